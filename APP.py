@@ -1452,9 +1452,158 @@ def calcular_espesor_losa_AASHTO93(W18, ZR, S0, delta_PSI, Sc, J, k, C, Ec=30000
 
 # --- FUNCIONES PARA PROCESAMIENTO DE DATOS LIDAR/DRONES ---
 
-def procesar_archivo_las_laz(file_path, output_dir="output_lidar"):
+# Sección típica sin diseño calculado: losa mínima DG-2018
+DISENO_SECCION_TIPICA = {"pavimento_rigido": {"espesor_cm": 20.0}}
+
+def diseno_rigido_panel(espesor_losa, sistema_unidades):
+    """Diseño rígido del panel principal (espesor de losa en mm o pulgadas) con espesor en cm"""
+    if sistema_unidades == "Sistema Internacional (SI)":
+        espesor_cm = espesor_losa / 10
+    else:
+        espesor_cm = espesor_losa * 2.54
+    return {"pavimento_rigido": {"espesor_cm": round(float(espesor_cm), 2)}}
+
+def _procesar_nube_lidar(file_path, directorio, decimacion="voxel", diseno=None):
+    """
+    Procesa la nube LAS/LAZ y escribe los productos en `directorio`
+    Devuelve (estadísticas, capas ráster para la caché)
+    
+    decimacion: "voxel", "minimo" o "aleatorio" (MODULO_DECIMACION); la
+    interpolación y el mallado reciben solo la densidad que necesitan
+    diseno: pavimento para el movimiento de tierras (DISENO_SECCION_TIPICA
+    si no se da); el resultado completo queda en stats['movimiento_tierras']
+    y la tabla de cuencas por sumidero en stats['cuencas_sumideros']
+    """
+    import os
+    import time
+    from MODULO_DECIMACION import decimar_nube, tamano_celda_objetivo
+
+    # Leer archivo LAS/LAZ
+    las = laspy.read(file_path)
+    points = np.vstack((las.x, las.y, las.z)).transpose()
+    
+    # Estadísticas básicas
+    stats = {
+        'total_points': len(points),
+        'x_min': np.min(las.x), 'x_max': np.max(las.x),
+        'y_min': np.min(las.y), 'y_max': np.max(las.y),
+        'z_min': np.min(las.z), 'z_max': np.max(las.z),
+        'area_m2': (np.max(las.x) - np.min(las.x)) * (np.max(las.y) - np.min(las.y)),
+        'volume_m3': None
+    }
+    
+    # Filtrar puntos de suelo (clasificación LAS)
+    from MODULO_FILTRO_SUELO import necesita_clasificacion, clasificar_suelo_nube
+    clases = np.asarray(las.classification) if hasattr(las, 'classification') else None
+    if necesita_clasificacion(clases):
+        # Nube sin clasificar: filtro morfológico progresivo sobre mínimos por celda
+        inicio = time.perf_counter()
+        filtro_suelo = clasificar_suelo_nube(points)
+        clases = filtro_suelo['clasificacion']
+        tiempo_clasificacion = round(time.perf_counter() - inicio, 3)
+        las.classification = clases
+        las_clasificado_path = os.path.join(directorio, "nube_clasificada.las")
+        las.write(las_clasificado_path)
+        stats['clasificacion_suelo'] = 'Filtro morfológico progresivo'
+        stats['las_clasificado_path'] = las_clasificado_path
+    else:
+        stats['clasificacion_suelo'] = 'Clasificación del archivo (clase 2)'
+        tiempo_clasificacion = 0.0
+    ground_points = points[clases == 2]  # Clase 2 = suelo
+    stats['ground_points'] = len(ground_points)
+    stats['decimacion'] = {}
+    stats['tiempos_s'] = {'clasificacion': tiempo_clasificacion}
+    
+    # Generar MDT si Open3D está disponible
+    if OPEN3D_AVAILABLE and len(ground_points) > 100:
+        try:
+            # Decimación a la resolución del octree de Poisson (profundidad 8)
+            malla = decimar_nube(ground_points, decimacion,
+                                 tamano_celda_objetivo(ground_points, profundidad_poisson=8))
+            stats['decimacion']['malla'] = {k: v for k, v in malla.items() if k != 'puntos'}
+            
+            pcd = o3d.geometry.PointCloud()
+            pcd.points = o3d.utility.Vector3dVector(malla['puntos'])
+            
+            # Generar malla triangular
+            inicio = time.perf_counter()
+            mesh, densities = o3d.geometry.TriangleMesh.create_from_point_cloud_poisson(pcd, depth=8)
+            stats['tiempos_s']['malla_poisson'] = round(time.perf_counter() - inicio, 3)
+            
+            # Guardar MDT
+            mdt_path = os.path.join(directorio, "mdt.obj")
+            o3d.io.write_triangle_mesh(mdt_path, mesh)
+            stats['mdt_path'] = mdt_path
+            
+        except Exception as e:
+            st.warning(f"No se pudo generar MDT: {str(e)}")
+    
+    # Calcular pendientes y curvas de nivel
+    capas = {}
+    if len(ground_points) > 100:
+        # Crear grid de elevación
+        x_range = np.linspace(stats['x_min'], stats['x_max'], 100)
+        y_range = np.linspace(stats['y_min'], stats['y_max'], 100)
+        X, Y = np.meshgrid(x_range, y_range)
+        
+        # Interpolación IDW sobre KD-tree, con la nube decimada (2 muestras por lado de celda)
+        from MODULO_INTERPOLACION import interpolar_en_puntos
+        try:
+            muestra = decimar_nube(ground_points, decimacion,
+                                   tamano_celda_objetivo(ground_points, celdas_grilla=100))
+            stats['decimacion']['interpolacion'] = {k: v for k, v in muestra.items() if k != 'puntos'}
+            muestra = muestra['puntos']
+            inicio = time.perf_counter()
+            Z, distancia_muestra = interpolar_en_puntos(muestra, np.column_stack([X.ravel(), Y.ravel()]))
+            Z = Z.reshape(X.shape)
+            stats['distancia_muestra_max_m'] = float(np.nanmax(distancia_muestra))
+            stats['tiempos_s']['interpolacion'] = round(time.perf_counter() - inicio, 3)
+            
+            # Calcular pendientes (m/m, con el espaciamiento real de la grilla)
+            dz_dx = np.gradient(Z, x_range, axis=1)
+            dz_dy = np.gradient(Z, y_range, axis=0)
+            
+            slopes = np.sqrt(dz_dx**2 + dz_dy**2)
+            stats['pendiente_promedio'] = np.nanmean(slopes) * 100  # Porcentaje
+            stats['pendiente_maxima'] = np.nanmax(slopes) * 100
+            
+            # Curvatura y acumulación de flujo para la caché de rásters
+            curvatura = np.gradient(dz_dx, x_range, axis=1) + np.gradient(dz_dy, y_range, axis=0)
+            from MODULO_HIDROLOGIA import rellenar_depresiones, direccion_flujo_d8, acumulacion_flujo
+            resolucion = float(np.sqrt((x_range[1] - x_range[0]) * (y_range[1] - y_range[0])))
+            flujo = direccion_flujo_d8(rellenar_depresiones(Z), resolucion)
+            # Movimiento de tierras de la calzada de 6 m con la estructura del diseño
+            from MODULO_MOVIMIENTO_TIERRAS import calcular_movimiento_tierras
+            mdt = {'X_grid': X, 'Y_grid': Y, 'Z_grid': Z, 'resolution': resolucion}
+            tierras = calcular_movimiento_tierras(mdt, diseno or DISENO_SECCION_TIPICA)
+            if "error" not in tierras:
+                stats['volume_m3'] = tierras['corte_total_m3']
+                stats['volumen_relleno_m3'] = tierras['relleno_total_m3']
+                stats['movimiento_tierras'] = tierras
+            # Cuencas de los puntos bajos (sumideros) con la curva IDF regional, para HEC-RAS
+            from MODULO_HIDROLOGIA import cuencas_por_sumidero
+            from MODULO_IDF import CURVA_IDF_POR_DEFECTO
+            cuencas = cuencas_por_sumidero(mdt, curva_idf=CURVA_IDF_POR_DEFECTO)
+            if "error" not in cuencas:
+                stats['cuencas_sumideros'] = cuencas['sumideros']
+            
+            capas = {'mdt': Z, 'pendiente': slopes, 'curvatura': curvatura,
+                     'acumulacion': acumulacion_flujo(flujo),
+                     'distancia_muestra': distancia_muestra.reshape(X.shape)}
+            
+        except Exception as e:
+            st.warning(f"No se pudieron calcular pendientes: {str(e)}")
+    
+    return stats, capas
+
+def procesar_archivo_las_laz(file_path, output_dir="output_lidar", decimacion="voxel", diseno=None):
     """
     Procesa archivos LAS/LAZ de drones para extraer información topográfica
+    (resultados en caché por hash del archivo, ver MODULO_CACHE_RASTER)
+
+    diseno: pavimento para el movimiento de tierras; con
+    stats['movimiento_tierras'] forma el diseño del modelo BIM (ver
+    diseno_bim_lidar)
     """
     if not LASPY_AVAILABLE:
         st.error("LasPy no está instalado. Instala con: pip install laspy")
@@ -1464,76 +1613,41 @@ def procesar_archivo_las_laz(file_path, output_dir="output_lidar"):
         import os
         import numpy as np
         
-        # Crear directorio de salida
-        os.makedirs(output_dir, exist_ok=True)
-        
-        # Leer archivo LAS/LAZ
-        las = laspy.read(file_path)
-        points = np.vstack((las.x, las.y, las.z)).transpose()
-        
-        # Estadísticas básicas
-        stats = {
-            'total_points': len(points),
-            'x_min': np.min(las.x), 'x_max': np.max(las.x),
-            'y_min': np.min(las.y), 'y_max': np.max(las.y),
-            'z_min': np.min(las.z), 'z_max': np.max(las.z),
-            'area_m2': (np.max(las.x) - np.min(las.x)) * (np.max(las.y) - np.min(las.y)),
-            'volume_m3': None
-        }
-        
-        # Filtrar puntos de suelo (clasificación LAS)
-        if hasattr(las, 'classification'):
-            ground_points = points[las.classification == 2]  # Clase 2 = suelo
-            stats['ground_points'] = len(ground_points)
-        else:
-            ground_points = points
-            stats['ground_points'] = len(points)
-        
-        # Generar MDT si Open3D está disponible
-        if OPEN3D_AVAILABLE and len(ground_points) > 100:
+        # Caché por levantamiento: hash del contenido + parámetros de procesamiento
+        from MODULO_CACHE_RASTER import CacheRaster, clave_cache, hash_contenido
+        from MODULO_MOVIMIENTO_TIERRAS import estructura_pavimento
+        cache = CacheRaster(output_dir)
+        diseno = diseno or DISENO_SECCION_TIPICA
+        parametros = {'grilla': 100, 'interpolacion': 'idw', 'decimacion': decimacion,
+                      'seccion': {'calzada_m': 6.0, 'estructura': estructura_pavimento(diseno)},
+                      'drenaje': 'cuencas_por_sumidero'}
+        clave = clave_cache(hash_contenido(file_path), parametros)
+        entrada = cache.cargar(clave)
+        if entrada is None:
+            directorio = cache.preparar(clave)
             try:
-                pcd = o3d.geometry.PointCloud()
-                pcd.points = o3d.utility.Vector3dVector(ground_points)
-                
-                # Generar malla triangular
-                mesh, densities = o3d.geometry.TriangleMesh.create_from_point_cloud_poisson(pcd, depth=8)
-                
-                # Guardar MDT
-                mdt_path = os.path.join(output_dir, "mdt.obj")
-                o3d.io.write_triangle_mesh(mdt_path, mesh)
-                stats['mdt_path'] = mdt_path
-                
-            except Exception as e:
-                st.warning(f"No se pudo generar MDT: {str(e)}")
-        
-        # Calcular pendientes y curvas de nivel
-        if len(ground_points) > 100:
-            # Crear grid de elevación
-            x_range = np.linspace(stats['x_min'], stats['x_max'], 100)
-            y_range = np.linspace(stats['y_min'], stats['y_max'], 100)
-            X, Y = np.meshgrid(x_range, y_range)
-            
-            # Interpolación simple para Z
-            from scipy.interpolate import griddata
-            try:
-                Z = griddata((ground_points[:, 0], ground_points[:, 1]), ground_points[:, 2], (X, Y), method='linear')
-                
-                # Calcular pendientes
-                dx = np.gradient(X, axis=1)
-                dy = np.gradient(Y, axis=0)
-                dz_dx = np.gradient(Z, axis=1)
-                dz_dy = np.gradient(Z, axis=0)
-                
-                slopes = np.sqrt(dz_dx**2 + dz_dy**2)
-                stats['pendiente_promedio'] = np.nanmean(slopes) * 100  # Porcentaje
-                stats['pendiente_maxima'] = np.nanmax(slopes) * 100
-                
-                # Guardar datos de pendientes
-                np.save(os.path.join(output_dir, "pendientes.npy"), slopes)
-                stats['pendientes_path'] = os.path.join(output_dir, "pendientes.npy")
-                
-            except Exception as e:
-                st.warning(f"No se pudieron calcular pendientes: {str(e)}")
+                stats, capas = _procesar_nube_lidar(file_path, directorio, decimacion, diseno)
+                stats = {campo: valor for campo, valor in stats.items() if not campo.endswith('_path')}
+                cache.publicar(clave, directorio, capas, {'parametros': parametros, 'stats': stats})
+            except Exception:
+                cache.descartar(directorio)
+                raise
+            entrada = cache.cargar(clave)
+            entrada['reutilizado'] = False
+        else:
+            entrada['reutilizado'] = True
+        
+        # Rutas de los productos dentro de la entrada de caché
+        stats = dict(entrada['metadatos']['stats'])
+        archivos = entrada['archivos']
+        for campo, nombre in (('las_clasificado_path', 'nube_clasificada.las'), ('mdt_path', 'mdt.obj'),
+                              ('pendientes_path', 'pendiente.npy'), ('curvatura_path', 'curvatura.npy'),
+                              ('acumulacion_path', 'acumulacion.npy'), ('mdt_grilla_path', 'mdt.npy'),
+                              ('distancia_muestra_path', 'distancia_muestra.npy')):
+            if nombre in archivos:
+                stats[campo] = archivos[nombre]
+        stats['cache_clave'] = clave
+        stats['cache_reutilizado'] = entrada['reutilizado']
         
         return stats
         
@@ -1541,81 +1655,118 @@ def procesar_archivo_las_laz(file_path, output_dir="output_lidar"):
         st.error(f"Error procesando archivo LAS/LAZ: {str(e)}")
         return None
 
+def diseno_bim_lidar(diseno, resultados_lidar):
+    """
+    Diseño para RevitBIM (MODULO_INTEROPERABILIDAD): el pavimento más el
+    movimiento de tierras del levantamiento (longitud, ancho, área de
+    plataforma, tramos y volúmenes de corte y relleno)
+    """
+    diseno_bim = dict(diseno)
+    if resultados_lidar and resultados_lidar.get('movimiento_tierras'):
+        diseno_bim['movimiento_tierras'] = resultados_lidar['movimiento_tierras']
+    return diseno_bim
+
+def consultar_gee_punto(coords, start_date, end_date):
+    """
+    Consulta a Google Earth Engine el NDVI (Sentinel-2) y la humedad del
+    suelo (SMAP) en un punto
+    """
+    # Inicializar GEE
+    ee.Initialize()
+    
+    # Crear geometría
+    geometry = ee.Geometry.Point(coords)
+    
+    # Extraer NDVI (Sentinel-2)
+    sentinel = ee.ImageCollection('COPERNICUS/S2_SR') \
+        .filterDate(start_date, end_date) \
+        .filterBounds(geometry) \
+        .filter(ee.Filter.lt('CLOUDY_PIXEL_PERCENTAGE', 20)) \
+        .median()
+    
+    ndvi = sentinel.normalizedDifference(['B8', 'B4']).rename('NDVI')
+    
+    # Extraer humedad del suelo (SMAP)
+    smap = ee.ImageCollection('NASA/SMAP/SPL4SMGP/007') \
+        .filterDate(start_date, end_date) \
+        .first()
+    
+    soil_moisture = smap.select('sm_surface').rename('SOIL_MOISTURE')
+    
+    return {
+        'NDVI_promedio': float(ndvi.reduceRegion(ee.Reducer.mean(), geometry, 30).get('NDVI').getInfo()),
+        'Humedad_suelo_promedio': float(soil_moisture.reduceRegion(ee.Reducer.mean(), geometry, 30000).get('SOIL_MOISTURE').getInfo()),
+        'fecha_inicio': start_date,
+        'fecha_fin': end_date,
+        'coordenadas': list(coords)
+    }
+
 def extraer_datos_satelitales_gee(coords, start_date, end_date):
     """
     Extrae datos satelitales de Google Earth Engine para análisis de suelo
+
+    Las consultas se guardan en la caché satelital compartida: repetir el
+    mismo punto y período no vuelve a consultar GEE. Sin GEE instalado se
+    sirven solo los resultados en caché.
     """
-    if not GEE_AVAILABLE:
-        st.error("Google Earth Engine no está instalado. Instala con: pip install earthengine-api geemap")
-        return None
+    from MODULO_CACHE_SATELITAL import ErrorSinCache, cache_compartido
+    cache = cache_compartido(sin_conexion=not GEE_AVAILABLE)
     
     try:
-        # Inicializar GEE
-        ee.Initialize()
-        
-        # Crear geometría
-        geometry = ee.Geometry.Point(coords)
-        
-        # Extraer NDVI (Sentinel-2)
-        sentinel = ee.ImageCollection('COPERNICUS/S2_SR') \
-            .filterDate(start_date, end_date) \
-            .filterBounds(geometry) \
-            .filter(ee.Filter.lt('CLOUDY_PIXEL_PERCENTAGE', 20)) \
-            .median()
-        
-        ndvi = sentinel.normalizedDifference(['B8', 'B4']).rename('NDVI')
-        
-        # Extraer humedad del suelo (SMAP)
-        smap = ee.ImageCollection('NASA/SMAP/SPL4SMGP/007') \
-            .filterDate(start_date, end_date) \
-            .first()
-        
-        soil_moisture = smap.select('sm_surface').rename('SOIL_MOISTURE')
-        
-        # Combinar resultados
-        result = ndvi.addBands(soil_moisture)
-        
-        # Exportar a CSV
-        import pandas as pd
-        data_dict = {
-            'NDVI_promedio': float(ndvi.reduceRegion(ee.Reducer.mean(), geometry, 30).get('NDVI').getInfo()),
-            'Humedad_suelo_promedio': float(soil_moisture.reduceRegion(ee.Reducer.mean(), geometry, 30000).get('SOIL_MOISTURE').getInfo()),
-            'fecha_inicio': start_date,
-            'fecha_fin': end_date,
-            'coordenadas': coords
-        }
-        
-        return data_dict
+        return cache.consultar(
+            'COPERNICUS/S2_SR+NASA/SMAP/SPL4SMGP/007',
+            [float(c) for c in coords], start_date, end_date,
+            lambda: consultar_gee_punto(coords, start_date, end_date),
+            reductor='mean', escala=30
+        )
         
+    except ErrorSinCache:
+        st.error("Google Earth Engine no está instalado y no hay datos en caché para este punto y período. "
+                 "Instala con: pip install earthengine-api geemap")
+        return None
     except Exception as e:
         st.error(f"Error extrayendo datos satelitales: {str(e)}")
         return None
 
-def calcular_cbr_ndvi(ndvi_value):
+def calcular_cbr_ndvi(ndvi_value, humedad=None):
     """
     Correlación NDVI vs CBR basada en estudios de suelo
+
+    Acepta un valor o un arreglo (ráster) de NDVI; usa la correlación
+    calibrada con ensayos de campo si fue publicada (MODULO_CALIBRACION_CBR)
+    y si no la tabla TABLA_NDVI_CBR de MODULO_CLASIFICACION_SUBRASANTE.
     """
-    # Correlación empírica NDVI vs CBR
-    if ndvi_value < 0.2:
-        return 2.0  # Suelo muy pobre
-    elif ndvi_value < 0.3:
-        return 3.5  # Suelo pobre
-    elif ndvi_value < 0.4:
-        return 5.0  # Suelo regular
-    elif ndvi_value < 0.5:
-        return 7.0  # Suelo bueno
-    elif ndvi_value < 0.6:
-        return 9.0  # Suelo muy bueno
-    else:
-        return 12.0  # Suelo excelente
+    from MODULO_CLASIFICACION_SUBRASANTE import cbr_desde_ndvi
+    cbr = cbr_desde_ndvi(ndvi_value, humedad)
+    return float(cbr) if cbr.ndim == 0 else cbr
 
-def generar_hec_ras_drenaje(area_ha, longitud_m, pendiente_pct, periodo_retorno=10):
+def hec_ras_drenaje_lidar(resultados_lidar, periodo_retorno=10):
+    """
+    Archivo HEC-RAS del levantamiento: área, longitud y pendiente de la
+    nube más la tabla de cuencas por sumidero de procesar_archivo_las_laz
+    """
+    longitud_m = max(resultados_lidar['x_max'] - resultados_lidar['x_min'],
+                     resultados_lidar['y_max'] - resultados_lidar['y_min'])
+    return generar_hec_ras_drenaje(resultados_lidar['area_m2'] / 10000, longitud_m,
+                                   resultados_lidar.get('pendiente_promedio', 2.0), periodo_retorno,
+                                   cuencas=resultados_lidar.get('cuencas_sumideros'))
+
+def generar_hec_ras_drenaje(area_ha, longitud_m, pendiente_pct, periodo_retorno=10, cuencas=None,
+                            secciones=None, curva_idf=None):
     """
     Genera archivo HEC-RAS para diseño de drenaje
+    (cuencas: tabla por sumidero de MODULO_HIDROLOGIA.cuencas_por_sumidero;
+    secciones: secciones del MDT de MODULO_SECCIONES.extraer_secciones;
+    curva_idf: curva de MODULO_IDF, la regional por defecto si no se da)
     """
     try:
-        # Parámetros hidrológicos
-        intensidad_lluvia = 60  # mm/h para Puno
+        from MODULO_HIDROLOGIA import tiempo_concentracion_kirpich
+        from MODULO_IDF import CURVA_IDF_POR_DEFECTO, intensidad_idf
+        
+        # Parámetros hidrológicos: intensidad IDF para una duración igual a Tc
+        curva_idf = curva_idf or CURVA_IDF_POR_DEFECTO
+        tiempo_concentracion = float(tiempo_concentracion_kirpich(longitud_m, pendiente_pct))
+        intensidad_lluvia = round(float(intensidad_idf(curva_idf, tiempo_concentracion, periodo_retorno)), 2)
         coeficiente_escorrentia = 0.7
         
         # Cálculo de caudal
@@ -1627,6 +1778,14 @@ def generar_hec_ras_drenaje(area_ha, longitud_m, pendiente_pct, periodo_retorno=
         profundidad_cuneta = 0.15  # m
         ancho_cuneta = 0.3  # m
         
+        # Geometría: secciones extraídas del MDT o sección triangular tipo
+        if secciones is not None:
+            from MODULO_SECCIONES import geometria_hec_ras
+            geometria = (f"# Secciones del MDT ({len(secciones['progresiva'])} estaciones)\n"
+                         f"{geometria_hec_ras(secciones)}")
+        else:
+            geometria = f"# Sección triangular\nStation 0.0\nElevation {profundidad_cuneta}\nStation {ancho_cuneta}\nElevation 0.0\n"
+        
         # Generar contenido HEC-RAS
         contenido = f"""HEC-RAS Version 6.0
 Title: San Miguel - Diseño de Drenaje Automático
@@ -1644,8 +1803,9 @@ Return Period: {periodo_retorno} years
 Area: {area_ha:.2f} ha
 Length: {longitud_m:.1f} m
 Slope: {pendiente_pct:.1f}%
-Time of Concentration: 8.5 min
+Time of Concentration: {tiempo_concentracion:.2f} min
 Rainfall Intensity: {intensidad_lluvia} mm/h
+IDF Curve: i = {curva_idf['K']} T^{curva_idf['m']} / (D + {curva_idf.get('c', 0.0)})^{curva_idf['n']}
 Runoff Coefficient: {coeficiente_escorrentia}
 
 # DISEÑO DE CUNETAS
@@ -1656,12 +1816,7 @@ Depth: {profundidad_cuneta} m
 Width: {ancho_cuneta} m
 
 # GEOMETRÍA DE CUNETAS
-# Sección triangular
-Station 0.0
-Elevation {profundidad_cuneta}
-Station {ancho_cuneta}
-Elevation 0.0
-
+{geometria}
 # MATERIALES
 Manning's n: 0.013 (Concrete)
 Side Slope: 2:1
@@ -1686,6 +1841,16 @@ Safety Factor: > 1.5
 - Datos obtenidos mediante LiDAR/Drone
 """
         
+        if cuencas:
+            contenido += "\n# CUENCAS POR SUMIDERO (MÉTODO RACIONAL)\n"
+            contenido += "Inlet  X  Y  Area(ha)  Length(m)  Slope(%)  Tc(min)  I(mm/h)  Q(L/s)\n"
+            for sumidero in cuencas:
+                contenido += (f"{sumidero['id']}  {sumidero['x']:.2f}  {sumidero['y']:.2f}  "
+                              f"{sumidero['area_ha']:.4f}  {sumidero['longitud_flujo_max_m']:.1f}  "
+                              f"{sumidero['pendiente_media_pct']:.2f}  {sumidero['tiempo_concentracion_min']:.2f}  "
+                              f"{sumidero.get('intensidad_mm_h', intensidad_lluvia):.2f}  "
+                              f"{sumidero['caudal_l_s']:.2f}\n")
+        
         return contenido
         
     except Exception as e:
@@ -3109,11 +3274,15 @@ with tabs[2]:
         with col1:
             st.markdown("**Parámetros Hidrológicos:**")
             C_veredas = st.number_input('C (coef. escorrentía)', min_value=0.1, max_value=1.0, value=0.9, step=0.01, key='C_veredas')
-            I_veredas = st.number_input('I (intensidad lluvia, mm/h)', min_value=1.0, max_value=500.0, value=80.0, step=1.0, key='I_veredas')
+            fuente_I_veredas = st.radio('Intensidad I', ['Curva IDF', 'Manual'], horizontal=True, key='fuente_I_veredas')
+            I_veredas = st.number_input('I manual (intensidad lluvia, mm/h)', min_value=1.0, max_value=500.0, value=80.0, step=1.0, key='I_veredas')
+            T_veredas = st.selectbox('Período de retorno IDF (años)', [2, 5, 10, 25, 50, 100], index=2, key='T_veredas')
+            tc_veredas = st.number_input('Duración = Tc (min)', min_value=1.0, max_value=1440.0, value=10.0, step=0.5, key='tc_veredas')
+            registros_idf_veredas = st.file_uploader('Registros de lluvia para la IDF (CSV, opcional)', type=['csv'], key='registros_idf_veredas')
             A_veredas = st.number_input('A (área de drenaje, ha)', min_value=0.01, max_value=100.0, value=1.0, step=0.01, key='A_veredas')
         with col2:
             st.markdown("**Fórmula Método Racional:**")
-            st.latex(r'Q = \frac{C \cdot I \cdot A}{3600}')
+            st.latex(r'Q = \frac{C \cdot I \cdot A}{360}')
             st.markdown("**Donde:**")
             st.markdown("• Q = Caudal (m³/s)")
             st.markdown("• C = Coeficiente de escorrentía")
@@ -3129,8 +3298,9 @@ with tabs[2]:
             S_veredas = st.number_input('S (pendiente longitudinal)', min_value=0.0001, max_value=0.10, value=0.01, step=0.0001, format='%.4f', key='S_veredas')
         with col2:
             st.markdown("**Fórmula Manning Triangular:**")
-            st.latex(r'Q_c = \frac{1.49}{n} \cdot y^{8/3} \cdot \sqrt{S} \cdot \frac{1}{2}')
+            st.latex(r'Q_c = \frac{k}{n} \cdot A \cdot R^{2/3} \cdot \sqrt{S}')
             st.markdown("**Donde:**")
+            st.markdown("• k = 1: entradas en m y m³/s en ambos sistemas; sección triangular 1:1")
             st.markdown("• Qc = Capacidad cuneta (m³/s)")
             st.markdown("• n = Coeficiente de rugosidad")
             st.markdown("• y = Altura de agua (m)")
@@ -3154,12 +3324,34 @@ with tabs[2]:
     if submitted_veredas:
         with st.spinner('🔄 Calculando veredas y cunetas...'):
             # --- CÁLCULOS VEREDAS Y CUNETAS ---
-            # Calcular caudal de diseño (método racional)
-            Q_veredas = (C_veredas * I_veredas * A_veredas) / 3600
+            # Intensidad de la curva IDF (registros de estación o regional por defecto)
+            if fuente_I_veredas == 'Curva IDF':
+                from MODULO_IDF import CURVA_IDF_POR_DEFECTO, caudales_racionales, curva_idf_desde_registros
+                curva_veredas = CURVA_IDF_POR_DEFECTO
+                if registros_idf_veredas is not None:
+                    ajuste_idf_veredas = curva_idf_desde_registros(registros_idf_veredas)
+                    if "error" in ajuste_idf_veredas:
+                        st.warning(f"⚠️ {ajuste_idf_veredas['error']}; se usa la curva regional por defecto")
+                    else:
+                        curva_veredas = ajuste_idf_veredas["curva"]
+                racional_veredas = caudales_racionales(A_veredas, tc_veredas, C_veredas, curva_veredas, T_veredas)
+                I_veredas = float(racional_veredas["intensidad_mm_h"])
+                Q_veredas = float(racional_veredas["caudal_m3_s"])
+                st.caption(f"IDF ({curva_veredas.get('fuente', 'ajustada')}): I = {I_veredas:.1f} mm/h "
+                           f"para T = {T_veredas} años y D = {tc_veredas:.1f} min")
+            else:
+                # Método racional con I manual (A en ha, Q en m³/s)
+                Q_veredas = (C_veredas * I_veredas * A_veredas) / 360
             
-            # Calcular capacidad de cuneta triangular (Manning)
+            # Calcular capacidad de cuneta triangular y tirante normal (Manning, MODULO_HIDRAULICA)
             import math
-            Qc_veredas = (1.49 / n_veredas) * (y_veredas**(8/3)) * math.sqrt(S_veredas) / 2
+            # Las entradas (y, Q) están en m y m³/s, así que k = 1 aun con el sistema inglés
+            from MODULO_HIDRAULICA import K_MANNING_SI, capacidad_seccion, tirante_normal
+            k_veredas = K_MANNING_SI
+            cuneta_veredas = {"tipo": "triangular", "talud_izq": 1.0, "talud_der": 1.0, "n": n_veredas,
+                              "pendiente": S_veredas}
+            Qc_veredas = float(capacidad_seccion({**cuneta_veredas, "profundidad_m": y_veredas}, k_veredas)[0])
+            flujo_veredas = tirante_normal(Q_veredas, {**cuneta_veredas, "profundidad_m": y_veredas}, k_veredas)
             
             # Validar pendiente de rampa (RNE)
             cumple_pendiente_veredas = pendiente_veredas <= 12
@@ -3207,7 +3399,7 @@ with tabs[2]:
                 st.markdown(f"• Intensidad lluvia (I): **{I_veredas:.1f} mm/h**")
                 st.markdown(f"• Área drenaje (A): **{A_veredas:.2f} ha**")
                 st.markdown(f"• Caudal diseño (Q): **{Q_veredas:.3f} m³/s**")
-                st.markdown(f"• Fórmula: Q = ({C_veredas:.2f} × {I_veredas:.1f} × {A_veredas:.2f}) / 3600")
+                st.markdown(f"• Fórmula: Q = ({C_veredas:.2f} × {I_veredas:.1f} × {A_veredas:.2f}) / 360")
             
             with col2:
                 st.markdown("**Análisis Hidráulico:**")
@@ -3215,6 +3407,9 @@ with tabs[2]:
                 st.markdown(f"• Altura agua (y): **{y_veredas:.2f} m**")
                 st.markdown(f"• Pendiente (S): **{S_veredas:.4f}**")
                 st.markdown(f"• Capacidad cuneta (Qc): **{Qc_veredas:.3f} m³/s**")
+                st.markdown(f"• Tirante normal para Q: **{flujo_veredas['tirante_m'][0]:.3f} m**")
+                st.markdown(f"• Velocidad: **{flujo_veredas['velocidad_m_s'][0]:.2f} m/s**, "
+                            f"Froude: **{flujo_veredas['froude'][0]:.2f}**")
                 st.markdown(f"• Estado capacidad: **{'✅ Suficiente' if capacidad_suficiente_veredas else '❌ Insuficiente'}**")
             
             # Análisis de accesibilidad
@@ -3254,10 +3449,11 @@ with tabs[2]:
                     S_range_veredas = np.linspace(0.001, 0.05, 50)
                     
                     # Cálculos de sensibilidad
-                    Q_C_range_veredas = [(c * I_veredas * A_veredas) / 3600 for c in C_range_veredas]
-                    Q_I_range_veredas = [(C_veredas * i * A_veredas) / 3600 for i in I_range_veredas]
-                    Qc_y_range_veredas = [(1.49 / n_veredas) * (y**(8/3)) * math.sqrt(S_veredas) / 2 for y in y_range_veredas]
-                    Qc_S_range_veredas = [(1.49 / n_veredas) * (y_veredas**(8/3)) * math.sqrt(s) / 2 for s in S_range_veredas]
+                    Q_C_range_veredas = [(c * I_veredas * A_veredas) / 360 for c in C_range_veredas]
+                    Q_I_range_veredas = [(C_veredas * i * A_veredas) / 360 for i in I_range_veredas]
+                    Qc_y_range_veredas = capacidad_seccion({**cuneta_veredas, "profundidad_m": y_range_veredas}, k_veredas)
+                    Qc_S_range_veredas = capacidad_seccion({**cuneta_veredas, "profundidad_m": y_veredas,
+                                                            "pendiente": S_range_veredas}, k_veredas)
                     
                     # Gráfico de sensibilidad
                     fig_sens_veredas, ((ax1, ax2), (ax3, ax4)) = plt.subplots(2, 2, figsize=(15, 12))
@@ -3353,8 +3549,9 @@ with tabs[2]:
                                 'Longitud rampa': f'{longitud_veredas:.1f} m',
                                 'Estado accesibilidad': estado_rampa_veredas,
                                 'Estado capacidad': 'Suficiente' if capacidad_suficiente_veredas else 'Insuficiente',
-                                'Fórmula caudal': 'Q = (C·I·A)/3600',
-                                'Fórmula capacidad': 'Qc = (1.49/n)·y^(8/3)·√S/2'
+                                'Fórmula caudal': 'Q = (C·I·A)/360',
+                                'Fórmula capacidad': 'Qc = (k/n)·A·R^(2/3)·√S',
+                                'Tirante normal': f"{flujo_veredas['tirante_m'][0]:.3f} m"
                             }
                             
                             # Generar PDF premium usando la función existente
@@ -3398,6 +3595,8 @@ with tabs[3]:
         with col1:
             Q_drenaje = st.number_input('Q (caudal, m³/s)', min_value=0.001, max_value=10.0, value=0.5, step=0.001, format='%.3f', key='Q_drenaje')
             v_drenaje = st.number_input('v (velocidad mínima, m/s)', min_value=0.1, max_value=10.0, value=0.6, step=0.01, key='v_drenaje')
+            n_drenaje = st.number_input('n (rugosidad de Manning)', min_value=0.009, max_value=0.030, value=0.013, step=0.001, format='%.3f', key='n_drenaje')
+            S_drenaje = st.number_input('S (pendiente de la alcantarilla)', min_value=0.0005, max_value=0.10, value=0.01, step=0.0005, format='%.4f', key='S_drenaje')
         with col2:
             st.markdown("**Fórmula MTC:**")
             st.latex(r'D = \sqrt{\frac{4Q}{\pi v}}')
@@ -3418,6 +3617,15 @@ with tabs[3]:
             area_seccion = math.pi * (D_drenaje/2)**2
             capacidad_maxima = area_seccion * v_drenaje
             
+            # Diámetro comercial por Manning (llenado máximo 0.8·D) y tirante normal
+            from MODULO_HIDRAULICA import alcantarilla_circular, dimensionar_alcantarillas, tirante_normal
+            comercial_drenaje = dimensionar_alcantarillas(Q_drenaje, S_drenaje, n=n_drenaje)
+            D_comercial_drenaje = float(comercial_drenaje['diametro_m'][0])
+            flujo_drenaje = None
+            if not math.isnan(D_comercial_drenaje):
+                flujo_drenaje = tirante_normal(Q_drenaje, alcantarilla_circular(D_comercial_drenaje, n=n_drenaje,
+                                                                                pendiente=S_drenaje))
+            
             # --- MOSTRAR RESULTADOS ---
             st.success('✅ Cálculos completados exitosamente!')
             
@@ -3446,6 +3654,21 @@ with tabs[3]:
                 st.markdown(f"• Capacidad máxima: **{capacidad_maxima:.3f} m³/s**")
                 st.markdown(f"• Factor de seguridad: **{capacidad_maxima/Q_drenaje:.2f}**")
             
+            st.subheader('🔩 Alcantarilla Comercial (Manning)')
+            if flujo_drenaje is None:
+                st.warning("⚠️ Ningún diámetro comercial conduce el caudal con llenado 0.8·D; use celdas múltiples o un cajón")
+            else:
+                col1, col2, col3, col4 = st.columns(4)
+                with col1:
+                    st.metric("Diámetro comercial", f"{D_comercial_drenaje:.2f} m", f"Qc = {comercial_drenaje['capacidad_m3_s'][0]:.3f} m³/s")
+                with col2:
+                    st.metric("Tirante normal", f"{flujo_drenaje['tirante_m'][0]:.3f} m", f"y/D = {flujo_drenaje['tirante_m'][0] / D_comercial_drenaje:.2f}")
+                with col3:
+                    st.metric("Velocidad", f"{flujo_drenaje['velocidad_m_s'][0]:.2f} m/s")
+                with col4:
+                    st.metric("Froude", f"{flujo_drenaje['froude'][0]:.2f}",
+                              "Supercrítico" if flujo_drenaje['froude'][0] > 1 else "Subcrítico")
+            
             # Análisis de sensibilidad
             if MATPLOTLIB_AVAILABLE:
                 st.subheader('📈 Análisis de Sensibilidad')
@@ -4397,7 +4620,8 @@ def main():
                             tmp_path = tmp.name
                         
                         # Procesar archivo
-                        resultados_lidar = procesar_archivo_las_laz(tmp_path)
+                        resultados_lidar = procesar_archivo_las_laz(
+                            tmp_path, diseno=diseno_rigido_panel(espesor_losa, sistema_unidades))
                         
                         if resultados_lidar:
                             st.success("¡Procesamiento LiDAR completado!")
@@ -4432,7 +4656,7 @@ def main():
                                             datos_integracion,
                                             resultados_lidar,
                                             None,  # Podrías añadir datos satelitales aquí
-                                            None   # Y contenido HEC-RAS si aplica
+                                            hec_ras_drenaje_lidar(resultados_lidar)
                                         )
                                         
                                         if pdf_buffer:
@@ -4455,34 +4679,39 @@ def main():
         
         with st.expander("🌍 Análisis Satelital (Google Earth Engine)"):
             if not GEE_AVAILABLE:
-                st.warning("Google Earth Engine no está disponible. Instale las dependencias necesarias.")
-            else:
-                col1, col2 = st.columns(2)
-                with col1:
-                    lat = st.number_input("Latitud", min_value=-90.0, max_value=90.0, value=-16.405, step=0.001)
-                    lon = st.number_input("Longitud", min_value=-180.0, max_value=180.0, value=-71.535, step=0.001)
-                with col2:
-                    fecha_inicio = st.date_input("Fecha inicio", value=pd.to_datetime("2023-01-01"))
-                    fecha_fin = st.date_input("Fecha fin", value=pd.to_datetime("2023-12-31"))
-                
-                if st.button("🛰️ Obtener datos satelitales"):
-                    with st.spinner("Consultando Google Earth Engine..."):
-                        try:
-                            datos_satelitales = extraer_datos_satelitales_gee(
-                                [lon, lat],
-                                fecha_inicio.strftime("%Y-%m-%d"),
-                                fecha_fin.strftime("%Y-%m-%d")
-                            )
+                st.warning("Google Earth Engine no está disponible. Modo sin conexión: solo se muestran "
+                           "consultas guardadas en la caché satelital.")
+            col1, col2 = st.columns(2)
+            with col1:
+                lat = st.number_input("Latitud", min_value=-90.0, max_value=90.0, value=-16.405, step=0.001)
+                lon = st.number_input("Longitud", min_value=-180.0, max_value=180.0, value=-71.535, step=0.001)
+            with col2:
+                fecha_inicio = st.date_input("Fecha inicio", value=pd.to_datetime("2023-01-01"))
+                fecha_fin = st.date_input("Fecha fin", value=pd.to_datetime("2023-12-31"))
+            
+            if st.button("🛰️ Obtener datos satelitales"):
+                with st.spinner("Consultando Google Earth Engine..."):
+                    try:
+                        datos_satelitales = extraer_datos_satelitales_gee(
+                            [lon, lat],
+                            fecha_inicio.strftime("%Y-%m-%d"),
+                            fecha_fin.strftime("%Y-%m-%d")
+                        )
+                        
+                        if datos_satelitales:
+                            st.success("Datos satelitales obtenidos!")
+                            st.json(datos_satelitales)
                             
-                            if datos_satelitales:
-                                st.success("Datos satelitales obtenidos!")
-                                st.json(datos_satelitales)
-                                
-                                # Calcular CBR estimado del NDVI
-                                cbr_estimado = calcular_cbr_ndvi(datos_satelitales.get('NDVI_promedio', 0.3))
-                                st.metric("CBR estimado del suelo", f"{cbr_estimado:.1f}%")
-                        except Exception as e:
-                            st.error(f"Error obteniendo datos satelitales: {str(e)}")
+                            # Calcular CBR estimado del NDVI
+                            cbr_estimado = calcular_cbr_ndvi(datos_satelitales.get('NDVI_promedio', 0.3))
+                            st.metric("CBR estimado del suelo", f"{cbr_estimado:.1f}%")
+                    except Exception as e:
+                        st.error(f"Error obteniendo datos satelitales: {str(e)}")
+            
+            from MODULO_CACHE_SATELITAL import cache_compartido
+            estadisticas_cache = cache_compartido().estadisticas()
+            st.caption(f"Caché satelital: {estadisticas_cache['entradas']} consultas guardadas, "
+                       f"tasa de aciertos {estadisticas_cache['tasa_aciertos']:.0%}")
         
         # Datos de ejemplo para San Miguel, Puno
         with st.expander("📊 Datos de Ejemplo - San Miguel, Puno"):
@@ -5231,7 +5460,8 @@ with tabs[5]:  # Pestaña LiDAR/Drones
             with tempfile.NamedTemporaryFile(delete=False, suffix='.las') as tmp:
                 tmp.write(uploaded_file.getvalue())
                 tmp_path = tmp.name
-            resultados_lidar = procesar_archivo_las_laz(tmp_path)
+            resultados_lidar = procesar_archivo_las_laz(
+                tmp_path, diseno=diseno_rigido_panel(espesor_losa, sistema_unidades))
             try:
                 os.unlink(tmp_path)
             except:
@@ -5251,6 +5481,25 @@ with tabs[5]:  # Pestaña LiDAR/Drones
                     st.metric("CBR estimado (NDVI)", f"{resultados_lidar['cbr_estimado']:.1f}")
                 with st.expander("Ver todos los datos LiDAR"):
                     st.json(resultados_lidar)
+                with st.expander("🏗️ Modelo BIM (Revit) con movimiento de tierras"):
+                    from MODULO_INTEROPERABILIDAD import RevitBIM
+                    modelo_bim = RevitBIM().crear_modelo_3d(
+                        diseno_bim_lidar(diseno_rigido_panel(espesor_losa, sistema_unidades), resultados_lidar))
+                    st.json(modelo_bim)
+                with st.expander("🌊 Cuencas por sumidero y archivo HEC-RAS"):
+                    cuencas_lidar = resultados_lidar.get('cuencas_sumideros') or []
+                    if cuencas_lidar:
+                        st.dataframe(pd.DataFrame(cuencas_lidar), use_container_width=True)
+                    else:
+                        st.info("No se detectaron puntos bajos (sumideros) en el MDT")
+                    hec_ras_lidar = hec_ras_drenaje_lidar(resultados_lidar)
+                    if hec_ras_lidar:
+                        st.download_button(
+                            label="📥 Descargar archivo HEC-RAS",
+                            data=hec_ras_lidar,
+                            file_name="drenaje_lidar_hec_ras.txt",
+                            mime="text/plain"
+                        )
                 st.subheader('📈 Análisis Automático')
                 with st.spinner('Realizando análisis automáticos...'):
                     resultado_rigido = calcular_pavimento_rigido(resultados_lidar)
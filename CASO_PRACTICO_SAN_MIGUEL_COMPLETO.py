@@ -5,24 +5,48 @@ CASO PRÁCTICO COMPLETO - SAN MIGUEL, PUNO
 Caso real de diseño de pavimentos para una cuadra en San Miguel, Puno
 con datos de drone LiDAR, análisis geotécnico y exportación a software externo.
 
+Las etapas del caso corren como grafo (MODULO_FLUJO_ETAPAS): LiDAR,
+datos satelitales, suelo y tránsito en paralelo, con checkpoint en disco
+por etapa para retomar tras una falla y línea de tiempo por etapa. El
+archivo LAS entra a la clave por su contenido y el código de los módulos
+de cálculo por su hash; al completarse el caso los checkpoints se borran.
+
 Autor: IA Assistant - Especialista UNI
 Fecha: 2024
 """
 
 import json
 import os
+import sys
 from datetime import datetime
-from typing import Dict, List
+from typing import Dict, List, Tuple, Optional
+
+from MODULO_FLUJO_ETAPAS import ErrorEtapa, FlujoEtapas, huella_modulos
+
+# Módulos de cálculo del caso: su código fuente entra en la clave de los checkpoints
+MODULOS_CASO = ("MODULO_LIDAR_DRONES", "MODULO_DISENO_AUTOMATIZADO", "MODULO_INTEROPERABILIDAD",
+                "MODULO_MOVIMIENTO_TIERRAS", "MODULO_GOOGLE_EARTH_ENGINE")
 
 # Importar módulos creados
 try:
     from MODULO_LIDAR_DRONES import procesamiento_completo_lidar
     from MODULO_DISENO_AUTOMATIZADO import diseno_automatizado_completo
     from MODULO_INTEROPERABILIDAD import interoperabilidad_completa
+    from MODULO_MOVIMIENTO_TIERRAS import calcular_movimiento_tierras
+    from MODULO_GOOGLE_EARTH_ENGINE import extract_soil_data_san_miguel, clasificar_suelo_por_ndvi
 except ImportError:
     print("⚠️ Módulos no encontrados. Usando funciones simuladas.")
     
-    def procesamiento_completo_lidar(archivo_las, proyecto):
+    def extract_soil_data_san_miguel(start_date="2023-01-01", end_date="2023-12-31"):
+        return {
+            "datos_suelo": {"NDVI_promedio": 0.35, "Precipitacion_anual": 650},
+            "estado": "✅ Datos satelitales extraídos exitosamente"
+        }
+    
+    def clasificar_suelo_por_ndvi(ndvi_value):
+        return {"tipo_suelo": "Suelo volcánico", "CBR_estimado": 5.0}
+    
+    def procesamiento_completo_lidar(archivo_las, proyecto, **opciones):
         return {
             "Proyecto": proyecto,
             "Datos_LiDAR": {
@@ -52,6 +76,9 @@ except ImportError:
             "Estado": "✅ Diseño automatizado completado"
         }
     
+    def calcular_movimiento_tierras(dtm_data, diseno, **opciones):
+        return {"error": "MDT no disponible", "estado": "❌ Error en movimiento de tierras"}
+    
     def interoperabilidad_completa(datos_lidar, diseno_pavimento, proyecto):
         return {
             "proyecto": proyecto,
@@ -72,6 +99,8 @@ class CasoPracticoSanMiguel:
     def __init__(self):
         self.proyecto = "San Miguel - Cuadra 1"
         self.ubicacion = "San Miguel, Puno, Perú"
+        self.directorio_resultados = "resultados_san_miguel"
+        self.archivo_las = "san_miguel_cuadra_1.las"
         self.coordenadas = {
             "latitud": -15.2345,
             "longitud": -70.1234,
@@ -93,12 +122,12 @@ class CasoPracticoSanMiguel:
             "ancho_veredas": 2.0     # metros por lado
         }
     
-    def generar_datos_drone_lidar(self) -> Dict:
-        """Genera datos simulados de drone LiDAR para San Miguel"""
+    def generar_datos_drone_lidar(self, archivo_las: Optional[str] = None) -> Dict:
+        """Genera datos simulados de drone LiDAR para San Miguel (self.archivo_las por defecto)"""
         print("🚁 Generando datos de drone LiDAR para San Miguel...")
         
         datos_lidar = {
-            "archivo_las": "san_miguel_cuadra_1.las",
+            "archivo_las": archivo_las or self.archivo_las,
             "fecha_vuelo": "2024-01-15",
             "altura_vuelo": 120,  # metros
             "resolucion_terreno": 0.05,  # 5 cm
@@ -108,10 +137,11 @@ class CasoPracticoSanMiguel:
             "coordenadas_utm": self.coordenadas["utm_coords"]
         }
         
-        # Procesar datos LiDAR
+        # Procesar datos LiDAR (el MDT se usa luego para el movimiento de tierras)
         resultado_lidar = procesamiento_completo_lidar(
             datos_lidar["archivo_las"], 
-            self.proyecto
+            self.proyecto,
+            devolver_mdt=True
         )
         
         return {
@@ -203,64 +233,182 @@ class CasoPracticoSanMiguel:
         
         return datos_transito
     
-    def ejecutar_caso_completo(self) -> Dict:
-        """Ejecuta el caso práctico completo"""
+    def generar_datos_satelitales_san_miguel(self) -> Dict:
+        """Extrae NDVI, humedad y precipitación satelital para San Miguel"""
+        print("🛰️ Extrayendo datos satelitales para San Miguel...")
+        
+        datos = extract_soil_data_san_miguel()
+        if "error" in datos:
+            raise ValueError(datos["error"])
+        
+        return {
+            "datos_satelitales": datos,
+            "clasificacion_ndvi": clasificar_suelo_por_ndvi(datos["datos_suelo"]["NDVI_promedio"])
+        }
+    
+    def configuracion_caso(self) -> Dict:
+        """
+        Datos que identifican el caso; si cambian, los checkpoints no se
+        reutilizan (la fecha de estudio queda fuera: cambia en cada día)
+        """
+        return {
+            "proyecto": self.proyecto,
+            "coordenadas": self.coordenadas,
+            "datos_proyecto": {clave: valor for clave, valor in self.datos_proyecto.items()
+                               if clave != "fecha_estudio"}
+        }
+    
+    # Etapas del flujo: reciben la configuración (clave de los checkpoints)
+    def _etapa_lidar(self, configuracion: Dict, archivo_las: str) -> Tuple[Dict, Optional[Dict]]:
+        # El MDT viaja como salida aparte: no entra al reporte JSON
+        datos_lidar = self.generar_datos_drone_lidar(archivo_las)
+        return datos_lidar, datos_lidar["resultado_procesamiento"].pop("MDT", None)
+    
+    def _etapa_satelital(self, configuracion: Dict) -> Dict:
+        return self.generar_datos_satelitales_san_miguel()
+    
+    def _etapa_suelo(self, configuracion: Dict) -> Dict:
+        return self.generar_datos_suelo_san_miguel()
+    
+    def _etapa_transito(self, configuracion: Dict) -> Dict:
+        return self.generar_datos_transito_san_miguel()
+    
+    def _etapa_diseno(self, datos_lidar: Dict, mdt_lidar: Optional[Dict], datos_suelo: Dict,
+                      datos_transito: Dict) -> Dict:
+        diseno = diseno_automatizado_completo(
+            datos_lidar["resultado_procesamiento"]["Datos_LiDAR"],
+            datos_suelo,
+            datos_transito,
+            "ambos"  # Rígido y flexible
+        )
+        # Movimiento de tierras con la estructura diseñada (geometría del modelo BIM)
+        if mdt_lidar is not None and "error" not in diseno:
+            diseno["movimiento_tierras"] = calcular_movimiento_tierras(
+                mdt_lidar, diseno, ancho_m=self.datos_proyecto["ancho_calzada"])
+        return diseno
+    
+    def _etapa_interoperabilidad(self, datos_lidar: Dict, diseno_pavimento: Dict) -> Dict:
+        return interoperabilidad_completa(
+            datos_lidar["resultado_procesamiento"]["Datos_LiDAR"],
+            diseno_pavimento,
+            self.proyecto
+        )
+    
+    def _etapa_reporte(self, datos_lidar: Dict, datos_satelitales: Dict, datos_suelo: Dict,
+                       datos_transito: Dict, diseno_pavimento: Dict, interoperabilidad: Dict) -> Dict:
+        return self.generar_reporte_completo(
+            datos_lidar, datos_suelo, datos_transito,
+            diseno_pavimento, interoperabilidad, datos_satelitales
+        )
+    
+    def crear_flujo_caso(self, ejecutor: str = "hilos", hilos: Optional[int] = None) -> FlujoEtapas:
+        """
+        Grafo de etapas del caso con checkpoints en
+        <directorio_resultados>/checkpoints
+
+        lidar, satelital, suelo y tránsito no dependen entre sí y corren en
+        paralelo; diseño → interoperabilidad → reporte esperan sus entradas.
+        Todas las etapas llevan como versión el hash de este archivo y de
+        MODULOS_CASO: un cambio en el código de cálculo no reusa checkpoints.
+        """
+        flujo = FlujoEtapas("caso_san_miguel", max_resultados=1, hilos=hilos, ejecutor=ejecutor,
+                            directorio_checkpoints=os.path.join(self.directorio_resultados, "checkpoints"))
+        modulos = [sys.modules[__name__]] + [sys.modules[m] for m in MODULOS_CASO if m in sys.modules]
+        version = huella_modulos(*modulos)
+        flujo.agregar("lidar", self._etapa_lidar, ("configuracion", "archivo_las"), ("datos_lidar", "mdt_lidar"),
+                      version=version)
+        flujo.agregar("satelital", self._etapa_satelital, ("configuracion",), ("datos_satelitales",),
+                      version=version)
+        flujo.agregar("suelo", self._etapa_suelo, ("configuracion",), ("datos_suelo",), version=version)
+        flujo.agregar("transito", self._etapa_transito, ("configuracion",), ("datos_transito",), version=version)
+        flujo.agregar("diseno", self._etapa_diseno, ("datos_lidar", "mdt_lidar", "datos_suelo", "datos_transito"),
+                      ("diseno_pavimento",), version=version)
+        flujo.agregar("interoperabilidad", self._etapa_interoperabilidad, ("datos_lidar", "diseno_pavimento"),
+                      version=version)
+        flujo.agregar("reporte", self._etapa_reporte,
+                      ("datos_lidar", "datos_satelitales", "datos_suelo", "datos_transito",
+                       "diseno_pavimento", "interoperabilidad"), version=version)
+        return flujo
+    
+    def ejecutar_caso_completo(self, reanudar: bool = True, ejecutor: str = "hilos",
+                               hilos: Optional[int] = None) -> Dict:
+        """
+        Ejecuta el caso práctico completo
+
+        Parámetros:
+        - reanudar: retoma desde los checkpoints de una ejecución
+          interrumpida (False los borra y recalcula todo); una ejecución
+          completa borra sus checkpoints, así la siguiente recalcula
+        - ejecutor: "hilos" o "procesos" para las etapas independientes
+        - hilos: número de trabajadores (por defecto, los procesadores)
+        """
         print(f"🏗️ Iniciando caso práctico completo: {self.proyecto}")
         print("=" * 60)
         
         try:
-            # 1. Datos de drone LiDAR
-            print("1️⃣ PROCESAMIENTO DE DATOS LIDAR")
-            datos_lidar = self.generar_datos_drone_lidar()
-            
-            # 2. Datos de suelo
-            print("\n2️⃣ ESTUDIO DE SUELO")
-            datos_suelo = self.generar_datos_suelo_san_miguel()
-            
-            # 3. Datos de tránsito
-            print("\n3️⃣ ESTUDIO DE TRÁNSITO")
-            datos_transito = self.generar_datos_transito_san_miguel()
+            flujo = self.crear_flujo_caso(ejecutor, hilos)
+            if not reanudar:
+                flujo.limpiar_cache(checkpoints=True)
             
-            # 4. Diseño automatizado
-            print("\n4️⃣ DISEÑO AUTOMATIZADO DE PAVIMENTOS")
-            diseno_pavimento = diseno_automatizado_completo(
-                datos_lidar["resultado_procesamiento"]["Datos_LiDAR"],
-                datos_suelo,
-                datos_transito,
-                "ambos"  # Rígido y flexible
-            )
+            # 1-5. LiDAR, satélite, suelo y tránsito en paralelo; luego diseño,
+            # exportación a software externo y reporte
+            print("1️⃣ LIDAR · SATÉLITE · SUELO · TRÁNSITO → DISEÑO → EXPORTACIÓN → REPORTE")
+            ejecucion = flujo.ejecutar({"configuracion": self.configuracion_caso(), "archivo_las": self.archivo_las},
+                                       objetivos=["reporte"], archivos=("archivo_las",))
+            reporte_completo = dict(ejecucion["valores"]["reporte"])
+            # El reporte puede venir de un checkpoint: fechas de esta ejecución
+            reporte_completo["informacion_proyecto"] = dict(self.datos_proyecto)
+            reporte_completo["fecha_reporte"] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            reporte_completo["ejecucion"] = {
+                "ejecutor": ejecutor,
+                "etapas_ejecutadas": ejecucion["ejecutadas"],
+                "etapas_desde_checkpoint": ejecucion["en_cache"],
+                "linea_tiempo": ejecucion["linea_tiempo"],
+                "tiempo_total_s": ejecucion["tiempo_s"]
+            }
+            self.imprimir_linea_tiempo(ejecucion)
             
-            # 5. Interoperabilidad con software externo
-            print("\n5️⃣ EXPORTACIÓN A SOFTWARE EXTERNO")
-            resultado_interoperabilidad = interoperabilidad_completa(
-                datos_lidar["resultado_procesamiento"]["Datos_LiDAR"],
-                diseno_pavimento,
-                self.proyecto
-            )
-            
-            # 6. Generar reporte completo
-            print("\n6️⃣ GENERANDO REPORTE COMPLETO")
-            reporte_completo = self.generar_reporte_completo(
-                datos_lidar, datos_suelo, datos_transito, 
-                diseno_pavimento, resultado_interoperabilidad
-            )
-            
-            # 7. Guardar resultados
+            # 6. Guardar resultados; los checkpoints solo sirven para retomar una ejecución interrumpida
             self.guardar_resultados(reporte_completo)
+            flujo.limpiar_cache(checkpoints=True)
             
             print("\n✅ CASO PRÁCTICO COMPLETADO EXITOSAMENTE")
             print("=" * 60)
             
             return reporte_completo
             
+        except ErrorEtapa as e:
+            error_msg = f"❌ Error en caso práctico (etapa {e.etapa}): {e.__cause__}"
+            print(error_msg)
+            self.imprimir_linea_tiempo(e.informe)
+            return {
+                "error": error_msg,
+                "etapa_fallida": e.etapa,
+                "etapas_completadas": [n for n, d in e.informe["etapas"].items() if d["estado"] != "error"],
+                "etapas_pendientes": e.informe["pendientes"],
+                "linea_tiempo": e.informe["linea_tiempo"]
+            }
+            
         except Exception as e:
             error_msg = f"❌ Error en caso práctico: {str(e)}"
             print(error_msg)
             return {"error": error_msg}
     
+    def imprimir_linea_tiempo(self, ejecucion: Dict) -> None:
+        """Imprime inicio, fin y estado de cada etapa"""
+        print("\n⏱️ LÍNEA DE TIEMPO POR ETAPA")
+        tramos = {tramo["etapa"]: tramo for tramo in ejecucion["linea_tiempo"]}
+        for nombre, datos in ejecucion["etapas"].items():
+            if nombre in tramos:
+                tramo = tramos[nombre]
+                print(f"   {nombre:<18} {tramo['inicio_s']:7.2f} → {tramo['fin_s']:7.2f} s  ({tramo['duracion_s']:.2f} s)")
+            else:
+                print(f"   {nombre:<18} {datos['estado']}")
+    
     def generar_reporte_completo(self, datos_lidar: Dict, datos_suelo: Dict, 
                                datos_transito: Dict, diseno_pavimento: Dict, 
-                               interoperabilidad: Dict) -> Dict:
+                               interoperabilidad: Dict,
+                               datos_satelitales: Optional[Dict] = None) -> Dict:
         """Genera reporte completo del caso práctico"""
         
         reporte = {
@@ -283,6 +431,7 @@ class CasoPracticoSanMiguel:
             "datos_transito": datos_transito,
             "diseno_pavimento": diseno_pavimento,
             "interoperabilidad": interoperabilidad,
+            "datos_satelitales": datos_satelitales,
             
             "conclusiones": [
                 "El suelo volcánico de San Miguel requiere estabilización previa",
@@ -323,14 +472,14 @@ class CasoPracticoSanMiguel:
         """Guarda los resultados del caso práctico, serializando cualquier objeto no estándar como string"""
         try:
             # Crear directorio de resultados
-            os.makedirs("resultados_san_miguel", exist_ok=True)
+            os.makedirs(self.directorio_resultados, exist_ok=True)
 
             # Guardar reporte JSON con encoder robusto
-            with open("resultados_san_miguel/reporte_completo.json", "w", encoding="utf-8") as f:
+            with open(os.path.join(self.directorio_resultados, "reporte_completo.json"), "w", encoding="utf-8") as f:
                 json.dump(reporte, f, indent=2, ensure_ascii=False, cls=EnhancedJSONEncoder)
 
             # Guardar resumen ejecutivo
-            with open("resultados_san_miguel/resumen_ejecutivo.txt", "w", encoding="utf-8") as f:
+            with open(os.path.join(self.directorio_resultados, "resumen_ejecutivo.txt"), "w", encoding="utf-8") as f:
                 f.write("CASO PRÁCTICO - SAN MIGUEL, PUNO\n")
                 f.write("=" * 50 + "\n\n")
                 f.write(f"Proyecto: {reporte['resumen_ejecutivo']['proyecto']}\n")
@@ -349,7 +498,7 @@ class CasoPracticoSanMiguel:
                 for i, recomendacion in enumerate(reporte['recomendaciones'], 1):
                     f.write(f"{i}. {recomendacion}\n")
             
-            print("💾 Resultados guardados en: resultados_san_miguel/")
+            print(f"💾 Resultados guardados en: {self.directorio_resultados}/")
         
         except Exception as e:
             print(f"⚠️ Error guardando resultados: {e}")
@@ -18,6 +18,7 @@ pip install pandas>=1.5.0
 pip install numpy>=1.21.0
 pip install openpyxl>=3.0.0
 pip install scipy>=1.9.0
+pip install numba>=0.57.0
 
 echo [3/4] Instalando librerias de graficos...
 pip install matplotlib>=3.5.0
@@ -0,0 +1,359 @@
+"""
+MÓDULO BENCHMARK - TIEMPOS POR ETAPA DEL FLUJO LIDAR
+====================================================
+
+Banco de pruebas reproducible del flujo LiDAR sobre nubes sintéticas:
+- Tiempo y memoria pico (tracemalloc) por etapa: lectura, filtro de
+  suelo, MDT, pendiente, curvas de nivel, drenaje y exportación
+- Barrido de tamaños de nube y resoluciones de grilla
+- Comparación de motores de MDT: bucle por celda (implementación
+  original, solo como referencia), promedio por celdas (binned), IDW
+  y vecino natural sobre KD-tree
+- Tiempos por etapa de process_laz_advanced y
+  procesamiento_completo_lidar (Cronometro)
+- Reporte JSON y tabla Markdown para seguir regresiones
+
+Autor: IA Assistant - Especialista UNI
+Fecha: 2024
+"""
+
+import numpy as np
+import json
+import os
+import platform
+import shutil
+import tempfile
+import time
+import tracemalloc
+from contextlib import redirect_stdout
+from typing import Dict, List, Tuple, Optional
+
+try:
+    import laspy
+    LASPY_AVAILABLE = True
+except ImportError:
+    LASPY_AVAILABLE = False
+
+from MODULO_CRONOMETRO import Cronometro
+from MODULO_FILTRO_SUELO import clasificar_suelo_nube, crear_mdt_por_celdas
+from MODULO_INTERPOLACION import interpolar_mdt
+from MODULO_HIDROLOGIA import analisis_hidrologico_mdt, pendiente_terreno
+from MODULO_CURVAS_NIVEL import extraer_curvas_nivel, exportar_curvas_geojson
+from MODULO_GEOTIFF import exportar_mdt_geotiff
+from MODULO_NUBE_SINTETICA import escribir_las_sintetico, nube_sintetica
+
+# Etapas medidas en cada caso, en orden de ejecución
+ETAPAS = ("lectura", "filtro_suelo", "mdt", "pendiente", "curvas", "drenaje", "exportacion")
+
+# Límite de celdas × puntos de suelo para correr el motor de bucle por celda
+LIMITE_BUCLE = 3e8
+
+def mdt_bucle_referencia(points: np.ndarray, resolucion: float = 1.0) -> Dict:
+    """
+    MDT con el bucle por celda original de PDALSimulator.create_dtm
+
+    Promedio de los puntos a menos de 'resolucion' de cada nodo (media
+    global si no hay ninguno). Es O(celdas × puntos): se conserva solo
+    como referencia para medir la aceleración de los motores actuales.
+    """
+    x_grid = np.arange(points[:, 0].min(), points[:, 0].max(), resolucion)
+    y_grid = np.arange(points[:, 1].min(), points[:, 1].max(), resolucion)
+    X_grid, Y_grid = np.meshgrid(x_grid, y_grid)
+    Z_grid = np.zeros_like(X_grid)
+    for i in range(len(x_grid)):
+        for j in range(len(y_grid)):
+            dist = np.sqrt((points[:, 0] - x_grid[i]) ** 2 + (points[:, 1] - y_grid[j]) ** 2)
+            nearby = dist < resolucion
+            if np.any(nearby):
+                Z_grid[j, i] = np.mean(points[nearby, 2])
+            else:
+                Z_grid[j, i] = np.mean(points[:, 2])
+    return {'X_grid': X_grid, 'Y_grid': Y_grid, 'Z_grid': Z_grid, 'resolution': resolucion}
+
+MOTORES_MDT = {
+    "bucle": mdt_bucle_referencia,
+    "binned": lambda points, resolucion: crear_mdt_por_celdas(points, resolucion),
+    "idw": lambda points, resolucion: interpolar_mdt(points, resolucion, metodo="idw"),
+    "natural": lambda points, resolucion: interpolar_mdt(points, resolucion, metodo="natural")
+}
+
+def leer_nube(ruta: str) -> Dict:
+    """Lee x, y, z y clasificación de un LAS/LAZ por bloques con laspy"""
+    with laspy.open(ruta) as lector:
+        bloques = [(np.column_stack([b.x, b.y, b.z]), np.asarray(b.classification))
+                   for b in lector.chunk_iterator(1000000)]
+    return {
+        "points": np.concatenate([b[0] for b in bloques]),
+        "clasificacion": np.concatenate([b[1] for b in bloques])
+    }
+
+def filtrar_suelo(nube: Dict, resolucion: float, filtro: str = "clase") -> np.ndarray:
+    """Puntos de suelo: clase 2 del archivo o filtro morfológico progresivo (pmf)"""
+    if filtro == "pmf":
+        clasificacion = clasificar_suelo_nube(nube["points"], resolucion)["clasificacion"]
+    else:
+        clasificacion = nube["clasificacion"]
+    return nube["points"][clasificacion == 2]
+
+def _celdas_estimadas(points: np.ndarray, resolucion: float) -> int:
+    """Celdas de la grilla que cubre la nube"""
+    ancho = np.ptp(points[:, 0]) / resolucion + 1
+    alto = np.ptp(points[:, 1]) / resolucion + 1
+    return int(ancho * alto)
+
+def ejecutar_caso(nube: Dict, resolucion: float, motor: str, directorio: str,
+                  filtro: str = "clase", intervalo_curvas: float = 0.5,
+                  limite_bucle: float = LIMITE_BUCLE) -> Dict:
+    """
+    Corre las etapas del flujo para una nube, resolución y motor de MDT
+
+    'nube' es la ruta a un LAS/LAZ o un dict con points y clasificacion
+    ya en memoria (sin laspy la lectura no se mide).
+    """
+    cronometro = Cronometro()
+    if isinstance(nube, str):
+        with cronometro.etapa("lectura"):
+            nube = leer_nube(nube)
+    with cronometro.etapa("filtro_suelo"):
+        suelo = filtrar_suelo(nube, resolucion, filtro)
+
+    caso = {
+        "puntos": int(len(nube["points"])),
+        "puntos_suelo": int(len(suelo)),
+        "resolucion": resolucion,
+        "motor": motor,
+        "celdas": _celdas_estimadas(suelo, resolucion)
+    }
+    if motor == "bucle" and caso["celdas"] * caso["puntos_suelo"] > limite_bucle:
+        caso["omitido"] = f"celdas × puntos > {limite_bucle:.0e}"
+        return caso
+
+    with cronometro.etapa("mdt"):
+        dtm = MOTORES_MDT[motor](suelo, resolucion)
+    with cronometro.etapa("pendiente"):
+        pendiente = pendiente_terreno(dtm['Z_grid'], dtm['resolution'])
+    with cronometro.etapa("curvas"):
+        curvas = extraer_curvas_nivel(dtm, intervalo_curvas)
+    with cronometro.etapa("drenaje"):
+        drenaje = analisis_hidrologico_mdt(dtm)
+    with cronometro.etapa("exportacion"):
+        base = os.path.join(directorio, f"{motor}_{caso['puntos']}_{resolucion:g}")
+        exportar_mdt_geotiff(dtm, base + "_mdt.tif")
+        exportar_curvas_geojson(curvas, base + "_curvas.geojson")
+
+    caso.update({
+        "etapas": cronometro.resumen(),
+        "pendiente_media_pct": round(float(np.nanmean(pendiente)) * 100, 3),
+        "curvas": len(curvas["curvas"]),
+        "area_cuenca_principal_ha": drenaje["resumen"]["area_cuenca_principal_ha"]
+    })
+    return caso
+
+def _comparar_motores(casos: List[Dict], referencia: str) -> List[Dict]:
+    """Aceleración del MDT y del total de cada motor frente al de referencia"""
+    comparaciones = []
+    for caso in casos:
+        if "etapas" not in caso or caso["motor"] == referencia:
+            continue
+        base = next((c for c in casos if c["motor"] == referencia and "etapas" in c
+                     and c["puntos"] == caso["puntos"] and c["resolucion"] == caso["resolucion"]), None)
+        if base is None:
+            continue
+        comparaciones.append({
+            "puntos": caso["puntos"],
+            "resolucion": caso["resolucion"],
+            "motor": caso["motor"],
+            "referencia": referencia,
+            "aceleracion_mdt": round(base["etapas"]["mdt"]["tiempo_s"] / max(caso["etapas"]["mdt"]["tiempo_s"], 1e-6), 1),
+            "aceleracion_total": round(base["etapas"]["total_s"] / max(caso["etapas"]["total_s"], 1e-6), 1)
+        })
+    return comparaciones
+
+def medir_flujos_completos(archivo_las: str, directorio: str) -> Dict:
+    """
+    Tiempos por etapa de process_laz_advanced y procesamiento_completo_lidar
+
+    Ambos flujos usan sus simuladores internos; la salida en pantalla se
+    descarta y los archivos se escriben en 'directorio'. El flujo por
+    etapas se crea nuevo para no medir resultados memorizados.
+    """
+    from MODULO_LIDAR_AVANZADO import process_laz_advanced
+    from MODULO_LIDAR_DRONES import crear_flujo_lidar, procesamiento_completo_lidar
+
+    flujos = {}
+    with open(os.devnull, "w", encoding="utf-8") as nulo, redirect_stdout(nulo):
+        inicio = time.perf_counter()
+        avanzado = process_laz_advanced(archivo_las, os.path.join(directorio, "avanzado"))
+        flujos["process_laz_advanced"] = {
+            "tiempo_s": round(time.perf_counter() - inicio, 3),
+            "etapas": avanzado.get("tiempos_etapas"),
+            "estado": avanzado["estado"]
+        }
+        inicio = time.perf_counter()
+        completo = procesamiento_completo_lidar(archivo_las, flujo=crear_flujo_lidar(),
+                                                ruta_geotiff=os.path.join(directorio, "mdt_terreno.tif"))
+        flujos["procesamiento_completo_lidar"] = {
+            "tiempo_s": round(time.perf_counter() - inicio, 3),
+            "etapas": completo.get("Tiempos_etapas"),
+            "estado": completo.get("Estado", completo.get("estado"))
+        }
+    return flujos
+
+def ejecutar_benchmark(puntos: Tuple[int, ...] = (100000, 1000000),
+                       resoluciones: Tuple[float, ...] = (1.0, 0.5),
+                       motores: Tuple[str, ...] = ("bucle", "binned", "idw"),
+                       semilla: int = 0, filtro: str = "clase", medir_memoria: bool = True,
+                       flujos_completos: bool = False, directorio: Optional[str] = None,
+                       limite_bucle: float = LIMITE_BUCLE, **opciones_nube) -> Dict:
+    """
+    Benchmark del flujo LiDAR por etapas
+
+    Parámetros:
+    - puntos: tamaños de nube sintética (cada uno se escribe una vez a LAS)
+    - resoluciones: tamaños de celda del MDT (m)
+    - motores: motores de MDT de MOTORES_MDT; el primero es la referencia
+    - filtro: "clase" (clase 2 del archivo) o "pmf" (filtro morfológico)
+    - medir_memoria: memoria pico por etapa con tracemalloc (más lento)
+    - flujos_completos: mide también process_laz_advanced y
+      procesamiento_completo_lidar
+    - opciones_nube: extension, densidad_pts_m2 o parametros del generador
+    """
+    desconocidos = [m for m in motores if m not in MOTORES_MDT]
+    if desconocidos:
+        return {
+            "error": f"Motores de MDT desconocidos: {desconocidos}",
+            "estado": "❌ Error en benchmark LiDAR"
+        }
+
+    temporal = directorio is None
+    directorio = tempfile.mkdtemp(prefix="benchmark_lidar_") if temporal else directorio
+    os.makedirs(directorio, exist_ok=True)
+    memoria_previa = tracemalloc.is_tracing()
+    try:
+        inicio = time.perf_counter()
+        if medir_memoria and not memoria_previa:
+            tracemalloc.start()
+        casos = []
+        generacion = {}
+        for n in puntos:
+            ruta = os.path.join(directorio, f"sintetico_{n}.las")
+            if LASPY_AVAILABLE:
+                escrito = escribir_las_sintetico(ruta, n, semilla, **opciones_nube)
+                if "error" in escrito:
+                    raise ValueError(escrito["error"])
+                generacion[n] = escrito["tiempo_s"]
+                fuente = ruta
+            else:
+                t0 = time.perf_counter()
+                fuente = nube_sintetica(n, semilla, **opciones_nube)
+                generacion[n] = round(time.perf_counter() - t0, 3)
+            for resolucion in resoluciones:
+                for motor in motores:
+                    caso = ejecutar_caso(fuente, resolucion, motor, directorio, filtro,
+                                         limite_bucle=limite_bucle)
+                    caso["generacion_s"] = generacion[n]
+                    casos.append(caso)
+
+        resultado = {
+            "casos": casos,
+            "comparaciones": _comparar_motores(casos, motores[0]),
+            "entorno": {
+                "python": platform.python_version(),
+                "numpy": np.__version__,
+                "sistema": platform.platform(),
+                "procesadores": os.cpu_count()
+            },
+            "parametros": {
+                "puntos": list(puntos),
+                "resoluciones": list(resoluciones),
+                "motores": list(motores),
+                "semilla": semilla,
+                "filtro": filtro,
+                "medir_memoria": medir_memoria
+            }
+        }
+        if flujos_completos:
+            resultado["flujos_completos"] = medir_flujos_completos(
+                os.path.join(directorio, f"sintetico_{puntos[0]}.las"), directorio)
+        resultado["tiempo_total_s"] = round(time.perf_counter() - inicio, 3)
+        resultado["estado"] = "✅ Benchmark LiDAR completado"
+        return resultado
+
+    except Exception as e:
+        return {
+            "error": str(e),
+            "estado": "❌ Error en benchmark LiDAR"
+        }
+
+    finally:
+        if medir_memoria and not memoria_previa:
+            tracemalloc.stop()
+        if temporal:
+            shutil.rmtree(directorio, ignore_errors=True)
+
+def tabla_markdown(resultado: Dict) -> str:
+    """Tabla Markdown de tiempos (s) por etapa y memoria pico de cada caso"""
+    lineas = [
+        "| Puntos | Res. (m) | Motor | " + " | ".join(ETAPAS) + " | Total (s) | Memoria pico (MB) |",
+        "|" + "---:|" * 2 + "---|" + "---:|" * (len(ETAPAS) + 2)
+    ]
+    for caso in resultado["casos"]:
+        inicio = f"| {caso['puntos']:,} | {caso['resolucion']:g} | {caso['motor']} |"
+        if "omitido" in caso:
+            lineas.append(inicio + " — |" * len(ETAPAS) + f" omitido ({caso['omitido']}) | — |")
+            continue
+        etapas = caso["etapas"]
+        tiempos = [f"{etapas[e]['tiempo_s']:.3f}" if e in etapas else "—" for e in ETAPAS]
+        picos = [etapas[e].get("memoria_pico_mb", 0.0) for e in ETAPAS if e in etapas]
+        pico = f"{max(picos):.1f}" if "memoria_pico_mb" in etapas.get("mdt", {}) else "—"
+        lineas.append(inicio + " " + " | ".join(tiempos) + f" | {etapas['total_s']:.3f} | {pico} |")
+    return "\n".join(lineas)
+
+def escribir_reporte_benchmark(resultado: Dict, ruta_base: str) -> Dict:
+    """
+    Escribe el reporte del benchmark: <ruta_base>.json y <ruta_base>.md
+    """
+    directorio = os.path.dirname(ruta_base)
+    if directorio:
+        os.makedirs(directorio, exist_ok=True)
+    with open(ruta_base + ".json", "w", encoding="utf-8") as f:
+        json.dump(resultado, f, indent=2, ensure_ascii=False)
+
+    lineas = ["# Benchmark del flujo LiDAR", ""]
+    entorno = resultado.get("entorno", {})
+    lineas.append(f"Python {entorno.get('python')} · NumPy {entorno.get('numpy')} · "
+                  f"{entorno.get('procesadores')} procesadores · {entorno.get('sistema')}")
+    lineas += ["", "## Tiempos por etapa (s)", "", tabla_markdown(resultado)]
+    if resultado.get("comparaciones"):
+        lineas += ["", "## Aceleración frente a la referencia", "",
+                   "| Puntos | Res. (m) | Motor | Referencia | MDT (×) | Total (×) |",
+                   "|---:|---:|---|---|---:|---:|"]
+        lineas += [f"| {c['puntos']:,} | {c['resolucion']:g} | {c['motor']} | {c['referencia']} | "
+                   f"{c['aceleracion_mdt']} | {c['aceleracion_total']} |" for c in resultado["comparaciones"]]
+    for nombre, flujo in resultado.get("flujos_completos", {}).items():
+        lineas += ["", f"## {nombre} ({flujo['tiempo_s']} s)", "", "| Etapa | Tiempo (s) |", "|---|---:|"]
+        lineas += [f"| {etapa} | {datos['tiempo_s']:.3f} |"
+                   for etapa, datos in (flujo.get("etapas") or {}).items() if isinstance(datos, dict)]
+    with open(ruta_base + ".md", "w", encoding="utf-8") as f:
+        f.write("\n".join(lineas) + "\n")
+
+    return {
+        "json": ruta_base + ".json",
+        "markdown": ruta_base + ".md",
+        "estado": "✅ Reporte de benchmark generado"
+    }
+
+if __name__ == "__main__":
+    # Prueba del módulo: nubes de 100 k y 1 M de puntos a 1 m y 0.5 m
+    resultado = ejecutar_benchmark(puntos=(100000, 1000000), resoluciones=(1.0, 0.5),
+                                   motores=("bucle", "binned", "idw"), flujos_completos=True)
+    if "error" in resultado:
+        print(resultado["estado"], resultado["error"])
+    else:
+        print(tabla_markdown(resultado))
+        for comparacion in resultado["comparaciones"]:
+            print(f"   {comparacion['motor']} vs {comparacion['referencia']} "
+                  f"({comparacion['puntos']:,} pts, {comparacion['resolucion']:g} m): "
+                  f"MDT ×{comparacion['aceleracion_mdt']}")
+        reporte = escribir_reporte_benchmark(resultado, os.path.join("output_lidar", "benchmark_lidar"))
+        print(f"{reporte['estado']}: {reporte['markdown']}")
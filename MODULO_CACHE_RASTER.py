@@ -0,0 +1,172 @@
+"""
+MÓDULO CACHE RASTER - MDT Y CAPAS DERIVADAS EN MEMORIA MAPEADA
+==============================================================
+
+Caché en disco de rásters de levantamientos LiDAR (MDT, pendiente,
+curvatura, acumulación de flujo):
+- Clave = hash del contenido del archivo + parámetros de procesamiento
+- Capas en .npy abiertas como memoria mapeada (RAM acotada al abrir)
+- Metadatos en un archivo JSON lateral por entrada
+- Publicación atómica (directorio temporal + rename): usuarios
+  concurrentes no se sobrescriben y nunca se lee una entrada incompleta
+
+Autor: IA Assistant - Especialista UNI
+Fecha: 2024
+"""
+
+import numpy as np
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+from typing import Dict, List, Tuple, Optional
+
+VERSION_CACHE = 1
+ARCHIVO_METADATOS = "metadatos.json"
+
+def hash_contenido(ruta: str, bloque: int = 8 * 1024 * 1024) -> str:
+    """SHA-256 del contenido del archivo, leído por bloques"""
+    sha = hashlib.sha256()
+    with open(ruta, "rb") as f:
+        for datos in iter(lambda: f.read(bloque), b""):
+            sha.update(datos)
+    return sha.hexdigest()
+
+def _a_json(valor):
+    """Convierte escalares y arreglos de numpy a tipos JSON"""
+    if isinstance(valor, np.generic):
+        return valor.item()
+    if isinstance(valor, np.ndarray):
+        return valor.tolist()
+    raise TypeError(f"Tipo no serializable: {type(valor).__name__}")
+
+def clave_cache(hash_archivo: str, parametros: Optional[Dict] = None) -> str:
+    """Clave de la entrada: hash del levantamiento + parámetros de procesamiento"""
+    texto = json.dumps({"archivo": hash_archivo, "parametros": parametros or {},
+                        "version": VERSION_CACHE}, sort_keys=True, default=_a_json)
+    return hashlib.sha256(texto.encode("utf-8")).hexdigest()[:32]
+
+class CacheRaster:
+    """Caché de rásters por levantamiento con capas en memoria mapeada"""
+
+    def __init__(self, directorio: str = "cache_raster"):
+        self.directorio = directorio
+        os.makedirs(directorio, exist_ok=True)
+
+    def ruta_entrada(self, clave: str) -> str:
+        """Directorio definitivo de una entrada"""
+        return os.path.join(self.directorio, clave)
+
+    def existe(self, clave: str) -> bool:
+        """Una entrada existe solo si fue publicada completa"""
+        return os.path.isfile(os.path.join(self.ruta_entrada(clave), ARCHIVO_METADATOS))
+
+    def preparar(self, clave: str) -> str:
+        """Directorio temporal exclusivo donde se escriben los productos"""
+        return tempfile.mkdtemp(prefix=f".{clave}.", dir=self.directorio)
+
+    def descartar(self, directorio_temporal: str) -> None:
+        """Elimina un directorio temporal sin publicar"""
+        shutil.rmtree(directorio_temporal, ignore_errors=True)
+
+    def publicar(self, clave: str, directorio_temporal: str, capas: Dict[str, np.ndarray],
+                 metadatos: Optional[Dict] = None) -> str:
+        """
+        Guarda las capas y los metadatos y publica la entrada atómicamente
+
+        Si otro proceso publicó la misma clave primero, se conserva la suya
+        (el contenido es equivalente) y se descarta la copia temporal.
+        """
+        descripcion = {}
+        for nombre, capa in capas.items():
+            capa = np.asarray(capa)
+            np.save(os.path.join(directorio_temporal, f"{nombre}.npy"), capa)
+            descripcion[nombre] = {"forma": list(capa.shape), "tipo": str(capa.dtype)}
+
+        contenido = {
+            "clave": clave,
+            "version": VERSION_CACHE,
+            "creado": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "capas": descripcion,
+            **(metadatos or {})
+        }
+        with open(os.path.join(directorio_temporal, ARCHIVO_METADATOS), "w", encoding="utf-8") as f:
+            json.dump(contenido, f, indent=2, ensure_ascii=False, default=_a_json)
+
+        destino = self.ruta_entrada(clave)
+        try:
+            os.rename(directorio_temporal, destino)
+        except OSError:
+            if not self.existe(clave):
+                raise
+            self.descartar(directorio_temporal)
+        return destino
+
+    def guardar(self, clave: str, capas: Dict[str, np.ndarray],
+                metadatos: Optional[Dict] = None) -> str:
+        """Publica capas ya calculadas en una sola llamada"""
+        return self.publicar(clave, self.preparar(clave), capas, metadatos)
+
+    def cargar(self, clave: str, capas: Optional[List[str]] = None) -> Optional[Dict]:
+        """
+        Abre una entrada publicada; las capas se devuelven como memoria
+        mapeada de solo lectura. Devuelve None si la clave no existe.
+        """
+        if not self.existe(clave):
+            return None
+        directorio = self.ruta_entrada(clave)
+        ruta_metadatos = os.path.join(directorio, ARCHIVO_METADATOS)
+        with open(ruta_metadatos, encoding="utf-8") as f:
+            metadatos = json.load(f)
+        os.utime(ruta_metadatos)  # Último uso, para limpiar()
+
+        nombres = metadatos["capas"].keys() if capas is None else capas
+        return {
+            "clave": clave,
+            "directorio": directorio,
+            "metadatos": metadatos,
+            "capas": {nombre: np.load(os.path.join(directorio, f"{nombre}.npy"), mmap_mode="r")
+                      for nombre in nombres},
+            "archivos": {nombre: os.path.join(directorio, nombre)
+                         for nombre in sorted(os.listdir(directorio))}
+        }
+
+    def entradas(self) -> List[Dict]:
+        """Entradas publicadas con su tamaño y último uso"""
+        lista = []
+        for clave in sorted(os.listdir(self.directorio)):
+            if clave.startswith(".") or not self.existe(clave):
+                continue
+            directorio = self.ruta_entrada(clave)
+            tamano = sum(os.path.getsize(os.path.join(directorio, nombre))
+                         for nombre in os.listdir(directorio))
+            ultimo_uso = os.path.getmtime(os.path.join(directorio, ARCHIVO_METADATOS))
+            lista.append({"clave": clave, "bytes": tamano, "ultimo_uso": ultimo_uso})
+        return lista
+
+    def limpiar(self, max_bytes: int) -> List[str]:
+        """Elimina las entradas menos usadas hasta quedar bajo max_bytes"""
+        entradas = sorted(self.entradas(), key=lambda e: e["ultimo_uso"])
+        total = sum(e["bytes"] for e in entradas)
+        eliminadas = []
+        for entrada in entradas:
+            if total <= max_bytes:
+                break
+            shutil.rmtree(self.ruta_entrada(entrada["clave"]), ignore_errors=True)
+            total -= entrada["bytes"]
+            eliminadas.append(entrada["clave"])
+        return eliminadas
+
+if __name__ == "__main__":
+    # Prueba del módulo: guardar y reabrir un MDT sintético
+    cache = CacheRaster(os.path.join(tempfile.gettempdir(), "cache_raster_demo"))
+    clave = clave_cache("demo", {"resolucion": 1.0})
+    if not cache.existe(clave):
+        Z = 3850 + np.random.default_rng(0).normal(0, 0.1, (500, 500))
+        cache.guardar(clave, {"mdt": Z, "pendiente": np.hypot(*np.gradient(Z))},
+                      {"proyecto": "San Miguel"})
+    entrada = cache.cargar(clave)
+    print(f"✅ Entrada {clave}: capas {list(entrada['capas'])}")
+    print(f"   MDT: {entrada['capas']['mdt'].shape}, tipo {type(entrada['capas']['mdt']).__name__}")
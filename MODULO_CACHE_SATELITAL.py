@@ -0,0 +1,274 @@
+"""
+MÓDULO CACHE SATELITAL - RESULTADOS DE CONSULTAS GEE CON VENCIMIENTO
+====================================================================
+
+Caché persistente de consultas a Google Earth Engine (Sentinel-2, SMAP,
+CHIRPS, ERA5) compartida entre usuarios que diseñan en la misma zona:
+- Clave = colección + hash de la geometría + rango de fechas + reductor
+  + escala (+ parámetros adicionales)
+- Una entrada JSON por consulta con vencimiento (TTL); escritura atómica
+- Desalojo por tamaño: primero las vencidas, luego las menos usadas
+- Estadísticas de aciertos, fallos, vencidas y desalojos
+- Modo sin conexión: solo se sirve desde la caché (incluso vencidas)
+- Una sola consulta al proveedor por clave aunque varios hilos la pidan
+  (candados por franja de claves, en número fijo)
+
+Autor: IA Assistant - Especialista UNI
+Fecha: 2024
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from MODULO_CACHE_RASTER import _a_json
+
+VERSION_CACHE_SATELITAL = 1
+TTL_POR_DEFECTO_S = 7 * 24 * 3600
+MAX_BYTES_POR_DEFECTO = 50 * 1024 * 1024
+
+# Candados por franja de claves: memoria fija sin importar cuántas claves se consulten
+CANDADOS_CLAVE = 64
+
+class ErrorSinCache(LookupError):
+    """Consulta sin entrada en caché estando en modo sin conexión"""
+
+def _redondear(valor, decimales: int = 7):
+    """Coordenadas redondeadas para que la misma geometría dé el mismo hash"""
+    if isinstance(valor, float):
+        return round(valor, decimales)
+    if isinstance(valor, dict):
+        return {k: _redondear(v, decimales) for k, v in valor.items()}
+    if isinstance(valor, (list, tuple)):
+        return [_redondear(v, decimales) for v in valor]
+    return valor
+
+def huella_geometria(geometria) -> str:
+    """SHA-256 de una geometría: ee.Geometry, GeoJSON o lista de coordenadas"""
+    if hasattr(geometria, "toGeoJSON"):
+        geometria = geometria.toGeoJSON()
+    texto = json.dumps(_redondear(geometria), sort_keys=True, default=_a_json)
+    return hashlib.sha256(texto.encode("utf-8")).hexdigest()
+
+def clave_consulta(coleccion: str, geometria, fecha_inicio: str, fecha_fin: str,
+                   reductor: str = "mean", escala: float = 30, extra: Optional[Dict] = None) -> str:
+    """Clave de una consulta satelital"""
+    texto = json.dumps({"coleccion": coleccion, "geometria": huella_geometria(geometria),
+                        "fechas": [str(fecha_inicio), str(fecha_fin)], "reductor": reductor,
+                        "escala": float(escala), "extra": extra or {}, "version": VERSION_CACHE_SATELITAL},
+                       sort_keys=True, default=_a_json)
+    return hashlib.sha256(texto.encode("utf-8")).hexdigest()[:32]
+
+class CacheConsultasSatelitales:
+    """Caché en disco de resultados de consultas satelitales con TTL"""
+
+    def __init__(self, directorio: str = "cache_satelital", ttl_s: float = TTL_POR_DEFECTO_S,
+                 max_bytes: int = MAX_BYTES_POR_DEFECTO, sin_conexion: bool = False):
+        self.directorio = directorio
+        self.ttl_s = ttl_s
+        self.max_bytes = max_bytes
+        self.sin_conexion = sin_conexion
+        self._candado = threading.Lock()
+        self._candados_clave = [threading.Lock() for _ in range(CANDADOS_CLAVE)]
+        self._contadores = {"aciertos": 0, "fallos": 0, "vencidas": 0, "vencidas_servidas": 0,
+                            "desalojadas": 0}
+        os.makedirs(directorio, exist_ok=True)
+
+    def _ruta(self, clave: str) -> str:
+        return os.path.join(self.directorio, f"{clave}.json")
+
+    def _candado_clave(self, clave: str) -> threading.Lock:
+        """Candado de la franja de la clave (las claves son hash hexadecimales)"""
+        return self._candados_clave[int(clave[:8], 16) % len(self._candados_clave)]
+
+    def _contar(self, nombre: str, cantidad: int = 1) -> None:
+        with self._candado:
+            self._contadores[nombre] += cantidad
+
+    def _leer(self, clave: str) -> Optional[Dict]:
+        """Entrada completa o None si no existe o está dañada"""
+        try:
+            with open(self._ruta(clave), encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def obtener(self, clave: str, permitir_vencida: bool = False) -> Optional[Dict]:
+        """
+        Entrada vigente de una clave (con 'valor' y 'vencida'); None si no
+        existe o venció (salvo permitir_vencida)
+        """
+        entrada = self._leer(clave)
+        if entrada is None:
+            return None
+        entrada["vencida"] = time.time() > entrada["expira"]
+        if entrada["vencida"] and not permitir_vencida:
+            return None
+        try:
+            os.utime(self._ruta(clave))  # Último uso, para el desalojo
+        except OSError:
+            pass
+        return entrada
+
+    def guardar(self, clave: str, valor: Any, consulta: Optional[Dict] = None,
+                ttl_s: Optional[float] = None) -> None:
+        """Guarda un resultado (escritura atómica) y aplica el límite de tamaño"""
+        ahora = time.time()
+        contenido = json.dumps({"clave": clave, "consulta": consulta or {}, "creado": ahora,
+                                "expira": ahora + (self.ttl_s if ttl_s is None else ttl_s),
+                                "valor": valor}, ensure_ascii=False, default=_a_json)
+        descriptor, temporal = tempfile.mkstemp(prefix=f".{clave}.", dir=self.directorio)
+        with os.fdopen(descriptor, "w", encoding="utf-8") as f:
+            f.write(contenido)
+        os.replace(temporal, self._ruta(clave))
+        self.limpiar()
+
+    def consultar(self, coleccion: str, geometria, fecha_inicio: str, fecha_fin: str,
+                  calcular: Optional[Callable[[], Any]], reductor: str = "mean", escala: float = 30,
+                  extra: Optional[Dict] = None, ttl_s: Optional[float] = None) -> Any:
+        """
+        Resultado de una consulta desde la caché o, si falta o venció,
+        desde calcular() (que consulta al proveedor) y lo guarda
+
+        En modo sin conexión nunca se llama a calcular(): se sirve la
+        entrada aunque esté vencida y, si no existe, se lanza ErrorSinCache.
+        """
+        clave = clave_consulta(coleccion, geometria, fecha_inicio, fecha_fin, reductor, escala, extra)
+        with self._candado_clave(clave):
+            entrada = self.obtener(clave, permitir_vencida=True)
+            if entrada is not None and not entrada["vencida"]:
+                self._contar("aciertos")
+                return entrada["valor"]
+            if entrada is not None:
+                self._contar("vencidas")
+            if self.sin_conexion or calcular is None:
+                if entrada is not None:
+                    self._contar("vencidas_servidas")
+                    return entrada["valor"]
+                self._contar("fallos")
+                raise ErrorSinCache(f"Sin datos en caché para {coleccion} ({fecha_inicio} a {fecha_fin})")
+            self._contar("fallos")
+            valor = calcular()
+            consulta = {"coleccion": coleccion, "fecha_inicio": str(fecha_inicio), "fecha_fin": str(fecha_fin),
+                        "reductor": reductor, "escala": escala}
+            self.guardar(clave, valor, consulta, ttl_s)
+            return json.loads(json.dumps(valor, default=_a_json))
+
+    def _archivos(self) -> List[os.DirEntry]:
+        """Archivos de entradas (sin temporales de escritura)"""
+        try:
+            return [a for a in os.scandir(self.directorio)
+                    if not a.name.startswith(".") and a.name.endswith(".json")]
+        except OSError:
+            return []
+
+    def _tamanos(self) -> List[int]:
+        """Tamaño de cada entrada (solo os.stat, sin leer los archivos)"""
+        tamanos = []
+        for archivo in self._archivos():
+            try:
+                tamanos.append(archivo.stat().st_size)
+            except OSError:
+                continue
+        return tamanos
+
+    def ocupacion(self) -> int:
+        """Bytes ocupados por las entradas"""
+        return sum(self._tamanos())
+
+    def entradas(self) -> List[Dict]:
+        """Entradas con su tamaño, último uso y vencimiento"""
+        lista = []
+        for archivo in sorted(self._archivos(), key=lambda a: a.name):
+            try:
+                estado = archivo.stat()
+                with open(archivo.path, encoding="utf-8") as f:
+                    expira = json.load(f)["expira"]
+                lista.append({"clave": archivo.name[:-5], "bytes": estado.st_size,
+                              "ultimo_uso": estado.st_mtime, "expira": expira})
+            except (OSError, ValueError, KeyError):
+                continue
+        return lista
+
+    def limpiar(self, max_bytes: Optional[int] = None) -> List[str]:
+        """
+        Elimina las entradas vencidas si se supera el límite y luego las
+        menos usadas hasta quedar bajo max_bytes
+
+        Bajo el límite solo se consulta el tamaño de los archivos; las
+        entradas se leen únicamente cuando hay que desalojar.
+        """
+        limite = self.max_bytes if max_bytes is None else max_bytes
+        if self.ocupacion() <= limite:
+            return []
+        entradas = self.entradas()
+        total = sum(e["bytes"] for e in entradas)
+        if total <= limite:
+            return []
+        ahora = time.time()
+        entradas.sort(key=lambda e: (e["expira"] > ahora, e["ultimo_uso"]))
+        eliminadas = []
+        for entrada in entradas:
+            if total <= limite:
+                break
+            try:
+                os.remove(self._ruta(entrada["clave"]))
+            except OSError:
+                continue
+            total -= entrada["bytes"]
+            eliminadas.append(entrada["clave"])
+        self._contar("desalojadas", len(eliminadas))
+        return eliminadas
+
+    def estadisticas(self) -> Dict:
+        """Contadores de uso y ocupación de la caché"""
+        with self._candado:
+            contadores = dict(self._contadores)
+        consultas = contadores["aciertos"] + contadores["fallos"] + contadores["vencidas_servidas"]
+        tamanos = self._tamanos()
+        return {
+            **contadores,
+            "consultas": consultas,
+            "tasa_aciertos": round(contadores["aciertos"] / consultas, 3) if consultas else 0.0,
+            "entradas": len(tamanos),
+            "bytes": sum(tamanos),
+            "sin_conexion": self.sin_conexion
+        }
+
+_CACHES_COMPARTIDAS = {}
+_CANDADO_COMPARTIDAS = threading.Lock()
+
+def cache_compartido(directorio: str = "cache_satelital", **opciones) -> CacheConsultasSatelitales:
+    """Una caché por directorio y proceso (sus estadísticas sobreviven a las recargas de la app)"""
+    with _CANDADO_COMPARTIDAS:
+        cache = _CACHES_COMPARTIDAS.get(os.path.abspath(directorio))
+        if cache is None:
+            cache = CacheConsultasSatelitales(directorio, **opciones)
+            _CACHES_COMPARTIDAS[os.path.abspath(directorio)] = cache
+        elif "sin_conexion" in opciones:
+            cache.sin_conexion = opciones["sin_conexion"]
+        return cache
+
+if __name__ == "__main__":
+    # Prueba del módulo con el sustituto local de Earth Engine
+    from MODULO_EE_LOCAL import EELocal
+
+    ee = EELocal()
+    cache = CacheConsultasSatelitales(os.path.join(tempfile.mkdtemp(), "cache"))
+    punto = ee.Geometry.Point([-70.1234, -15.2345])
+
+    def ndvi_mediano():
+        return ee.ImageCollection('COPERNICUS/S2_SR').filterDate('2023-01-01', '2023-12-31') \
+            .filter(ee.Filter.lt('CLOUDY_PIXEL_PERCENTAGE', 20)).median() \
+            .normalizedDifference(['B8', 'B4']).rename('NDVI') \
+            .reduceRegion(ee.Reducer.mean(), punto, 30).getInfo()
+
+    for _ in range(3):
+        inicio = time.perf_counter()
+        valor = cache.consultar('COPERNICUS/S2_SR', punto, '2023-01-01', '2023-12-31', ndvi_mediano)
+        print(f"NDVI {valor['NDVI']:.3f} en {(time.perf_counter() - inicio) * 1000:.1f} ms")
+    print(cache.estadisticas())
@@ -0,0 +1,231 @@
+"""
+MÓDULO CALIBRACIÓN CBR - CORRELACIÓN NDVI → CBR CON ENSAYOS DE CAMPO
+=====================================================================
+
+Calibración regional de la correlación satelital de la subrasante:
+- Lectura de ensayos CBR de laboratorio con coordenadas (lista, DataFrame o CSV)
+- Índices satelitales colocalizados (NDVI, humedad) desde el almacén
+  local de series (MODULO_SERIES_SATELITALES)
+- Ajuste por mínimos cuadrados de todos los modelos candidatos y de
+  todos los pliegues de validación cruzada en una sola pasada matricial
+- Publicación de la correlación elegida para MODULO_CLASIFICACION_SUBRASANTE
+
+Autor: IA Assistant - Especialista UNI
+Fecha: 2024
+"""
+
+import numpy as np
+import pandas as pd
+import json
+import os
+import time
+from typing import Dict, List, Tuple, Optional
+
+from MODULO_CLASIFICACION_SUBRASANTE import ARCHIVO_CALIBRACION, TABLA_NDVI_CBR, aplicar_tabla, matriz_regresion
+
+# Modelos candidatos: términos y respuesta ("lineal" = CBR, "log" = ln CBR)
+MODELOS_CANDIDATOS = {
+    "lineal": {"terminos": ["1", "ndvi"], "respuesta": "lineal"},
+    "cuadratico": {"terminos": ["1", "ndvi", "ndvi2"], "respuesta": "lineal"},
+    "exponencial": {"terminos": ["1", "ndvi"], "respuesta": "log"},
+    "exponencial_cuadratico": {"terminos": ["1", "ndvi", "ndvi2"], "respuesta": "log"},
+    "lineal_humedad": {"terminos": ["1", "ndvi", "humedad"], "respuesta": "lineal"},
+    "exponencial_humedad": {"terminos": ["1", "ndvi", "humedad", "ndvi_humedad"], "respuesta": "log"}
+}
+
+# Nombres aceptados para las columnas de los ensayos
+ALIAS_COLUMNAS = {"lon": ("lon", "longitud", "x"), "lat": ("lat", "latitud", "y"),
+                  "CBR": ("CBR", "cbr", "CBR_lab", "cbr_laboratorio")}
+
+def leer_ensayos_cbr(origen) -> pd.DataFrame:
+    """
+    Ensayos CBR de campo con columnas lon, lat y CBR (%)
+
+    Parámetros:
+    - origen: ruta CSV, DataFrame o lista de dicts/tuplas (lon, lat, CBR)
+    """
+    if isinstance(origen, str):
+        ensayos = pd.read_csv(origen)
+    elif isinstance(origen, pd.DataFrame):
+        ensayos = origen.copy()
+    elif origen and not isinstance(origen[0], dict):
+        ensayos = pd.DataFrame([tuple(e)[:3] for e in origen], columns=["lon", "lat", "CBR"])
+    else:
+        ensayos = pd.DataFrame(list(origen))
+
+    renombres = {}
+    for nombre, alias in ALIAS_COLUMNAS.items():
+        encontrado = next((a for a in alias if a in ensayos.columns), None)
+        if encontrado is None:
+            raise ValueError(f"Falta la columna '{nombre}' en los ensayos")
+        renombres[encontrado] = nombre
+    ensayos = ensayos.rename(columns=renombres)
+    for columna in ("lon", "lat", "CBR"):
+        ensayos[columna] = pd.to_numeric(ensayos[columna], errors="coerce")
+    ensayos = ensayos.dropna(subset=["lon", "lat", "CBR"])
+    return ensayos[ensayos["CBR"] > 0].reset_index(drop=True)
+
+def indices_colocalizados(almacen, ensayos: pd.DataFrame, fecha_inicio: str, fecha_fin: str,
+                          variables: Tuple[str, ...] = ("ndvi", "humedad_suelo")) -> pd.DataFrame:
+    """Ensayos con la media del período de cada variable en su píxel"""
+    puntos = ensayos[["lon", "lat"]].to_numpy(dtype=float)
+    resultado = ensayos.copy()
+    for variable in variables:
+        resultado[variable] = almacen.valores_puntos(variable, puntos, fecha_inicio, fecha_fin)["media"]
+    return resultado
+
+def pliegues_validacion(n: int, pliegues: int = 5, semilla: int = 0) -> np.ndarray:
+    """Pliegue (0..pliegues-1) de cada muestra, balanceado y reproducible"""
+    pliegues = max(2, min(pliegues, n))
+    return np.random.default_rng(semilla).permutation(np.arange(n) % pliegues)
+
+def _metricas(observado: np.ndarray, estimado: np.ndarray) -> Dict[str, np.ndarray]:
+    """RMSE, MAE y R² de cada fila de estimado contra observado"""
+    error = estimado - observado
+    total = ((observado - observado.mean()) ** 2).sum()
+    return {"rmse": np.sqrt((error ** 2).mean(axis=-1)), "mae": np.abs(error).mean(axis=-1),
+            "r2": 1 - (error ** 2).sum(axis=-1) / total if total > 0 else np.full(error.shape[:-1], np.nan)}
+
+def ajustar_modelos(ndvi, cbr, humedad=None, modelos: Optional[Dict] = None, pliegues: int = 5,
+                    semilla: int = 0, regularizacion: float = 1e-9) -> Dict:
+    """
+    Ajusta todos los modelos candidatos con validación cruzada k-pliegues
+
+    Cada modelo es una máscara sobre la matriz común de términos; las
+    ecuaciones normales de modelos × (pliegues + ajuste completo) se
+    resuelven juntas. Los modelos con humedad se descartan si falta o no
+    varía entre ensayos.
+
+    Devuelve por modelo RMSE, MAE y R² de validación cruzada (en CBR),
+    R² del ajuste completo y coeficientes, más el nombre del mejor
+    (menor RMSE de validación).
+    """
+    modelos = dict(modelos or MODELOS_CANDIDATOS)
+    ndvi = np.asarray(ndvi, dtype=float)
+    cbr = np.asarray(cbr, dtype=float)
+    humedad = np.full(ndvi.shape, np.nan) if humedad is None else np.asarray(humedad, dtype=float)
+    validos = np.isfinite(ndvi) & np.isfinite(cbr) & (cbr > 0)
+    con_humedad = validos & np.isfinite(humedad)
+    humedad_util = con_humedad.any() and con_humedad.sum() == validos.sum() and np.std(humedad[con_humedad]) > 1e-6
+    if not humedad_util:
+        modelos = {n: m for n, m in modelos.items() if not any("humedad" in t for t in m["terminos"])}
+    ndvi, cbr, humedad = ndvi[validos], cbr[validos], humedad[validos]
+    maximo_terminos = max(len(m["terminos"]) for m in modelos.values())
+    if len(cbr) < maximo_terminos + 2:
+        raise ValueError(f"Se necesitan al menos {maximo_terminos + 2} ensayos con NDVI válido")
+
+    nombres = list(modelos)
+    terminos = list(dict.fromkeys(t for m in modelos.values() for t in m["terminos"]))
+    X = matriz_regresion(ndvi, humedad, terminos)                       # (n, T)
+    mascara = np.array([[t in modelos[m]["terminos"] for t in terminos] for m in nombres], dtype=float)
+    logaritmico = np.array([modelos[m]["respuesta"] == "log" for m in nombres])
+    Y = np.where(logaritmico[:, None], np.log(cbr)[None, :], cbr[None, :])  # (M, n)
+
+    # Pesos: un conjunto de entrenamiento por pliegue y el ajuste completo al final
+    pliegue = pliegues_validacion(len(cbr), pliegues, semilla)
+    k = pliegue.max() + 1
+    W = np.vstack([(pliegue != f).astype(float) for f in range(k)] + [np.ones(len(cbr))])  # (F, n)
+
+    escala = np.maximum(np.abs(X).max(axis=0), 1e-12)
+    Xn = X / escala
+    XtWX = np.einsum("fn,ni,nj->fij", W, Xn, Xn)                        # (F, T, T)
+    par = mascara[:, :, None] * mascara[:, None, :]                     # (M, T, T)
+    identidad = np.eye(len(terminos))
+    A = XtWX[None] * par[:, None] + (identidad * (1 - mascara)[:, None, :])[:, None] \
+        + regularizacion * identidad
+    b = np.einsum("fn,ni,mn->mfi", W, Xn, Y) * mascara[:, None, :]      # (M, F, T)
+    coeficientes = np.linalg.solve(A, b[..., None])[..., 0] / escala    # (M, F, T)
+
+    estimado = np.einsum("ni,mfi->mfn", X, coeficientes)
+    estimado = np.where(logaritmico[:, None, None], np.exp(estimado), estimado)
+    validacion = estimado[:, pliegue, np.arange(len(cbr))]              # (M, n) fuera de pliegue
+    cv = _metricas(cbr, validacion)
+    completo = _metricas(cbr, estimado[:, -1])
+
+    tabla_actual = _metricas(cbr, aplicar_tabla(ndvi, TABLA_NDVI_CBR)[None])
+    resultados = {}
+    for i, nombre in enumerate(nombres):
+        usados = mascara[i] > 0
+        resultados[nombre] = {
+            "terminos": [t for t, u in zip(terminos, usados) if u],
+            "respuesta": modelos[nombre]["respuesta"],
+            "coeficientes": [float(c) for c in coeficientes[i, -1][usados]],
+            "rmse_cv": round(float(cv["rmse"][i]), 3),
+            "mae_cv": round(float(cv["mae"][i]), 3),
+            "r2_cv": round(float(cv["r2"][i]), 4),
+            "r2": round(float(completo["r2"][i]), 4)
+        }
+    mejor = min(resultados, key=lambda m: resultados[m]["rmse_cv"])
+    return {
+        "modelos": resultados,
+        "mejor": mejor,
+        "tabla_actual": {"rmse": round(float(tabla_actual["rmse"][0]), 3),
+                         "r2": round(float(tabla_actual["r2"][0]), 4)},
+        "ensayos": int(len(cbr)),
+        "pliegues": int(k),
+        "rango_ndvi": [round(float(ndvi.min()), 4), round(float(ndvi.max()), 4)],
+        "rango_cbr": [round(float(cbr.min()), 2), round(float(cbr.max()), 2)]
+    }
+
+def tabla_desde_modelo(ajuste: Dict, nombre: Optional[str] = None) -> Dict:
+    """Tabla de modo "regresion" para cbr_desde_ndvi (MODULO_CLASIFICACION_SUBRASANTE)"""
+    modelo = ajuste["modelos"][nombre or ajuste["mejor"]]
+    return {"modo": "regresion", "modelo": nombre or ajuste["mejor"], "terminos": modelo["terminos"],
+            "coeficientes": modelo["coeficientes"], "respuesta": modelo["respuesta"],
+            "rango_ndvi": ajuste["rango_ndvi"], "cbr_minimo": 1.0}
+
+def publicar_calibracion(calibracion: Dict, ruta: str = ARCHIVO_CALIBRACION) -> str:
+    """Escribe la correlación calibrada (reemplazo atómico) para cargar_tabla_cbr"""
+    contenido = {key: calibracion[key] for key in ("tabla", "modelos", "mejor", "tabla_actual", "ensayos",
+                                                   "pliegues", "periodo") if key in calibracion}
+    temporal = f"{ruta}.tmp"
+    with open(temporal, "w", encoding="utf-8") as f:
+        json.dump(contenido, f, indent=2, ensure_ascii=False)
+    os.replace(temporal, ruta)
+    return ruta
+
+def calibrar_region(almacen, ensayos, fecha_inicio: str, fecha_fin: str, pliegues: int = 5,
+                    modelos: Optional[Dict] = None, publicar: Optional[str] = None) -> Dict:
+    """
+    Calibración completa de una región: ensayos → índices colocalizados →
+    ajuste con validación cruzada → tabla (y archivo si se pide publicar)
+
+    Parámetros:
+    - almacen: AlmacenSeriesSatelitales con NDVI (y humedad) ingeridos
+    - ensayos: ver leer_ensayos_cbr
+    - fecha_inicio, fecha_fin: período de los índices (inclusive)
+    - publicar: ruta del JSON de calibración (None = no escribir)
+    """
+    inicio = time.perf_counter()
+    try:
+        muestras = indices_colocalizados(almacen, leer_ensayos_cbr(ensayos), fecha_inicio, fecha_fin)
+        ajuste = ajustar_modelos(muestras["ndvi"], muestras["CBR"], muestras.get("humedad_suelo"),
+                                 modelos, pliegues)
+        calibracion = {**ajuste, "tabla": tabla_desde_modelo(ajuste), "muestras": muestras,
+                       "periodo": [fecha_inicio, fecha_fin]}
+        if publicar:
+            calibracion["archivo"] = publicar_calibracion(calibracion, publicar)
+        calibracion["tiempo_s"] = round(time.perf_counter() - inicio, 3)
+        calibracion["estado"] = "✅ Correlación NDVI-CBR calibrada"
+        return calibracion
+    except Exception as e:
+        return {"error": str(e), "estado": "❌ Error en calibración NDVI-CBR"}
+
+if __name__ == "__main__":
+    # Prueba del módulo
+    import tempfile
+    from MODULO_EE_LOCAL import EELocal
+    from MODULO_SERIES_SATELITALES import AlmacenSeriesSatelitales
+
+    almacen = AlmacenSeriesSatelitales(os.path.join(tempfile.mkdtemp(), "series"))
+    almacen.ingerir_variables(EELocal(), (-70.135, -15.245, -70.112, -15.224), "2023-04-01", "2023-10-01",
+                              ["ndvi", "humedad_suelo"])
+    rng = np.random.default_rng(7)
+    puntos = np.column_stack([rng.uniform(-70.129, -70.118, 30), rng.uniform(-15.239, -15.230, 30)])
+    ndvi = almacen.valores_puntos("ndvi", puntos, "2023-04-01", "2023-09-30")["media"]
+    cbr = np.exp(0.9 + 3.2 * ndvi) * rng.lognormal(0, 0.08, 30)
+    calibracion = calibrar_region(almacen, np.column_stack([puntos, cbr]).tolist(), "2023-04-01", "2023-09-30")
+    print(f"{calibracion['estado']} con {calibracion['ensayos']} ensayos en {calibracion['tiempo_s']} s")
+    for nombre, modelo in calibracion["modelos"].items():
+        print(f"  {nombre}: RMSE CV {modelo['rmse_cv']}, R² CV {modelo['r2_cv']}")
+    print(f"Mejor: {calibracion['mejor']}; tabla actual RMSE {calibracion['tabla_actual']['rmse']}")
@@ -0,0 +1,247 @@
+"""
+MÓDULO CAMBIOS - DETECCIÓN MULTITEMPORAL DE ASENTAMIENTOS
+=========================================================
+
+Comparación de dos levantamientos LiDAR del mismo bloque (antes y
+después de la obra) para monitoreo de asentamientos:
+- Corregistro de ambos MDT en una grilla común (intersección de huellas,
+  remuestreo bilineal) con corrección robusta del sesgo vertical
+- Diferencia de elevaciones con nivel de detección (LoD) por celda:
+  error vertical de cada época más el error horizontal y de
+  interpolación propagado por la pendiente
+- Zonas de asentamiento y levantamiento por componentes conexas
+  etiquetadas tesela a tesela (MODULO_ZONAS), con memoria acotada para
+  comparar épocas de toda la ciudad
+
+Autor: IA Assistant - Especialista UNI
+Fecha: 2024
+"""
+
+import numpy as np
+import time
+from statistics import NormalDist
+from typing import Dict, List, Tuple, Optional
+
+from MODULO_SECCIONES import muestrear_bilineal
+from MODULO_ZONAS import etiquetar_por_teselas
+
+CLASE_ASENTAMIENTO = 1
+CLASE_LEVANTAMIENTO = 2
+TIPOS_CAMBIO = {CLASE_ASENTAMIENTO: "Asentamiento", CLASE_LEVANTAMIENTO: "Levantamiento"}
+
+def grilla_comun(dtm_anterior: Dict, dtm_posterior: Dict, resolucion: Optional[float] = None) -> Dict:
+    """
+    Grilla común sobre la intersección de las huellas de ambos MDT
+
+    Por defecto usa la resolución más gruesa de las dos épocas; el
+    origen coincide con el borde de la intersección.
+    """
+    bordes = []
+    for dtm in (dtm_anterior, dtm_posterior):
+        x = dtm['X_grid'][0, :]
+        y = dtm['Y_grid'][:, 0]
+        r = dtm['resolution']
+        bordes.append((x[0] - r / 2, y[0] - r / 2, x[-1] + r / 2, y[-1] + r / 2))
+    bordes = np.array(bordes)
+    x_min, y_min = bordes[:, :2].max(axis=0)
+    x_max, y_max = bordes[:, 2:].min(axis=0)
+    resolucion = resolucion or max(dtm_anterior['resolution'], dtm_posterior['resolution'])
+    nx = int(np.floor((x_max - x_min) / resolucion + 1e-9))
+    ny = int(np.floor((y_max - y_min) / resolucion + 1e-9))
+    if nx < 1 or ny < 1:
+        raise ValueError("Los MDT de las dos épocas no se superponen")
+    return {"x_min": float(x_min), "y_min": float(y_min), "resolucion": float(resolucion),
+            "nx": nx, "ny": ny}
+
+def _centros(grilla: Dict, f0: int, f1: int, c0: int, c1: int) -> np.ndarray:
+    """Coordenadas (filas × columnas × 2) de los centros de celda de una ventana"""
+    r = grilla["resolucion"]
+    x = grilla["x_min"] + (np.arange(c0, c1) + 0.5) * r
+    y = grilla["y_min"] + (np.arange(f0, f1) + 0.5) * r
+    xx, yy = np.meshgrid(x, y)
+    return np.stack([xx, yy], axis=-1)
+
+def estimar_sesgo_vertical(dtm_anterior: Dict, dtm_posterior: Dict, grilla: Dict,
+                           muestras: int = 200000, iteraciones: int = 5) -> Tuple[float, float]:
+    """
+    Sesgo vertical entre épocas (mediana robusta de la diferencia en una
+    muestra de celdas, descartando cambios reales por 3·MAD)
+
+    Devuelve (sesgo_m, dispersión_m) con la dispersión como MAD escalada.
+    """
+    rng = np.random.default_rng(0)
+    n = min(muestras, grilla["nx"] * grilla["ny"])
+    celdas = rng.choice(grilla["nx"] * grilla["ny"], n, replace=False)
+    r = grilla["resolucion"]
+    xy = np.column_stack([grilla["x_min"] + (celdas % grilla["nx"] + 0.5) * r,
+                          grilla["y_min"] + (celdas // grilla["nx"] + 0.5) * r])
+    dz = muestrear_bilineal(dtm_posterior, xy) - muestrear_bilineal(dtm_anterior, xy)
+    dz = dz[np.isfinite(dz)]
+    if dz.size == 0:
+        return 0.0, 0.0
+    estables = dz
+    for _ in range(iteraciones):
+        sesgo = float(np.median(estables))
+        mad = 1.4826 * float(np.median(np.abs(estables - sesgo)))
+        seleccion = dz[np.abs(dz - sesgo) <= max(3 * mad, 1e-6)]
+        if seleccion.size == estables.size:
+            break
+        estables = seleccion
+    return sesgo, mad
+
+def _varianza_epoca(dtm: Dict, xy_halo: np.ndarray, resolucion: float, sigma: float,
+                    error_horizontal_m: float) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Cotas y varianza vertical de una época en una ventana con halo de una
+    celda: σ² = σ_v² + (pendiente · (e_h + distancia a la muestra))²
+    """
+    z = muestrear_bilineal(dtm, xy_halo)
+    gy, gx = np.gradient(z, resolucion)
+    pendiente = np.hypot(gx, gy)[1:-1, 1:-1]
+    # Halo fuera de la huella: diferencias unilaterales dentro de la ventana
+    sin_halo = np.isnan(pendiente)
+    if np.any(sin_halo) and min(z.shape) > 3:
+        gy, gx = np.gradient(z[1:-1, 1:-1], resolucion)
+        pendiente[sin_halo] = np.hypot(gx, gy)[sin_halo]
+    distancia = error_horizontal_m
+    if 'distancia_muestra' in dtm:
+        capa = dict(dtm, Z_grid=dtm['distancia_muestra'])
+        distancia = error_horizontal_m + np.nan_to_num(muestrear_bilineal(capa, xy_halo[1:-1, 1:-1]))
+    varianza = sigma ** 2 + (np.nan_to_num(pendiente) * distancia) ** 2
+    return z[1:-1, 1:-1], varianza
+
+def detectar_cambios(dtm_anterior: Dict, dtm_posterior: Dict, resolucion: Optional[float] = None,
+                     sigma_anterior: float = 0.05, sigma_posterior: float = 0.05,
+                     error_horizontal_m: float = 0.0, confianza: float = 0.95,
+                     corregir_sesgo: bool = True, area_minima_m2: float = 1.0,
+                     conectividad: int = 8, tesela: int = 1024,
+                     devolver_grilla: bool = False) -> Dict:
+    """
+    Detección de asentamientos y levantamientos entre dos épocas
+
+    Parámetros:
+    - dtm_anterior, dtm_posterior: MDT de cada época (formato del
+      proyecto; pueden ser capas en memoria mapeada de CacheRaster). Si
+      traen la capa 'distancia_muestra' (MODULO_INTERPOLACION), se suma
+      al error horizontal.
+    - resolucion: Celda de la grilla común (None = la más gruesa)
+    - sigma_anterior, sigma_posterior: Error vertical de cada época (m)
+    - error_horizontal_m: Error de georreferenciación horizontal (m)
+    - confianza: Nivel de confianza del LoD (0.95 → 1.96·σ)
+    - corregir_sesgo: Restar el sesgo vertical robusto entre épocas
+    - area_minima_m2: Zonas menores no se listan
+    - tesela: Celdas por lado de cada tesela procesada
+
+    Un cambio es significativo si |dz| > LoD = t·√(σ₁² + σ₂²). Los
+    volúmenes e incertidumbres se acumulan solo en celdas significativas.
+    """
+    try:
+        inicio = time.perf_counter()
+        grilla = grilla_comun(dtm_anterior, dtm_posterior, resolucion)
+        r = grilla["resolucion"]
+        area_celda = r * r
+        sesgo, dispersion = (estimar_sesgo_vertical(dtm_anterior, dtm_posterior, grilla)
+                             if corregir_sesgo else (0.0, 0.0))
+        t = NormalDist().inv_cdf(0.5 + confianza / 2)
+        totales = {"celdas_validas": 0, "suma_lod": 0.0}
+        if devolver_grilla:
+            diferencia = np.full((grilla["ny"], grilla["nx"]), np.nan)
+            lod_grilla = np.full((grilla["ny"], grilla["nx"]), np.nan)
+
+        def clases_tesela(f0: int, f1: int, c0: int, c1: int):
+            xy = _centros(grilla, f0 - 1, f1 + 1, c0 - 1, c1 + 1)
+            z1, var1 = _varianza_epoca(dtm_anterior, xy, r, sigma_anterior, error_horizontal_m)
+            z2, var2 = _varianza_epoca(dtm_posterior, xy, r, sigma_posterior, error_horizontal_m)
+            dz = z2 - z1 - sesgo
+            lod = t * np.sqrt(var1 + var2)
+            validas = np.isfinite(dz)
+            totales["celdas_validas"] += int(validas.sum())
+            totales["suma_lod"] += float(lod[validas].sum())
+            clase = np.zeros(dz.shape, dtype=np.int8)
+            clase[validas & (dz < -lod)] = CLASE_ASENTAMIENTO
+            clase[validas & (dz > lod)] = CLASE_LEVANTAMIENTO
+            if devolver_grilla:
+                diferencia[f0:f1, c0:c1] = dz
+                lod_grilla[f0:f1, c0:c1] = lod
+            return clase, {"dz": np.nan_to_num(dz), "varianza": var1 + var2}
+
+        componentes = etiquetar_por_teselas(grilla["ny"], grilla["nx"], clases_tesela, tesela,
+                                            conectividad, devolver_grilla)
+
+        zonas = []
+        volumen = {CLASE_ASENTAMIENTO: 0.0, CLASE_LEVANTAMIENTO: 0.0}
+        area = {CLASE_ASENTAMIENTO: 0.0, CLASE_LEVANTAMIENTO: 0.0}
+        for i in range(componentes["total"]):
+            clase = int(componentes["clase"][i])
+            celdas = int(componentes["celdas"][i])
+            volumen[clase] += float(componentes["suma_dz"][i]) * area_celda
+            area[clase] += celdas * area_celda
+            if celdas * area_celda < area_minima_m2:
+                continue
+            f_min, f_max, c_min, c_max = componentes["caja"][i]
+            extremo = componentes["min_dz"][i] if clase == CLASE_ASENTAMIENTO else componentes["max_dz"][i]
+            zonas.append({
+                "id": i + 1,
+                "tipo": TIPOS_CAMBIO[clase],
+                "celdas": celdas,
+                "area_m2": round(celdas * area_celda, 2),
+                "volumen_m3": round(float(componentes["suma_dz"][i]) * area_celda, 3),
+                "incertidumbre_volumen_m3": round(float(np.sqrt(componentes["suma_varianza"][i])) * area_celda, 3),
+                "dz_medio_m": round(float(componentes["suma_dz"][i]) / celdas, 4),
+                "dz_extremo_m": round(float(extremo), 4),
+                "centroide": (round(float(grilla["x_min"] + (componentes["suma_columna"][i] / celdas + 0.5) * r), 3),
+                              round(float(grilla["y_min"] + (componentes["suma_fila"][i] / celdas + 0.5) * r), 3)),
+                "bbox": (round(float(grilla["x_min"] + c_min * r), 3), round(float(grilla["y_min"] + f_min * r), 3),
+                         round(float(grilla["x_min"] + (c_max + 1) * r), 3), round(float(grilla["y_min"] + (f_max + 1) * r), 3))
+            })
+        zonas.sort(key=lambda zona: -abs(zona["volumen_m3"]))
+
+        resultado = {
+            "grilla": grilla,
+            "sesgo_vertical_m": round(sesgo, 4),
+            "dispersion_estable_m": round(dispersion, 4),
+            "lod_medio_m": round(totales["suma_lod"] / max(totales["celdas_validas"], 1), 4),
+            "area_comparada_m2": round(totales["celdas_validas"] * area_celda, 2),
+            "area_asentamiento_m2": round(area[CLASE_ASENTAMIENTO], 2),
+            "area_levantamiento_m2": round(area[CLASE_LEVANTAMIENTO], 2),
+            "volumen_asentamiento_m3": round(-volumen[CLASE_ASENTAMIENTO], 3),
+            "volumen_levantamiento_m3": round(volumen[CLASE_LEVANTAMIENTO], 3),
+            "volumen_neto_m3": round(volumen[CLASE_ASENTAMIENTO] + volumen[CLASE_LEVANTAMIENTO], 3),
+            "zonas": zonas,
+            "total_zonas": len(zonas),
+            "teselas": componentes["teselas"],
+            "tiempo_s": round(time.perf_counter() - inicio, 3),
+            "estado": "✅ Detección de cambios completada"
+        }
+        if devolver_grilla:
+            resultado.update({"diferencia": diferencia, "lod": lod_grilla,
+                              "etiquetas": componentes["etiquetas"]})
+        return resultado
+
+    except Exception as e:
+        return {
+            "error": str(e),
+            "estado": "❌ Error en detección de cambios"
+        }
+
+if __name__ == "__main__":
+    # Prueba del módulo: 2 km × 1 km de ciudad, con asentamiento tras la obra
+    rng = np.random.default_rng(0)
+    resolucion = 0.5
+    x = np.arange(0, 2000, resolucion) + 0.25
+    y = np.arange(0, 1000, resolucion) + 0.25
+    X, Y = np.meshgrid(x, y)
+    Z = 3850 + 0.01 * X + 2 * np.sin(Y / 150)
+    antes = {'X_grid': X, 'Y_grid': Y, 'Z_grid': Z + rng.normal(0, 0.02, Z.shape), 'resolution': resolucion}
+    despues_z = (Z + 0.04 - 0.12 * np.exp(-((X - 800) ** 2 + (Y - 400) ** 2) / 30 ** 2)
+                 + 0.08 * np.exp(-((X - 1500) ** 2 + (Y - 700) ** 2) / 15 ** 2))
+    despues = {'X_grid': X, 'Y_grid': Y, 'Z_grid': despues_z + rng.normal(0, 0.02, Z.shape),
+               'resolution': resolucion}
+    resultado = detectar_cambios(antes, despues, sigma_anterior=0.02, sigma_posterior=0.02,
+                                 area_minima_m2=10.0)
+    print(f"{resultado['estado']}: {resultado['area_comparada_m2'] / 1e4:.0f} ha en "
+          f"{resultado['tiempo_s']} s ({resultado['teselas']} teselas)")
+    print(f"   Sesgo vertical corregido: {resultado['sesgo_vertical_m']} m, LoD medio {resultado['lod_medio_m']} m")
+    for zona in resultado["zonas"][:5]:
+        print(f"   {zona['tipo']}: {zona['area_m2']} m², {zona['volumen_m3']} ± "
+              f"{zona['incertidumbre_volumen_m3']} m³, extremo {zona['dz_extremo_m']} m en {zona['centroide']}")
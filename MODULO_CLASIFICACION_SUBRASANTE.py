@@ -0,0 +1,273 @@
+"""
+MÓDULO CLASIFICACIÓN SUBRASANTE - NDVI Y HUMEDAD A CBR Y k
+==========================================================
+
+Clasificación vectorizada y determinista de la subrasante:
+- Tablas de cortes configurables (escalón o interpolación lineal) para
+  NDVI → CBR, humedad del suelo → factor de reducción del CBR y
+  NDVI → tipo de suelo
+- Rásters de CBR (%), módulo de reacción k (MPa/m, k = 10 × CBR) y
+  categoría de subrasante (S0 a S5, MTC Suelos y Pavimentos) en una pasada
+- Mapa de resistencia de subrasante del área de proyecto desde Earth
+  Engine (o el sustituto local), con áreas por categoría
+- Correlaciones calibradas con ensayos de campo (MODULO_CALIBRACION_CBR)
+  publicadas como tablas de modo "regresion"
+
+Autor: IA Assistant - Especialista UNI
+Fecha: 2024
+"""
+
+import numpy as np
+import copy
+import json
+import math
+import os
+from typing import Dict, List, Tuple, Optional
+
+# NDVI → CBR (%): un valor menor que el corte i toma valores[i]
+TABLA_NDVI_CBR = {"cortes": [0.2, 0.3, 0.4, 0.5, 0.6], "valores": [2.0, 3.5, 5.0, 7.0, 9.0, 12.0],
+                  "modo": "escalon"}
+
+# Humedad superficial (m³/m³) → factor sobre el CBR (suelo saturado pierde capacidad)
+TABLA_HUMEDAD_FACTOR = {"cortes": [0.15, 0.25, 0.35], "valores": [1.0, 0.9, 0.75, 0.6], "modo": "escalon"}
+
+# NDVI → tipo de suelo del análisis satelital; CBR = centro del rango de cada tipo
+TIPOS_SUELO_NDVI = {
+    "cortes": [0.2, 0.4, 0.6],
+    "tipos": [
+        {"tipo_suelo": "Suelo desértico/rocoso", "CBR_estimado": 11.5, "capacidad_portante": "Alta",
+         "recomendacion": "Suelo estable, adecuado para pavimentos"},
+        {"tipo_suelo": "Suelo volcánico/pobre", "CBR_estimado": 5.5, "capacidad_portante": "Media-baja",
+         "recomendacion": "Requiere estabilización previa"},
+        {"tipo_suelo": "Suelo aluvial/medio", "CBR_estimado": 14.0, "capacidad_portante": "Media",
+         "recomendacion": "Adecuado con compactación"},
+        {"tipo_suelo": "Suelo orgánico/rico", "CBR_estimado": 4.0, "capacidad_portante": "Baja",
+         "recomendacion": "Requiere excavación y reemplazo"}
+    ]
+}
+
+# Categorías de subrasante por CBR (MTC, Manual de Suelos y Pavimentos)
+CATEGORIAS_SUBRASANTE = {
+    "cortes": [3.0, 6.0, 10.0, 20.0, 30.0],
+    "nombres": ["S0 Inadecuada", "S1 Insuficiente", "S2 Regular", "S3 Buena", "S4 Muy buena", "S5 Excelente"]
+}
+
+FACTOR_K_CBR = 10.0  # k (MPa/m) = 10 × CBR
+
+# Correlación publicada por la calibración de campo
+ARCHIVO_CALIBRACION = "calibracion_ndvi_cbr.json"
+
+# Tablas publicadas ya leídas: ruta absoluta → ((mtime_ns, tamaño), tabla)
+_tablas_publicadas: Dict[str, Tuple[Tuple[int, int], Dict]] = {}
+
+# Términos de las regresiones NDVI (y humedad) → CBR
+TERMINOS_REGRESION = {
+    "1": lambda ndvi, humedad: np.ones_like(ndvi),
+    "ndvi": lambda ndvi, humedad: ndvi,
+    "ndvi2": lambda ndvi, humedad: ndvi ** 2,
+    "humedad": lambda ndvi, humedad: humedad,
+    "ndvi_humedad": lambda ndvi, humedad: ndvi * humedad
+}
+
+def indice_tabla(valores, cortes: List[float]) -> np.ndarray:
+    """Índice de clase de cada valor: menor que cortes[i] → i (NaN → -1)"""
+    valores = np.asarray(valores, dtype=float)
+    indice = np.searchsorted(np.asarray(cortes, dtype=float), valores, side="right")
+    return np.where(np.isnan(valores), -1, indice)
+
+def aplicar_tabla(valores, tabla: Dict) -> np.ndarray:
+    """
+    Valor de la tabla para cada elemento: escalón (cortes/valores con un
+    valor más que cortes) o lineal (valores en los cortes, extremos fijos)
+    """
+    valores = np.asarray(valores, dtype=float)
+    salida = np.asarray(tabla["valores"], dtype=float)
+    if tabla.get("modo", "escalon") == "lineal":
+        return np.interp(valores, tabla["cortes"], salida, left=salida[0], right=salida[-1])
+    if len(salida) != len(tabla["cortes"]) + 1:
+        raise ValueError("Una tabla en escalón necesita un valor más que cortes")
+    indice = indice_tabla(valores, tabla["cortes"])
+    return np.where(indice < 0, np.nan, salida[np.clip(indice, 0, len(salida) - 1)])
+
+def usa_humedad(tabla: Dict) -> bool:
+    """True si la correlación ya incluye la humedad como variable"""
+    return tabla.get("modo") == "regresion" and any("humedad" in t for t in tabla["terminos"])
+
+def matriz_regresion(ndvi, humedad, terminos: List[str]) -> np.ndarray:
+    """Columnas de los términos de regresión evaluadas en cada elemento (último eje)"""
+    ndvi = np.asarray(ndvi, dtype=float)
+    humedad = np.broadcast_to(np.asarray(np.nan if humedad is None else humedad, dtype=float), ndvi.shape)
+    return np.stack([TERMINOS_REGRESION[t](ndvi, humedad) for t in terminos], axis=-1)
+
+def evaluar_regresion(ndvi, humedad, tabla: Dict) -> np.ndarray:
+    """
+    CBR (%) de una correlación calibrada: NDVI acotado al rango de los
+    ensayos, respuesta lineal o logarítmica y un CBR mínimo
+    """
+    if usa_humedad(tabla) and humedad is None:
+        raise ValueError("La correlación calibrada necesita la humedad del suelo")
+    ndvi = np.clip(np.asarray(ndvi, dtype=float), *tabla["rango_ndvi"])
+    valor = matriz_regresion(ndvi, humedad, tabla["terminos"]) @ np.asarray(tabla["coeficientes"], dtype=float)
+    if tabla["respuesta"] == "log":
+        valor = np.exp(valor)
+    return np.maximum(valor, tabla.get("cbr_minimo", 1.0))
+
+def cbr_desde_ndvi(ndvi, humedad=None, tabla_cbr: Optional[Dict] = None,
+                   tabla_humedad: Dict = TABLA_HUMEDAD_FACTOR) -> np.ndarray:
+    """
+    CBR (%) desde NDVI, reducido por la humedad del suelo si se entrega
+    (una regresión calibrada con humedad ya la incluye); sin tabla_cbr
+    usa la correlación vigente (tabla_cbr_vigente)
+    """
+    if tabla_cbr is None:
+        tabla_cbr = tabla_cbr_vigente(humedad)
+    if tabla_cbr.get("modo") == "regresion":
+        cbr = evaluar_regresion(ndvi, humedad, tabla_cbr)
+        if usa_humedad(tabla_cbr):
+            return cbr
+    else:
+        cbr = aplicar_tabla(ndvi, tabla_cbr)
+    if humedad is not None:
+        cbr = cbr * aplicar_tabla(np.broadcast_to(np.asarray(humedad, dtype=float), cbr.shape), tabla_humedad)
+    return cbr
+
+def cargar_tabla_cbr(ruta: str = ARCHIVO_CALIBRACION) -> Dict:
+    """
+    Correlación NDVI → CBR publicada por la calibración, o la tabla por
+    defecto; el JSON se relee solo si cambió su fecha de modificación
+    """
+    try:
+        estado = os.stat(ruta)
+    except OSError:
+        return TABLA_NDVI_CBR
+    ruta = os.path.abspath(ruta)
+    version = (estado.st_mtime_ns, estado.st_size)
+    guardada = _tablas_publicadas.get(ruta)
+    if guardada is None or guardada[0] != version:
+        with open(ruta, encoding="utf-8") as f:
+            guardada = (version, json.load(f)["tabla"])
+        _tablas_publicadas[ruta] = guardada
+    return copy.deepcopy(guardada[1])
+
+def tabla_cbr_vigente(humedad=None, ruta: str = ARCHIVO_CALIBRACION) -> Dict:
+    """
+    Tabla publicada por la calibración; la tabla por defecto si no hay
+    publicación o si la publicada necesita humedad y no se entrega
+    """
+    tabla = cargar_tabla_cbr(ruta)
+    if usa_humedad(tabla) and humedad is None:
+        return TABLA_NDVI_CBR
+    return tabla
+
+def k_desde_cbr(cbr, factor: float = FACTOR_K_CBR) -> np.ndarray:
+    """Módulo de reacción de la subrasante k (MPa/m)"""
+    return np.asarray(cbr, dtype=float) * factor
+
+def categoria_subrasante(cbr) -> np.ndarray:
+    """Categoría S0..S5 por CBR como entero 0..5 (-1 sin dato)"""
+    return indice_tabla(cbr, CATEGORIAS_SUBRASANTE["cortes"]).astype(np.int8)
+
+def tipo_suelo_ndvi(ndvi: float, tabla: Dict = TIPOS_SUELO_NDVI) -> Dict:
+    """Tipo de suelo, CBR, capacidad portante y recomendación para un NDVI"""
+    indice = int(indice_tabla(ndvi, tabla["cortes"]))
+    return dict(tabla["tipos"][max(indice, 0)])
+
+def mapa_subrasante(ndvi, humedad=None, area_pixel_m2: Optional[float] = None,
+                    tabla_cbr: Optional[Dict] = None, tabla_humedad: Dict = TABLA_HUMEDAD_FACTOR,
+                    factor_k: float = FACTOR_K_CBR) -> Dict:
+    """
+    Rásters de CBR, k y categoría de subrasante desde rásters de NDVI y
+    humedad (misma forma, o humedad escalar); NaN = fuera del área
+
+    Devuelve cbr, k, categoria, el resumen por categoría (píxeles, % y
+    área si se da area_pixel_m2) y estadísticas de CBR y k. Sin tabla_cbr
+    usa la correlación publicada por la calibración (cargar_tabla_cbr).
+    """
+    cbr = cbr_desde_ndvi(ndvi, humedad, tabla_cbr, tabla_humedad)
+    k = k_desde_cbr(cbr, factor_k)
+    categoria = categoria_subrasante(cbr)
+    validos = categoria >= 0
+    total = int(validos.sum())
+    conteos = np.bincount(categoria[validos].ravel(), minlength=len(CATEGORIAS_SUBRASANTE["nombres"]))
+    resumen = {}
+    for nombre, pixeles in zip(CATEGORIAS_SUBRASANTE["nombres"], conteos):
+        resumen[nombre] = {"pixeles": int(pixeles), "porcentaje": round(100.0 * pixeles / total, 2) if total else 0.0}
+        if area_pixel_m2:
+            resumen[nombre]["area_m2"] = round(float(pixeles * area_pixel_m2), 1)
+    estadisticas = {}
+    if total:
+        estadisticas = {"CBR_promedio": round(float(np.nanmean(cbr)), 2), "CBR_minimo": round(float(np.nanmin(cbr)), 2),
+                        "CBR_p10": round(float(np.nanpercentile(cbr, 10)), 2),
+                        "k_promedio_MPa_m": round(float(np.nanmean(k)), 1),
+                        "k_minimo_MPa_m": round(float(np.nanmin(k)), 1)}
+    return {
+        "cbr": cbr,
+        "k": k,
+        "categoria": categoria,
+        "resumen_categorias": resumen,
+        "estadisticas": estadisticas,
+        "pixeles": total,
+        "estado": "✅ Mapa de subrasante generado" if total else "⚠️ Sin píxeles válidos"
+    }
+
+def mapa_subrasante_proyecto(ee, poligono: List[Tuple[float, float]], fecha_inicio: str, fecha_fin: str,
+                             cache=None, **opciones) -> Dict:
+    """
+    Mapa de subrasante del área de proyecto: composición NDVI (Sentinel-2)
+    y humedad (SMAP) en una solicitud cada una, humedad remuestreada a la
+    grilla del NDVI y píxeles fuera del polígono en NaN
+
+    Parámetros:
+    - ee: módulo 'ee' inicializado o EELocal()
+    - poligono: vértices (lon, lat) del área de proyecto
+    - cache: caché satelital opcional (MODULO_CACHE_SATELITAL)
+    - opciones: tablas y factor_k de mapa_subrasante (sin tabla_cbr, la publicada)
+    """
+    from MODULO_EE_LOCAL import punto_en_poligono
+    from MODULO_EXTRACCION_LOTES import _solicitar_con_cache, _ventana_pixeles, normalizar_sitios
+    from MODULO_SERIES_SATELITALES import VARIABLES_SATELITALES
+
+    try:
+        sitio = normalizar_sitios([poligono])
+        ventana = _ventana_pixeles("ndvi", sitio)
+        ventana_humedad = _ventana_pixeles("humedad_suelo", sitio)
+        ndvi = _solicitar_con_cache(ee, "ndvi", fecha_inicio, fecha_fin, ventana, cache)
+        humedad = _solicitar_con_cache(ee, "humedad_suelo", fecha_inicio, fecha_fin, ventana_humedad, cache)
+        if ndvi is None:
+            return {"error": "Sin imágenes NDVI en el período", "estado": "❌ Error en mapa de subrasante"}
+
+        resolucion = VARIABLES_SATELITALES["ndvi"]["resolucion"]
+        col0, fila0, ancho, alto = ventana
+        lon = -180 + (col0 + np.arange(ancho) + 0.5) * resolucion
+        lat = 90 - (fila0 + np.arange(alto) + 0.5) * resolucion
+        malla_lon, malla_lat = np.meshgrid(lon, lat)
+        ndvi = np.where(punto_en_poligono(malla_lon, malla_lat, sitio[0]["vertices"]), ndvi, np.nan)
+
+        if humedad is not None:
+            paso = VARIABLES_SATELITALES["humedad_suelo"]["resolucion"]
+            columnas = np.floor((malla_lon + 180) / paso).astype(int) - ventana_humedad[0]
+            filas = np.floor((90 - malla_lat) / paso).astype(int) - ventana_humedad[1]
+            humedad = humedad[np.clip(filas, 0, humedad.shape[0] - 1), np.clip(columnas, 0, humedad.shape[1] - 1)]
+
+        lado_m = resolucion * 111320.0
+        area_pixel = lado_m * lado_m * math.cos(math.radians(float(lat.mean())))
+        mapa = mapa_subrasante(ndvi, humedad, area_pixel, **opciones)
+        mapa.update({"ndvi": ndvi, "humedad": humedad,
+                     "transformacion": {"oeste": -180 + col0 * resolucion, "norte": 90 - fila0 * resolucion,
+                                        "resolucion_grados": resolucion},
+                     "area_m2": round(area_pixel * mapa["pixeles"], 1)})
+        return mapa
+    except Exception as e:
+        return {"error": str(e), "estado": "❌ Error en mapa de subrasante"}
+
+if __name__ == "__main__":
+    # Prueba del módulo
+    from MODULO_EE_LOCAL import EELocal
+    from MODULO_SERIES_SATELITALES import POLIGONO_SAN_MIGUEL
+
+    print(f"CBR por NDVI: {cbr_desde_ndvi([0.15, 0.35, 0.55, 0.7]).tolist()}")
+    mapa = mapa_subrasante_proyecto(EELocal(), POLIGONO_SAN_MIGUEL, "2023-04-01", "2023-10-01")
+    print(f"Mapa {mapa['cbr'].shape}, {mapa['pixeles']} píxeles, {mapa['area_m2'] / 10000:.1f} ha")
+    print(mapa["estadisticas"])
+    for nombre, datos in mapa["resumen_categorias"].items():
+        print(f"  {nombre}: {datos['porcentaje']}% ({datos['area_m2'] / 10000:.2f} ha)")
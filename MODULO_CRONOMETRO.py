@@ -0,0 +1,60 @@
+"""
+MÓDULO CRONÓMETRO - TIEMPOS Y MEMORIA POR ETAPA
+===============================================
+
+Medición ligera de flujos de procesamiento, compartida por los módulos
+de producción y el banco de pruebas (MODULO_BENCHMARK):
+- Tiempo acumulado por etapa con un bloque 'with'
+- Memoria pico por etapa solo si tracemalloc está activo
+- Resumen con el tiempo total
+
+Autor: IA Assistant - Especialista UNI
+Fecha: 2024
+"""
+
+import time
+import tracemalloc
+from contextlib import contextmanager
+from typing import Dict
+
+class Cronometro:
+    """
+    Tiempos por etapa de un flujo de procesamiento
+
+    La memoria pico de cada etapa se registra solo si tracemalloc está
+    activo (lo activa ejecutar_benchmark), para no penalizar el uso normal.
+    """
+
+    def __init__(self):
+        self.etapas = {}
+
+    @contextmanager
+    def etapa(self, nombre: str):
+        """Mide el bloque 'with' y acumula su tiempo bajo 'nombre'"""
+        memoria = tracemalloc.is_tracing()
+        if memoria:
+            base = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            registro = self.etapas.setdefault(nombre, {"tiempo_s": 0.0})
+            registro["tiempo_s"] = round(registro["tiempo_s"] + time.perf_counter() - inicio, 4)
+            if memoria:
+                pico = (tracemalloc.get_traced_memory()[1] - base) / 1e6
+                registro["memoria_pico_mb"] = round(max(registro.get("memoria_pico_mb", 0.0), pico), 2)
+
+    def resumen(self) -> Dict:
+        """Etapas medidas más el tiempo total"""
+        return dict(self.etapas, total_s=round(sum(e["tiempo_s"] for e in self.etapas.values()), 4))
+
+if __name__ == "__main__":
+    # Prueba del módulo: dos etapas, una repetida
+    cronometro = Cronometro()
+    for _ in range(2):
+        with cronometro.etapa("espera"):
+            time.sleep(0.01)
+    with cronometro.etapa("suma"):
+        sum(range(100000))
+    print(cronometro.resumen())
@@ -0,0 +1,283 @@
+"""
+MÓDULO CURVAS DE NIVEL - MARCHING SQUARES SOBRE EL MDT
+======================================================
+
+Extracción de curvas de nivel como polilíneas a partir del MDT en grilla:
+- Marching squares vectorizado (costo lineal en celdas + segmentos)
+- Resolución de casos silla con el promedio de la celda
+- Longitud de curvas por nivel
+- Exportación a DXF (AutoCAD Civil 3D) y GeoJSON (QGIS)
+
+Autor: IA Assistant - Especialista UNI
+Fecha: 2024
+"""
+
+import numpy as np
+import json
+import math
+import os
+from typing import Dict, List, Tuple, Optional
+
+# Aristas de cada celda: 0 = inferior, 1 = derecha, 2 = superior, 3 = izquierda
+# Bits del caso: 1 = esquina inf-izq, 2 = inf-der, 4 = sup-der, 8 = sup-izq
+# Cada caso tiene hasta dos segmentos (arista_a, arista_b); -1 = sin segmento
+_TABLA_SEGMENTOS = np.full((16, 2, 2, 2), -1, dtype=np.int8)
+for _caso, _segmentos in {
+    1: [(3, 0)], 2: [(0, 1)], 3: [(3, 1)], 4: [(1, 2)], 6: [(0, 2)], 7: [(3, 2)],
+    8: [(2, 3)], 9: [(0, 2)], 11: [(1, 2)], 12: [(3, 1)], 13: [(0, 1)], 14: [(3, 0)]
+}.items():
+    for _centro in (0, 1):
+        _TABLA_SEGMENTOS[_caso, _centro, 0] = _segmentos[0]
+
+# Casos silla: el índice [_, 1] corresponde a centro de celda sobre el nivel
+_TABLA_SEGMENTOS[5, 0] = [(3, 0), (1, 2)]
+_TABLA_SEGMENTOS[5, 1] = [(0, 1), (2, 3)]
+_TABLA_SEGMENTOS[10, 0] = [(0, 1), (2, 3)]
+_TABLA_SEGMENTOS[10, 1] = [(3, 0), (1, 2)]
+
+def _origen_mdt(dtm_data: Dict) -> Tuple[float, float, float]:
+    """Coordenadas del nodo [0, 0] y resolución del MDT"""
+    return (float(np.asarray(dtm_data['X_grid'])[0, 0]),
+            float(np.asarray(dtm_data['Y_grid'])[0, 0]),
+            float(dtm_data['resolution']))
+
+def segmentos_curvas_nivel(Z_grid: np.ndarray, intervalo: float = 0.5,
+                           nivel_base: float = 0.0) -> Dict:
+    """
+    Segmentos de curvas de nivel por marching squares vectorizado
+
+    Solo se generan pares (celda, nivel) para los niveles que realmente
+    cruzan cada celda, por lo que el costo no depende del número de niveles.
+    Coordenadas en unidades de grilla (columna, fila).
+    """
+    if intervalo <= 0:
+        raise ValueError("El intervalo de curvas debe ser positivo")
+    Z = np.asarray(Z_grid, dtype=np.float64)
+    ny, nx = Z.shape
+    vacio = {"k": np.empty(0, np.int64), "p0": np.empty((0, 2)), "p1": np.empty((0, 2)),
+             "arista0": np.empty(0, np.int64), "arista1": np.empty(0, np.int64)}
+    if ny < 2 or nx < 2:
+        return vacio
+
+    esquinas = np.stack([Z[:-1, :-1], Z[:-1, 1:], Z[1:, 1:], Z[1:, :-1]])  # ii, id, sd, si
+    z_bajo = esquinas.min(axis=0)
+    z_alto = esquinas.max(axis=0)
+    valida = ~np.isnan(esquinas).any(axis=0)
+    z_bajo = np.where(valida, z_bajo, nivel_base)
+    z_alto = np.where(valida, z_alto, nivel_base)
+
+    # Niveles L_k = base + k·intervalo con z_bajo < L_k <= z_alto
+    k_bajo = np.floor((z_bajo - nivel_base) / intervalo).astype(np.int64) + 1
+    k_alto = np.floor((z_alto - nivel_base) / intervalo).astype(np.int64)
+    conteo = np.where(valida, np.maximum(k_alto - k_bajo + 1, 0), 0).ravel()
+    total = int(conteo.sum())
+    if total == 0:
+        return vacio
+
+    celda = np.repeat(np.arange(conteo.size), conteo)
+    desfase = np.arange(total) - np.repeat(np.cumsum(conteo) - conteo, conteo)
+    k = k_bajo.ravel()[celda] + desfase
+    nivel = nivel_base + k * intervalo
+
+    fila, columna = np.divmod(celda, nx - 1)
+    zc = esquinas.reshape(4, -1)[:, celda]
+    sobre = zc >= nivel
+    caso = sobre[0] * 1 + sobre[1] * 2 + sobre[2] * 4 + sobre[3] * 8
+    centro = (zc.mean(axis=0) >= nivel).astype(np.int64)
+
+    # Posición de cada arista: esquinas extremo (índices en zc) y desplazamientos
+    extremos = np.array([[0, 1], [1, 2], [3, 2], [0, 3]])
+    base_arista = np.array([[0.0, 0.0], [1.0, 0.0], [0.0, 1.0], [0.0, 0.0]])
+    direccion = np.array([[1.0, 0.0], [0.0, 1.0], [1.0, 0.0], [0.0, 1.0]])
+
+    def punto_en_arista(arista: np.ndarray, indices: np.ndarray) -> np.ndarray:
+        za = zc[extremos[arista, 0], indices]
+        zb = zc[extremos[arista, 1], indices]
+        t = (nivel[indices] - za) / (zb - za)
+        return (np.column_stack([columna[indices], fila[indices]]) + base_arista[arista]
+                + direccion[arista] * t[:, np.newaxis])
+
+    def id_arista(arista: np.ndarray, indices: np.ndarray) -> np.ndarray:
+        # Aristas horizontales: f·(nx-1)+c ; verticales: H + f·nx + c
+        f = fila[indices] + (arista == 2)
+        c = columna[indices] + (arista == 1)
+        horizontal = (arista == 0) | (arista == 2)
+        return np.where(horizontal, f * (nx - 1) + c, ny * (nx - 1) + f * nx + c)
+
+    partes = {"k": [], "p0": [], "p1": [], "arista0": [], "arista1": []}
+    for s in (0, 1):
+        aristas = _TABLA_SEGMENTOS[caso, centro, s]
+        indices = np.flatnonzero(aristas[:, 0] >= 0)
+        a0 = aristas[indices, 0].astype(np.int64)
+        a1 = aristas[indices, 1].astype(np.int64)
+        partes["k"].append(k[indices])
+        partes["p0"].append(punto_en_arista(a0, indices))
+        partes["p1"].append(punto_en_arista(a1, indices))
+        partes["arista0"].append(id_arista(a0, indices))
+        partes["arista1"].append(id_arista(a1, indices))
+    return {clave: np.concatenate(valor) for clave, valor in partes.items()}
+
+def _unir_segmentos(segmentos: Dict) -> List[Tuple[int, np.ndarray, bool]]:
+    """
+    Une segmentos en polilíneas usando la arista compartida como clave
+
+    Cada cruce (nivel, arista) es compartido por a lo sumo dos segmentos,
+    así que el emparejamiento se resuelve con un único ordenamiento.
+    """
+    n = segmentos["k"].size
+    if n == 0:
+        return []
+    k_rel = segmentos["k"] - segmentos["k"].min()
+    max_arista = int(max(segmentos["arista0"].max(), segmentos["arista1"].max())) + 1
+    claves = np.concatenate([k_rel * max_arista + segmentos["arista0"],
+                             k_rel * max_arista + segmentos["arista1"]])
+
+    # Extremo e (0..2n-1): segmento e % n, lado e // n ; vecino = extremo con igual clave
+    orden = np.argsort(claves, kind="stable")
+    iguales = claves[orden[1:]] == claves[orden[:-1]]
+    vecino = np.full(2 * n, -1, dtype=np.int64)
+    vecino[orden[:-1][iguales]] = orden[1:][iguales]
+    vecino[orden[1:][iguales]] = orden[:-1][iguales]
+    vecino = vecino.tolist()
+
+    p0, p1 = segmentos["p0"], segmentos["p1"]
+    visitado = np.zeros(n, dtype=bool)
+    polilineas = []
+
+    def recorrer(extremo: int) -> List[int]:
+        # Devuelve la secuencia de extremos de salida siguiendo la cadena
+        cadena = []
+        while True:
+            siguiente = vecino[extremo]
+            if siguiente < 0:
+                return cadena
+            seg = siguiente % n
+            if visitado[seg]:
+                return cadena
+            visitado[seg] = True
+            salida = siguiente + n if siguiente < n else siguiente - n
+            cadena.append(salida)
+            extremo = salida
+
+    for inicio in range(n):
+        if visitado[inicio]:
+            continue
+        visitado[inicio] = True
+        adelante = recorrer(inicio + n)
+        cerrada = bool(adelante) and vecino[adelante[-1]] == inicio
+        atras = [] if cerrada else recorrer(inicio)
+
+        extremos = list(reversed(atras)) + [inicio, inicio + n] + adelante
+        indices = np.array(extremos)
+        coordenadas = np.where((indices < n)[:, np.newaxis], p0[indices % n], p1[indices % n])
+        polilineas.append((int(segmentos["k"][inicio]), coordenadas, cerrada))
+    return polilineas
+
+def extraer_curvas_nivel(dtm_data: Dict, intervalo: float = 0.5,
+                         nivel_base: float = 0.0, unir_polilineas: bool = True) -> Dict:
+    """
+    Curvas de nivel del MDT como polilíneas en coordenadas del proyecto
+
+    Parámetros:
+    - dtm_data: MDT con 'X_grid', 'Y_grid', 'Z_grid' y 'resolution'
+    - intervalo: Equidistancia entre curvas (m)
+    - nivel_base: Cota de referencia de los niveles (m)
+    - unir_polilineas: Si False, solo se calculan longitudes por nivel
+    """
+    x0, y0, resolucion = _origen_mdt(dtm_data)
+    Z = np.asarray(dtm_data['Z_grid'], dtype=np.float64)
+    segmentos = segmentos_curvas_nivel(Z, intervalo, nivel_base)
+
+    # Longitud por nivel: una suma ponderada por nivel (bincount)
+    longitudes = np.linalg.norm(segmentos["p1"] - segmentos["p0"], axis=1) * resolucion
+    niveles_k = np.unique(segmentos["k"])
+    if niveles_k.size:
+        suma = np.bincount(segmentos["k"] - niveles_k[0], weights=longitudes)
+        longitud_por_nivel = {round(float(nivel_base + k * intervalo), 3): round(float(suma[k - niveles_k[0]]), 2)
+                              for k in niveles_k}
+    else:
+        longitud_por_nivel = {}
+
+    curvas = []
+    if unir_polilineas:
+        for k, coordenadas, cerrada in _unir_segmentos(segmentos):
+            curvas.append({
+                "nivel": round(float(nivel_base + k * intervalo), 3),
+                "coordenadas": np.column_stack([x0 + coordenadas[:, 0] * resolucion,
+                                                y0 + coordenadas[:, 1] * resolucion]),
+                "cerrada": cerrada
+            })
+
+    return {
+        "intervalo": intervalo,
+        "niveles": sorted(longitud_por_nivel),
+        "longitud_por_nivel_m": longitud_por_nivel,
+        "longitud_total_m": round(float(longitudes.sum()), 2),
+        "total_segmentos": int(segmentos["k"].size),
+        "curvas": curvas,
+        "elevacion_minima": round(float(np.nanmin(Z)), 2),
+        "elevacion_maxima": round(float(np.nanmax(Z)), 2),
+        "estado": "✅ Curvas de nivel extraídas"
+    }
+
+def exportar_curvas_dxf(curvas: Dict, ruta_dxf: str, cada_maestra: int = 5) -> str:
+    """
+    Exporta las polilíneas a DXF (R12) con cota en cada vértice
+
+    Las curvas múltiplo de cada_maestra·intervalo van a la capa CURVAS_MAESTRAS.
+    """
+    intervalo_maestra = curvas["intervalo"] * cada_maestra
+    lineas = ["0", "SECTION", "2", "ENTITIES"]
+    for curva in curvas["curvas"]:
+        cociente = curva["nivel"] / intervalo_maestra
+        capa = "CURVAS_MAESTRAS" if abs(cociente - round(cociente)) < 1e-6 else "CURVAS_NIVEL"
+        lineas += ["0", "POLYLINE", "8", capa, "66", "1",
+                   "10", "0.0", "20", "0.0", "30", f"{curva['nivel']:.3f}",
+                   "70", "9" if curva["cerrada"] else "8"]
+        for x, y in curva["coordenadas"]:
+            lineas += ["0", "VERTEX", "8", capa, "10", f"{x:.3f}", "20", f"{y:.3f}",
+                       "30", f"{curva['nivel']:.3f}", "70", "32"]
+        lineas += ["0", "SEQEND", "8", capa]
+    lineas += ["0", "ENDSEC", "0", "EOF"]
+
+    directorio = os.path.dirname(ruta_dxf)
+    if directorio:
+        os.makedirs(directorio, exist_ok=True)
+    with open(ruta_dxf, "w", encoding="utf-8") as f:
+        f.write("\n".join(lineas) + "\n")
+    return ruta_dxf
+
+def exportar_curvas_geojson(curvas: Dict, ruta_geojson: str, epsg: int = 32718) -> str:
+    """
+    Exporta las polilíneas a GeoJSON (LineString con propiedad de cota)
+    """
+    features = [{
+        "type": "Feature",
+        "properties": {"elevacion": curva["nivel"], "cerrada": curva["cerrada"]},
+        "geometry": {
+            "type": "LineString",
+            "coordinates": np.round(curva["coordenadas"], 3).tolist()
+        }
+    } for curva in curvas["curvas"]]
+
+    coleccion = {
+        "type": "FeatureCollection",
+        "crs": {"type": "name", "properties": {"name": f"urn:ogc:def:crs:EPSG::{epsg}"}},
+        "features": features
+    }
+    directorio = os.path.dirname(ruta_geojson)
+    if directorio:
+        os.makedirs(directorio, exist_ok=True)
+    with open(ruta_geojson, "w", encoding="utf-8") as f:
+        json.dump(coleccion, f)
+    return ruta_geojson
+
+if __name__ == "__main__":
+    # Prueba del módulo: colina gaussiana sobre una calle inclinada
+    x = np.arange(0, 100, 1.0)
+    y = np.arange(0, 100, 1.0)
+    X, Y = np.meshgrid(x, y)
+    Z = 3850 + 0.05 * X + 4.0 * np.exp(-((X - 50) ** 2 + (Y - 50) ** 2) / 400)
+    resultado = extraer_curvas_nivel({'X_grid': X, 'Y_grid': Y, 'Z_grid': Z, 'resolution': 1.0})
+    print(f"📊 Curvas: {len(resultado['curvas'])} polilíneas, "
+          f"{resultado['longitud_total_m']:.1f} m en {len(resultado['niveles'])} niveles")
@@ -0,0 +1,126 @@
+"""
+MÓDULO DECIMACIÓN - REDUCCIÓN DE NUBES DE PUNTOS POR CELDA
+==========================================================
+
+Etapa de decimación previa a la interpolación del MDT y al mallado:
+- Grilla de vóxeles (centroide por vóxel)
+- Mínimo z por celda (punto real más bajo, conservador para suelo)
+- Aleatorio por celda (k puntos reales por celda, reproducible)
+- Tamaño de celda según la densidad que necesita cada consumidor
+  (grilla de interpolación o profundidad de la reconstrucción Poisson)
+
+Todas las variantes agrupan por celda con un único ordenamiento, sin
+bucles por punto.
+
+Autor: IA Assistant - Especialista UNI
+Fecha: 2024
+"""
+
+import numpy as np
+import math
+import time
+from typing import Dict, List, Tuple, Optional
+
+METODOS_DECIMACION = ("voxel", "minimo", "aleatorio")
+
+def _indices_celda_2d(points: np.ndarray, tamano: float) -> np.ndarray:
+    """Índice lineal de la celda XY de cada punto"""
+    origen = points[:, :2].min(axis=0)
+    celda = np.floor((points[:, :2] - origen) / tamano).astype(np.int64)
+    return celda[:, 1] * (int(celda[:, 0].max()) + 1) + celda[:, 0]
+
+def _grupos(claves: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Orden que agrupa claves iguales e inicio de cada grupo en ese orden"""
+    orden = np.argsort(claves, kind="stable")
+    ordenadas = claves[orden]
+    inicios = np.flatnonzero(np.r_[True, ordenadas[1:] != ordenadas[:-1]])
+    return orden, inicios
+
+def decimar_voxel(points: np.ndarray, tamano: float) -> np.ndarray:
+    """Centroide XYZ de los puntos de cada vóxel cúbico de lado `tamano`"""
+    xyz = np.asarray(points[:, :3], dtype=np.float64)
+    voxel = np.floor((xyz - xyz.min(axis=0)) / tamano).astype(np.int64)
+    dimension = voxel.max(axis=0) + 1
+    claves = (voxel[:, 2] * dimension[1] + voxel[:, 1]) * dimension[0] + voxel[:, 0]
+    orden, inicios = _grupos(claves)
+    conteo = np.diff(np.r_[inicios, claves.size])
+    return np.add.reduceat(xyz[orden], inicios, axis=0) / conteo[:, np.newaxis]
+
+def decimar_minimo_celda(points: np.ndarray, tamano: float) -> np.ndarray:
+    """Punto de menor z de cada celda XY (conserva todas las columnas)"""
+    orden, inicios = _grupos(_indices_celda_2d(points, tamano))
+    z = points[orden, 2]
+    minimos = np.minimum.reduceat(z, inicios)
+    grupo = np.repeat(np.arange(inicios.size), np.diff(np.r_[inicios, z.size]))
+    candidatos = np.flatnonzero(z == minimos[grupo])
+    primeros = candidatos[np.r_[True, grupo[candidatos[1:]] != grupo[candidatos[:-1]]]]
+    return points[orden[primeros]]
+
+def decimar_aleatorio_celda(points: np.ndarray, tamano: float, puntos_por_celda: int = 1,
+                            semilla: int = 0) -> np.ndarray:
+    """Hasta `puntos_por_celda` puntos al azar de cada celda XY (reproducible)"""
+    permutacion = np.random.default_rng(semilla).permutation(len(points))
+    orden, inicios = _grupos(_indices_celda_2d(points[permutacion], tamano))
+    rango = np.arange(orden.size) - np.repeat(inicios, np.diff(np.r_[inicios, orden.size]))
+    return points[permutacion[orden[rango < puntos_por_celda]]]
+
+def tamano_celda_objetivo(points: np.ndarray, celdas_grilla: Optional[int] = None,
+                          profundidad_poisson: Optional[int] = None,
+                          muestras_por_celda: float = 2.0) -> float:
+    """
+    Tamaño de celda de decimación según el consumidor
+
+    - celdas_grilla: celdas por lado de la grilla de interpolación; se dejan
+      `muestras_por_celda` puntos por lado de cada celda
+    - profundidad_poisson: el octree de profundidad d divide la extensión en
+      2^d celdas; más puntos por celda no aportan detalle a la malla
+    """
+    extension = float(np.max(np.ptp(points[:, :2], axis=0)))
+    if profundidad_poisson is not None:
+        return extension / 2 ** profundidad_poisson
+    if celdas_grilla is not None:
+        return extension / (celdas_grilla * muestras_por_celda)
+    raise ValueError("Indique celdas_grilla o profundidad_poisson")
+
+def decimar_nube(points: np.ndarray, metodo: str = "voxel", tamano: float = 1.0,
+                 **opciones) -> Dict:
+    """
+    Decima la nube con el método indicado y reporta conteos y tiempo
+
+    Parámetros:
+    - metodo: "voxel", "minimo" o "aleatorio"
+    - tamano: Lado de la celda o vóxel (m)
+    - opciones: puntos_por_celda y semilla para el método aleatorio
+    """
+    if metodo not in METODOS_DECIMACION:
+        raise ValueError(f"Método de decimación no válido: {metodo}")
+    inicio = time.perf_counter()
+    if len(points) == 0 or tamano <= 0:
+        decimados = points
+    elif metodo == "voxel":
+        decimados = decimar_voxel(points, tamano)
+    elif metodo == "minimo":
+        decimados = decimar_minimo_celda(points, tamano)
+    else:
+        decimados = decimar_aleatorio_celda(points, tamano, **opciones)
+    return {
+        "puntos": decimados,
+        "metodo": metodo,
+        "tamano_celda_m": round(float(tamano), 4),
+        "puntos_entrada": int(len(points)),
+        "puntos_salida": int(len(decimados)),
+        "reduccion_pct": round(100.0 * (1 - len(decimados) / max(len(points), 1)), 2),
+        "tiempo_s": round(time.perf_counter() - inicio, 3)
+    }
+
+if __name__ == "__main__":
+    # Prueba del módulo: 2 millones de puntos de suelo en una cuadra
+    rng = np.random.default_rng(0)
+    n = 2000000
+    nube = np.column_stack([rng.uniform(0, 100, n), rng.uniform(0, 80, n),
+                            3850 + rng.normal(0, 0.02, n)])
+    tamano = tamano_celda_objetivo(nube, celdas_grilla=100)
+    for metodo in METODOS_DECIMACION:
+        resultado = decimar_nube(nube, metodo, tamano)
+        print(f"✅ {metodo}: {resultado['puntos_entrada']:,} → {resultado['puntos_salida']:,} puntos "
+              f"({resultado['reduccion_pct']}%) en {resultado['tiempo_s']} s")
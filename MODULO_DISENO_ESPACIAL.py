@@ -0,0 +1,340 @@
+"""
+MÓDULO DISEÑO ESPACIAL - PAVIMENTOS CON SUBRASANTE VARIABLE
+===========================================================
+
+Diseño AASHTO 93 celda por celda y por tramos homogéneos:
+- Ecuaciones AASHTO 93 de pavimento rígido (espesor de losa) y flexible
+  (número estructural y capas) resueltas por bisección vectorizada:
+  todas las celdas o tramos se resuelven a la vez
+- Mapa de espesores desde rásters de CBR o k (correlación satelital,
+  ensayos de campo o ambos) con tránsito por celda o uniforme
+- Tramos homogéneos a lo largo del eje por diferencias acumuladas
+  (AASHTO 93, Apéndice J), con longitud mínima y cortes obligados en los
+  cambios de tránsito
+- Tabla de tramos con CBR y k de diseño (percentil), W18 y espesores;
+  en el mapa cada celda usa el W18 del tramo en que se proyecta sobre el eje
+
+Autor: IA Assistant - Especialista UNI
+Fecha: 2024
+"""
+
+import numpy as np
+from scipy.spatial import cKDTree
+from typing import Dict, List, Tuple, Optional
+
+from MODULO_SECCIONES import estaciones_eje, muestrear_bilineal
+
+MPA_A_PSI = 145.038
+MPA_M_A_PCI = 3.6839
+PULG_A_MM = 25.4
+
+# Parámetros AASHTO 93 por defecto (95% de confiabilidad en rígido, 90% en flexible)
+PARAMETROS_RIGIDO = {"Sc_MPa": 4.5, "Ec_MPa": 28000.0, "J": 3.2, "Cd": 1.0, "ZR": -1.645, "S0": 0.35,
+                     "p0": 4.5, "pt": 2.5, "espesor_minimo_mm": 150.0}
+PARAMETROS_FLEXIBLE = {"ZR": -1.282, "S0": 0.45, "p0": 4.2, "pt": 2.0,
+                       "a1": 0.44, "a2": 0.14, "a3": 0.11, "m2": 1.0, "m3": 1.0,
+                       "MR_base_psi": 30000.0, "MR_subbase_psi": 15000.0,
+                       "D1_minimo_pulg": 2.0, "D2_minimo_pulg": 4.0, "D3_minimo_pulg": 6.0}
+
+def log_w18_rigido(D, k_pci, Sc_psi, Ec_psi, J, Cd, ZR, S0, p0, pt):
+    """log10(W18) admisible de una losa de D pulgadas (AASHTO 93)"""
+    D = np.asarray(D, dtype=float)
+    delta_psi = p0 - pt
+    termino_k = D ** 0.75 - 18.42 / (Ec_psi / k_pci) ** 0.25
+    return (ZR * S0 + 7.35 * np.log10(D + 1) - 0.06
+            + np.log10(delta_psi / (4.5 - 1.5)) / (1 + 1.624e7 / (D + 1) ** 8.46)
+            + (4.22 - 0.32 * pt) * np.log10(Sc_psi * Cd * (D ** 0.75 - 1.132) / (215.63 * J * termino_k)))
+
+def log_w18_flexible(SN, MR_psi, ZR, S0, p0, pt):
+    """log10(W18) admisible para un número estructural SN (AASHTO 93)"""
+    SN = np.asarray(SN, dtype=float)
+    return (ZR * S0 + 9.36 * np.log10(SN + 1) - 0.20
+            + np.log10((p0 - pt) / (4.2 - 1.5)) / (0.40 + 1094 / (SN + 1) ** 5.19)
+            + 2.32 * np.log10(MR_psi) - 8.07)
+
+def _biseccion(funcion, objetivo: np.ndarray, inferior: np.ndarray, superior: np.ndarray,
+               iteraciones: int = 60) -> np.ndarray:
+    """Raíz de funcion(x) = objetivo (creciente en x) para todos los elementos a la vez"""
+    inferior, superior, objetivo = np.broadcast_arrays(np.asarray(inferior, dtype=float),
+                                                       np.asarray(superior, dtype=float),
+                                                       np.asarray(objetivo, dtype=float))
+    inferior, superior = inferior.copy(), superior.copy()
+    for _ in range(iteraciones):
+        medio = (inferior + superior) / 2
+        bajo = funcion(medio) < objetivo
+        inferior = np.where(bajo, medio, inferior)
+        superior = np.where(bajo, superior, medio)
+    return (inferior + superior) / 2
+
+def _minimo_unimodal(funcion, inferior: np.ndarray, superior: np.ndarray, iteraciones: int = 60) -> np.ndarray:
+    """Abscisa del mínimo de una funcion decreciente y luego creciente, por sección áurea vectorizada"""
+    razon = (np.sqrt(5.0) - 1) / 2
+    inferior, superior = np.broadcast_arrays(np.asarray(inferior, dtype=float), np.asarray(superior, dtype=float))
+    inferior, superior = inferior.copy(), superior.copy()
+    for _ in range(iteraciones):
+        c = superior - razon * (superior - inferior)
+        d = inferior + razon * (superior - inferior)
+        izquierda = funcion(c) < funcion(d)
+        superior = np.where(izquierda, d, superior)
+        inferior = np.where(izquierda, inferior, c)
+    return (inferior + superior) / 2
+
+def modulo_resiliente_cbr(cbr) -> np.ndarray:
+    """Módulo resiliente de la subrasante (psi): MR = 2555 × CBR^0.64 (MTC)"""
+    return 2555.0 * np.asarray(cbr, dtype=float) ** 0.64
+
+def espesor_rigido_aashto93(W18, k_MPa_m, **parametros) -> np.ndarray:
+    """
+    Espesor de losa (mm) para W18 ejes equivalentes y k (MPa/m), en
+    cualquier forma (escalares o rásters que se difunden entre sí)
+    """
+    p = {**PARAMETROS_RIGIDO, **parametros}
+    k_pci = np.asarray(k_MPa_m, dtype=float) * MPA_M_A_PCI
+    Ec_psi = p["Ec_MPa"] * MPA_A_PSI
+    objetivo = np.log10(np.asarray(W18, dtype=float))
+    funcion = lambda d: log_w18_rigido(d, k_pci, p["Sc_MPa"] * MPA_A_PSI, Ec_psi, p["J"], p["Cd"],
+                                       p["ZR"], p["S0"], p["p0"], p["pt"])
+    # El término de k tiene una singularidad en losas delgadas: la ecuación solo
+    # crece con D a partir de su mínimo, que es el límite inferior de la búsqueda
+    singular = np.maximum((18.42 / (Ec_psi / k_pci) ** 0.25 + 1e-6) ** (4 / 3), 2.0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        inferior = _minimo_unimodal(funcion, singular, 40.0)
+        D = _biseccion(funcion, objetivo, inferior, 40.0)
+    return np.maximum(D * PULG_A_MM, p["espesor_minimo_mm"])
+
+def numero_estructural_aashto93(W18, MR_psi, **parametros) -> np.ndarray:
+    """Número estructural requerido para W18 sobre un material de módulo MR (psi)"""
+    p = {**PARAMETROS_FLEXIBLE, **parametros}
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return _biseccion(lambda sn: log_w18_flexible(sn, MR_psi, p["ZR"], p["S0"], p["p0"], p["pt"]),
+                          np.log10(np.asarray(W18, dtype=float)), 0.01, 20.0)
+
+def capas_flexible_aashto93(W18, cbr, **parametros) -> Dict[str, np.ndarray]:
+    """
+    Número estructural y espesores de carpeta, base y subbase (cm) por el
+    método de capas de AASHTO 93 (cada capa protege a la inferior)
+    """
+    p = {**PARAMETROS_FLEXIBLE, **parametros}
+    MR = modulo_resiliente_cbr(cbr)
+    SN = np.where(np.isnan(MR), np.nan, numero_estructural_aashto93(W18, MR, **parametros))
+    SN1 = numero_estructural_aashto93(W18, p["MR_base_psi"], **parametros)
+    SN2 = numero_estructural_aashto93(W18, p["MR_subbase_psi"], **parametros)
+    SN, SN1, SN2 = np.broadcast_arrays(SN, SN1, SN2)
+
+    D1 = np.maximum(np.ceil(SN1 / p["a1"] * 2) / 2, p["D1_minimo_pulg"])
+    aporte1 = p["a1"] * D1
+    D2 = np.maximum(np.ceil((SN2 - aporte1) / (p["a2"] * p["m2"]) * 2) / 2, p["D2_minimo_pulg"])
+    aporte2 = p["a2"] * p["m2"] * D2
+    faltante = SN - aporte1 - aporte2
+    D3 = np.where(faltante > 0, np.maximum(np.ceil(faltante / (p["a3"] * p["m3"]) * 2) / 2,
+                                           p["D3_minimo_pulg"]), 0.0)
+    D1, D2, D3 = (np.where(np.isnan(SN), np.nan, D) for D in (D1, D2, D3))
+    return {"SN": SN, "carpeta_cm": D1 * 2.54, "base_cm": D2 * 2.54, "subbase_cm": D3 * 2.54}
+
+def mapa_espesores(cbr, W18, tipo: str = "ambos", factor_k: float = 10.0,
+                   parametros_rigido: Optional[Dict] = None, parametros_flexible: Optional[Dict] = None) -> Dict:
+    """
+    Espesores por celda desde un ráster de CBR (%) y el tránsito W18
+    (escalar o ráster); NaN = celda sin dato
+
+    Parámetros:
+    - tipo: "rigido", "flexible" o "ambos"
+    - factor_k: k (MPa/m) = factor_k × CBR
+    """
+    cbr = np.asarray(cbr, dtype=float)
+    mapa = {"cbr": cbr, "k": cbr * factor_k, "W18": np.broadcast_to(np.asarray(W18, dtype=float), cbr.shape)}
+    if tipo in ("rigido", "ambos"):
+        losa = espesor_rigido_aashto93(mapa["W18"], mapa["k"], **(parametros_rigido or {}))
+        mapa["losa_mm"] = np.where(np.isnan(cbr), np.nan, losa)
+    if tipo in ("flexible", "ambos"):
+        mapa.update(capas_flexible_aashto93(mapa["W18"], cbr, **(parametros_flexible or {})))
+    if tipo not in ("rigido", "flexible", "ambos"):
+        raise ValueError(f"Tipo de pavimento desconocido: {tipo}")
+    return mapa
+
+def raster_desde_mapa_subrasante(mapa: Dict) -> Dict:
+    """
+    Ráster de CBR en metros locales (x al este y y al norte desde la
+    esquina noroeste) desde mapa_subrasante_proyecto (MODULO_CLASIFICACION_SUBRASANTE)
+    """
+    t = mapa["transformacion"]
+    filas, columnas = mapa["cbr"].shape
+    latitud = t["norte"] - filas * t["resolucion_grados"] / 2
+    paso_x = t["resolucion_grados"] * 111320.0 * np.cos(np.radians(latitud))
+    paso_y = t["resolucion_grados"] * 111320.0
+    X, Y = np.meshgrid((np.arange(columnas) + 0.5) * paso_x, -(np.arange(filas) + 0.5) * paso_y)
+    return {"X_grid": X, "Y_grid": Y, "Z_grid": mapa["cbr"], "resolution": paso_y,
+            "origen_lonlat": (t["oeste"], t["norte"]), "escala_m_por_grado": (paso_x / t["resolucion_grados"],
+                                                                              paso_y / t["resolucion_grados"])}
+
+def lonlat_a_local(raster: Dict, lonlat: np.ndarray) -> np.ndarray:
+    """Vértices (lon, lat) en las coordenadas locales de raster_desde_mapa_subrasante"""
+    lonlat = np.asarray(lonlat, dtype=float)
+    oeste, norte = raster["origen_lonlat"]
+    escala_x, escala_y = raster["escala_m_por_grado"]
+    return np.column_stack([(lonlat[:, 0] - oeste) * escala_x, (lonlat[:, 1] - norte) * escala_y])
+
+def segmentos_homogeneos(progresiva: np.ndarray, respuesta: np.ndarray, longitud_minima_m: float = 50.0,
+                         cortes: Tuple[float, ...] = (), diferencia_minima: float = 0.1) -> Dict:
+    """
+    Tramos homogéneos por diferencias acumuladas (AASHTO 93, Apéndice J)
+
+    Zx = área acumulada de la respuesta − media × progresiva; los límites
+    están donde cambia el signo de la pendiente de Zx. Los tramos más
+    cortos que longitud_minima_m se unen al vecino de media más parecida;
+    luego se unen vecinos cuyas medias difieren menos que
+    diferencia_minima (relativa). Los cortes obligados (p. ej. cambios
+    de tránsito) no se eliminan.
+
+    Devuelve los límites (índices de estación), los tramos (i0, i1) y Zx.
+    """
+    x = np.asarray(progresiva, dtype=float)
+    r = np.asarray(respuesta, dtype=float)
+    r = np.where(np.isnan(r), np.nanmean(r), r)
+    areas = (r[:-1] + r[1:]) / 2 * np.diff(x)
+    acumulada = np.r_[0.0, np.cumsum(areas)]
+    media = acumulada[-1] / (x[-1] - x[0])
+    zx = acumulada - media * (x - x[0])
+
+    signo = np.sign(np.diff(zx))
+    signo[signo == 0] = 1
+    limites = set((np.flatnonzero(signo[1:] != signo[:-1]) + 1).tolist())
+    obligados = {int(np.argmin(np.abs(x - corte))) for corte in cortes}
+    obligados -= {0, len(x) - 1}
+    limites = sorted((limites | obligados) - {0, len(x) - 1})
+
+    def media_tramo(i0: int, i1: int) -> float:
+        return float((acumulada[i1] - acumulada[i0]) / (x[i1] - x[i0]))
+
+    while True:
+        bordes = [0] + limites + [len(x) - 1]
+        tramos = list(zip(bordes[:-1], bordes[1:]))
+        medias = [media_tramo(i0, i1) for i0, i1 in tramos]
+        # Límite entre los tramos j y j+1 es bordes[j + 1]
+        candidatos = []
+        for j, (i0, i1) in enumerate(tramos):
+            if x[i1] - x[i0] < longitud_minima_m:
+                for vecino, limite in ((j - 1, bordes[j]), (j + 1, bordes[j + 1])):
+                    if 0 <= vecino < len(tramos) and limite not in obligados:
+                        candidatos.append((0, x[i1] - x[i0], abs(medias[vecino] - medias[j]), limite))
+        if not candidatos:
+            for j in range(len(tramos) - 1):
+                diferencia = abs(medias[j] - medias[j + 1]) / max(abs(medias[j] + medias[j + 1]) / 2, 1e-12)
+                if diferencia < diferencia_minima and bordes[j + 1] not in obligados:
+                    candidatos.append((1, diferencia, 0.0, bordes[j + 1]))
+        if not candidatos:
+            break
+        limites.remove(min(candidatos)[3])
+
+    return {"limites": limites, "tramos": tramos, "zx": zx, "media": float(media)}
+
+def diseno_por_tramos(raster_cbr: Dict, eje: np.ndarray, trafico_tramos: List[Tuple[float, float, float]],
+                      intervalo_m: float = 10.0, longitud_minima_m: float = 50.0, diferencia_minima: float = 0.1,
+                      percentil_diseno: float = 25.0,
+                      ensayos: Optional[List[Tuple[float, float]]] = None, tipo: str = "ambos",
+                      factor_k: float = 10.0, parametros_rigido: Optional[Dict] = None,
+                      parametros_flexible: Optional[Dict] = None) -> Dict:
+    """
+    Diseño por tramos homogéneos a lo largo de un eje
+
+    Parámetros:
+    - raster_cbr: ráster de CBR con la forma del MDT ('X_grid', 'Y_grid',
+      'Z_grid' = CBR) en las mismas coordenadas que el eje
+    - eje: vértices del eje (N×2)
+    - trafico_tramos: (progresiva inicial, progresiva final, W18) por tramo
+    - longitud_minima_m, diferencia_minima: ver segmentos_homogeneos
+    - percentil_diseno: percentil del CBR del tramo usado para diseñar
+      (25 = el 75% del tramo es mejor que el valor de diseño)
+    - ensayos: (progresiva, CBR de campo); corrigen el sesgo del ráster
+      con la mediana de campo/ráster en los puntos ensayados
+
+    Devuelve el perfil por estación, los tramos con sus espesores (una sola
+    llamada vectorizada a los solucionadores) y el mapa de espesores, en
+    el que cada celda toma el W18 de diseño del tramo donde cae su
+    proyección sobre el eje (mapa["tramo"] indica ese tramo, 1..n).
+    """
+    try:
+        estaciones = estaciones_eje(eje, intervalo_m)
+        progresiva = estaciones["progresiva"]
+        cbr = muestrear_bilineal(raster_cbr, estaciones["xy"])
+        if np.isnan(cbr).all():
+            return {"error": "El eje no cruza el ráster de CBR", "estado": "❌ Error en diseño por tramos"}
+
+        correccion = 1.0
+        if ensayos:
+            posiciones = np.array([p for p, _ in ensayos], dtype=float)
+            campo = np.array([c for _, c in ensayos], dtype=float)
+            estimado = np.interp(posiciones, progresiva, np.where(np.isnan(cbr), np.nanmean(cbr), cbr))
+            correccion = float(np.median(campo / estimado))
+            cbr = cbr * correccion
+
+        trafico = sorted(trafico_tramos)
+        w18 = np.full(progresiva.shape, max(valor for _, _, valor in trafico))
+        for inicio, fin, valor in reversed(trafico):
+            w18[(progresiva >= inicio) & (progresiva <= fin)] = valor
+        cambios = [fin for _, fin, _ in trafico[:-1]]
+
+        segmentacion = segmentos_homogeneos(progresiva, cbr, longitud_minima_m, tuple(cambios), diferencia_minima)
+        tramos = segmentacion["tramos"]
+        cbr_diseno = np.array([np.nanpercentile(cbr[i0:i1 + 1], percentil_diseno) for i0, i1 in tramos])
+        # Tránsito de diseño: el mayor de los tramos de tránsito que se solapan con el tramo homogéneo
+        w18_diseno = np.array([max([valor for inicio, fin, valor in trafico
+                                    if min(fin, progresiva[i1]) - max(inicio, progresiva[i0]) > 1e-9]
+                                   or [float(w18[i0])]) for i0, i1 in tramos])
+        espesores = mapa_espesores(cbr_diseno, w18_diseno, tipo, factor_k, parametros_rigido, parametros_flexible)
+
+        tabla = []
+        for j, (i0, i1) in enumerate(tramos):
+            fila = {"tramo": j + 1, "progresiva_inicio": round(float(progresiva[i0]), 2),
+                    "progresiva_fin": round(float(progresiva[i1]), 2),
+                    "longitud_m": round(float(progresiva[i1] - progresiva[i0]), 2),
+                    "CBR_medio": round(float(np.nanmean(cbr[i0:i1 + 1])), 2),
+                    "CBR_diseno": round(float(cbr_diseno[j]), 2),
+                    "k_diseno_MPa_m": round(float(cbr_diseno[j] * factor_k), 1),
+                    "W18": float(w18_diseno[j])}
+            if "losa_mm" in espesores:
+                fila["losa_mm"] = round(float(espesores["losa_mm"][j]), 1)
+            if "SN" in espesores:
+                fila.update({"SN": round(float(espesores["SN"][j]), 2),
+                             "carpeta_cm": round(float(espesores["carpeta_cm"][j]), 1),
+                             "base_cm": round(float(espesores["base_cm"][j]), 1),
+                             "subbase_cm": round(float(espesores["subbase_cm"][j]), 1)})
+            tabla.append(fila)
+
+        # Tránsito del mapa: cada celda se proyecta sobre el eje desde su estación más cercana
+        # y toma el W18 de diseño del tramo que contiene esa progresiva
+        cbr_celdas = np.asarray(raster_cbr["Z_grid"], dtype=float) * correccion
+        xy_celdas = np.column_stack([np.ravel(raster_cbr["X_grid"]), np.ravel(raster_cbr["Y_grid"])])
+        estacion = cKDTree(estaciones["xy"]).query(xy_celdas)[1]
+        progresiva_celda = progresiva[estacion] + np.einsum("ij,ij->i", xy_celdas - estaciones["xy"][estacion],
+                                                            estaciones["tangente"][estacion])
+        inicios = progresiva[[i0 for i0, _ in tramos]]
+        tramo_celda = np.clip(np.searchsorted(inicios, progresiva_celda, side="right") - 1, 0, len(tramos) - 1)
+        tramo_celda = tramo_celda.reshape(cbr_celdas.shape)
+        mapa = mapa_espesores(cbr_celdas, w18_diseno[tramo_celda], tipo, factor_k,
+                              parametros_rigido, parametros_flexible)
+        mapa["tramo"] = tramo_celda + 1
+        return {
+            "perfil": {"progresiva": progresiva, "cbr": cbr, "W18": w18, "zx": segmentacion["zx"]},
+            "tramos": tabla,
+            "mapa": mapa,
+            "correccion_ensayos": round(correccion, 3),
+            "estado": "✅ Diseño por tramos homogéneos completado"
+        }
+    except Exception as e:
+        return {"error": str(e), "estado": "❌ Error en diseño por tramos"}
+
+if __name__ == "__main__":
+    # Prueba del módulo: calle de 600 m con subrasante variable
+    x = np.arange(0, 600, 2.0)
+    y = np.arange(-20, 20, 2.0)
+    X, Y = np.meshgrid(x, y)
+    cbr = np.where(X < 250, 4.0, np.where(X < 420, 9.0, 6.0)) + 0.5 * np.sin(X / 15)
+    raster = {"X_grid": X, "Y_grid": Y, "Z_grid": cbr, "resolution": 2.0}
+    eje = np.array([[0.0, 0.0], [598.0, 0.0]])
+    resultado = diseno_por_tramos(raster, eje, [(0, 300, 1.5e6), (300, 600, 4.0e6)])
+    print(resultado["estado"])
+    for fila in resultado["tramos"]:
+        print(f"  Tramo {fila['tramo']}: {fila['progresiva_inicio']:.0f}-{fila['progresiva_fin']:.0f} m, "
+              f"CBR {fila['CBR_diseno']}%, W18 {fila['W18']:.1e}, losa {fila['losa_mm']} mm, SN {fila['SN']}")
+    print(f"Mapa de losa: {np.nanmin(resultado['mapa']['losa_mm']):.0f}-{np.nanmax(resultado['mapa']['losa_mm']):.0f} mm")
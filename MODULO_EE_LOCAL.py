@@ -0,0 +1,397 @@
+"""
+MÓDULO EE LOCAL - SUSTITUTO DETERMINISTA DE GOOGLE EARTH ENGINE
+===============================================================
+
+Imita el subconjunto de la API 'ee' que usa el proyecto, sin conexión:
+- ee.Initialize, ee.Geometry (Point, Rectangle, Polygon), ee.Filter,
+  ee.Reducer, ee.ImageCollection (filterDate, filterBounds, filter,
+  select, median, mean, first, size, aggregate_array) y ee.Image
+  (select, rename, normalizedDifference, addBands, reduceRegion)
+- ee.data.computePixels con fileFormat NUMPY_NDARRAY (arreglo
+  estructurado por banda), como la API real
+- Campos sintéticos reproducibles (misma fecha y lugar = mismo valor)
+  con ciclo estacional del altiplano (lluvias de diciembre a marzo):
+  Sentinel-2 (B4, B8, nubosidad), SMAP (sm_surface), CHIRPS
+  (precipitation) y ERA5-Land (temperature_2m en K)
+
+Autor: IA Assistant - Especialista UNI
+Fecha: 2024
+"""
+
+import numpy as np
+import math
+import zlib
+from datetime import date, datetime, timedelta
+from typing import Callable, Dict, List, Tuple, Optional
+
+# Colecciones simuladas: bandas, paso entre imágenes (días), primera fecha,
+# escala nominal (m) y frecuencias espaciales (ciclos por grado)
+COLECCIONES_LOCALES = {
+    "COPERNICUS/S2_SR": {"bandas": ("B4", "B8"), "paso_dias": 5, "inicio": "2017-03-28",
+                         "escala_m": 10, "frecuencias": (60.0, 400.0)},
+    "NASA/SMAP/SPL4SMGP/007": {"bandas": ("sm_surface",), "paso_dias": 1, "inicio": "2015-03-31",
+                               "escala_m": 11000, "frecuencias": (1.0, 6.0)},
+    "UCSB-CHG/CHIRPS/DAILY": {"bandas": ("precipitation",), "paso_dias": 1, "inicio": "1981-01-01",
+                              "escala_m": 5566, "frecuencias": (2.0, 10.0)},
+    "ECMWF/ERA5_LAND/DAILY_AGGR": {"bandas": ("temperature_2m",), "paso_dias": 1, "inicio": "1950-01-02",
+                                   "escala_m": 11132, "frecuencias": (1.0, 5.0)}
+}
+
+MS_POR_DIA = 86400000
+
+def _a_fecha(valor) -> date:
+    """Fecha desde 'YYYY-MM-DD', date, datetime o milisegundos desde 1970"""
+    if isinstance(valor, datetime):
+        return valor.date()
+    if isinstance(valor, date):
+        return valor
+    if isinstance(valor, (int, float, np.integer)):
+        return date(1970, 1, 1) + timedelta(days=int(valor // MS_POR_DIA))
+    return datetime.strptime(str(valor)[:10], "%Y-%m-%d").date()
+
+def _semilla(*partes) -> int:
+    """Semilla estable entre ejecuciones (crc32 de las partes)"""
+    return zlib.crc32("|".join(str(p) for p in partes).encode("utf-8"))
+
+def _campo_espacial(nombre: str, lon: np.ndarray, lat: np.ndarray,
+                    frecuencias: Tuple[float, float], ondas: int = 4) -> np.ndarray:
+    """Campo suave en [-1, 1] como suma de ondas planas con fase fija por nombre"""
+    rng = np.random.default_rng(_semilla("campo", nombre))
+    campo = np.zeros(np.broadcast(lon, lat).shape)
+    for _ in range(ondas):
+        fx, fy = rng.uniform(*frecuencias, 2) * rng.choice([-1, 1], 2)
+        campo += np.sin(2 * np.pi * (fx * lon + fy * lat) + rng.uniform(0, 2 * np.pi))
+    return campo / ondas
+
+def _estacion(dia: date) -> float:
+    """Ciclo estacional: +1 a mediados de febrero (lluvias), -1 en agosto"""
+    return math.cos(2 * math.pi * (dia.timetuple().tm_yday - 46) / 365.25)
+
+def nubosidad_sentinel(dia: date) -> float:
+    """Porcentaje de nubes de la escena Sentinel-2 del día (mayor en lluvias)"""
+    rng = np.random.default_rng(_semilla("nubes", dia.isoformat()))
+    return float(np.clip(rng.uniform(0, 40) + 15 * _estacion(dia), 0, 100))
+
+def valores_banda(coleccion: str, banda: str, dia: date, lon: np.ndarray, lat: np.ndarray) -> np.ndarray:
+    """Valor sintético de una banda en (lon, lat) para la imagen del día"""
+    datos = COLECCIONES_LOCALES[coleccion]
+    s = _estacion(dia)
+    campo = _campo_espacial(f"{coleccion}/{banda}", lon, lat, datos["frecuencias"])
+    rng = np.random.default_rng(_semilla(coleccion, banda, dia.isoformat()))
+    variacion = rng.normal(0, 1)
+    if banda == "B8":
+        return 0.26 + 0.07 * s + 0.05 * campo + 0.005 * variacion
+    if banda == "B4":
+        return 0.10 - 0.02 * s - 0.015 * campo + 0.002 * variacion
+    if banda == "sm_surface":
+        return np.clip(0.16 + 0.06 * s + 0.03 * campo + 0.01 * variacion, 0.02, 0.5)
+    if banda == "precipitation":
+        lluvia = rng.uniform() < 0.35 + 0.3 * s
+        cantidad = rng.exponential(6.0) if lluvia else 0.0
+        return np.maximum(cantidad * (1 + 0.3 * campo), 0.0)
+    if banda == "temperature_2m":
+        return 273.15 + 9.0 + 2.0 * s + 1.5 * campo + 0.8 * variacion
+    raise ValueError(f"Banda desconocida: {banda}")
+
+class ValorLocal:
+    """Resultado diferido (ee.ComputedObject): getInfo() y get(clave)"""
+
+    def __init__(self, valor):
+        self.valor = valor
+
+    def get(self, clave: str) -> "ValorLocal":
+        return ValorLocal(self.valor[clave])
+
+    def getInfo(self):
+        return self.valor
+
+class GeometriaLocal:
+    """Geometría en lon/lat (EPSG:4326): punto, rectángulo o polígono"""
+
+    def __init__(self, tipo: str, coordenadas: List):
+        self.tipo = tipo
+        self.coordenadas = coordenadas
+
+    def vertices(self) -> np.ndarray:
+        """Vértices (N×2) del anillo exterior o el punto"""
+        if self.tipo == "Point":
+            return np.array([self.coordenadas], dtype=float)
+        return np.array(self.coordenadas[0], dtype=float)
+
+    def caja(self) -> Tuple[float, float, float, float]:
+        """(oeste, sur, este, norte)"""
+        v = self.vertices()
+        return float(v[:, 0].min()), float(v[:, 1].min()), float(v[:, 0].max()), float(v[:, 1].max())
+
+    def getInfo(self) -> Dict:
+        return {"type": self.tipo, "coordinates": self.coordenadas}
+
+    def toGeoJSON(self) -> Dict:
+        """GeoJSON sin consultar al servidor (como en la API real)"""
+        return self.getInfo()
+
+class _Geometria:
+    """Fábrica ee.Geometry"""
+
+    @staticmethod
+    def Point(coordenadas: List[float]) -> GeometriaLocal:
+        return GeometriaLocal("Point", [float(c) for c in coordenadas])
+
+    @staticmethod
+    def Rectangle(coordenadas: List[float]) -> GeometriaLocal:
+        oeste, sur, este, norte = coordenadas
+        return GeometriaLocal("Polygon", [[[oeste, sur], [este, sur], [este, norte], [oeste, norte], [oeste, sur]]])
+
+    @staticmethod
+    def Polygon(coordenadas: List) -> GeometriaLocal:
+        return GeometriaLocal("Polygon", coordenadas if np.ndim(coordenadas[0][0]) else [coordenadas])
+
+class _Filtro:
+    """Fábrica ee.Filter (comparaciones sobre propiedades de imagen)"""
+
+    @staticmethod
+    def lt(propiedad: str, valor: float) -> Callable:
+        return lambda propiedades: propiedades.get(propiedad, -np.inf) < valor
+
+    @staticmethod
+    def gt(propiedad: str, valor: float) -> Callable:
+        return lambda propiedades: propiedades.get(propiedad, np.inf) > valor
+
+class _Reductor:
+    """Fábrica ee.Reducer"""
+
+    @staticmethod
+    def mean() -> str:
+        return "mean"
+
+    @staticmethod
+    def median() -> str:
+        return "median"
+
+    @staticmethod
+    def max() -> str:
+        return "max"
+
+    @staticmethod
+    def min() -> str:
+        return "min"
+
+class ImagenLocal:
+    """
+    Imagen diferida: una función (lon, lat) → {banda: arreglo} más
+    propiedades (system:time_start, nubosidad)
+    """
+
+    def __init__(self, evaluar: Callable, propiedades: Optional[Dict] = None):
+        self._evaluar = evaluar
+        self.propiedades = propiedades or {}
+
+    def evaluar(self, lon: np.ndarray, lat: np.ndarray) -> Dict[str, np.ndarray]:
+        return self._evaluar(np.asarray(lon, dtype=float), np.asarray(lat, dtype=float))
+
+    def bandNames(self) -> ValorLocal:
+        return ValorLocal(list(self.evaluar(np.zeros(1), np.zeros(1))))
+
+    def get(self, propiedad: str) -> ValorLocal:
+        return ValorLocal(self.propiedades.get(propiedad))
+
+    def select(self, bandas, nuevos: Optional[List[str]] = None) -> "ImagenLocal":
+        bandas = [bandas] if isinstance(bandas, str) else list(bandas)
+        nuevos = nuevos or bandas
+        return ImagenLocal(lambda lon, lat: {n: v for n, v in zip(nuevos, (self.evaluar(lon, lat)[b] for b in bandas))},
+                           self.propiedades)
+
+    def rename(self, nombres) -> "ImagenLocal":
+        nombres = [nombres] if isinstance(nombres, str) else list(nombres)
+        return ImagenLocal(lambda lon, lat: dict(zip(nombres, self.evaluar(lon, lat).values())), self.propiedades)
+
+    def normalizedDifference(self, bandas: List[str]) -> "ImagenLocal":
+        def evaluar(lon, lat):
+            valores = self.evaluar(lon, lat)
+            a, b = valores[bandas[0]], valores[bandas[1]]
+            return {"nd": (a - b) / (a + b)}
+        return ImagenLocal(evaluar, self.propiedades)
+
+    def addBands(self, otra: "ImagenLocal") -> "ImagenLocal":
+        return ImagenLocal(lambda lon, lat: {**self.evaluar(lon, lat), **otra.evaluar(lon, lat)}, self.propiedades)
+
+    def reduceRegion(self, reducer: str, geometry: GeometriaLocal, scale: float = 30,
+                     **opciones) -> ValorLocal:
+        """Reducción sobre los centros de una grilla de paso 'scale' (m) dentro de la geometría"""
+        if geometry.tipo == "Point":
+            lon, lat = np.array([geometry.coordenadas[0]]), np.array([geometry.coordenadas[1]])
+        else:
+            oeste, sur, este, norte = geometry.caja()
+            paso = scale / 111320.0
+            lon, lat = np.meshgrid(np.arange(oeste + paso / 2, este, paso), np.arange(sur + paso / 2, norte, paso))
+            dentro = punto_en_poligono(lon.ravel(), lat.ravel(), geometry.vertices())
+            lon, lat = lon.ravel()[dentro], lat.ravel()[dentro]
+            if lon.size == 0:
+                lon, lat = np.array([(oeste + este) / 2]), np.array([(sur + norte) / 2])
+        funcion = {"mean": np.nanmean, "median": np.nanmedian, "max": np.nanmax, "min": np.nanmin}[reducer]
+        return ValorLocal({banda: float(funcion(valores)) for banda, valores in self.evaluar(lon, lat).items()})
+
+class ColeccionLocal:
+    """ee.ImageCollection diferida sobre una colección simulada"""
+
+    def __init__(self, nombre: str, inicio: Optional[date] = None, fin: Optional[date] = None,
+                 filtros: Tuple = (), bandas: Optional[List[str]] = None):
+        if nombre not in COLECCIONES_LOCALES:
+            raise ValueError(f"Colección no disponible localmente: {nombre}")
+        self.nombre = nombre
+        self.inicio = inicio
+        self.fin = fin
+        self.filtros = filtros
+        self.bandas = bandas
+
+    def _copiar(self, **cambios) -> "ColeccionLocal":
+        datos = {"inicio": self.inicio, "fin": self.fin, "filtros": self.filtros, "bandas": self.bandas}
+        datos.update(cambios)
+        return ColeccionLocal(self.nombre, **datos)
+
+    def filterDate(self, inicio, fin) -> "ColeccionLocal":
+        return self._copiar(inicio=_a_fecha(inicio), fin=_a_fecha(fin))
+
+    def filterBounds(self, geometria: GeometriaLocal) -> "ColeccionLocal":
+        return self._copiar()
+
+    def filter(self, filtro: Callable) -> "ColeccionLocal":
+        return self._copiar(filtros=self.filtros + (filtro,))
+
+    def select(self, bandas) -> "ColeccionLocal":
+        return self._copiar(bandas=[bandas] if isinstance(bandas, str) else list(bandas))
+
+    def fechas(self) -> List[date]:
+        """Fechas de las imágenes que pasan los filtros (fin excluido, como en ee)"""
+        datos = COLECCIONES_LOCALES[self.nombre]
+        primera = _a_fecha(datos["inicio"])
+        if self.inicio is None or self.fin is None:
+            raise ValueError("Use filterDate antes de listar una colección local")
+        desfase = (self.inicio - primera).days
+        paso = datos["paso_dias"]
+        dia = primera + timedelta(days=max(0, -(-desfase // paso) * paso))
+        fechas = []
+        while dia < self.fin:
+            if all(filtro(self._propiedades(dia)) for filtro in self.filtros):
+                fechas.append(dia)
+            dia += timedelta(days=paso)
+        return fechas
+
+    def _propiedades(self, dia: date) -> Dict:
+        propiedades = {"system:time_start": (dia - date(1970, 1, 1)).days * MS_POR_DIA,
+                       "system:index": dia.strftime("%Y%m%d")}
+        if self.nombre == "COPERNICUS/S2_SR":
+            propiedades["CLOUDY_PIXEL_PERCENTAGE"] = nubosidad_sentinel(dia)
+        return propiedades
+
+    def imagen(self, dia: date) -> ImagenLocal:
+        """Imagen de la colección para un día"""
+        bandas = self.bandas or list(COLECCIONES_LOCALES[self.nombre]["bandas"])
+        return ImagenLocal(lambda lon, lat: {b: valores_banda(self.nombre, b, dia, lon, lat) for b in bandas},
+                           self._propiedades(dia))
+
+    def size(self) -> ValorLocal:
+        return ValorLocal(len(self.fechas()))
+
+    def aggregate_array(self, propiedad: str) -> ValorLocal:
+        return ValorLocal([self._propiedades(dia)[propiedad] for dia in self.fechas()])
+
+    def first(self) -> ImagenLocal:
+        fechas = self.fechas()
+        if not fechas:
+            raise ValueError(f"Colección vacía: {self.nombre}")
+        return self.imagen(fechas[0])
+
+    def _reducir(self, funcion: Callable) -> ImagenLocal:
+        imagenes = [self.imagen(dia) for dia in self.fechas()]
+        if not imagenes:
+            raise ValueError(f"Colección vacía: {self.nombre}")
+
+        def evaluar(lon, lat):
+            valores = [imagen.evaluar(lon, lat) for imagen in imagenes]
+            return {banda: funcion(np.stack([v[banda] for v in valores]), axis=0) for banda in valores[0]}
+        return ImagenLocal(evaluar)
+
+    def mosaic(self) -> ImagenLocal:
+        """Una escena por fecha en las colecciones locales: equivale a first()"""
+        return self.first()
+
+    def median(self) -> ImagenLocal:
+        return self._reducir(np.median)
+
+    def mean(self) -> ImagenLocal:
+        return self._reducir(np.mean)
+
+class _DatosLocales:
+    """ee.data: cálculo de píxeles en una grilla"""
+
+    @staticmethod
+    def computePixels(solicitud: Dict) -> np.ndarray:
+        """
+        Píxeles de la expresión en la grilla pedida (affineTransform en
+        grados, crsCode EPSG:4326) como arreglo estructurado alto×ancho
+        con un campo float32 por banda
+        """
+        grilla = solicitud["grid"]
+        ancho, alto = grilla["dimensions"]["width"], grilla["dimensions"]["height"]
+        t = grilla["affineTransform"]
+        columnas = np.arange(ancho) + 0.5
+        filas = np.arange(alto) + 0.5
+        lon = t["translateX"] + t["scaleX"] * columnas[np.newaxis, :] + t.get("shearX", 0) * filas[:, np.newaxis]
+        lat = t["translateY"] + t.get("shearY", 0) * columnas[np.newaxis, :] + t["scaleY"] * filas[:, np.newaxis]
+        valores = solicitud["expression"].evaluar(lon, lat)
+        salida = np.zeros((alto, ancho), dtype=[(banda, np.float32) for banda in valores])
+        for banda, arreglo in valores.items():
+            salida[banda] = np.broadcast_to(arreglo, (alto, ancho))
+        return salida
+
+class EELocal:
+    """Objeto con la forma del módulo 'ee' (ee = EELocal())"""
+
+    Geometry = _Geometria
+    Filter = _Filtro
+    Reducer = _Reductor
+    data = _DatosLocales
+
+    def __init__(self):
+        self.initialized = False
+
+    def Initialize(self, *args, **kwargs) -> bool:
+        self.initialized = True
+        return True
+
+    def ImageCollection(self, nombre: str) -> ColeccionLocal:
+        return ColeccionLocal(nombre)
+
+    def Image(self, nombre_o_valor) -> ImagenLocal:
+        if isinstance(nombre_o_valor, (int, float)):
+            return ImagenLocal(lambda lon, lat: {"constant": np.full(np.broadcast(lon, lat).shape,
+                                                                    float(nombre_o_valor))})
+        raise ValueError("Solo se admiten imágenes constantes en el sustituto local")
+
+def punto_en_poligono(x: np.ndarray, y: np.ndarray, vertices: np.ndarray) -> np.ndarray:
+    """Prueba par-impar vectorizada de puntos en un anillo (N×2, cerrado o no)"""
+    vertices = np.asarray(vertices, dtype=float)
+    x0, y0 = vertices[:, 0], vertices[:, 1]
+    x1, y1 = np.roll(x0, -1), np.roll(y0, -1)
+    dentro = np.zeros(np.shape(x), dtype=bool)
+    for xa, ya, xb, yb in zip(x0, y0, x1, y1):
+        if ya == yb:
+            continue
+        cruza = (ya > y) != (yb > y)
+        x_corte = xa + (y - ya) * (xb - xa) / (yb - ya)
+        dentro ^= cruza & (x < x_corte)
+    return dentro
+
+if __name__ == "__main__":
+    # Prueba del módulo: el mismo código que usa la API real
+    ee = EELocal()
+    ee.Initialize()
+    punto = ee.Geometry.Point([-70.1234, -15.2345])
+    sentinel = ee.ImageCollection('COPERNICUS/S2_SR') \
+        .filterDate('2023-01-01', '2023-12-31') \
+        .filterBounds(punto) \
+        .filter(ee.Filter.lt('CLOUDY_PIXEL_PERCENTAGE', 20))
+    ndvi = sentinel.median().normalizedDifference(['B8', 'B4']).rename('NDVI')
+    print(f"Escenas Sentinel-2 despejadas en 2023: {sentinel.size().getInfo()}")
+    print(f"NDVI mediano: {ndvi.reduceRegion(ee.Reducer.mean(), punto, 30).get('NDVI').getInfo():.3f}")
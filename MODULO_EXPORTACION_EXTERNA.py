@@ -210,6 +210,12 @@ def exportar_hec_ras_avanzado(analisis_drenaje: Dict, datos_proyecto: Dict) -> D
     try:
         print("🌊 Exportando a HEC-RAS...")
         
+        # Geometría: secciones extraídas del MDT o sección triangular tipo
+        diseno = analisis_drenaje['diseno_drenaje']
+        geometria = analisis_drenaje.get('geometria_hec_ras') or (
+            f"# Sección triangular\nStation 0.0\nElevation {diseno['profundidad_cuneta_m']}\n"
+            f"Station {diseno['ancho_cuneta_m']}\nElevation 0.0\n")
+        
         # Crear contenido del archivo HEC-RAS
         hec_ras_content = f"""
 HEC-RAS Version 6.0
@@ -222,7 +228,7 @@ Description: Diseño de cunetas y drenaje superficial para pavimentación urbana
 Project Name: {datos_proyecto.get('nombre', 'San Miguel')}
 Location: {datos_proyecto.get('ubicacion', 'San Miguel, Puno')}
 Design Year: {datetime.now().year}
-Return Period: 10 years
+Return Period: {analisis_drenaje['parametros_hidrologicos'].get('periodo_retorno', 10)} years
 
 # PARÁMETROS HIDROLÓGICOS
 Area: {analisis_drenaje['parametros_hidrologicos']['area_cuenca_ha']} ha
@@ -240,12 +246,7 @@ Depth: {analisis_drenaje['diseno_drenaje']['profundidad_cuneta_m']} m
 Width: {analisis_drenaje['diseno_drenaje']['ancho_cuneta_m']} m
 
 # GEOMETRÍA DE CUNETAS
-# Sección triangular
-Station 0.0
-Elevation {analisis_drenaje['diseno_drenaje']['profundidad_cuneta_m']}
-Station {analisis_drenaje['diseno_drenaje']['ancho_cuneta_m']}
-Elevation 0.0
-
+{geometria}
 # MATERIALES
 Manning's n: 0.013 (Concrete)
 Side Slope: 2:1
@@ -0,0 +1,268 @@
+"""
+MÓDULO EXTRACCIÓN POR LOTES - DATOS SATELITALES DE MUCHOS SITIOS
+================================================================
+
+Extracción de NDVI, humedad, precipitación y temperatura para cientos de
+centroides de manzana o polígonos en pocas solicitudes:
+- Sitios agrupados por tesela de la grilla de cada variable y por
+  ventana de fechas
+- Una sola composición (mediana para NDVI, media para el resto) y un solo
+  ee.data.computePixels por grupo, sobre la ventana de píxeles que cubre
+  a todos los sitios del grupo
+- Solicitudes concurrentes (asyncio) con límite de conexiones hacia el
+  proveedor (Google Earth Engine o el sustituto local de MODULO_EE_LOCAL)
+- Resultado en tabla ordenada: una fila por sitio, variable y ventana
+- Caché satelital opcional por solicitud (MODULO_CACHE_SATELITAL); en
+  modo sin conexión los grupos sin caché quedan vacíos
+- Errores del proveedor (ee.EEException) por grupo: sus sitios quedan
+  vacíos con el mensaje en la columna "error" y el resto del lote sigue
+
+Autor: IA Assistant - Especialista UNI
+Fecha: 2024
+"""
+
+import numpy as np
+import pandas as pd
+import asyncio
+import math
+import time
+from datetime import timedelta
+from typing import Dict, List, Tuple, Optional
+
+from MODULO_CACHE_SATELITAL import CacheConsultasSatelitales, ErrorSinCache
+from MODULO_EE_LOCAL import EELocal, _a_fecha, punto_en_poligono
+from MODULO_SERIES_SATELITALES import VARIABLES_SATELITALES, TAMANO_TESELA
+
+COLUMNAS_TABLA = ["sitio", "variable", "unidad", "inicio", "fin", "media", "minimo", "maximo",
+                  "desviacion", "pixeles", "error"]
+
+def normalizar_sitios(sitios: List) -> List[Dict]:
+    """
+    Sitios como {"id", "vertices"} (N×2 en lon, lat). Acepta pares
+    (lon, lat), listas de vértices o diccionarios con "lon"/"lat" o
+    "poligono" y un "id" opcional (por defecto la posición).
+    """
+    normalizados = []
+    for posicion, sitio in enumerate(sitios):
+        identificador = posicion
+        if isinstance(sitio, dict):
+            identificador = sitio.get("id", posicion)
+            sitio = sitio["poligono"] if "poligono" in sitio else (sitio["lon"], sitio["lat"])
+        vertices = np.asarray(sitio, dtype=float).reshape(-1, 2)
+        normalizados.append({"id": identificador, "vertices": vertices})
+    return normalizados
+
+def ventanas_fechas(fecha_inicio: str, fecha_fin: str, ventana_dias: Optional[int] = None) -> List[Tuple[str, str]]:
+    """Ventanas [inicio, fin) consecutivas; una sola si ventana_dias es None"""
+    inicio, fin = _a_fecha(fecha_inicio), _a_fecha(fecha_fin)
+    paso = timedelta(days=ventana_dias) if ventana_dias else fin - inicio
+    ventanas = []
+    while inicio < fin:
+        siguiente = min(inicio + paso, fin)
+        ventanas.append((inicio.isoformat(), siguiente.isoformat()))
+        inicio = siguiente
+    return ventanas
+
+def _pixel(variable: str, lon: float, lat: float) -> Tuple[int, int]:
+    """(columna, fila) global del píxel que contiene el punto"""
+    resolucion = VARIABLES_SATELITALES[variable]["resolucion"]
+    return int(math.floor((lon + 180) / resolucion)), int(math.floor((90 - lat) / resolucion))
+
+def agrupar_sitios(sitios: List[Dict], variable: str,
+                   tamano_tesela: int = TAMANO_TESELA) -> Dict[Tuple[int, int], List[Dict]]:
+    """Sitios por tesela (según su centroide) en la grilla de la variable"""
+    grupos = {}
+    for sitio in sitios:
+        columna, fila = _pixel(variable, *sitio["vertices"].mean(axis=0))
+        grupos.setdefault((columna // tamano_tesela, fila // tamano_tesela), []).append(sitio)
+    return grupos
+
+def _ventana_pixeles(variable: str, sitios: List[Dict]) -> Tuple[int, int, int, int]:
+    """(col0, fila0, ancho, alto) de la ventana de píxeles que cubre a los sitios"""
+    vertices = np.vstack([sitio["vertices"] for sitio in sitios])
+    col0, fila0 = _pixel(variable, vertices[:, 0].min(), vertices[:, 1].max())
+    col1, fila1 = _pixel(variable, vertices[:, 0].max(), vertices[:, 1].min())
+    return col0, fila0, col1 - col0 + 1, fila1 - fila0 + 1
+
+def _solicitar_composicion(ee, variable: str, inicio: str, fin: str,
+                           ventana: Tuple[int, int, int, int]) -> Optional[np.ndarray]:
+    """
+    Una ida y vuelta al proveedor: composición de la ventana de fechas en
+    la ventana de píxeles. None si la colección no tiene imágenes.
+    """
+    definicion = VARIABLES_SATELITALES[variable]
+    resolucion = definicion["resolucion"]
+    col0, fila0, ancho, alto = ventana
+    oeste, norte = -180 + col0 * resolucion, 90 - fila0 * resolucion
+    coleccion = ee.ImageCollection(definicion["coleccion"]) \
+        .filterDate(inicio, fin) \
+        .filterBounds(ee.Geometry.Rectangle([oeste, norte - alto * resolucion, oeste + ancho * resolucion, norte]))
+    if "filtro" in definicion:
+        propiedad, limite = definicion["filtro"]
+        coleccion = coleccion.filter(ee.Filter.lt(propiedad, limite))
+    try:
+        if definicion.get("operacion") == "diferencia_normalizada":
+            imagen = coleccion.median().normalizedDifference(list(definicion["bandas"]))
+        else:
+            imagen = coleccion.select(list(definicion["bandas"])).mean()
+        pixeles = ee.data.computePixels({
+            "expression": imagen.rename([variable]),
+            "fileFormat": "NUMPY_NDARRAY",
+            "grid": {"dimensions": {"width": ancho, "height": alto},
+                     "affineTransform": {"scaleX": resolucion, "shearX": 0, "translateX": oeste,
+                                         "shearY": 0, "scaleY": -resolucion, "translateY": norte},
+                     "crsCode": "EPSG:4326"}})
+    except ValueError:
+        return None
+    return pixeles[variable].astype(np.float64) * definicion.get("escala", 1.0) + definicion.get("desplazamiento", 0.0)
+
+def _errores_proveedor(ee) -> Tuple[type, ...]:
+    """Excepciones del proveedor que invalidan solo un grupo (ee.EEException en Earth Engine)"""
+    excepcion = getattr(ee, "EEException", None)
+    return (excepcion,) if isinstance(excepcion, type) and issubclass(excepcion, Exception) else ()
+
+def _solicitar_con_cache(ee, variable: str, inicio: str, fin: str, ventana: Tuple[int, int, int, int],
+                         cache: Optional[CacheConsultasSatelitales]) -> Optional[np.ndarray]:
+    """Composición desde la caché satelital si existe; si no, desde el proveedor"""
+    if cache is None:
+        return _solicitar_composicion(ee, variable, inicio, fin, ventana)
+    definicion = VARIABLES_SATELITALES[variable]
+    reductor = "median" if definicion.get("operacion") == "diferencia_normalizada" else "mean"
+    try:
+        valores = cache.consultar(definicion["coleccion"], list(ventana), inicio, fin,
+                                  lambda: _solicitar_composicion(ee, variable, inicio, fin, ventana),
+                                  reductor=reductor, escala=definicion["resolucion"], extra={"variable": variable})
+    except ErrorSinCache:
+        return None
+    return None if valores is None else np.array(valores, dtype=np.float64)
+
+def _estadisticas_sitio(variable: str, sitio: Dict, ventana: Tuple[int, int, int, int],
+                        valores: Optional[np.ndarray]) -> Dict:
+    """Estadísticas de los píxeles cuyo centro cae en el sitio (o del píxel de su centroide)"""
+    fila = {"media": None, "minimo": None, "maximo": None, "desviacion": None, "pixeles": 0}
+    if valores is None:
+        return fila
+    resolucion = VARIABLES_SATELITALES[variable]["resolucion"]
+    col0, fila0, ancho, alto = ventana
+    vertices = sitio["vertices"]
+    seleccion = np.array([])
+    if len(vertices) >= 3:
+        c_a, f_a = _pixel(variable, vertices[:, 0].min(), vertices[:, 1].max())
+        c_b, f_b = _pixel(variable, vertices[:, 0].max(), vertices[:, 1].min())
+        lon = -180 + (np.arange(c_a, c_b + 1) + 0.5) * resolucion
+        lat = 90 - (np.arange(f_a, f_b + 1) + 0.5) * resolucion
+        malla_lon, malla_lat = np.meshgrid(lon, lat)
+        dentro = punto_en_poligono(malla_lon, malla_lat, vertices)
+        seleccion = valores[f_a - fila0:f_b - fila0 + 1, c_a - col0:c_b - col0 + 1][dentro]
+    if seleccion.size == 0:
+        columna, fila_centro = _pixel(variable, *vertices.mean(axis=0))
+        seleccion = valores[fila_centro - fila0, columna - col0].reshape(1)
+    seleccion = seleccion[np.isfinite(seleccion)]
+    if seleccion.size:
+        fila.update({"media": round(float(seleccion.mean()), 4), "minimo": round(float(seleccion.min()), 4),
+                     "maximo": round(float(seleccion.max()), 4), "desviacion": round(float(seleccion.std()), 4),
+                     "pixeles": int(seleccion.size)})
+    return fila
+
+async def _extraer_grupo(ee, variable: str, inicio: str, fin: str, sitios: List[Dict],
+                         semaforo: asyncio.Semaphore,
+                         cache: Optional[CacheConsultasSatelitales] = None) -> Tuple[List[Dict], bool, Optional[str]]:
+    """
+    Filas de un grupo (tesela y ventana de fechas) con una sola solicitud;
+    un error del proveedor deja vacías solo las filas de este grupo
+    """
+    ventana = _ventana_pixeles(variable, sitios)
+    error = None
+    async with semaforo:
+        try:
+            valores = await asyncio.to_thread(_solicitar_con_cache, ee, variable, inicio, fin, ventana, cache)
+        except _errores_proveedor(ee) as e:
+            valores, error = None, str(e)
+    unidad = VARIABLES_SATELITALES[variable]["unidad"]
+    filas = [{"sitio": sitio["id"], "variable": variable, "unidad": unidad, "inicio": inicio, "fin": fin,
+              **_estadisticas_sitio(variable, sitio, ventana, valores), "error": error} for sitio in sitios]
+    return filas, valores is not None, error
+
+async def extraer_lote_async(ee, sitios: List, fecha_inicio: str, fecha_fin: str,
+                             variables: Optional[List[str]] = None, ventana_dias: Optional[int] = None,
+                             max_concurrentes: int = 8, tamano_tesela: int = TAMANO_TESELA,
+                             cache: Optional[CacheConsultasSatelitales] = None) -> Dict:
+    """Versión asíncrona de extraer_lote (para usar dentro de un bucle de eventos)"""
+    inicio = time.perf_counter()
+    normalizados = normalizar_sitios(sitios)
+    variables = variables or list(VARIABLES_SATELITALES)
+    ventanas = ventanas_fechas(fecha_inicio, fecha_fin, ventana_dias)
+    semaforo = asyncio.Semaphore(max_concurrentes)
+    tareas = [_extraer_grupo(ee, variable, desde, hasta, grupo, semaforo, cache)
+              for variable in variables
+              for grupo in agrupar_sitios(normalizados, variable, tamano_tesela).values()
+              for desde, hasta in ventanas]
+    resultados = await asyncio.gather(*tareas)
+
+    tabla = pd.DataFrame([fila for filas, _, _ in resultados for fila in filas], columns=COLUMNAS_TABLA)
+    tabla = tabla.sort_values(["sitio", "variable", "inicio"], kind="stable").reset_index(drop=True)
+    sin_datos = sum(1 for _, con_datos, _ in resultados if not con_datos)
+    con_error = sum(1 for _, _, error in resultados if error)
+    if con_error:
+        estado = f"⚠️ {con_error} solicitudes fallaron en el proveedor"
+    elif sin_datos < len(tareas):
+        estado = "✅ Extracción por lotes completada"
+    else:
+        estado = "⚠️ Sin imágenes en el período"
+    return {
+        "tabla": tabla,
+        "sitios": len(normalizados),
+        "solicitudes": len(tareas),
+        "solicitudes_por_sitio": len(normalizados) * len(variables) * len(ventanas),
+        "grupos_sin_datos": sin_datos,
+        "grupos_con_error": con_error,
+        "tiempo_s": round(time.perf_counter() - inicio, 3),
+        "estado": estado
+    }
+
+def extraer_lote(ee, sitios: List, fecha_inicio: str, fecha_fin: str,
+                 variables: Optional[List[str]] = None, ventana_dias: Optional[int] = None,
+                 max_concurrentes: int = 8, tamano_tesela: int = TAMANO_TESELA,
+                 cache: Optional[CacheConsultasSatelitales] = None) -> Dict:
+    """
+    Extrae las variables satelitales de muchos sitios agrupando solicitudes
+
+    Parámetros:
+    - ee: módulo 'ee' inicializado o EELocal()
+    - sitios: centroides (lon, lat), polígonos o diccionarios con "id"
+    - fecha_inicio, fecha_fin: período (fin excluido)
+    - variables: claves de VARIABLES_SATELITALES (todas por defecto)
+    - ventana_dias: largo de cada ventana de composición (todo el período
+      si es None)
+    - max_concurrentes: solicitudes simultáneas hacia el proveedor
+    - cache: caché satelital para no repetir solicitudes ya hechas
+
+    Devuelve la tabla (DataFrame con una fila por sitio, variable y
+    ventana, con el error del proveedor si su grupo falló), el número de
+    solicitudes hechas y el que habría requerido consultar sitio por sitio.
+    """
+    try:
+        return asyncio.run(extraer_lote_async(ee, sitios, fecha_inicio, fecha_fin, variables,
+                                              ventana_dias, max_concurrentes, tamano_tesela, cache))
+    except Exception as e:
+        return {"error": str(e), "estado": "❌ Error en extracción por lotes"}
+
+def centroides_manzanas(centro: Tuple[float, float], filas: int, columnas: int,
+                        separacion_m: float = 100.0) -> List[Dict]:
+    """Centroides de una cuadrícula de manzanas alrededor de un punto (lon, lat)"""
+    paso_lat = separacion_m / 111320.0
+    paso_lon = paso_lat / math.cos(math.radians(centro[1]))
+    return [{"id": f"M-{i + 1:02d}-{j + 1:02d}",
+             "lon": centro[0] + (j - (columnas - 1) / 2) * paso_lon,
+             "lat": centro[1] + ((filas - 1) / 2 - i) * paso_lat}
+            for i in range(filas) for j in range(columnas)]
+
+if __name__ == "__main__":
+    # Prueba del módulo: 400 manzanas del distrito de San Miguel
+    ee = EELocal()
+    ee.Initialize()
+    manzanas = centroides_manzanas((-70.1234, -15.2345), 20, 20)
+    resultado = extraer_lote(ee, manzanas, "2023-01-01", "2024-01-01", ventana_dias=91)
+    print(f"Sitios: {resultado['sitios']} | Solicitudes: {resultado['solicitudes']} "
+          f"(sitio por sitio: {resultado['solicitudes_por_sitio']}) | {resultado['tiempo_s']} s")
+    print(resultado["tabla"].head(8).to_string(index=False))
@@ -0,0 +1,381 @@
+"""
+MÓDULO FILTRO DE SUELO - CLASIFICACIÓN DE NUBES SIN CLASIFICAR
+==============================================================
+
+Clasificación automática de puntos de suelo (clase ASPRS 2) para archivos
+LAS/LAZ entregados sin clasificar:
+- Rasterización vectorizada de mínimos por celda
+- Filtro morfológico progresivo (PMF, Zhang et al. 2003) sobre la grilla
+- Procesamiento por teselas con halo (memoria acotada)
+- Lectura/escritura por bloques de puntos con laspy
+
+Autor: IA Assistant - Especialista UNI
+Fecha: 2024
+"""
+
+import numpy as np
+import math
+import os
+from typing import Dict, List, Tuple, Optional
+
+try:
+    import laspy
+    LASPY_AVAILABLE = True
+except ImportError:
+    LASPY_AVAILABLE = False
+
+try:
+    from scipy import ndimage
+    SCIPY_AVAILABLE = True
+except ImportError:
+    SCIPY_AVAILABLE = False
+
+# Clases ASPRS usadas por el filtro
+CLASE_NO_CLASIFICADO = 1
+CLASE_SUELO = 2
+
+# Parámetros por defecto para zonas urbanas de San Miguel, Puno
+PARAMETROS_PMF = {
+    "resolucion": 1.0,      # m - tamaño de celda de mínimos
+    "ventana_max": 20.0,    # m - mayor objeto a remover (edificaciones)
+    "pendiente": 0.15,      # m/m - pendiente máxima del terreno
+    "dh_inicial": 0.30,     # m - tolerancia inicial de elevación
+    "dh_max": 2.5,          # m - tolerancia máxima de elevación
+    "tesela": 1024          # celdas por lado de cada tesela
+}
+
+def necesita_clasificacion(clasificacion: Optional[np.ndarray]) -> bool:
+    """
+    Indica si una nube requiere filtro de suelo (sin clases o sin clase 2)
+    """
+    if clasificacion is None:
+        return True
+    clasificacion = np.asarray(clasificacion)
+    return clasificacion.size == 0 or not np.any(clasificacion == CLASE_SUELO)
+
+def definir_grilla(x_min: float, y_min: float, x_max: float, y_max: float,
+                   resolucion: float) -> Dict:
+    """
+    Define una grilla regular (fila 0 = y mínimo) que cubre la extensión dada
+    """
+    if resolucion <= 0:
+        raise ValueError("La resolución de la grilla debe ser positiva")
+    nx = int(math.floor((x_max - x_min) / resolucion)) + 1
+    ny = int(math.floor((y_max - y_min) / resolucion)) + 1
+    return {
+        "x_min": float(x_min),
+        "y_min": float(y_min),
+        "resolucion": float(resolucion),
+        "nx": nx,
+        "ny": ny
+    }
+
+def indices_celda(x: np.ndarray, y: np.ndarray, grilla: Dict) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Devuelve el índice lineal de celda de cada punto y la máscara de puntos dentro
+    """
+    columna = np.floor((np.asarray(x) - grilla["x_min"]) / grilla["resolucion"]).astype(np.int64)
+    fila = np.floor((np.asarray(y) - grilla["y_min"]) / grilla["resolucion"]).astype(np.int64)
+    dentro = (columna >= 0) & (columna < grilla["nx"]) & (fila >= 0) & (fila < grilla["ny"])
+    return fila * grilla["nx"] + columna, dentro
+
+def acumular_minimos(z_min: np.ndarray, x: np.ndarray, y: np.ndarray,
+                     z: np.ndarray, grilla: Dict) -> np.ndarray:
+    """
+    Actualiza en sitio la grilla plana de mínimos con un bloque de puntos
+    """
+    indices, dentro = indices_celda(x, y, grilla)
+    indices = indices[dentro]
+    valores = np.asarray(z, dtype=np.float64)[dentro]
+    if indices.size == 0:
+        return z_min
+
+    # Mínimo por celda con un único ordenamiento (sin bucles por punto)
+    orden = np.argsort(indices, kind="stable")
+    indices = indices[orden]
+    valores = valores[orden]
+    inicio = np.flatnonzero(np.r_[True, indices[1:] != indices[:-1]])
+    celdas = indices[inicio]
+    z_min[celdas] = np.minimum(z_min[celdas], np.minimum.reduceat(valores, inicio))
+    return z_min
+
+def rasterizar_minimos(points: np.ndarray, resolucion: float = 1.0,
+                       grilla: Optional[Dict] = None) -> Tuple[np.ndarray, Dict]:
+    """
+    Grilla de elevación mínima por celda (NaN en celdas sin puntos)
+    """
+    points = np.asarray(points)
+    if grilla is None:
+        grilla = definir_grilla(points[:, 0].min(), points[:, 1].min(),
+                                points[:, 0].max(), points[:, 1].max(), resolucion)
+    z_min = np.full(grilla["nx"] * grilla["ny"], np.inf)
+    acumular_minimos(z_min, points[:, 0], points[:, 1], points[:, 2], grilla)
+    z_min[np.isinf(z_min)] = np.nan
+    return z_min.reshape(grilla["ny"], grilla["nx"]), grilla
+
+def crear_mdt_por_celdas(points: np.ndarray, resolucion: float = 1.0,
+                         grilla: Optional[Dict] = None) -> Dict:
+    """
+    MDT por promedio de puntos en cada celda (una pasada, sin bucles por celda)
+
+    Devuelve el mismo formato que PDALSimulator.create_dtm; las celdas sin
+    puntos toman la elevación de la celda con datos más cercana.
+    """
+    points = np.asarray(points)
+    if grilla is None:
+        grilla = definir_grilla(points[:, 0].min(), points[:, 1].min(),
+                                points[:, 0].max(), points[:, 1].max(), resolucion)
+    n_celdas = grilla["nx"] * grilla["ny"]
+    indices, dentro = indices_celda(points[:, 0], points[:, 1], grilla)
+    suma = np.bincount(indices[dentro], weights=points[dentro, 2], minlength=n_celdas)
+    conteo = np.bincount(indices[dentro], minlength=n_celdas)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        z_grid = (suma / conteo).reshape(grilla["ny"], grilla["nx"])
+
+    forma = (grilla["ny"], grilla["nx"])
+    x_centros = grilla["x_min"] + (np.arange(grilla["nx"]) + 0.5) * grilla["resolucion"]
+    y_centros = grilla["y_min"] + (np.arange(grilla["ny"]) + 0.5) * grilla["resolucion"]
+    return {
+        'X_grid': np.broadcast_to(x_centros[np.newaxis, :], forma),
+        'Y_grid': np.broadcast_to(y_centros[:, np.newaxis], forma),
+        'Z_grid': _rellenar_vacios(z_grid),
+        'resolution': grilla["resolucion"],
+        'conteo_puntos': conteo.reshape(forma)
+    }
+
+def _filtro_extremo(a: np.ndarray, ventana: int, operacion: str) -> np.ndarray:
+    """Mínimo/máximo móvil cuadrado (separable) con borde reflejado"""
+    if SCIPY_AVAILABLE:
+        filtro = ndimage.minimum_filter if operacion == "min" else ndimage.maximum_filter
+        return filtro(a, size=ventana, mode="reflect")
+
+    # Alternativa NumPy: dos pasadas 1D con ventanas deslizantes
+    reductor = np.min if operacion == "min" else np.max
+    radio = ventana // 2
+    resultado = a
+    for eje in (0, 1):
+        pad = [(0, 0), (0, 0)]
+        pad[eje] = (radio, ventana - 1 - radio)
+        extendido = np.pad(resultado, pad, mode="symmetric")
+        vistas = np.lib.stride_tricks.sliding_window_view(extendido, ventana, axis=eje)
+        resultado = reductor(vistas, axis=-1)
+    return resultado
+
+def apertura_morfologica(a: np.ndarray, ventana: int) -> np.ndarray:
+    """Apertura en escala de grises (erosión seguida de dilatación)"""
+    return _filtro_extremo(_filtro_extremo(a, ventana, "min"), ventana, "max")
+
+def apertura_por_teselas(a: np.ndarray, ventana: int, tesela: int = 1024) -> np.ndarray:
+    """
+    Apertura morfológica tesela por tesela con halo, idéntica a la global
+
+    El halo de 2·(ventana//2) celdas cubre el alcance de la erosión más la
+    dilatación, por lo que el interior de cada tesela es exacto.
+    """
+    filas, columnas = a.shape
+    if filas <= tesela and columnas <= tesela:
+        return apertura_morfologica(a, ventana)
+
+    halo = 2 * (ventana // 2)
+    resultado = np.empty_like(a)
+    for r0 in range(0, filas, tesela):
+        r1 = min(r0 + tesela, filas)
+        for c0 in range(0, columnas, tesela):
+            c1 = min(c0 + tesela, columnas)
+            hr0, hr1 = max(r0 - halo, 0), min(r1 + halo, filas)
+            hc0, hc1 = max(c0 - halo, 0), min(c1 + halo, columnas)
+            bloque = apertura_morfologica(a[hr0:hr1, hc0:hc1], ventana)
+            resultado[r0:r1, c0:c1] = bloque[r0 - hr0:r1 - hr0, c0 - hc0:c1 - hc0]
+    return resultado
+
+def _rellenar_vacios(z: np.ndarray) -> np.ndarray:
+    """Rellena celdas NaN con el valor de la celda válida más cercana"""
+    vacios = np.isnan(z)
+    if not np.any(vacios):
+        return z.copy()
+    if np.all(vacios):
+        raise ValueError("La grilla no contiene celdas con puntos")
+    if SCIPY_AVAILABLE:
+        indices = ndimage.distance_transform_edt(vacios, return_distances=False, return_indices=True)
+        return z[tuple(indices)]
+
+    # Alternativa sin SciPy: máximo local iterativo sobre las celdas vacías
+    relleno = np.where(vacios, -np.inf, z)
+    while np.isinf(relleno).any():
+        dilatado = _filtro_extremo(relleno, 3, "max")
+        relleno = np.where(np.isinf(relleno), dilatado, relleno)
+    return relleno
+
+def ventanas_progresivas(resolucion: float, ventana_max: float) -> List[int]:
+    """Tamaños de ventana en celdas: 3, 5, 9, 17, ... (w_k = 2·2^k + 1)"""
+    ventanas = []
+    k = 0
+    while True:
+        w = 2 * (2 ** k) + 1
+        if ventanas and w * resolucion > ventana_max:
+            break
+        ventanas.append(w)
+        k += 1
+    return ventanas
+
+def filtro_morfologico_progresivo(z_min: np.ndarray, resolucion: float = 1.0,
+                                  ventana_max: float = 20.0, pendiente: float = 0.15,
+                                  dh_inicial: float = 0.30, dh_max: float = 2.5,
+                                  tesela: int = 1024) -> Dict:
+    """
+    Filtro morfológico progresivo sobre la grilla de mínimos
+
+    Parámetros:
+    - z_min: Grilla de elevaciones mínimas por celda (NaN = sin puntos)
+    - resolucion: Tamaño de celda (m)
+    - ventana_max: Mayor objeto no-suelo a remover (m)
+    - pendiente: Pendiente máxima esperada del terreno (m/m)
+    - dh_inicial / dh_max: Tolerancias de elevación (m)
+    - tesela: Celdas por lado de cada tesela
+    """
+    vacias = np.isnan(z_min)
+    superficie = _rellenar_vacios(z_min)
+    no_suelo = np.zeros(z_min.shape, dtype=bool)
+
+    w_anterior = 1
+    ventanas = ventanas_progresivas(resolucion, ventana_max)
+    for i, w in enumerate(ventanas):
+        abierta = apertura_por_teselas(superficie, w, tesela)
+        if i == 0:
+            dh = dh_inicial
+        else:
+            dh = min(pendiente * (w - w_anterior) * resolucion + dh_inicial, dh_max)
+        no_suelo |= (superficie - abierta) > dh
+        superficie = abierta
+        w_anterior = w
+
+    suelo = ~no_suelo & ~vacias
+    return {
+        "celdas_suelo": suelo,
+        "z_min": z_min,
+        "superficie_suelo": np.where(suelo, z_min, np.nan),
+        "superficie_abierta": superficie,
+        "ventanas": ventanas,
+        "resolucion": resolucion
+    }
+
+def clasificar_puntos(x: np.ndarray, y: np.ndarray, z: np.ndarray,
+                      resultado_filtro: Dict, grilla: Dict,
+                      tolerancia: float = 0.30) -> np.ndarray:
+    """
+    Clase ASPRS por punto: 2 si su celda es suelo y z ≤ z_min + tolerancia, 1 si no
+    """
+    indices, dentro = indices_celda(x, y, grilla)
+    indices = np.where(dentro, indices, 0)
+    suelo_celda = resultado_filtro["celdas_suelo"].ravel()[indices] & dentro
+    referencia = resultado_filtro["z_min"].ravel()[indices]
+    es_suelo = suelo_celda & (np.asarray(z) - referencia <= tolerancia)
+    return np.where(es_suelo, CLASE_SUELO, CLASE_NO_CLASIFICADO).astype(np.uint8)
+
+def clasificar_suelo_nube(points: np.ndarray, resolucion: float = 1.0,
+                          ventana_max: float = 20.0, pendiente: float = 0.15,
+                          dh_inicial: float = 0.30, dh_max: float = 2.5,
+                          tesela: int = 1024) -> Dict:
+    """
+    Clasifica en memoria una nube (N×3) y devuelve la clase ASPRS por punto
+    """
+    points = np.asarray(points)
+    z_min, grilla = rasterizar_minimos(points, resolucion)
+    filtro = filtro_morfologico_progresivo(z_min, resolucion, ventana_max, pendiente,
+                                           dh_inicial, dh_max, tesela)
+    clasificacion = clasificar_puntos(points[:, 0], points[:, 1], points[:, 2],
+                                      filtro, grilla, dh_inicial)
+    puntos_suelo = int(np.sum(clasificacion == CLASE_SUELO))
+    return {
+        "clasificacion": clasificacion,
+        "grilla": grilla,
+        "filtro": filtro,
+        "puntos_totales": len(points),
+        "puntos_suelo": puntos_suelo,
+        "porcentaje_suelo": round(100.0 * puntos_suelo / max(len(points), 1), 2)
+    }
+
+def clasificar_archivo_las(ruta_entrada: str, ruta_salida: str,
+                           resolucion: float = 1.0, puntos_por_bloque: int = 5000000,
+                           **parametros) -> Dict:
+    """
+    Clasifica un archivo LAS/LAZ por bloques y escribe la clase en un LAS de salida
+
+    Dos pasadas de lectura: la primera acumula mínimos por celda y la segunda
+    asigna la clase a cada punto; solo un bloque de puntos reside en memoria.
+
+    Parámetros:
+    - ruta_entrada: Archivo LAS/LAZ sin clasificar
+    - ruta_salida: Archivo LAS/LAZ de salida con clasificación
+    - resolucion: Tamaño de celda del filtro (m)
+    - puntos_por_bloque: Puntos leídos por iteración
+    - parametros: ventana_max, pendiente, dh_inicial, dh_max, tesela
+    """
+    if not LASPY_AVAILABLE:
+        return {
+            "error": "LasPy no está instalado. Instala con: pip install laspy",
+            "estado": "❌ Error clasificando archivo LAS"
+        }
+
+    try:
+        directorio = os.path.dirname(ruta_salida)
+        if directorio:
+            os.makedirs(directorio, exist_ok=True)
+
+        # Pasada 1: mínimos por celda
+        with laspy.open(ruta_entrada) as lector:
+            header = lector.header
+            grilla = definir_grilla(header.mins[0], header.mins[1],
+                                    header.maxs[0], header.maxs[1], resolucion)
+            z_min = np.full(grilla["nx"] * grilla["ny"], np.inf)
+            for bloque in lector.chunk_iterator(puntos_por_bloque):
+                acumular_minimos(z_min, np.asarray(bloque.x), np.asarray(bloque.y),
+                                 np.asarray(bloque.z), grilla)
+
+        z_min[np.isinf(z_min)] = np.nan
+        z_min = z_min.reshape(grilla["ny"], grilla["nx"])
+        filtro = filtro_morfologico_progresivo(z_min, resolucion, **parametros)
+        tolerancia = parametros.get("dh_inicial", PARAMETROS_PMF["dh_inicial"])
+
+        # Pasada 2: clasificación y escritura por bloques
+        puntos_totales = 0
+        puntos_suelo = 0
+        with laspy.open(ruta_entrada) as lector:
+            with laspy.open(ruta_salida, mode="w", header=lector.header) as escritor:
+                for bloque in lector.chunk_iterator(puntos_por_bloque):
+                    clases = clasificar_puntos(np.asarray(bloque.x), np.asarray(bloque.y),
+                                               np.asarray(bloque.z), filtro, grilla, tolerancia)
+                    bloque.classification = clases
+                    escritor.write_points(bloque)
+                    puntos_totales += len(clases)
+                    puntos_suelo += int(np.sum(clases == CLASE_SUELO))
+
+        return {
+            "archivo_entrada": ruta_entrada,
+            "archivo_salida": ruta_salida,
+            "puntos_totales": puntos_totales,
+            "puntos_suelo": puntos_suelo,
+            "porcentaje_suelo": round(100.0 * puntos_suelo / max(puntos_totales, 1), 2),
+            "dimensiones_grilla": (grilla["ny"], grilla["nx"]),
+            "ventanas_celdas": filtro["ventanas"],
+            "estado": "✅ Clasificación de suelo completada"
+        }
+
+    except Exception as e:
+        return {
+            "error": str(e),
+            "estado": "❌ Error clasificando archivo LAS"
+        }
+
+if __name__ == "__main__":
+    # Prueba del módulo con una cuadra sintética (calle inclinada + edificación)
+    rng = np.random.default_rng(0)
+    n = 200000
+    x = rng.uniform(0, 100, n)
+    y = rng.uniform(0, 100, n)
+    z = 3850 + 0.05 * x
+    edificacion = (x > 40) & (x < 55) & (y > 40) & (y < 60)
+    z[edificacion] += 6.0
+    resultado = clasificar_suelo_nube(np.column_stack([x, y, z]))
+    print(f"🌍 Puntos de suelo: {resultado['puntos_suelo']:,} de {resultado['puntos_totales']:,} "
+          f"({resultado['porcentaje_suelo']}%)")
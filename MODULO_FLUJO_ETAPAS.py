@@ -0,0 +1,434 @@
+"""
+MÓDULO FLUJO POR ETAPAS - GRAFO DE PROCESAMIENTO MEMORIZADO
+===========================================================
+
+Ejecución de flujos de procesamiento como grafo acíclico de etapas:
+- Cada etapa declara por nombre sus entradas y salidas
+- Resultado memorizado por hash del contenido de sus entradas: solo se
+  re-ejecutan las etapas cuyas entradas cambiaron (si una etapa produce
+  lo mismo que antes, las siguientes se sirven de la caché)
+- Etapas sin dependencia entre sí corren en paralelo (hilos)
+- Entradas que son archivos se identifican por el hash de su contenido
+- La clave de cada etapa incluye el hash del código de su función (y una
+  versión opcional): cambiar el código invalida sus resultados guardados
+- Checkpoints en disco por etapa: una ejecución interrumpida se retoma
+  desde la última etapa completada
+- Informe por etapa (ejecutada, en caché o desde checkpoint, tiempo y
+  clave) y línea de tiempo de la ejecución
+
+Autor: IA Assistant - Especialista UNI
+Fecha: 2024
+"""
+
+import numpy as np
+import copy
+import hashlib
+import os
+import pickle
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, FIRST_COMPLETED, wait
+from typing import Callable, Dict, List, Tuple, Optional
+
+from MODULO_CACHE_RASTER import hash_contenido
+from MODULO_CRONOMETRO import Cronometro
+
+def _actualizar_huella(sha, valor) -> None:
+    """Agrega al hash el contenido de un valor (arreglos, dicts, listas y escalares)"""
+    if isinstance(valor, np.ndarray):
+        sha.update(f"nd{valor.dtype.str}{valor.shape}".encode())
+        sha.update(np.ascontiguousarray(valor).data if valor.dtype != object else repr(valor.tolist()).encode())
+    elif isinstance(valor, dict):
+        sha.update(f"dict{len(valor)}".encode())
+        for clave in sorted(valor, key=str):
+            _actualizar_huella(sha, str(clave))
+            _actualizar_huella(sha, valor[clave])
+    elif isinstance(valor, (list, tuple)):
+        sha.update(f"{type(valor).__name__}{len(valor)}".encode())
+        for elemento in valor:
+            _actualizar_huella(sha, elemento)
+    elif isinstance(valor, np.generic):
+        _actualizar_huella(sha, valor.item())
+    else:
+        sha.update(f"{type(valor).__name__}:{valor!r};".encode())
+
+def huella(valor) -> str:
+    """Hash del contenido de un valor"""
+    sha = hashlib.sha256()
+    _actualizar_huella(sha, valor)
+    return sha.hexdigest()[:32]
+
+# Hashes de archivos ya leídos (LRU acotado, compartido entre hilos)
+MAX_HUELLAS_ARCHIVO = 256
+_huellas_archivo: "OrderedDict[Tuple, str]" = OrderedDict()
+_candado_huellas = threading.Lock()
+
+def huella_archivo(ruta: str) -> str:
+    """
+    Hash del contenido de un archivo, recordado por tamaño y fecha de
+    modificación; una ruta inexistente se identifica por su nombre
+    """
+    if not os.path.isfile(ruta):
+        return huella(("ruta", ruta))
+    estado = os.stat(ruta)
+    firma = (os.path.abspath(ruta), estado.st_size, estado.st_mtime_ns)
+    with _candado_huellas:
+        if firma in _huellas_archivo:
+            _huellas_archivo.move_to_end(firma)
+            return _huellas_archivo[firma]
+    valor = hash_contenido(ruta)[:32]
+    with _candado_huellas:
+        _huellas_archivo[firma] = valor
+        while len(_huellas_archivo) > MAX_HUELLAS_ARCHIVO:
+            _huellas_archivo.popitem(last=False)
+    return valor
+
+def _partes_codigo(codigo) -> List:
+    """Bytecode, nombres y constantes de un objeto código (con sus funciones anidadas)"""
+    partes = [codigo.co_code, codigo.co_names]
+    for constante in codigo.co_consts:
+        if hasattr(constante, "co_code"):
+            partes.append(_partes_codigo(constante))
+        elif isinstance(constante, frozenset):
+            partes.append(sorted(map(repr, constante)))
+        else:
+            partes.append(repr(constante))
+    return partes
+
+def huella_codigo(funcion: Callable) -> str:
+    """
+    Hash del código de una función, método o functools.partial; no cubre
+    las funciones que llama (para eso, la versión de la etapa)
+    """
+    funcion = getattr(funcion, "__func__", funcion)
+    while hasattr(funcion, "func"):
+        funcion = getattr(funcion.func, "__func__", funcion.func)
+    codigo = getattr(funcion, "__code__", None)
+    if codigo is None:
+        return huella(getattr(funcion, "__qualname__", type(funcion).__qualname__))
+    return huella((funcion.__module__, funcion.__qualname__, _partes_codigo(codigo)))
+
+def huella_modulos(*modulos) -> str:
+    """Hash del código fuente de módulos (versión de etapas que dependen de ellos)"""
+    return huella([(modulo.__name__, huella_archivo(modulo.__file__)) for modulo in modulos])
+
+class Etapa:
+    """Etapa del flujo: función con entradas y salidas declaradas por nombre"""
+
+    def __init__(self, nombre: str, funcion: Callable, entradas: Tuple[str, ...] = (),
+                 salidas: Optional[Tuple[str, ...]] = None, memorizar: bool = True,
+                 version: Optional[str] = None):
+        self.nombre = nombre
+        self.funcion = funcion
+        self.entradas = tuple(entradas)
+        self.salidas = tuple(salidas) if salidas else (nombre,)
+        self.memorizar = memorizar
+        self.version = huella((huella_codigo(funcion), version))
+
+    def ejecutar(self, valores: Dict) -> Dict:
+        """Llama a la función con sus entradas y nombra sus salidas"""
+        resultado = self.funcion(**{entrada: valores[entrada] for entrada in self.entradas})
+        if len(self.salidas) == 1:
+            resultado = (resultado,)
+        if len(resultado) != len(self.salidas):
+            raise ValueError(f"La etapa '{self.nombre}' devolvió {len(resultado)} valores "
+                             f"para {len(self.salidas)} salidas")
+        return dict(zip(self.salidas, resultado))
+
+class ErrorEtapa(RuntimeError):
+    """Falla de una etapa; 'informe' describe la ejecución parcial del flujo"""
+
+    def __init__(self, etapa: str, error: Exception, informe: Dict):
+        super().__init__(f"Error en la etapa '{etapa}': {error}")
+        self.etapa = etapa
+        self.informe = informe
+
+def _ejecutar_etapa(etapa: Etapa, valores: Dict) -> Tuple[Dict, Dict, Dict, float, float]:
+    """
+    Ejecuta una etapa en un hilo o proceso trabajador: salidas, hash de
+    las salidas, medición (Cronometro) e instantes de inicio y fin
+    """
+    cronometro = Cronometro()
+    inicio = time.time()
+    with cronometro.etapa(etapa.nombre):
+        salidas = etapa.ejecutar(valores)
+    fin = time.time()
+    return (salidas, {nombre: huella(valor) for nombre, valor in salidas.items()},
+            cronometro.etapas[etapa.nombre], inicio, fin)
+
+class FlujoEtapas:
+    """
+    Grafo de etapas con resultados memorizados por hash de entradas
+
+    Las etapas no deben modificar sus entradas: los valores memorizados
+    se comparten entre etapas y ejecuciones. Quien llama recibe copias de
+    las salidas pedidas, que puede modificar sin alterar la caché. Las etapas con memorizar=False (p. ej.
+    escritura de archivos) se ejecutan siempre. Cada etapa guarda hasta
+    'max_resultados' entradas en caché (las menos recientes se descartan).
+
+    La clave de una etapa combina el hash de sus entradas con el de su
+    código; 'version' en agregar() cubre el código que la etapa llama en
+    otros módulos (ver huella_modulos).
+
+    Con 'directorio_checkpoints' el resultado de cada etapa se guarda
+    además en disco: una nueva ejecución (otro proceso, o tras una falla)
+    retoma desde las etapas ya completadas. Con ejecutor="procesos" las
+    etapas corren en un ProcessPoolExecutor y sus funciones deben poder
+    serializarse (funciones de módulo o métodos, no lambdas).
+    """
+
+    def __init__(self, nombre: str = "flujo", max_resultados: int = 2, hilos: Optional[int] = None,
+                 directorio_checkpoints: Optional[str] = None, ejecutor: str = "hilos"):
+        if ejecutor not in ("hilos", "procesos"):
+            raise ValueError(f"Ejecutor desconocido: '{ejecutor}' (use 'hilos' o 'procesos')")
+        self.nombre = nombre
+        self.max_resultados = max_resultados
+        self.hilos = hilos
+        self.directorio_checkpoints = directorio_checkpoints
+        self.ejecutor = ejecutor
+        self.etapas: Dict[str, Etapa] = {}
+        self.productor: Dict[str, str] = {}
+        self._cache: Dict[str, OrderedDict] = {}
+        self._candado = threading.Lock()
+
+    def agregar(self, nombre: str, funcion: Callable, entradas: Tuple[str, ...] = (),
+                salidas: Optional[Tuple[str, ...]] = None, memorizar: bool = True,
+                version: Optional[str] = None) -> "FlujoEtapas":
+        """
+        Agrega una etapa; cada salida debe tener un único productor.
+        'version' entra en la clave de la etapa junto al hash de su código.
+        """
+        if nombre in self.etapas:
+            raise ValueError(f"Etapa duplicada: '{nombre}'")
+        etapa = Etapa(nombre, funcion, entradas, salidas, memorizar, version)
+        repetidas = [salida for salida in etapa.salidas if salida in self.productor]
+        if repetidas:
+            raise ValueError(f"Salidas ya producidas por otra etapa: {repetidas}")
+        self.etapas[nombre] = etapa
+        self.productor.update({salida: nombre for salida in etapa.salidas})
+        self._cache[nombre] = OrderedDict()
+        return self
+
+    def dependencias(self, nombre: str) -> List[str]:
+        """Etapas que producen las entradas de una etapa"""
+        return sorted({self.productor[e] for e in self.etapas[nombre].entradas if e in self.productor})
+
+    def orden(self, objetivos: Optional[List[str]] = None) -> List[str]:
+        """
+        Orden topológico de las etapas necesarias para los objetivos
+        (nombres de salidas; todas si es None). ValueError si hay ciclos.
+        """
+        if objetivos is None:
+            pendientes = list(self.etapas)
+        else:
+            desconocidos = [o for o in objetivos if o not in self.productor]
+            if desconocidos:
+                raise ValueError(f"Salidas desconocidas: {desconocidos}")
+            pendientes = [self.productor[o] for o in objetivos]
+
+        orden, estado = [], {}
+        for inicio in pendientes:
+            pila = [(inicio, False)]
+            while pila:
+                nombre, cerrar = pila.pop()
+                if cerrar:
+                    estado[nombre] = 2
+                    orden.append(nombre)
+                    continue
+                if estado.get(nombre) == 2:
+                    continue
+                if estado.get(nombre) == 1:
+                    raise ValueError(f"Ciclo en el flujo en la etapa '{nombre}'")
+                estado[nombre] = 1
+                pila.append((nombre, True))
+                for dependencia in self.dependencias(nombre):
+                    if estado.get(dependencia) == 1:
+                        raise ValueError(f"Ciclo en el flujo entre '{nombre}' y '{dependencia}'")
+                    if estado.get(dependencia) != 2:
+                        pila.append((dependencia, False))
+        return orden
+
+    def limpiar_cache(self, checkpoints: bool = False) -> None:
+        """Descarta los resultados memorizados (y los checkpoints en disco)"""
+        with self._candado:
+            for cache in self._cache.values():
+                cache.clear()
+        if checkpoints and self.directorio_checkpoints and os.path.isdir(self.directorio_checkpoints):
+            for archivo in os.listdir(self.directorio_checkpoints):
+                if archivo.endswith(".pkl"):
+                    os.remove(os.path.join(self.directorio_checkpoints, archivo))
+
+    def _ruta_checkpoint(self, nombre: str, clave: str) -> str:
+        """Archivo del checkpoint de una etapa para una clave"""
+        return os.path.join(self.directorio_checkpoints, f"{nombre}__{clave}.pkl")
+
+    def _leer_checkpoint(self, nombre: str, clave: str) -> Optional[Tuple[Dict, Dict]]:
+        """Salidas y hashes guardados de una etapa; None si no hay checkpoint válido"""
+        if not self.directorio_checkpoints:
+            return None
+        ruta = self._ruta_checkpoint(nombre, clave)
+        if not os.path.isfile(ruta):
+            return None
+        try:
+            with open(ruta, "rb") as f:
+                return pickle.load(f)
+        except Exception:
+            return None
+
+    def _guardar_checkpoint(self, nombre: str, clave: str, resultado: Tuple[Dict, Dict]) -> None:
+        """
+        Guarda el resultado de una etapa (escritura atómica) y borra los
+        checkpoints anteriores de la misma etapa
+        """
+        os.makedirs(self.directorio_checkpoints, exist_ok=True)
+        descriptor, temporal = tempfile.mkstemp(prefix=f".{nombre}.", dir=self.directorio_checkpoints)
+        with os.fdopen(descriptor, "wb") as f:
+            pickle.dump(resultado, f, protocol=pickle.HIGHEST_PROTOCOL)
+        ruta = self._ruta_checkpoint(nombre, clave)
+        os.replace(temporal, ruta)
+        for archivo in os.listdir(self.directorio_checkpoints):
+            if archivo.startswith(f"{nombre}__") and archivo != os.path.basename(ruta):
+                os.remove(os.path.join(self.directorio_checkpoints, archivo))
+
+    def _memorizar(self, nombre: str, clave: str, resultado: Tuple[Dict, Dict]) -> None:
+        """Guarda un resultado en la caché en memoria de la etapa"""
+        with self._candado:
+            cache = self._cache[nombre]
+            cache[clave] = resultado
+            while len(cache) > self.max_resultados:
+                cache.popitem(last=False)
+
+    def _buscar(self, etapa: Etapa, clave: str) -> Tuple[Optional[Tuple[Dict, Dict]], str]:
+        """Resultado memorizado en memoria ('en_cache') o en disco ('checkpoint')"""
+        if not etapa.memorizar:
+            return None, ""
+        with self._candado:
+            memorizado = self._cache[etapa.nombre].get(clave)
+            if memorizado is not None:
+                self._cache[etapa.nombre].move_to_end(clave)
+                return memorizado, "en_cache"
+        memorizado = self._leer_checkpoint(etapa.nombre, clave)
+        if memorizado is not None:
+            self._memorizar(etapa.nombre, clave, memorizado)
+            return memorizado, "checkpoint"
+        return None, ""
+
+    def ejecutar(self, entradas: Dict, objetivos: Optional[List[str]] = None,
+                 archivos: Tuple[str, ...] = (), hilos: Optional[int] = None) -> Dict:
+        """
+        Ejecuta el flujo
+
+        Parámetros:
+        - entradas: valores externos por nombre
+        - objetivos: salidas requeridas (todas si es None); solo corren las
+          etapas necesarias
+        - archivos: nombres de entradas que son rutas; se identifican por
+          el contenido del archivo y no por el texto de la ruta
+        - hilos: trabajadores para etapas independientes (por defecto los
+          del flujo)
+
+        Devuelve valores (copias de las salidas pedidas), etapas (estado, tiempo y clave
+        por etapa), ejecutadas, en_cache, tiempos (Cronometro) y
+        linea_tiempo (inicio y fin de cada etapa ejecutada, en s desde el
+        comienzo). Si una etapa falla, las que ya estaban en curso terminan
+        y quedan memorizadas, y se lanza ErrorEtapa con el informe parcial.
+        """
+        orden = self.orden(objetivos)
+        faltantes = sorted({e for nombre in orden for e in self.etapas[nombre].entradas
+                            if e not in self.productor and e not in entradas})
+        if faltantes:
+            raise ValueError(f"Entradas externas faltantes: {faltantes}")
+
+        inicio = time.perf_counter()
+        comienzo = time.time()
+        valores = dict(entradas)
+        huellas = {nombre: huella_archivo(valor) if nombre in archivos else huella(valor)
+                   for nombre, valor in entradas.items()}
+        tiempos = {}
+        informe = {}
+        linea_tiempo = []
+        pendientes = {nombre: set(self.dependencias(nombre)) for nombre in orden}
+        en_curso = {}
+        fallo = None
+
+        def completar(nombre: str) -> None:
+            for deps in pendientes.values():
+                deps.discard(nombre)
+
+        clase_ejecutor = ProcessPoolExecutor if self.ejecutor == "procesos" else ThreadPoolExecutor
+        with clase_ejecutor(max_workers=hilos or self.hilos or os.cpu_count() or 1) as ejecutor:
+            while (pendientes and fallo is None) or en_curso:
+                listas = [nombre for nombre, deps in pendientes.items() if not deps] if fallo is None else []
+                for nombre in listas:
+                    del pendientes[nombre]
+                    etapa = self.etapas[nombre]
+                    clave = huella((nombre, etapa.version, [huellas[e] for e in etapa.entradas]))
+                    memorizado, origen = self._buscar(etapa, clave)
+                    if memorizado is not None:
+                        valores.update(memorizado[0])
+                        huellas.update(memorizado[1])
+                        informe[nombre] = {"estado": origen, "tiempo_s": 0.0, "clave": clave}
+                        completar(nombre)
+                        continue
+                    futuro = ejecutor.submit(_ejecutar_etapa, etapa, {e: valores[e] for e in etapa.entradas})
+                    en_curso[futuro] = (nombre, clave)
+
+                if fallo is None and any(not deps for deps in pendientes.values()):
+                    continue
+                if not en_curso:
+                    break
+                terminados, _ = wait(en_curso, return_when=FIRST_COMPLETED)
+                for futuro in terminados:
+                    nombre, clave = en_curso.pop(futuro)
+                    try:
+                        salidas, huellas_salida, medicion, t0, t1 = futuro.result()
+                    except Exception as e:
+                        informe[nombre] = {"estado": "error", "tiempo_s": 0.0, "clave": clave, "error": str(e)}
+                        if fallo is None:
+                            fallo = (nombre, e)
+                            for otro in en_curso:
+                                otro.cancel()
+                        continue
+                    valores.update(salidas)
+                    huellas.update(huellas_salida)
+                    if self.etapas[nombre].memorizar:
+                        self._memorizar(nombre, clave, (salidas, huellas_salida))
+                        if self.directorio_checkpoints:
+                            self._guardar_checkpoint(nombre, clave, (salidas, huellas_salida))
+                    tiempos[nombre] = medicion
+                    informe[nombre] = {"estado": "ejecutada", "tiempo_s": medicion["tiempo_s"], "clave": clave}
+                    linea_tiempo.append({"etapa": nombre, "inicio_s": round(t0 - comienzo, 4),
+                                         "fin_s": round(t1 - comienzo, 4), "duracion_s": round(t1 - t0, 4)})
+                    completar(nombre)
+
+        linea_tiempo.sort(key=lambda tramo: tramo["inicio_s"])
+        resultado = {
+            "etapas": {nombre: informe[nombre] for nombre in orden if nombre in informe},
+            "ejecutadas": [n for n in orden if informe.get(n, {}).get("estado") == "ejecutada"],
+            "en_cache": [n for n in orden if informe.get(n, {}).get("estado") in ("en_cache", "checkpoint")],
+            "pendientes": [n for n in orden if n not in informe],
+            "tiempos": dict(tiempos, total_s=round(sum(t["tiempo_s"] for t in tiempos.values()), 4)),
+            "linea_tiempo": linea_tiempo,
+            "tiempo_s": round(time.perf_counter() - inicio, 4)
+        }
+        if fallo is not None:
+            nombre, error = fallo
+            raise ErrorEtapa(nombre, error, resultado) from error
+
+        salidas_pedidas = objetivos if objetivos is not None else list(self.productor)
+        resultado["valores"] = {nombre: copy.deepcopy(valores[nombre]) for nombre in salidas_pedidas}
+        return resultado
+
+if __name__ == "__main__":
+    # Prueba del módulo: dos ramas independientes sobre una grilla
+    flujo = FlujoEtapas("demo")
+    flujo.agregar("grilla", lambda n: np.random.default_rng(0).normal(size=(n, n)), ("n",))
+    flujo.agregar("suavizado", lambda grilla: (grilla[:-1] + grilla[1:]) / 2, ("grilla",))
+    flujo.agregar("media", lambda suavizado: float(suavizado.mean()), ("suavizado",))
+    flujo.agregar("maximo", lambda grilla, umbral: float(grilla.max()) > umbral, ("grilla", "umbral"))
+    for umbral in (3.0, 3.0, 5.0):
+        resultado = flujo.ejecutar({"n": 2000, "umbral": umbral})
+        print(f"umbral={umbral}: ejecutadas={resultado['ejecutadas']} en_cache={resultado['en_cache']} "
+              f"({resultado['tiempo_s']} s)")
@@ -0,0 +1,438 @@
+"""
+MÓDULO GEOTIFF - ESCRITURA DE RÁSTERS SIN RASTERIO
+==================================================
+
+Escritor GeoTIFF en numpy puro (zlib de la biblioteca estándar) para el
+MDT y sus rásters derivados:
+- Teselas de 256×256 comprimidas con Deflate (predictor 3 para flotantes,
+  predictor 2 para enteros)
+- Resúmenes (overviews) internos por promedio 2×2 calculados en cascada
+- Escritura por franjas de teselas: el ráster completo nunca se carga en
+  memoria (la fuente puede ser un np.memmap de MODULO_CACHE_RASTER)
+- BigTIFF automático para corredores de más de 4 GB
+- Lectura de los archivos generados (verificación y reutilización)
+
+Autor: IA Assistant - Especialista UNI
+Fecha: 2024
+"""
+
+import numpy as np
+import math
+import os
+import struct
+import zlib
+from typing import Dict, List, Tuple, Optional
+
+# Etiquetas TIFF y GeoTIFF usadas por el escritor
+TAG_SUBARCHIVO = 254
+TAG_ANCHO = 256
+TAG_ALTO = 257
+TAG_BITS = 258
+TAG_COMPRESION = 259
+TAG_FOTOMETRICA = 262
+TAG_MUESTRAS = 277
+TAG_PLANAR = 284
+TAG_PREDICTOR = 317
+TAG_TESELA_ANCHO = 322
+TAG_TESELA_ALTO = 323
+TAG_TESELA_OFFSETS = 324
+TAG_TESELA_BYTES = 325
+TAG_FORMATO_MUESTRA = 339
+TAG_ESCALA_PIXEL = 33550
+TAG_PUNTO_ENLACE = 33922
+TAG_GEOCLAVES = 34735
+TAG_GDAL_NODATA = 42113
+
+# Tipos TIFF: código -> (formato struct, bytes)
+TIPOS_TIFF = {2: ("s", 1), 3: ("H", 2), 4: ("I", 4), 12: ("d", 8), 16: ("Q", 8)}
+
+COMPRESION_NINGUNA = 1
+COMPRESION_DEFLATE = 8
+
+def _formato_muestra(dtype: np.dtype) -> int:
+    """SampleFormat TIFF: 1 entero sin signo, 2 entero con signo, 3 flotante"""
+    return {"u": 1, "i": 2, "f": 3}[dtype.kind]
+
+def _aplicar_predictor(tesela: np.ndarray, predictor: int) -> bytes:
+    """Codifica una tesela (alto×ancho) en bytes little-endian con predictor"""
+    alto, ancho = tesela.shape
+    if predictor == 3:
+        # Predictor de punto flotante: bytes más significativos primero y
+        # diferencia horizontal byte a byte
+        tamano = tesela.dtype.itemsize
+        planos = (tesela.astype(tesela.dtype.newbyteorder(">")).view(np.uint8)
+                  .reshape(alto, ancho, tamano).transpose(0, 2, 1).reshape(alto, ancho * tamano))
+        diferencia = planos.copy()
+        diferencia[:, 1:] -= planos[:, :-1]
+        return diferencia.tobytes()
+    datos = tesela.astype(tesela.dtype.newbyteorder("<"))
+    if predictor == 2:
+        diferencia = datos.copy()
+        diferencia[:, 1:] -= datos[:, :-1]
+        return diferencia.tobytes()
+    return datos.tobytes()
+
+def _revertir_predictor(datos: bytes, dtype: np.dtype, alto: int, ancho: int,
+                        predictor: int) -> np.ndarray:
+    """Decodifica los bytes de una tesela al arreglo alto×ancho"""
+    if predictor == 3:
+        tamano = dtype.itemsize
+        planos = np.cumsum(np.frombuffer(datos, dtype=np.uint8).reshape(alto, ancho * tamano),
+                           axis=1, dtype=np.uint8)
+        return (planos.reshape(alto, tamano, ancho).transpose(0, 2, 1).copy()
+                .view(dtype.newbyteorder(">")).reshape(alto, ancho).astype(dtype))
+    tesela = np.frombuffer(datos, dtype=dtype.newbyteorder("<")).reshape(alto, ancho).astype(dtype)
+    if predictor == 2:
+        tesela = np.cumsum(tesela, axis=1, dtype=dtype)
+    return tesela
+
+def _reducir_2x2(bloque: np.ndarray, nodata: Optional[float]) -> np.ndarray:
+    """
+    Resumen 2×2: promedio ignorando sin-datos (flotantes) o muestra
+    decimada (enteros, para no inventar clases)
+    """
+    alto, ancho = bloque.shape
+    if bloque.dtype.kind != "f":
+        return bloque[::2, ::2]
+    datos = bloque.astype(np.float64)
+    if nodata is not None and not np.isnan(nodata):
+        datos[datos == nodata] = np.nan
+    if alto % 2 or ancho % 2:
+        datos = np.pad(datos, ((0, alto % 2), (0, ancho % 2)), constant_values=np.nan)
+    grupos = datos.reshape(datos.shape[0] // 2, 2, datos.shape[1] // 2, 2)
+    validos = ~np.isnan(grupos)
+    suma = np.where(validos, grupos, 0.0).sum(axis=(1, 3))
+    cuenta = validos.sum(axis=(1, 3))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        media = suma / cuenta
+    if nodata is not None:
+        media[cuenta == 0] = nodata
+    return media.astype(bloque.dtype)
+
+class _NivelTeselas:
+    """Estado de escritura de un nivel (resolución completa o resumen)"""
+
+    def __init__(self, ancho: int, alto: int, tesela: int):
+        self.ancho = ancho
+        self.alto = alto
+        self.columnas = math.ceil(ancho / tesela)
+        self.filas = math.ceil(alto / tesela)
+        self.offsets = np.zeros(self.columnas * self.filas, dtype=np.uint64)
+        self.bytes = np.zeros(self.columnas * self.filas, dtype=np.uint64)
+        self.pendientes: List[np.ndarray] = []
+        self.filas_recibidas = 0
+        self.fila_teselas = 0
+
+def _dimensiones_resumenes(ancho: int, alto: int, tesela: int,
+                           niveles: Optional[int]) -> List[Tuple[int, int]]:
+    """Dimensiones de los resúmenes 2×, 4×, ... hasta caber en una tesela"""
+    dimensiones = []
+    while max(ancho, alto) > 1:
+        if niveles is None and max(ancho, alto) <= tesela:
+            break
+        if niveles is not None and len(dimensiones) >= niveles:
+            break
+        ancho, alto = math.ceil(ancho / 2), math.ceil(alto / 2)
+        dimensiones.append((ancho, alto))
+    return dimensiones
+
+def _escribir_ifd(f, entradas: List[Tuple[int, int, object]], bigtiff: bool) -> Tuple[int, int]:
+    """
+    Escribe un IFD al final del archivo con sus valores fuera de línea
+
+    Devuelve (posición del IFD, posición del puntero al siguiente IFD).
+    """
+    orden = "<"
+    ancho_cuenta, ancho_entrada, ancho_valor = (8, 20, 8) if bigtiff else (2, 12, 4)
+    f.seek(0, os.SEEK_END)
+    if f.tell() % 2:
+        f.write(b"\0")
+    inicio = f.tell()
+    entradas = sorted(entradas, key=lambda e: e[0])
+    tamano_ifd = ancho_cuenta + ancho_entrada * len(entradas) + ancho_valor
+    fuera_de_linea = inicio + tamano_ifd
+
+    cuerpo = struct.pack(orden + ("Q" if bigtiff else "H"), len(entradas))
+    extra = b""
+    for etiqueta, tipo, valores in entradas:
+        formato, tamano = TIPOS_TIFF[tipo]
+        if tipo == 2:
+            datos = valores.encode("ascii") + b"\0"
+            cuenta = len(datos)
+        else:
+            valores = np.atleast_1d(valores)
+            cuenta = valores.size
+            datos = struct.pack(orden + formato * cuenta, *valores.tolist())
+        cuerpo += struct.pack(orden + "HH" + ("Q" if bigtiff else "I"), etiqueta, tipo, cuenta)
+        if len(datos) <= ancho_valor:
+            cuerpo += datos.ljust(ancho_valor, b"\0")
+        else:
+            cuerpo += struct.pack(orden + ("Q" if bigtiff else "I"), fuera_de_linea + len(extra))
+            extra += datos
+            if len(extra) % 2:
+                extra += b"\0"
+    puntero_siguiente = inicio + len(cuerpo)
+    cuerpo += b"\0" * ancho_valor
+    f.write(cuerpo + extra)
+    return inicio, puntero_siguiente
+
+def escribir_geotiff(ruta: str, fuente: np.ndarray, origen_x: float, origen_y: float,
+                     resolucion: float, epsg: int = 32718, nodata: Optional[float] = -9999.0,
+                     tesela: int = 256, compresion: bool = True, nivel_compresion: int = 6,
+                     niveles_resumen: Optional[int] = None, sur_arriba: bool = False,
+                     dtype: Optional[str] = None, bigtiff: Optional[bool] = None) -> Dict:
+    """
+    Escribe un GeoTIFF teselado y comprimido con resúmenes internos
+
+    Parámetros:
+    - fuente: Arreglo 2D (ndarray o np.memmap); se lee por franjas de una
+      tesela de alto, de modo que la memoria usada no depende del tamaño
+    - origen_x, origen_y: Esquina superior izquierda del ráster (m)
+    - resolucion: Tamaño de píxel (m)
+    - sur_arriba: True si la fila 0 de la fuente es el borde sur (MDT)
+    - nodata: Valor sin datos; los NaN se escriben con este valor
+    - niveles_resumen: Número de resúmenes (None = hasta caber en una tesela)
+    """
+    alto, ancho = fuente.shape
+    tipo = np.dtype(dtype or {"f": np.float32, "b": np.uint8}.get(fuente.dtype.kind, fuente.dtype))
+    if nodata is not None and tipo.kind in "ui" and not np.iinfo(tipo).min <= nodata <= np.iinfo(tipo).max:
+        nodata = None
+    predictor = (3 if tipo.kind == "f" else 2) if compresion else 1
+    if tesela % 16:
+        raise ValueError("El tamaño de tesela debe ser múltiplo de 16")
+
+    niveles = [_NivelTeselas(ancho, alto, tesela)]
+    niveles += [_NivelTeselas(a, h, tesela) for a, h in _dimensiones_resumenes(ancho, alto, tesela, niveles_resumen)]
+    if bigtiff is None:
+        bruto = sum(n.columnas * n.filas for n in niveles) * tesela * tesela * tipo.itemsize
+        bigtiff = bruto > 0xF0000000
+
+    def escribir_fila_teselas(f, indice: int, bloque: np.ndarray) -> None:
+        """Comprime y escribe una fila de teselas del nivel indicado"""
+        nivel = niveles[indice]
+        relleno = np.full((tesela, nivel.columnas * tesela),
+                          nodata if nodata is not None else 0, dtype=tipo)
+        relleno[:bloque.shape[0], :bloque.shape[1]] = bloque
+        for columna in range(nivel.columnas):
+            datos = _aplicar_predictor(relleno[:, columna * tesela:(columna + 1) * tesela], predictor)
+            if compresion:
+                datos = zlib.compress(datos, nivel_compresion)
+            posicion = nivel.fila_teselas * nivel.columnas + columna
+            nivel.offsets[posicion] = f.tell()
+            nivel.bytes[posicion] = len(datos)
+            f.write(datos)
+        nivel.fila_teselas += 1
+
+    def alimentar(f, indice: int, filas: np.ndarray, final: bool) -> None:
+        """Acumula filas de un nivel y emite filas de teselas completas"""
+        nivel = niveles[indice]
+        if filas.size:
+            nivel.pendientes.append(filas)
+            nivel.filas_recibidas += filas.shape[0]
+        acumulado = sum(p.shape[0] for p in nivel.pendientes)
+        while acumulado >= tesela or (final and acumulado > 0):
+            bloque = np.concatenate(nivel.pendientes) if len(nivel.pendientes) > 1 else nivel.pendientes[0]
+            franja, resto = bloque[:tesela], bloque[tesela:]
+            nivel.pendientes = [resto] if resto.shape[0] else []
+            acumulado = resto.shape[0]
+            escribir_fila_teselas(f, indice, franja)
+            if indice + 1 < len(niveles):
+                alimentar(f, indice + 1, _reducir_2x2(franja, nodata), final=False)
+        if final and indice + 1 < len(niveles):
+            alimentar(f, indice + 1, np.empty((0, niveles[indice + 1].ancho), dtype=tipo), final=True)
+
+    with open(ruta, "wb") as f:
+        if bigtiff:
+            f.write(b"II" + struct.pack("<HHHQ", 43, 8, 0, 0))
+        else:
+            f.write(b"II" + struct.pack("<HI", 42, 0))
+
+        # Franjas de una tesela de alto, de norte a sur
+        for inicio in range(0, alto, tesela):
+            if sur_arriba:
+                franja = np.asarray(fuente[max(alto - inicio - tesela, 0):alto - inicio])[::-1]
+            else:
+                franja = np.asarray(fuente[inicio:inicio + tesela])
+            franja = franja.astype(tipo)
+            if nodata is not None and tipo.kind == "f":
+                franja[np.isnan(franja)] = nodata
+            alimentar(f, 0, franja, final=inicio + tesela >= alto)
+
+        # Directorios de imagen: resolución completa y resúmenes encadenados
+        tipo_offset = 16 if bigtiff else 4
+        geoclaves = [1, 1, 0, 3, 1024, 0, 1, 1, 1025, 0, 1, 1, 3072, 0, 1, epsg]
+        puntero_anterior = 4 if not bigtiff else 8
+        for i, nivel in enumerate(niveles):
+            escala = resolucion * 2 ** i
+            entradas = [
+                (TAG_SUBARCHIVO, 4, 0 if i == 0 else 1),
+                (TAG_ANCHO, 4, nivel.ancho),
+                (TAG_ALTO, 4, nivel.alto),
+                (TAG_BITS, 3, tipo.itemsize * 8),
+                (TAG_COMPRESION, 3, COMPRESION_DEFLATE if compresion else COMPRESION_NINGUNA),
+                (TAG_FOTOMETRICA, 3, 1),
+                (TAG_MUESTRAS, 3, 1),
+                (TAG_PLANAR, 3, 1),
+                (TAG_TESELA_ANCHO, 3, tesela),
+                (TAG_TESELA_ALTO, 3, tesela),
+                (TAG_TESELA_OFFSETS, tipo_offset, nivel.offsets),
+                (TAG_TESELA_BYTES, tipo_offset, nivel.bytes),
+                (TAG_FORMATO_MUESTRA, 3, _formato_muestra(tipo))
+            ]
+            if compresion:
+                entradas.append((TAG_PREDICTOR, 3, predictor))
+            if i == 0:
+                entradas += [
+                    (TAG_ESCALA_PIXEL, 12, np.array([escala, escala, 0.0])),
+                    (TAG_PUNTO_ENLACE, 12, np.array([0.0, 0.0, 0.0, origen_x, origen_y, 0.0])),
+                    (TAG_GEOCLAVES, 3, np.array(geoclaves))
+                ]
+            if nodata is not None:
+                entradas.append((TAG_GDAL_NODATA, 2, np.format_float_positional(nodata, trim="-")))
+            posicion, puntero = _escribir_ifd(f, entradas, bigtiff)
+            f.seek(puntero_anterior)
+            f.write(struct.pack("<Q" if bigtiff else "<I", posicion))
+            puntero_anterior = puntero
+
+        tamano = f.seek(0, os.SEEK_END)
+
+    return {
+        "ruta": ruta,
+        "ancho": ancho,
+        "alto": alto,
+        "tipo": str(tipo),
+        "tesela": tesela,
+        "resumenes": [(n.ancho, n.alto) for n in niveles[1:]],
+        "bigtiff": bigtiff,
+        "compresion": "DEFLATE" if compresion else "NINGUNA",
+        "tamano_bytes": tamano,
+        "epsg": epsg,
+        "estado": "✅ GeoTIFF exportado"
+    }
+
+def exportar_mdt_geotiff(dtm_data: Dict, ruta: str, capa: str = "Z_grid",
+                         epsg: int = 32718, **opciones) -> Dict:
+    """
+    Exporta una capa del MDT (Z_grid u otra grilla alineada) a GeoTIFF
+
+    Los valores de X_grid/Y_grid se interpretan como centros de celda.
+    """
+    try:
+        X = np.asarray(dtm_data['X_grid'])
+        Y = np.asarray(dtm_data['Y_grid'])
+        resolucion = float(dtm_data['resolution'])
+        fuente = dtm_data[capa]
+        sur_arriba = Y.shape[0] > 1 and Y[-1, 0] > Y[0, 0]
+        y_norte = float(max(Y[0, 0], Y[-1, 0]))
+        return escribir_geotiff(ruta, fuente, float(X[0, 0]) - resolucion / 2,
+                                y_norte + resolucion / 2, resolucion, epsg=epsg,
+                                sur_arriba=sur_arriba, **opciones)
+    except Exception as e:
+        return {
+            "error": str(e),
+            "estado": "❌ Error exportando GeoTIFF"
+        }
+
+def _leer_ifds(f) -> Tuple[bool, List[Dict[int, object]]]:
+    """Lee todos los IFD de un TIFF little-endian (clásico o BigTIFF)"""
+    cabecera = f.read(16)
+    if cabecera[:2] != b"II":
+        raise ValueError("Solo se leen archivos TIFF little-endian")
+    version = struct.unpack("<H", cabecera[2:4])[0]
+    bigtiff = version == 43
+    siguiente = struct.unpack("<Q", cabecera[8:16])[0] if bigtiff else struct.unpack("<I", cabecera[4:8])[0]
+    ancho_cuenta, ancho_entrada, ancho_valor = (8, 20, 8) if bigtiff else (2, 12, 4)
+
+    ifds = []
+    while siguiente:
+        f.seek(siguiente)
+        cuenta = struct.unpack("<Q" if bigtiff else "<H", f.read(ancho_cuenta))[0]
+        bruto = f.read(ancho_entrada * cuenta + ancho_valor)
+        etiquetas = {}
+        for i in range(cuenta):
+            entrada = bruto[i * ancho_entrada:(i + 1) * ancho_entrada]
+            etiqueta, tipo = struct.unpack("<HH", entrada[:4])
+            n = struct.unpack("<Q" if bigtiff else "<I", entrada[4:4 + ancho_valor])[0]
+            formato, tamano = TIPOS_TIFF[tipo]
+            valor = entrada[4 + ancho_valor:]
+            if n * tamano > ancho_valor:
+                posicion = f.tell()
+                f.seek(struct.unpack("<Q" if bigtiff else "<I", valor)[0])
+                valor = f.read(n * tamano)
+                f.seek(posicion)
+            valor = valor[:n * tamano]
+            etiquetas[etiqueta] = (valor.rstrip(b"\0").decode("ascii") if tipo == 2
+                                   else np.array(struct.unpack("<" + formato * n, valor)))
+        ifds.append(etiquetas)
+        siguiente = struct.unpack("<Q" if bigtiff else "<I", bruto[-ancho_valor:])[0]
+    return bigtiff, ifds
+
+def leer_geotiff(ruta: str, nivel: int = 0) -> Dict:
+    """
+    Lee un GeoTIFF teselado escrito por este módulo
+
+    Devuelve la grilla con la convención del MDT del proyecto (fila 0 =
+    sur) junto con la georreferenciación y el valor sin datos.
+    """
+    with open(ruta, "rb") as f:
+        bigtiff, ifds = _leer_ifds(f)
+        etiquetas = ifds[nivel]
+        ancho = int(etiquetas[TAG_ANCHO][0])
+        alto = int(etiquetas[TAG_ALTO][0])
+        tesela_ancho = int(etiquetas[TAG_TESELA_ANCHO][0])
+        tesela_alto = int(etiquetas[TAG_TESELA_ALTO][0])
+        bits = int(etiquetas[TAG_BITS][0])
+        formato = int(etiquetas.get(TAG_FORMATO_MUESTRA, [1])[0])
+        tipo = np.dtype({1: "u", 2: "i", 3: "f"}[formato] + str(bits // 8))
+        compresion = int(etiquetas[TAG_COMPRESION][0])
+        predictor = int(etiquetas.get(TAG_PREDICTOR, [1])[0])
+
+        columnas = math.ceil(ancho / tesela_ancho)
+        filas = math.ceil(alto / tesela_alto)
+        datos = np.empty((filas * tesela_alto, columnas * tesela_ancho), dtype=tipo)
+        for i, (offset, cuenta) in enumerate(zip(etiquetas[TAG_TESELA_OFFSETS], etiquetas[TAG_TESELA_BYTES])):
+            f.seek(int(offset))
+            bruto = f.read(int(cuenta))
+            if compresion == COMPRESION_DEFLATE:
+                bruto = zlib.decompress(bruto)
+            fila, columna = divmod(i, columnas)
+            datos[fila * tesela_alto:(fila + 1) * tesela_alto,
+                  columna * tesela_ancho:(columna + 1) * tesela_ancho] = \
+                _revertir_predictor(bruto, tipo, tesela_alto, tesela_ancho, predictor)
+
+    base = ifds[0]
+    escala = float(base[TAG_ESCALA_PIXEL][0]) * 2 ** nivel if TAG_ESCALA_PIXEL in base else 1.0
+    enlace = base.get(TAG_PUNTO_ENLACE, np.zeros(6))
+    geoclaves = base.get(TAG_GEOCLAVES, np.zeros(4, dtype=int))
+    epsg = next((int(geoclaves[j + 3]) for j in range(4, len(geoclaves), 4) if geoclaves[j] == 3072), None)
+    nodata = base.get(TAG_GDAL_NODATA)
+    nodata = float(nodata) if nodata is not None else None
+
+    Z = datos[:alto, :ancho][::-1]
+    x = float(enlace[3]) + escala * (np.arange(ancho) + 0.5)
+    y = float(enlace[4]) - escala * (np.arange(alto)[::-1] + 0.5)
+    return {
+        'X_grid': np.broadcast_to(x, (alto, ancho)),
+        'Y_grid': np.broadcast_to(y[:, np.newaxis], (alto, ancho)),
+        'Z_grid': Z,
+        'resolution': escala,
+        'epsg': epsg,
+        'nodata': nodata,
+        'niveles': len(ifds),
+        'bigtiff': bigtiff
+    }
+
+if __name__ == "__main__":
+    # Prueba del módulo: MDT sintético de 1500×1200 celdas
+    import tempfile
+    x = 230500 + np.arange(1500) * 0.5
+    y = 8325000 + np.arange(1200) * 0.5
+    X, Y = np.meshgrid(x, y)
+    Z = 3850 + 0.02 * (X - x[0]) + np.sin((Y - y[0]) / 40)
+    ruta = os.path.join(tempfile.gettempdir(), "mdt_demo.tif")
+    resultado = exportar_mdt_geotiff({'X_grid': X, 'Y_grid': Y, 'Z_grid': Z, 'resolution': 0.5}, ruta)
+    print(f"{resultado['estado']}: {ruta}")
+    print(f"   {resultado['ancho']}×{resultado['alto']}, resúmenes {resultado['resumenes']}")
+    print(f"   Tamaño: {resultado['tamano_bytes'] / 1e6:.2f} MB (sin comprimir {Z.size * 4 / 1e6:.2f} MB)")
+    leido = leer_geotiff(ruta)
+    print(f"   Error máximo de lectura: {np.max(np.abs(leido['Z_grid'] - Z.astype(np.float32))):.6f}")
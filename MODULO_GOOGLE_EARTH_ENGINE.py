@@ -19,6 +19,8 @@ from datetime import datetime, timedelta
 from typing import Dict, List, Tuple, Optional
 import os
 
+from MODULO_CLASIFICACION_SUBRASANTE import tipo_suelo_ndvi
+
 # Simulación de Google Earth Engine para entornos sin instalación
 class GoogleEarthEngineSimulator:
     """Simulador de Google Earth Engine para desarrollo local"""
@@ -208,36 +210,10 @@ def extract_soil_data_san_miguel(start_date: str = "2023-01-01", end_date: str =
 
 def clasificar_suelo_por_ndvi(ndvi_value: float) -> Dict:
     """
-    Clasifica el tipo de suelo basado en NDVI
+    Clasifica el tipo de suelo basado en NDVI (determinista; tabla
+    TIPOS_SUELO_NDVI de MODULO_CLASIFICACION_SUBRASANTE)
     """
-    if ndvi_value < 0.2:
-        return {
-            "tipo_suelo": "Suelo desértico/rocoso",
-            "CBR_estimado": np.random.uniform(8.0, 15.0),
-            "capacidad_portante": "Alta",
-            "recomendacion": "Suelo estable, adecuado para pavimentos"
-        }
-    elif ndvi_value < 0.4:
-        return {
-            "tipo_suelo": "Suelo volcánico/pobre",
-            "CBR_estimado": np.random.uniform(3.0, 8.0),
-            "capacidad_portante": "Media-baja",
-            "recomendacion": "Requiere estabilización previa"
-        }
-    elif ndvi_value < 0.6:
-        return {
-            "tipo_suelo": "Suelo aluvial/medio",
-            "CBR_estimado": np.random.uniform(8.0, 20.0),
-            "capacidad_portante": "Media",
-            "recomendacion": "Adecuado con compactación"
-        }
-    else:
-        return {
-            "tipo_suelo": "Suelo orgánico/rico",
-            "CBR_estimado": np.random.uniform(2.0, 6.0),
-            "capacidad_portante": "Baja",
-            "recomendacion": "Requiere excavación y reemplazo"
-        }
+    return tipo_suelo_ndvi(ndvi_value)
 
 def calcular_caudal_precipitacion(precipitacion_mm: float, area_ha: float, 
                                 coeficiente_escorrentia: float = 0.7) -> Dict:
@@ -308,15 +284,16 @@ def generar_reporte_satelital(datos: Dict, proyecto: str = "San Miguel") -> Dict
     """
     Genera reporte completo de datos satelitales
     """
+    clasificacion = clasificar_suelo_por_ndvi(datos["datos_suelo"]["NDVI_promedio"])
     reporte = {
         "proyecto": proyecto,
         "fecha_analisis": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
         "resumen_ejecutivo": {
             "NDVI_promedio": datos["datos_suelo"]["NDVI_promedio"],
-            "tipo_suelo_estimado": clasificar_suelo_por_ndvi(datos["datos_suelo"]["NDVI_promedio"])["tipo_suelo"],
-            "CBR_estimado": clasificar_suelo_por_ndvi(datos["datos_suelo"]["NDVI_promedio"])["CBR_estimado"],
+            "tipo_suelo_estimado": clasificacion["tipo_suelo"],
+            "CBR_estimado": clasificacion["CBR_estimado"],
             "precipitacion_anual": datos["datos_suelo"]["Precipitacion_anual"],
-            "recomendacion_principal": clasificar_suelo_por_ndvi(datos["datos_suelo"]["NDVI_promedio"])["recomendacion"]
+            "recomendacion_principal": clasificacion["recomendacion"]
         },
         "datos_completos": datos,
         "analisis_hidrologico": calcular_caudal_precipitacion(
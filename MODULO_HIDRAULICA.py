@@ -0,0 +1,267 @@
+"""
+MÓDULO HIDRÁULICA - TIRANTE NORMAL DE MANNING EN LOTE
+=====================================================
+
+Motor hidráulico para redes de cunetas y alcantarillas:
+- Secciones triangulares y trapezoidales (cunetas) y circulares
+  (alcantarillas) descritas como arreglos, una fila por tramo
+- Tirante normal por Newton vectorizado con respaldo de bisección,
+  velocidad, número de Froude y régimen de todos los tramos a la vez
+- Capacidad a sección llena (o al llenado máximo de la alcantarilla) y
+  verificación contra los caudales de diseño de cada sumidero
+- Diámetro comercial mínimo de alcantarillas en una sola pasada
+
+Autor: IA Assistant - Especialista UNI
+Fecha: 2024
+"""
+
+import numpy as np
+import pandas as pd
+from typing import Dict, List, Tuple, Optional
+
+GRAVEDAD = 9.81
+K_MANNING_SI = 1.0
+K_MANNING_INGLES = 1.486
+
+TIPOS_SECCION = {"triangular": 0, "trapezoidal": 1, "circular": 2}
+
+# Tirante relativo de máxima conducción de una sección circular (y/D)
+Y_D_MAXIMO_CIRCULAR = 0.938
+
+# Diámetros comerciales de alcantarilla (m): TMC y concreto
+DIAMETROS_COMERCIALES = [0.30, 0.40, 0.45, 0.50, 0.60, 0.75, 0.90, 1.00, 1.20, 1.50, 1.80, 2.00, 2.40]
+
+def normalizar_secciones(secciones, n_tramos: Optional[int] = None) -> Dict[str, np.ndarray]:
+    """
+    Arreglos de igual largo de las secciones (dict de escalares/arreglos,
+    lista de dicts o DataFrame)
+
+    Campos: tipo, base_m, talud_izq, talud_der (horizontal:vertical),
+    diametro_m, profundidad_m (altura útil; en circulares, el llenado
+    máximo como y/D con llenado_maximo), n y pendiente (m/m)
+    """
+    if isinstance(secciones, pd.DataFrame):
+        secciones = {c: secciones[c].to_numpy() for c in secciones.columns}
+    elif isinstance(secciones, (list, tuple)):
+        secciones = pd.DataFrame(list(secciones)).to_dict("list")
+    campos = {"tipo": "trapezoidal", "base_m": 0.0, "talud_izq": 0.0, "talud_der": 0.0, "diametro_m": np.nan,
+              "profundidad_m": np.nan, "llenado_maximo": 0.8, "n": 0.016, "pendiente": 0.01}
+    valores = {c: np.asarray(secciones.get(c, defecto)) for c, defecto in campos.items()}
+    tamano = max(n_tramos or 1, max(v.size for v in valores.values()))
+    resultado = {c: np.broadcast_to(v, (tamano,)).astype(float if c != "tipo" else object)
+                 for c, v in valores.items()}
+    # Tablas mixtas: los campos que no aplican a un tipo llegan como NaN
+    for c, defecto in campos.items():
+        if c != "tipo" and not np.isnan(defecto):
+            resultado[c] = np.where(np.isnan(resultado[c]), defecto, resultado[c])
+    tipo = resultado.pop("tipo")
+    desconocidos = set(tipo) - set(TIPOS_SECCION)
+    if desconocidos:
+        raise ValueError(f"Tipo de sección desconocido: {sorted(desconocidos)}")
+    resultado["codigo"] = np.array([TIPOS_SECCION[t] for t in tipo], dtype=np.int8)
+    circular = resultado["codigo"] == TIPOS_SECCION["circular"]
+    if np.isnan(resultado["diametro_m"][circular]).any():
+        raise ValueError("Las secciones circulares necesitan diametro_m")
+    resultado["profundidad_m"] = np.where(circular, resultado["llenado_maximo"] * resultado["diametro_m"],
+                                          resultado["profundidad_m"])
+    return resultado
+
+def cuneta_triangular(pendiente_transversal: float, profundidad_m: float, talud_bordillo: float = 0.0,
+                      **extra) -> Dict:
+    """Cuneta de calzada: bordillo (talud_bordillo, 0 = vertical) y bombeo de la calzada"""
+    return {"tipo": "triangular", "talud_izq": talud_bordillo, "talud_der": 1.0 / pendiente_transversal,
+            "profundidad_m": profundidad_m, **extra}
+
+def cuneta_trapezoidal(base_m: float, talud: float, profundidad_m: float, **extra) -> Dict:
+    """Cuneta trapezoidal simétrica"""
+    return {"tipo": "trapezoidal", "base_m": base_m, "talud_izq": talud, "talud_der": talud,
+            "profundidad_m": profundidad_m, **extra}
+
+def alcantarilla_circular(diametro_m, llenado_maximo: float = 0.8, **extra) -> Dict:
+    """Alcantarilla circular con su llenado máximo de diseño (y/D)"""
+    return {"tipo": "circular", "diametro_m": diametro_m, "llenado_maximo": llenado_maximo, **extra}
+
+def geometria(y: np.ndarray, s: Dict[str, np.ndarray]) -> Tuple[np.ndarray, ...]:
+    """Área, perímetro mojado, ancho superficial y dP/dy para el tirante y de cada sección"""
+    circular = s["codigo"] == TIPOS_SECCION["circular"]
+    # Trapecio (triángulo con base 0)
+    lados = np.sqrt(1 + s["talud_izq"] ** 2) + np.sqrt(1 + s["talud_der"] ** 2)
+    area = s["base_m"] * y + (s["talud_izq"] + s["talud_der"]) / 2 * y ** 2
+    perimetro = s["base_m"] + lados * y
+    ancho = s["base_m"] + (s["talud_izq"] + s["talud_der"]) * y
+    d_perimetro = lados
+    if circular.any():
+        D = np.where(circular, s["diametro_m"], 1.0)
+        theta = 2 * np.arccos(np.clip(1 - 2 * np.where(circular, y, 0.5) / D, -1, 1))
+        seno = np.maximum(np.sin(theta / 2), 1e-12)
+        area = np.where(circular, D ** 2 / 8 * (theta - np.sin(theta)), area)
+        perimetro = np.where(circular, D * theta / 2, perimetro)
+        ancho = np.where(circular, D * seno, ancho)
+        d_perimetro = np.where(circular, 2 / seno, d_perimetro)
+    return area, perimetro, ancho, d_perimetro
+
+def conduccion(y: np.ndarray, s: Dict[str, np.ndarray]) -> Tuple[np.ndarray, np.ndarray]:
+    """Factor de conducción A·R^(2/3) y su derivada respecto al tirante"""
+    area, perimetro, ancho, d_perimetro = geometria(y, s)
+    perimetro = np.maximum(perimetro, 1e-12)
+    factor = area ** (5 / 3) * perimetro ** (-2 / 3)
+    derivada = (5 / 3 * area ** (2 / 3) * perimetro ** (-2 / 3) * ancho
+                - 2 / 3 * area ** (5 / 3) * perimetro ** (-5 / 3) * d_perimetro)
+    return factor, derivada
+
+def capacidad_seccion(secciones, k_manning: float = K_MANNING_SI) -> np.ndarray:
+    """Caudal (m³/s) con el tirante en la profundidad útil de cada sección"""
+    s = secciones if "codigo" in secciones else normalizar_secciones(secciones)
+    factor, _ = conduccion(s["profundidad_m"], s)
+    return k_manning / s["n"] * factor * np.sqrt(s["pendiente"])
+
+def tirante_normal(caudal, secciones, k_manning: float = K_MANNING_SI, tolerancia: float = 1e-10,
+                   iteraciones: int = 50) -> Dict[str, np.ndarray]:
+    """
+    Tirante normal de Manning de todas las secciones a la vez
+
+    Newton sobre A·R^(2/3) = Q·n/(k·√S), con un intervalo [bajo, alto]
+    que se estrecha en cada paso; si Newton sale del intervalo se toma
+    el punto medio. En cunetas el tirante puede superar la profundidad
+    útil (desborde); en alcantarillas se busca hasta 0.938·D y por encima
+    del máximo de conducción quedan en carga.
+
+    Devuelve tirante, área, velocidad, Froude, ancho superficial y las
+    banderas desborde (no cabe en la profundidad útil) y en_carga.
+    """
+    s = secciones if "codigo" in secciones else normalizar_secciones(secciones, np.size(caudal))
+    Q = np.broadcast_to(np.asarray(caudal, dtype=float), s["n"].shape)
+    objetivo = Q * s["n"] / (k_manning * np.sqrt(s["pendiente"]))
+    circular = s["codigo"] == TIPOS_SECCION["circular"]
+
+    # Límite superior de búsqueda: máximo de conducción (circular) o se duplica hasta encerrar la raíz
+    alto = np.where(circular, Y_D_MAXIMO_CIRCULAR * np.nan_to_num(s["diametro_m"], nan=1.0), 1.0)
+    factor_alto, _ = conduccion(alto, s)
+    for _ in range(64):
+        crecer = ~circular & (factor_alto < objetivo)
+        if not crecer.any():
+            break
+        alto = np.where(crecer, alto * 2, alto)
+        factor_alto, _ = conduccion(alto, s)
+    en_carga = circular & (factor_alto < objetivo)
+    bajo = np.zeros_like(alto)
+    y = np.where(en_carga, alto, 0.5 * alto)
+
+    for _ in range(iteraciones):
+        factor, derivada = conduccion(y, s)
+        residuo = factor - objetivo
+        bajo = np.where(residuo < 0, y, bajo)
+        alto = np.where(residuo > 0, y, alto)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            nuevo = y - residuo / derivada
+        fuera = ~np.isfinite(nuevo) | (nuevo <= bajo) | (nuevo >= alto)
+        nuevo = np.where(fuera, (bajo + alto) / 2, nuevo)
+        nuevo = np.where(Q <= 0, 0.0, np.where(en_carga, y, nuevo))
+        convergido = np.abs(nuevo - y) <= tolerancia * np.maximum(y, 1e-6)
+        y = nuevo
+        if convergido.all():
+            break
+
+    area, _, ancho, _ = geometria(y, s)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        velocidad = np.where(area > 0, Q / area, 0.0)
+        froude = np.where(area > 0, velocidad / np.sqrt(GRAVEDAD * area / np.maximum(ancho, 1e-12)), 0.0)
+    return {
+        "tirante_m": y,
+        "area_m2": area,
+        "velocidad_m_s": velocidad,
+        "froude": froude,
+        "ancho_superficial_m": ancho,
+        "desborde": ~circular & (y > s["profundidad_m"] + 1e-12),
+        "en_carga": en_carga
+    }
+
+def verificar_red_cunetas(tramos, caudales_sumidero=None, k_manning: float = K_MANNING_SI) -> Dict:
+    """
+    Verifica todos los tramos de una red de cunetas y alcantarillas contra
+    su caudal de diseño
+
+    Parámetros:
+    - tramos: secciones (ver normalizar_secciones) con 'caudal_m3_s' o
+      con 'sumidero' (id del sumidero al que descarga cada tramo)
+    - caudales_sumidero: tabla de MODULO_HIDROLOGIA.cuencas_por_sumidero
+      (lista de dicts con 'id' y 'caudal_l_s') o dict id → caudal (m³/s)
+
+    Devuelve la tabla por tramo (tirante, velocidad, Froude, régimen,
+    capacidad, utilización y si cumple) y un resumen de la red.
+    """
+    try:
+        tabla = pd.DataFrame(tramos) if not isinstance(tramos, pd.DataFrame) else tramos.copy()
+        if "caudal_m3_s" not in tabla.columns:
+            if caudales_sumidero is None or "sumidero" not in tabla.columns:
+                raise ValueError("Cada tramo necesita 'caudal_m3_s' o 'sumidero' con caudales_sumidero")
+            if isinstance(caudales_sumidero, dict):
+                caudales = {k: float(v) for k, v in caudales_sumidero.items()}
+            else:
+                caudales = {c["id"]: c["caudal_l_s"] / 1000 for c in caudales_sumidero}
+            tabla["caudal_m3_s"] = tabla["sumidero"].map(caudales)
+            if tabla["caudal_m3_s"].isna().any():
+                faltantes = sorted(set(tabla.loc[tabla["caudal_m3_s"].isna(), "sumidero"]))
+                raise ValueError(f"Sumideros sin caudal de diseño: {faltantes}")
+
+        s = normalizar_secciones(tabla, len(tabla))
+        Q = tabla["caudal_m3_s"].to_numpy(dtype=float)
+        flujo = tirante_normal(Q, s, k_manning)
+        capacidad = capacidad_seccion(s, k_manning)
+        cumple = ~flujo["desborde"] & ~flujo["en_carga"] & (Q <= capacidad * (1 + 1e-9))
+
+        tabla["tirante_m"] = np.round(flujo["tirante_m"], 4)
+        tabla["velocidad_m_s"] = np.round(flujo["velocidad_m_s"], 3)
+        tabla["froude"] = np.round(flujo["froude"], 3)
+        tabla["regimen"] = np.where(flujo["froude"] > 1, "Supercrítico", "Subcrítico")
+        tabla["capacidad_m3_s"] = np.round(capacidad, 5)
+        tabla["utilizacion"] = np.round(np.divide(Q, capacidad, out=np.full_like(Q, np.inf), where=capacidad > 0), 3)
+        tabla["cumple"] = cumple
+        return {
+            "tramos": tabla,
+            "resumen": {
+                "tramos": int(len(tabla)),
+                "cumplen": int(cumple.sum()),
+                "no_cumplen": int((~cumple).sum()),
+                "desbordes": int(flujo["desborde"].sum()),
+                "en_carga": int(flujo["en_carga"].sum()),
+                "supercriticos": int((flujo["froude"] > 1).sum()),
+                "utilizacion_maxima": float(tabla["utilizacion"].max()) if len(tabla) else 0.0
+            },
+            "estado": "✅ Red verificada" if cumple.all() else "⚠️ Tramos con capacidad insuficiente"
+        }
+    except Exception as e:
+        return {"error": str(e), "estado": "❌ Error verificando red de drenaje"}
+
+def dimensionar_alcantarillas(caudal, pendiente, n: float = 0.013, llenado_maximo: float = 0.8,
+                              diametros: List[float] = DIAMETROS_COMERCIALES,
+                              k_manning: float = K_MANNING_SI) -> Dict[str, np.ndarray]:
+    """
+    Menor diámetro comercial que conduce cada caudal con el llenado
+    máximo; capacidades de tramos × diámetros en una sola evaluación
+    (NaN si ningún diámetro alcanza)
+    """
+    Q, S = np.broadcast_arrays(np.atleast_1d(np.asarray(caudal, dtype=float)), np.asarray(pendiente, dtype=float))
+    diametros = np.asarray(diametros, dtype=float)
+    malla = normalizar_secciones({"tipo": "circular", "diametro_m": np.tile(diametros, Q.size),
+                                  "llenado_maximo": llenado_maximo, "n": n, "pendiente": np.repeat(S, diametros.size)})
+    capacidades = capacidad_seccion(malla, k_manning).reshape(Q.size, diametros.size)
+    alcanza = capacidades >= Q[:, None]
+    indice = np.where(alcanza.any(axis=1), alcanza.argmax(axis=1), -1)
+    diametro = np.where(indice >= 0, diametros[np.maximum(indice, 0)], np.nan)
+    capacidad = np.where(indice >= 0, capacidades[np.arange(Q.size), np.maximum(indice, 0)], np.nan)
+    return {"diametro_m": diametro, "capacidad_m3_s": capacidad, "capacidades_m3_s": capacidades}
+
+if __name__ == "__main__":
+    # Prueba del módulo: 10 000 tramos de cuneta y dos alcantarillas
+    import time
+    rng = np.random.default_rng(0)
+    tramos = pd.DataFrame({**cuneta_triangular(0.02, 0.15), "pendiente": rng.uniform(0.005, 0.08, 10000),
+                           "caudal_m3_s": rng.uniform(0.005, 0.08, 10000), "n": 0.016})
+    inicio = time.perf_counter()
+    red = verificar_red_cunetas(tramos)
+    print(f"{red['estado']} en {time.perf_counter() - inicio:.3f} s: {red['resumen']}")
+    alcantarillas = dimensionar_alcantarillas([0.15, 0.5, 1.8], 0.01)
+    print(f"Diámetros: {alcantarillas['diametro_m']} m")
+    flujo = tirante_normal([0.15, 0.5], alcantarilla_circular([0.6, 0.9], n=0.013, pendiente=0.01))
+    print(f"Tirantes: {np.round(flujo['tirante_m'], 3)} m, Froude: {np.round(flujo['froude'], 2)}")
@@ -0,0 +1,569 @@
+"""
+MÓDULO HIDROLOGÍA - RELLENO DE DEPRESIONES Y ACUMULACIÓN DE FLUJO
+=================================================================
+
+Motor hidrológico sobre el MDT para diseño de cunetas y drenaje urbano:
+- Relleno de depresiones por Priority-Flood (O(N log N), Barnes et al. 2014)
+- Dirección de flujo D8 y D-infinito (Tarboton 1997)
+- Acumulación de flujo por frentes topológicos vectorizados
+- Longitud de flujo máxima y extracción de cauces por umbral
+- Cuencas por sumidero o punto bajo y método racional en lote
+
+Numba (dependencia en requirements.txt) compila el Priority-Flood; sin
+Numba el mismo algoritmo corre en Python puro (unos 24 s por 10⁶
+celdas), útil solo para grillas pequeñas.
+
+Autor: IA Assistant - Especialista UNI
+Fecha: 2024
+"""
+
+import numpy as np
+import heapq
+import math
+import warnings
+from typing import Dict, List, Tuple, Optional
+
+# Tamaño de grilla desde el que se advierte que falta Numba
+CELDAS_AVISO_SIN_NUMBA = 250_000
+
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+    def njit(*args, **kwargs):
+        """Sin Numba los núcleos se ejecutan como Python puro"""
+        if len(args) == 1 and callable(args[0]):
+            return args[0]
+        return lambda funcion: funcion
+
+# Vecinos D8 (fila 0 = sur): desplazamiento de fila, de columna y código ESRI
+VECINOS_D8 = (
+    (0, 1, 1),      # Este
+    (-1, 1, 2),     # Sureste
+    (-1, 0, 4),     # Sur
+    (-1, -1, 8),    # Suroeste
+    (0, -1, 16),    # Oeste
+    (1, -1, 32),    # Noroeste
+    (1, 0, 64),     # Norte
+    (1, 1, 128)     # Noreste
+)
+_DF = np.array([v[0] for v in VECINOS_D8], dtype=np.int64)
+_DC = np.array([v[1] for v in VECINOS_D8], dtype=np.int64)
+_CODIGOS = np.array([v[2] for v in VECINOS_D8], dtype=np.uint8)
+_DISTANCIAS = np.hypot(_DF, _DC)
+
+# Facetas D-infinito: (vecino cardinal, vecino diagonal, ángulo base, signo)
+_FACETAS_DINF = (
+    (0, 7, 0.0, 1.0), (6, 7, 0.5 * np.pi, -1.0), (6, 5, 0.5 * np.pi, 1.0),
+    (4, 5, np.pi, -1.0), (4, 3, np.pi, 1.0), (2, 3, 1.5 * np.pi, -1.0),
+    (2, 1, 1.5 * np.pi, 1.0), (0, 1, 2.0 * np.pi, -1.0)
+)
+
+@njit(cache=True)
+def _priority_flood(z, ny, nx, df, dc, salidas):
+    """Núcleo Priority-Flood con incremento mínimo (nextafter) en zonas planas"""
+    relleno = z.copy()
+    n = ny * nx
+    cerrado = np.zeros(n, dtype=np.bool_)
+    cola = [(0.0, 0)]
+    cola.pop()
+
+    for c in range(n):
+        if np.isnan(relleno[c]):
+            cerrado[c] = True
+
+    # Semillas: borde de la grilla, salidas internas y vecinas a zonas sin datos
+    for c in range(n):
+        if cerrado[c]:
+            continue
+        f = c // nx
+        k = c % nx
+        borde = salidas[c] or f == 0 or f == ny - 1 or k == 0 or k == nx - 1
+        if not borde:
+            for d in range(8):
+                if np.isnan(relleno[(f + df[d]) * nx + k + dc[d]]):
+                    borde = True
+                    break
+        if borde:
+            cerrado[c] = True
+            heapq.heappush(cola, (relleno[c], c))
+
+    while len(cola) > 0:
+        zc, c = heapq.heappop(cola)
+        f = c // nx
+        k = c % nx
+        for d in range(8):
+            ff = f + df[d]
+            kk = k + dc[d]
+            if ff < 0 or ff >= ny or kk < 0 or kk >= nx:
+                continue
+            v = ff * nx + kk
+            if cerrado[v]:
+                continue
+            cerrado[v] = True
+            if relleno[v] <= zc:
+                relleno[v] = np.nextafter(zc, np.inf)
+            heapq.heappush(cola, (relleno[v], v))
+    return relleno
+
+def rellenar_depresiones(Z_grid: np.ndarray, salidas: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Rellena depresiones del MDT para que toda celda drene al borde
+
+    Las zonas planas resultantes conservan una pendiente mínima (un ULP por
+    celda), de modo que la dirección de flujo queda definida en todo el MDT.
+    Las celdas NaN y las marcadas en `salidas` (sumideros) se tratan como
+    salidas: las depresiones que las contienen drenan hacia ellas.
+    """
+    Z = np.ascontiguousarray(Z_grid, dtype=np.float64)
+    ny, nx = Z.shape
+    if salidas is None:
+        salidas = np.zeros(Z.size, dtype=np.bool_)
+    salidas = np.ascontiguousarray(salidas, dtype=np.bool_).ravel()
+    if not NUMBA_AVAILABLE and Z.size > CELDAS_AVISO_SIN_NUMBA:
+        warnings.warn(f"Numba no está instalado: el relleno de {Z.size:,} celdas corre en Python puro "
+                      "(unos 24 s por millón de celdas); instale numba (requirements.txt)", RuntimeWarning)
+    return _priority_flood(Z.ravel(), ny, nx, _DF, _DC, salidas).reshape(ny, nx)
+
+def direccion_flujo_d8(Z_grid: np.ndarray, resolucion: float = 1.0) -> Dict:
+    """
+    Dirección de flujo D8 (máxima pendiente hacia uno de los 8 vecinos)
+
+    Devuelve receptores (N×1, -1 = salida), proporciones, código ESRI y
+    pendiente de descarga (m/m).
+    """
+    Z = np.asarray(Z_grid, dtype=np.float64)
+    ny, nx = Z.shape
+    Zp = np.pad(Z, 1, mode="constant", constant_values=np.nan)
+    mejor = np.zeros(Z.shape)
+    elegido = np.full(Z.shape, -1, dtype=np.int8)
+    caida = np.empty(Z.shape)
+    with np.errstate(invalid="ignore"):
+        for k, (df, dc, _) in enumerate(VECINOS_D8):
+            np.subtract(Z, Zp[1 + df:1 + df + ny, 1 + dc:1 + dc + nx], out=caida)
+            caida *= 1.0 / (resolucion * _DISTANCIAS[k])
+            supera = caida > mejor
+            np.copyto(mejor, caida, where=supera)
+            elegido[supera] = k
+
+    elegido = elegido.ravel()
+    con_receptor = elegido >= 0
+    desplazamiento = _DF * nx + _DC
+    receptor = np.where(con_receptor, np.arange(ny * nx) + desplazamiento[elegido], -1)
+    return {
+        "metodo": "D8",
+        "receptores": receptor[:, np.newaxis],
+        "proporciones": con_receptor.astype(np.float64)[:, np.newaxis],
+        "codigo": np.where(con_receptor, _CODIGOS[elegido], 0).astype(np.uint8).reshape(ny, nx),
+        "distancia": np.where(con_receptor, _DISTANCIAS[elegido] * resolucion, 0.0),
+        "pendiente": mejor,
+        "forma": (ny, nx)
+    }
+
+def direccion_flujo_dinf(Z_grid: np.ndarray, resolucion: float = 1.0) -> Dict:
+    """
+    Dirección de flujo D-infinito (Tarboton 1997)
+
+    El flujo se reparte entre los dos vecinos de la faceta de máxima
+    pendiente en proporción al ángulo dentro de la faceta.
+    """
+    Z = np.asarray(Z_grid, dtype=np.float64)
+    ny, nx = Z.shape
+    d = resolucion
+    Zp = np.pad(Z, 1, mode="constant", constant_values=np.nan)
+    mejor = np.zeros(Z.shape)
+    angulo = np.full(Z.shape, -1.0)
+    faceta = np.full(Z.shape, -1, dtype=np.int8)
+    fraccion_diagonal = np.zeros(Z.shape)
+
+    with np.errstate(invalid="ignore"):
+        for i, (cardinal, diagonal, base, signo) in enumerate(_FACETAS_DINF):
+            e1 = Zp[1 + _DF[cardinal]:1 + _DF[cardinal] + ny, 1 + _DC[cardinal]:1 + _DC[cardinal] + nx]
+            e2 = Zp[1 + _DF[diagonal]:1 + _DF[diagonal] + ny, 1 + _DC[diagonal]:1 + _DC[diagonal] + nx]
+            s1 = (Z - e1) / d
+            s2 = (e1 - e2) / d
+            r = np.arctan2(s2, s1)
+            s = np.hypot(s1, s2)
+            bajo = r < 0
+            alto = r > np.pi / 4
+            r[bajo] = 0.0
+            r[alto] = np.pi / 4
+            np.copyto(s, s1, where=bajo)
+            np.copyto(s, (Z - e2) / (d * math.sqrt(2.0)), where=alto)
+            supera = s > mejor
+            np.copyto(mejor, s, where=supera)
+            faceta[supera] = i
+            np.copyto(fraccion_diagonal, r / (np.pi / 4), where=supera)
+            np.copyto(angulo, base + signo * r, where=supera)
+
+    faceta = faceta.ravel()
+    fraccion_diagonal = fraccion_diagonal.ravel()
+    con_receptor = faceta >= 0
+    indices = np.arange(ny * nx)
+    cardinales = np.array([f[0] for f in _FACETAS_DINF])
+    diagonales = np.array([f[1] for f in _FACETAS_DINF])
+    desplazamiento = _DF * nx + _DC
+    receptores = np.full((ny * nx, 2), -1, dtype=np.int64)
+    receptores[con_receptor, 0] = indices[con_receptor] + desplazamiento[cardinales[faceta[con_receptor]]]
+    receptores[con_receptor, 1] = indices[con_receptor] + desplazamiento[diagonales[faceta[con_receptor]]]
+    proporciones = np.zeros((ny * nx, 2))
+    proporciones[con_receptor, 0] = 1.0 - fraccion_diagonal[con_receptor]
+    proporciones[con_receptor, 1] = fraccion_diagonal[con_receptor]
+    return {
+        "metodo": "Dinf",
+        "receptores": receptores,
+        "proporciones": proporciones,
+        "angulo": np.mod(angulo, 2 * np.pi).reshape(ny, nx),
+        "pendiente": mejor,
+        "forma": (ny, nx)
+    }
+
+def orden_topologico(receptores: np.ndarray, proporciones: np.ndarray) -> List[np.ndarray]:
+    """
+    Frentes de celdas en orden aguas abajo (algoritmo de Kahn vectorizado)
+
+    Cada frente contiene celdas cuyos aportantes ya fueron procesados; el
+    número de frentes es la longitud del camino de flujo más largo en celdas.
+    """
+    n = receptores.shape[0]
+    validos = (receptores >= 0) & (proporciones > 0)
+    grado = np.bincount(receptores[validos], minlength=n)
+    frente = np.flatnonzero(grado == 0)
+    frentes = []
+    while frente.size:
+        frentes.append(frente)
+        destino = receptores[frente][validos[frente]]
+        np.subtract.at(grado, destino, 1)
+        listos = np.sort(destino[grado[destino] == 0])
+        frente = listos[np.r_[True, listos[1:] != listos[:-1]]] if listos.size else listos
+    return frentes
+
+def acumulacion_flujo(flujo: Dict, pesos: Optional[np.ndarray] = None,
+                      frentes: Optional[List[np.ndarray]] = None) -> np.ndarray:
+    """
+    Acumulación de flujo (celdas aportantes, o suma de pesos si se dan)
+    """
+    receptores = flujo["receptores"]
+    proporciones = flujo["proporciones"]
+    n = receptores.shape[0]
+    acumulado = np.ones(n) if pesos is None else np.asarray(pesos, dtype=np.float64).ravel().copy()
+    if frentes is None:
+        frentes = orden_topologico(receptores, proporciones)
+
+    validos = (receptores >= 0) & (proporciones > 0)
+    for frente in frentes:
+        v = validos[frente]
+        aporte = acumulado[frente][:, np.newaxis] * proporciones[frente]
+        np.add.at(acumulado, receptores[frente][v], aporte[v])
+    return acumulado.reshape(flujo["forma"])
+
+def longitud_flujo(flujo_d8: Dict, frentes: Optional[List[np.ndarray]] = None) -> np.ndarray:
+    """
+    Longitud del camino de flujo más largo aguas arriba de cada celda (m)
+    """
+    receptor = flujo_d8["receptores"][:, 0]
+    distancia = flujo_d8["distancia"]
+    if frentes is None:
+        frentes = orden_topologico(flujo_d8["receptores"], flujo_d8["proporciones"])
+
+    longitud = np.zeros(receptor.size)
+    for frente in frentes:
+        frente = frente[receptor[frente] >= 0]
+        np.maximum.at(longitud, receptor[frente], longitud[frente] + distancia[frente])
+    return longitud.reshape(flujo_d8["forma"])
+
+def extraer_cauces(acumulacion_m2: np.ndarray, umbral_m2: float = 500.0) -> Dict:
+    """
+    Cauces (cunetas naturales) donde el área aportante supera el umbral
+    """
+    cauces = acumulacion_m2 >= umbral_m2
+    return {
+        "mascara": cauces,
+        "umbral_m2": umbral_m2,
+        "celdas_cauce": int(np.sum(cauces)),
+        "porcentaje_area": round(100.0 * np.mean(cauces), 2) if cauces.size else 0.0
+    }
+
+def pendiente_terreno(Z_grid: np.ndarray, resolucion: float = 1.0) -> np.ndarray:
+    """Pendiente del terreno (m/m) por diferencias centrales"""
+    grad_y, grad_x = np.gradient(np.asarray(Z_grid, dtype=np.float64), resolucion)
+    return np.hypot(grad_x, grad_y)
+
+def analisis_hidrologico_mdt(dtm_data: Dict, metodo: str = "D8",
+                             umbral_cauce_m2: float = 500.0) -> Dict:
+    """
+    Análisis hidrológico completo del MDT
+
+    Parámetros:
+    - dtm_data: MDT con 'Z_grid' y 'resolution'
+    - metodo: "D8" o "Dinf" para la acumulación de flujo
+    - umbral_cauce_m2: Área aportante mínima para considerar un cauce
+    """
+    Z = np.asarray(dtm_data['Z_grid'], dtype=np.float64)
+    resolucion = float(dtm_data['resolution'])
+    area_celda = resolucion ** 2
+
+    relleno = rellenar_depresiones(Z)
+    profundidad_relleno = relleno - Z
+
+    flujo_d8 = direccion_flujo_d8(relleno, resolucion)
+    frentes_d8 = orden_topologico(flujo_d8["receptores"], flujo_d8["proporciones"])
+    if metodo == "Dinf":
+        flujo = direccion_flujo_dinf(relleno, resolucion)
+        frentes = orden_topologico(flujo["receptores"], flujo["proporciones"])
+    else:
+        flujo, frentes = flujo_d8, frentes_d8
+
+    acumulacion_m2 = acumulacion_flujo(flujo, frentes=frentes) * area_celda
+    longitud = longitud_flujo(flujo_d8, frentes_d8)
+    pendiente = np.nan_to_num(pendiente_terreno(Z, resolucion))
+
+    # Cuenca principal: salida D8 con mayor área aportante
+    acumulacion_d8 = acumulacion_flujo(flujo_d8, frentes=frentes_d8)
+    suma_pendiente = acumulacion_flujo(flujo_d8, pesos=pendiente, frentes=frentes_d8)
+    salida = int(np.argmax(acumulacion_d8))
+    cauces = extraer_cauces(acumulacion_m2, umbral_cauce_m2)
+
+    return {
+        "relleno": relleno,
+        "profundidad_relleno": profundidad_relleno,
+        "flujo": flujo,
+        "flujo_d8": flujo_d8,
+        "acumulacion_m2": acumulacion_m2,
+        "longitud_flujo_m": longitud,
+        "pendiente": pendiente,
+        "cauces": cauces,
+        "resumen": {
+            "metodo": flujo["metodo"],
+            "celdas": int(Z.size),
+            "volumen_depresiones_m3": round(float(np.nansum(profundidad_relleno)) * area_celda, 2),
+            "celdas_depresion": int(np.sum(profundidad_relleno > 1e-6)),
+            "salida_principal": (salida // Z.shape[1], salida % Z.shape[1]),
+            "area_cuenca_principal_ha": round(float(acumulacion_d8.ravel()[salida]) * area_celda / 10000, 4),
+            "longitud_flujo_max_m": round(float(longitud.ravel()[salida]), 1),
+            "pendiente_media_cuenca_pct": round(100 * float(suma_pendiente.ravel()[salida]
+                                                      / acumulacion_d8.ravel()[salida]), 2),
+            "celdas_cauce": cauces["celdas_cauce"]
+        }
+    }
+
+def tiempo_concentracion_kirpich(longitud_m, pendiente_pct):
+    """
+    Tiempo de concentración de Kirpich (min), con L en m y la pendiente
+    en %; internamente S = pendiente_pct / 100 (m/m)
+
+    Acepta escalares o arreglos; la pendiente se limita a 0.1% y la
+    longitud a 1 m para cuencas de una sola celda.
+    """
+    longitud = np.maximum(np.asarray(longitud_m, dtype=np.float64), 1.0)
+    pendiente = np.maximum(np.asarray(pendiente_pct, dtype=np.float64) / 100, 0.001)
+    return 0.0195 * longitud ** 0.77 * pendiente ** -0.385
+
+def celdas_desde_coordenadas(dtm_data: Dict, coordenadas: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Fila y columna de la celda del MDT más cercana a cada coordenada (x, y)"""
+    coordenadas = np.atleast_2d(np.asarray(coordenadas, dtype=np.float64))
+    x0 = float(np.asarray(dtm_data['X_grid'])[0, 0])
+    y0 = float(np.asarray(dtm_data['Y_grid'])[0, 0])
+    resolucion = float(dtm_data['resolution'])
+    ny, nx = np.shape(dtm_data['Z_grid'])
+    filas = np.clip(np.rint((coordenadas[:, 1] - y0) / resolucion), 0, ny - 1).astype(np.int64)
+    columnas = np.clip(np.rint((coordenadas[:, 0] - x0) / resolucion), 0, nx - 1).astype(np.int64)
+    return filas, columnas
+
+def ajustar_a_punto_bajo(Z_grid: np.ndarray, filas: np.ndarray, columnas: np.ndarray,
+                         radio_celdas: int = 1) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Desplaza cada sumidero a la celda más baja dentro de un radio
+
+    Corrige la posición levantada en campo para que el sumidero quede sobre
+    la línea de la cuneta del MDT.
+    """
+    Z = np.asarray(Z_grid, dtype=np.float64)
+    ny, nx = Z.shape
+    mejor_f, mejor_c = filas.copy(), columnas.copy()
+    mejor_z = Z[filas, columnas].copy()
+    for df in range(-radio_celdas, radio_celdas + 1):
+        for dc in range(-radio_celdas, radio_celdas + 1):
+            f = np.clip(filas + df, 0, ny - 1)
+            c = np.clip(columnas + dc, 0, nx - 1)
+            z = Z[f, c]
+            mas_bajo = z < mejor_z
+            mejor_f[mas_bajo], mejor_c[mas_bajo], mejor_z[mas_bajo] = f[mas_bajo], c[mas_bajo], z[mas_bajo]
+    return mejor_f, mejor_c
+
+def detectar_puntos_bajos(Z_grid: np.ndarray, mascara_calle: Optional[np.ndarray] = None,
+                          profundidad_minima: float = 0.05) -> np.ndarray:
+    """
+    Puntos bajos (mínimos locales estrictos) con depresión de al menos
+    `profundidad_minima` m, opcionalmente restringidos a la calzada
+
+    Devuelve índices planos de celda.
+    """
+    Z = np.asarray(Z_grid, dtype=np.float64)
+    ny, nx = Z.shape
+    Zp = np.pad(Z, 1, mode="constant", constant_values=np.inf)
+    minimo = np.ones(Z.shape, dtype=bool)
+    with np.errstate(invalid="ignore"):
+        for df, dc, _ in VECINOS_D8:
+            vecino = Zp[1 + df:1 + df + ny, 1 + dc:1 + dc + nx]
+            minimo &= ~(vecino <= Z)
+    minimo[[0, -1], :] = False
+    minimo[:, [0, -1]] = False
+    minimo &= (rellenar_depresiones(Z) - Z) >= profundidad_minima
+    if mascara_calle is not None:
+        minimo &= np.asarray(mascara_calle, dtype=bool)
+    return np.flatnonzero(minimo)
+
+def delinear_cuencas(flujo_d8: Dict, sumideros: np.ndarray,
+                     frentes: Optional[List[np.ndarray]] = None) -> Dict:
+    """
+    Cuenca aportante de cada sumidero por recorrido aguas arriba vectorizado
+
+    Los sumideros captan todo el flujo que les llega (se tratan como
+    salidas), de modo que las cuencas anidadas no se superponen. Cada celda
+    hereda la etiqueta y la distancia de su receptor recorriendo los frentes
+    topológicos de aguas abajo hacia aguas arriba.
+    """
+    sumideros = np.asarray(sumideros, dtype=np.int64)
+    receptor = flujo_d8["receptores"][:, 0].copy()
+    receptor[sumideros] = -1
+    distancia = np.where(receptor >= 0, flujo_d8["distancia"], 0.0)
+    proporciones = (receptor >= 0).astype(np.float64)[:, np.newaxis]
+    if frentes is None:
+        frentes = orden_topologico(receptor[:, np.newaxis], proporciones)
+
+    etiqueta = np.full(receptor.size, -1, dtype=np.int64)
+    etiqueta[sumideros] = np.arange(sumideros.size)
+    hasta_sumidero = np.zeros(receptor.size)
+    for frente in reversed(frentes):
+        frente = frente[receptor[frente] >= 0]
+        etiqueta[frente] = etiqueta[receptor[frente]]
+        hasta_sumidero[frente] = hasta_sumidero[receptor[frente]] + distancia[frente]
+
+    return {
+        "etiquetas": etiqueta.reshape(flujo_d8["forma"]),
+        "distancia_sumidero_m": hasta_sumidero.reshape(flujo_d8["forma"]),
+        "sumideros": sumideros
+    }
+
+def cuencas_por_sumidero(dtm_data: Dict, sumideros: Optional[np.ndarray] = None,
+                         mascara_calle: Optional[np.ndarray] = None,
+                         coeficiente_escorrentia: float = 0.7,
+                         intensidad_mm_h: float = 60.0,
+                         radio_ajuste_m: float = 1.0,
+                         profundidad_minima: float = 0.05,
+                         curva_idf: Optional[Dict] = None,
+                         periodo_retorno: float = 10.0) -> Dict:
+    """
+    Delimita la cuenca de cada sumidero o punto bajo y aplica el método
+    racional en lote
+
+    Parámetros:
+    - dtm_data: MDT con 'X_grid', 'Y_grid', 'Z_grid' y 'resolution'
+    - sumideros: Coordenadas (x, y) de los sumideros; si no se dan se usan
+      los puntos bajos detectados sobre la calzada
+    - mascara_calle: Celdas de calzada para la detección de puntos bajos
+    - coeficiente_escorrentia, intensidad_mm_h: Parámetros del método racional
+    - radio_ajuste_m: Radio para llevar cada sumidero al punto más bajo
+    - curva_idf, periodo_retorno: Curva de MODULO_IDF; si se da, cada cuenca
+      usa la intensidad de una lluvia de duración igual a su tiempo de
+      concentración en lugar de intensidad_mm_h
+    """
+    try:
+        Z = np.asarray(dtm_data['Z_grid'], dtype=np.float64)
+        ny, nx = Z.shape
+        resolucion = float(dtm_data['resolution'])
+        area_celda = resolucion ** 2
+
+        if sumideros is None:
+            indices = detectar_puntos_bajos(Z, mascara_calle, profundidad_minima)
+        else:
+            filas, columnas = celdas_desde_coordenadas(dtm_data, sumideros)
+            radio = int(round(radio_ajuste_m / resolucion))
+            if radio > 0:
+                filas, columnas = ajustar_a_punto_bajo(Z, filas, columnas, radio)
+            indices = filas * nx + columnas
+        indices, primero = np.unique(indices, return_index=True)
+        indices = indices[np.argsort(primero)]
+
+        # Las depresiones que contienen un sumidero drenan hacia él
+        salidas = np.zeros(Z.size, dtype=bool)
+        salidas[indices] = True
+        relleno = rellenar_depresiones(Z, salidas)
+        flujo_d8 = direccion_flujo_d8(relleno, resolucion)
+        cuencas = delinear_cuencas(flujo_d8, indices)
+
+        etiquetas = cuencas["etiquetas"].ravel()
+        en_cuenca = etiquetas >= 0
+        k = etiquetas[en_cuenca]
+        n = indices.size
+        celdas = np.bincount(k, minlength=n)
+        pendiente = np.nan_to_num(pendiente_terreno(Z, resolucion)).ravel()
+        suma_pendiente = np.bincount(k, weights=pendiente[en_cuenca], minlength=n)
+        longitud = np.zeros(n)
+        np.maximum.at(longitud, k, cuencas["distancia_sumidero_m"].ravel()[en_cuenca])
+
+        area_ha = celdas * area_celda / 10000
+        pendiente_pct = 100 * suma_pendiente / np.maximum(celdas, 1)
+        tc = tiempo_concentracion_kirpich(longitud, pendiente_pct)
+        if curva_idf is not None:
+            from MODULO_IDF import intensidad_idf
+            intensidad = intensidad_idf(curva_idf, tc, periodo_retorno)
+        else:
+            intensidad = np.full(n, float(intensidad_mm_h))
+        caudal_m3_s = coeficiente_escorrentia * intensidad * area_ha / 360
+
+        # Coordenadas de la celda en la grilla (también si sus celdas no son cuadradas)
+        x = np.asarray(dtm_data['X_grid'], dtype=float).ravel()[indices]
+        y = np.asarray(dtm_data['Y_grid'], dtype=float).ravel()[indices]
+        tabla = [{
+            "id": i + 1,
+            "x": round(float(x[i]), 3),
+            "y": round(float(y[i]), 3),
+            "cota_m": round(float(Z.ravel()[indices[i]]), 3),
+            "area_ha": round(float(area_ha[i]), 4),
+            "longitud_flujo_max_m": round(float(longitud[i]), 1),
+            "pendiente_media_pct": round(float(pendiente_pct[i]), 2),
+            "tiempo_concentracion_min": round(float(tc[i]), 2),
+            "intensidad_mm_h": round(float(intensidad[i]), 2),
+            "caudal_l_s": round(float(caudal_m3_s[i]) * 1000, 2)
+        } for i in range(n)]
+
+        return {
+            "sumideros": tabla,
+            "etiquetas": cuencas["etiquetas"],
+            "total_sumideros": n,
+            "area_total_ha": round(float(area_ha.sum()), 4),
+            "area_sin_sumidero_ha": round(float(np.sum(~en_cuenca)) * area_celda / 10000, 4),
+            "caudal_total_l_s": round(float(caudal_m3_s.sum()) * 1000, 2),
+            "coeficiente_escorrentia": coeficiente_escorrentia,
+            "intensidad_lluvia_mm_h": intensidad_mm_h if curva_idf is None else "IDF por cuenca",
+            "periodo_retorno": periodo_retorno,
+            "estado": "✅ Cuencas por sumidero delimitadas"
+        }
+
+    except Exception as e:
+        return {
+            "error": str(e),
+            "estado": "❌ Error delimitando cuencas por sumidero"
+        }
+
+if __name__ == "__main__":
+    # Prueba del módulo: calle en V con pendiente longitudinal y un bache
+    x = np.arange(0, 100, 1.0)
+    y = np.arange(0, 20, 1.0)
+    X, Y = np.meshgrid(x, y)
+    Z = 3850 + 0.05 * X + 0.02 * np.abs(Y - 10)
+    Z[10, 40] -= 0.3
+    resultado = analisis_hidrologico_mdt({'Z_grid': Z, 'resolution': 1.0})
+    for clave, valor in resultado["resumen"].items():
+        print(f"   {clave}: {valor}")
+
+    # Cuencas por sumidero: uno en el bache y otro al pie de la calle
+    cuencas = cuencas_por_sumidero({'X_grid': X, 'Y_grid': Y, 'Z_grid': Z, 'resolution': 1.0},
+                                   sumideros=[(40, 10), (0, 10)])
+    for sumidero in cuencas["sumideros"]:
+        print(f"   Sumidero {sumidero['id']}: {sumidero['area_ha']} ha, "
+              f"{sumidero['caudal_l_s']} L/s")
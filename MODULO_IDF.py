@@ -0,0 +1,206 @@
+"""
+MÓDULO IDF - CURVAS INTENSIDAD-DURACIÓN-FRECUENCIA
+==================================================
+
+Intensidades de lluvia de diseño para el método racional:
+- Máximos anuales de lluvia diaria (estación o CHIRPS del almacén local)
+  o láminas máximas anuales por duración (pluviógrafo)
+- Distribución de Gumbel por momentos para todas las duraciones y
+  períodos de retorno a la vez; desagregación de Dyck-Peschke (MTC)
+- Ajuste de i = K·T^m / (D + c)^n por mínimos cuadrados en logaritmos,
+  resolviendo todos los valores candidatos de c en una pasada
+- Intensidades como arreglos duraciones × períodos y caudales racionales
+  en lote con el tiempo de concentración de cada cuenca
+
+Autor: IA Assistant - Especialista UNI
+Fecha: 2024
+"""
+
+import numpy as np
+import pandas as pd
+from typing import Dict, List, Tuple, Optional
+
+DURACIONES_MIN = [5, 10, 15, 20, 30, 60, 120, 180, 360, 720, 1440]
+PERIODOS_RETORNO = [2, 5, 10, 25, 50, 100, 500]
+
+# Corrección de Weiss por intervalo fijo de observación (lluvia de 1 día → 24 h)
+FACTOR_INTERVALO_DIARIO = 1.13
+
+# Curva regional por defecto (San Miguel, Puno) cuando no hay registros:
+# Gumbel + Dyck-Peschke sobre P24 máxima anual de media 30 mm y desviación 9 mm
+CURVA_IDF_POR_DEFECTO = {"K": 306.53, "m": 0.1575, "n": 0.75, "c": 0.0, "duracion_minima_min": 5.0,
+                         "fuente": "Regional por defecto (P24 media 30 mm, Dyck-Peschke)"}
+
+COLUMNAS_LLUVIA = ("precipitacion", "precipitacion_mm", "lluvia", "pp", "P24")
+
+def factor_frecuencia_gumbel(periodos) -> np.ndarray:
+    """Factor de frecuencia K_T de Gumbel (método de momentos)"""
+    T = np.asarray(periodos, dtype=float)
+    return -np.sqrt(6) / np.pi * (0.5772 + np.log(np.log(T / (T - 1))))
+
+def cuantiles_gumbel(maximos, periodos=PERIODOS_RETORNO) -> np.ndarray:
+    """
+    Cuantiles de Gumbel de máximos anuales (años × columnas) para cada
+    período de retorno; devuelve columnas × períodos (NaN = año faltante)
+    """
+    maximos = np.asarray(maximos, dtype=float)
+    if maximos.ndim == 1:
+        maximos = maximos[:, None]
+    media = np.nanmean(maximos, axis=0)
+    desviacion = np.nanstd(maximos, axis=0, ddof=1)
+    return media[:, None] + factor_frecuencia_gumbel(periodos)[None, :] * desviacion[:, None]
+
+def precipitacion_duraciones(P24, duraciones=DURACIONES_MIN) -> np.ndarray:
+    """Lámina (mm) para cada duración desde la de 24 h: Pd = P24·(d/1440)^0.25 (Dyck-Peschke)"""
+    P24 = np.asarray(P24, dtype=float)
+    return P24[..., None] * (np.asarray(duraciones, dtype=float) / 1440.0) ** 0.25
+
+def maximos_anuales_diarios(fechas, lluvia, cobertura_minima: float = 0.8) -> pd.Series:
+    """Máximo anual de lluvia diaria (mm), solo años con la cobertura mínima de días"""
+    serie = pd.Series(np.asarray(lluvia, dtype=float), index=pd.to_datetime(pd.Series(fechas)).values).dropna()
+    por_anio = serie.groupby(serie.index.year)
+    dias = por_anio.size()
+    anios = dias.index[dias >= cobertura_minima * 365]
+    return por_anio.max().loc[anios]
+
+def ajustar_curva_idf(intensidades, duraciones=DURACIONES_MIN, periodos=PERIODOS_RETORNO,
+                      c_candidatos=None) -> Dict:
+    """
+    Ajusta i = K·T^m / (D + c)^n a una tabla de intensidades (duraciones ×
+    períodos, mm/h)
+
+    Para cada c candidato la regresión ln i = ln K + m ln T − n ln(D + c)
+    es lineal; las ecuaciones normales de todos los c se resuelven juntas
+    y se elige el de menor residuo.
+    """
+    intensidades = np.asarray(intensidades, dtype=float)
+    D, T = np.meshgrid(np.asarray(duraciones, dtype=float), np.asarray(periodos, dtype=float), indexing="ij")
+    validos = np.isfinite(intensidades) & (intensidades > 0)
+    if validos.sum() < 4:
+        raise ValueError("Se necesitan al menos 4 intensidades válidas para ajustar la curva IDF")
+    y = np.log(intensidades[validos])
+    D, T = D[validos], T[validos]
+    c = np.asarray(np.arange(0.0, 30.5, 0.5) if c_candidatos is None else c_candidatos, dtype=float)
+
+    X = np.stack([np.ones((len(c), len(y))), np.broadcast_to(np.log(T), (len(c), len(y))),
+                  -np.log(D[None, :] + c[:, None])], axis=-1)                 # (C, N, 3)
+    XtX = np.einsum("cni,cnj->cij", X, X)
+    Xty = np.einsum("cni,n->ci", X, y)
+    beta = np.linalg.solve(XtX, Xty[..., None])[..., 0]                    # (C, 3)
+    residuo = ((np.einsum("cni,ci->cn", X, beta) - y) ** 2).sum(axis=1)
+    mejor = int(np.argmin(residuo))
+
+    curva = {"K": round(float(np.exp(beta[mejor, 0])), 4), "m": round(float(beta[mejor, 1]), 4),
+             "n": round(float(beta[mejor, 2]), 4), "c": float(c[mejor]),
+             "duracion_minima_min": float(min(duraciones))}
+    estimado = intensidad_idf(curva, D, T)
+    observado = np.exp(y)
+    curva["r2"] = round(float(1 - ((estimado - observado) ** 2).sum() / ((observado - observado.mean()) ** 2).sum()), 4)
+    curva["rmse_mm_h"] = round(float(np.sqrt(((estimado - observado) ** 2).mean())), 3)
+    return curva
+
+def intensidad_idf(curva: Dict, duracion_min, periodo_anos) -> np.ndarray:
+    """
+    Intensidad (mm/h) para duraciones y períodos de retorno de cualquier
+    forma que se difundan entre sí; la duración se limita a la mínima
+    de la curva (p. ej. tiempos de concentración muy cortos)
+    """
+    D = np.maximum(np.asarray(duracion_min, dtype=float), curva.get("duracion_minima_min", 5.0))
+    T = np.asarray(periodo_anos, dtype=float)
+    return curva["K"] * T ** curva["m"] / (D + curva.get("c", 0.0)) ** curva["n"]
+
+def tabla_idf(curva: Dict, duraciones=DURACIONES_MIN, periodos=PERIODOS_RETORNO) -> pd.DataFrame:
+    """Tabla de intensidades (mm/h): filas = duración (min), columnas = período (años)"""
+    valores = intensidad_idf(curva, np.asarray(duraciones, dtype=float)[:, None], np.asarray(periodos)[None, :])
+    return pd.DataFrame(np.round(valores, 2), index=pd.Index(duraciones, name="duracion_min"),
+                        columns=[f"T={T}" for T in periodos])
+
+def curva_idf_desde_p24(maximos_p24, duraciones=DURACIONES_MIN, periodos=PERIODOS_RETORNO,
+                        factor_intervalo: float = FACTOR_INTERVALO_DIARIO) -> Dict:
+    """Curva IDF desde máximos anuales de lluvia diaria (Gumbel + Dyck-Peschke)"""
+    maximos = np.asarray(maximos_p24, dtype=float)
+    maximos = maximos[np.isfinite(maximos)]
+    if maximos.size < 3:
+        raise ValueError("Se necesitan al menos 3 años de máximos de lluvia diaria")
+    P24 = cuantiles_gumbel(maximos, periodos)[0] * factor_intervalo         # (NT,)
+    laminas = precipitacion_duraciones(P24, duraciones).T                  # (ND, NT)
+    intensidades = laminas / (np.asarray(duraciones, dtype=float)[:, None] / 60.0)
+    curva = ajustar_curva_idf(intensidades, duraciones, periodos)
+    curva.update({"anios": int(maximos.size), "P24_media_mm": round(float(maximos.mean()), 2)})
+    return curva
+
+def curva_idf_desde_maximos(laminas_maximas, duraciones, periodos=PERIODOS_RETORNO) -> Dict:
+    """Curva IDF desde láminas máximas anuales (mm) por duración (años × duraciones)"""
+    laminas = np.asarray(laminas_maximas, dtype=float)
+    cuantiles = cuantiles_gumbel(laminas, periodos)                        # (ND, NT)
+    intensidades = cuantiles / (np.asarray(duraciones, dtype=float)[:, None] / 60.0)
+    curva = ajustar_curva_idf(intensidades, duraciones, periodos)
+    curva["anios"] = int(np.isfinite(laminas).any(axis=1).sum())
+    return curva
+
+def curva_idf_desde_registros(origen, periodos=PERIODOS_RETORNO) -> Dict:
+    """
+    Curva IDF desde registros de estación (ruta o archivo CSV, o DataFrame)
+
+    Formatos:
+    - Diario: columnas 'fecha' y lluvia ('precipitacion', 'lluvia', 'pp'...) en mm
+    - Pluviógrafo: una fila por año y columnas numéricas con la duración
+      en minutos ('5', '10', '60'...) y la lámina máxima anual en mm
+    """
+    try:
+        registros = pd.read_csv(origen) if isinstance(origen, str) or hasattr(origen, "read") else pd.DataFrame(origen)
+        columna = next((c for c in COLUMNAS_LLUVIA if c in registros.columns), None)
+        if "fecha" in registros.columns and columna is not None:
+            maximos = maximos_anuales_diarios(registros["fecha"], pd.to_numeric(registros[columna], errors="coerce"))
+            curva = curva_idf_desde_p24(maximos.to_numpy(), periodos=periodos)
+            curva["fuente"] = f"Registros diarios ({curva['anios']} años)"
+        else:
+            columnas = [c for c in registros.columns if str(c).strip().replace(".", "", 1).isdigit()]
+            if len(columnas) < 2:
+                raise ValueError("Los registros necesitan 'fecha' y lluvia diaria, o columnas de duración en minutos")
+            duraciones = [float(c) for c in columnas]
+            laminas = registros[columnas].apply(pd.to_numeric, errors="coerce").to_numpy()
+            curva = curva_idf_desde_maximos(laminas, duraciones, periodos)
+            curva["fuente"] = f"Pluviógrafo ({curva['anios']} años, {len(duraciones)} duraciones)"
+        return {"curva": curva, "tabla": tabla_idf(curva, periodos=periodos), "estado": "✅ Curva IDF ajustada"}
+    except Exception as e:
+        return {"error": str(e), "estado": "❌ Error ajustando curva IDF"}
+
+def curva_idf_desde_chirps(almacen, poligono: List[Tuple[float, float]], fecha_inicio: str, fecha_fin: str,
+                           periodos=PERIODOS_RETORNO) -> Dict:
+    """
+    Curva IDF desde la precipitación diaria CHIRPS del almacén local
+    (MODULO_SERIES_SATELITALES), promedio areal sobre el polígono
+    """
+    try:
+        consulta = almacen.consulta_zonal("precipitacion", poligono, fecha_inicio, fecha_fin)
+        if not consulta["fechas"]:
+            return {"error": "Sin precipitación en el almacén para el período", "estado": "❌ Error ajustando curva IDF"}
+        maximos = maximos_anuales_diarios(consulta["fechas"], [np.nan if v is None else v for v in consulta["media"]])
+        curva = curva_idf_desde_p24(maximos.to_numpy(), periodos=periodos)
+        curva["fuente"] = f"CHIRPS ({curva['anios']} años)"
+        return {"curva": curva, "tabla": tabla_idf(curva, periodos=periodos), "estado": "✅ Curva IDF ajustada"}
+    except Exception as e:
+        return {"error": str(e), "estado": "❌ Error ajustando curva IDF"}
+
+def caudales_racionales(area_ha, tiempo_concentracion_min, coeficiente_escorrentia,
+                        curva: Optional[Dict] = None, periodo_retorno: float = 10.0) -> Dict[str, np.ndarray]:
+    """
+    Método racional en lote: intensidad de cada cuenca para una duración
+    igual a su tiempo de concentración y Q = C·I·A/360 (m³/s, A en ha)
+    """
+    intensidad = intensidad_idf(curva or CURVA_IDF_POR_DEFECTO, tiempo_concentracion_min, periodo_retorno)
+    caudal = np.asarray(coeficiente_escorrentia, dtype=float) * intensidad * np.asarray(area_ha, dtype=float) / 360
+    return {"intensidad_mm_h": intensidad, "caudal_m3_s": caudal}
+
+if __name__ == "__main__":
+    # Prueba del módulo
+    print("Curva por defecto:")
+    print(tabla_idf(CURVA_IDF_POR_DEFECTO).iloc[:6])
+    rng = np.random.default_rng(1)
+    fechas = pd.date_range("1990-01-01", "2019-12-31", freq="D")
+    lluvia = rng.gamma(0.3, 4.0, len(fechas))
+    resultado = curva_idf_desde_registros(pd.DataFrame({"fecha": fechas, "precipitacion": lluvia}))
+    print(resultado["estado"], {k: resultado["curva"][k] for k in ("K", "m", "n", "c", "r2")})
+    racional = caudales_racionales([0.5, 1.2, 3.0], [6.0, 12.5, 25.0], 0.7)
+    print(f"I = {np.round(racional['intensidad_mm_h'], 1)} mm/h, Q = {np.round(racional['caudal_m3_s'] * 1000, 1)} L/s")
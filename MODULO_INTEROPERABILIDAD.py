@@ -302,22 +302,32 @@ class RevitBIM:
                 "estado": "❌ Error en exportación Revit BIM"
             }
     
+    def geometria_corredor(self, diseno: Dict) -> Tuple[float, float, float]:
+        """
+        Largo, ancho y área de plataforma (m, m, m²) del corredor: del
+        movimiento de tierras si está calculado, si no la cuadra típica 100×6 m
+        """
+        tierras = diseno.get("movimiento_tierras")
+        if tierras and "error" not in tierras:
+            return tierras["longitud_m"], tierras["ancho_m"], tierras["area_plataforma_m2"]
+        return 100, 6, 100 * 6
+    
     def crear_modelo_3d(self, diseno: Dict) -> Dict:
         """Crea modelo 3D del pavimento"""
         volumen_total = 0
         elementos = []
+        largo, ancho, area = self.geometria_corredor(diseno)
         
         if "pavimento_rigido" in diseno:
             espesor = diseno["pavimento_rigido"]["espesor_cm"] / 100  # m
-            area = 100 * 6  # m²
             volumen = area * espesor
             
             elementos.append({
                 "tipo": "Pavimento_Rigido",
                 "familia": self.families["pavimento_rigido"],
                 "dimensiones": {
-                    "largo": 100,
-                    "ancho": 6,
+                    "largo": largo,
+                    "ancho": ancho,
                     "espesor": espesor
                 },
                 "volumen": volumen,
@@ -327,15 +337,14 @@ class RevitBIM:
         
         if "pavimento_flexible" in diseno:
             espesor_total = diseno["pavimento_flexible"]["espesor_total_cm"] / 100
-            area = 100 * 6
             volumen = area * espesor_total
             
             elementos.append({
                 "tipo": "Pavimento_Flexible",
                 "familia": self.families["pavimento_flexible"],
                 "dimensiones": {
-                    "largo": 100,
-                    "ancho": 6,
+                    "largo": largo,
+                    "ancho": ancho,
                     "espesor": espesor_total
                 },
                 "volumen": volumen,
@@ -343,10 +352,20 @@ class RevitBIM:
             })
             volumen_total += volumen
         
+        tierras = diseno.get("movimiento_tierras")
+        movimiento = {}
+        if tierras and "error" not in tierras:
+            movimiento = {
+                "corte_m3": tierras["corte_total_m3"],
+                "relleno_m3": tierras["relleno_total_m3"],
+                "balance_m3": tierras["balance_m3"]
+            }
+        
         return {
             "elementos": elementos,
             "volumen_total_m3": round(volumen_total, 2),
-            "area_total_m2": 600
+            "area_total_m2": round(area, 2),
+            "movimiento_tierras": movimiento
         }
     
     def crear_programacion_4d(self, diseno: Dict) -> Dict:
@@ -422,15 +441,17 @@ class RevitBIM:
             "total": 0
         }
         
+        _, _, area = self.geometria_corredor(diseno)
+        
         if "pavimento_rigido" in diseno:
-            volumen = diseno["pavimento_rigido"]["espesor_cm"] * 600 / 100  # m³
+            volumen = diseno["pavimento_rigido"]["espesor_cm"] * area / 100  # m³
             costos["materiales"] += volumen * 150  # S/150 por m³
             costos["mano_obra"] += volumen * 80   # S/80 por m³
             costos["equipos"] += volumen * 40     # S/40 por m³
         
         if "pavimento_flexible" in diseno:
-            volumen_base = diseno["pavimento_flexible"]["espesor_base_cm"] * 600 / 100
-            volumen_subbase = diseno["pavimento_flexible"]["espesor_subbase_cm"] * 600 / 100
+            volumen_base = diseno["pavimento_flexible"]["espesor_base_cm"] * area / 100
+            volumen_subbase = diseno["pavimento_flexible"]["espesor_subbase_cm"] * area / 100
             
             costos["materiales"] += volumen_base * 80 + volumen_subbase * 40
             costos["mano_obra"] += (volumen_base + volumen_subbase) * 60
@@ -440,7 +461,7 @@ class RevitBIM:
         
         return {
             "costos_desglosados": costos,
-            "costo_por_m2": round(costos["total"] / 600, 2),
+            "costo_por_m2": round(costos["total"] / area, 2),
             "moneda": "Soles (PEN)"
         }
 
@@ -0,0 +1,253 @@
+"""
+MÓDULO INTERPOLACIÓN - MDT SOBRE ÍNDICE ESPACIAL (KD-TREE)
+==========================================================
+
+Interpolación del MDT para levantamientos con cobertura irregular:
+- IDW con k vecinos y radio máximo opcional
+- Vecino más cercano
+- Plano local por mínimos cuadrados con k vecinos (exacto en planos;
+  para perfiles de superficie de pavimento)
+- Vecino natural discreto (Sibson discreto, Park et al. 2006)
+- Consultas por teselas de salida en paralelo (memoria acotada)
+- Capa de calidad: distancia a la muestra más cercana por celda
+
+Autor: IA Assistant - Especialista UNI
+Fecha: 2024
+"""
+
+import numpy as np
+import math
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Tuple, Optional
+
+try:
+    from scipy.spatial import cKDTree
+    from scipy.signal import fftconvolve
+    SCIPY_AVAILABLE = True
+except ImportError:
+    SCIPY_AVAILABLE = False
+
+from MODULO_FILTRO_SUELO import definir_grilla
+
+METODOS_INTERPOLACION = ("idw", "vecino", "natural")
+
+# Radio máximo (en celdas) de dispersión del vecino natural discreto
+RADIO_NATURAL_CELDAS = 32
+
+def construir_indice(points: np.ndarray) -> "cKDTree":
+    """Índice espacial 2D (KD-tree) de las muestras XY"""
+    if not SCIPY_AVAILABLE:
+        raise ImportError("SciPy no está instalado. Instala con: pip install scipy")
+    return cKDTree(np.asarray(points)[:, :2])
+
+def _idw(indice: "cKDTree", z: np.ndarray, xy: np.ndarray, k: int, potencia: float,
+         radio_max: Optional[float]) -> Tuple[np.ndarray, np.ndarray]:
+    """IDW de k vecinos en los puntos xy; devuelve (valores, distancia mínima)"""
+    k = min(k, z.size)
+    distancia, vecino = indice.query(xy, k=k, distance_upper_bound=radio_max or np.inf)
+    distancia = distancia.reshape(len(xy), k)
+    vecino = vecino.reshape(len(xy), k)
+    validos = np.isfinite(distancia)
+    with np.errstate(divide="ignore"):
+        peso = np.where(validos, 1.0 / np.maximum(distancia, 1e-12) ** potencia, 0.0)
+    valores_vecinos = z[np.where(validos, vecino, 0)]
+    with np.errstate(invalid="ignore"):
+        valores = (peso * valores_vecinos).sum(axis=1) / peso.sum(axis=1)
+    return valores, distancia[:, 0]
+
+def _plano_local(indice: "cKDTree", xy_muestras: np.ndarray, z: np.ndarray, xy: np.ndarray,
+                 k: int, radio_max: Optional[float]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Plano z = a + b·dx + c·dy ajustado a los k vecinos de cada consulta
+    (coordenadas relativas a la consulta, a es el valor); donde el ajuste
+    es degenerado se usa el promedio de los vecinos
+    """
+    k = min(k, z.size)
+    distancia, vecino = indice.query(xy, k=k, distance_upper_bound=radio_max or np.inf)
+    distancia = distancia.reshape(len(xy), k)
+    vecino = vecino.reshape(len(xy), k)
+    peso = np.isfinite(distancia).astype(np.float64)
+    seguro = np.where(peso > 0, vecino, 0)
+    dx = (xy_muestras[seguro, 0] - xy[:, 0:1]) * peso
+    dy = (xy_muestras[seguro, 1] - xy[:, 1:2]) * peso
+    zv = z[seguro] * peso
+    n = peso.sum(axis=1)
+    normal = np.empty((len(xy), 3, 3))
+    normal[:, 0, 0] = n
+    normal[:, 0, 1] = normal[:, 1, 0] = dx.sum(axis=1)
+    normal[:, 0, 2] = normal[:, 2, 0] = dy.sum(axis=1)
+    normal[:, 1, 1] = (dx * dx).sum(axis=1)
+    normal[:, 1, 2] = normal[:, 2, 1] = (dx * dy).sum(axis=1)
+    normal[:, 2, 2] = (dy * dy).sum(axis=1)
+    derecha = np.column_stack([zv.sum(axis=1), (zv * dx).sum(axis=1), (zv * dy).sum(axis=1)])
+    escala = np.maximum(normal[:, 1, 1] * normal[:, 2, 2], 1e-300)
+    determinante = np.linalg.det(normal)
+    valido = (n >= 3) & (np.abs(determinante) > 1e-9 * n * escala)
+    valores = np.full(len(xy), np.nan)
+    if np.any(valido):
+        valores[valido] = np.linalg.solve(normal[valido], derecha[valido][..., np.newaxis])[:, 0, 0]
+    promedio = ~valido & (n > 0)
+    valores[promedio] = zv[promedio].sum(axis=1) / n[promedio]
+    return valores, distancia[:, 0]
+
+def interpolar_en_puntos(points: np.ndarray, xy: np.ndarray, metodo: str = "idw",
+                         k: int = 8, potencia: float = 2.0, radio_max: Optional[float] = None,
+                         indice: Optional["cKDTree"] = None,
+                         bloque: int = 262144) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Interpola z en puntos de consulta arbitrarios (IDW, vecino más cercano
+    o plano local de mínimos cuadrados)
+
+    Las consultas se procesan en bloques para acotar la memoria. Devuelve
+    (valores, distancia a la muestra más cercana); NaN fuera de radio_max.
+    """
+    if metodo not in ("idw", "vecino", "plano"):
+        raise ValueError("interpolar_en_puntos admite 'idw', 'vecino' o 'plano'")
+    indice = indice if indice is not None else construir_indice(points)
+    z = np.asarray(points)[:, 2].astype(np.float64)
+    xy_muestras = np.asarray(points)[:, :2].astype(np.float64)
+    xy = np.asarray(xy, dtype=np.float64).reshape(-1, 2)
+    valores = np.empty(len(xy))
+    distancias = np.empty(len(xy))
+    for inicio in range(0, len(xy), bloque):
+        consulta = xy[inicio:inicio + bloque]
+        if metodo == "plano":
+            valores[inicio:inicio + bloque], distancias[inicio:inicio + bloque] = _plano_local(
+                indice, xy_muestras, z, consulta, k, radio_max)
+            continue
+        valores[inicio:inicio + bloque], distancias[inicio:inicio + bloque] = _idw(
+            indice, z, consulta, 1 if metodo == "vecino" else k, potencia, radio_max)
+    return valores, distancias
+
+def _discos(radio_max: int) -> List[np.ndarray]:
+    """Núcleos circulares de radio 0..radio_max celdas"""
+    discos = []
+    for r in range(radio_max + 1):
+        d = np.arange(-r, r + 1)
+        discos.append((d[:, np.newaxis] ** 2 + d[np.newaxis, :] ** 2 <= r * r).astype(np.float64))
+    return discos
+
+def _sibson_discreto(valor: np.ndarray, radio: np.ndarray, discos: List[np.ndarray]) -> np.ndarray:
+    """
+    Vecino natural discreto: cada celda dispersa el valor de su muestra más
+    cercana en un disco de radio igual a esa distancia; el resultado es el
+    promedio de lo recibido. Una convolución por radio distinto.
+    """
+    suma = np.zeros(valor.shape)
+    cuenta = np.zeros(valor.shape)
+    for r in np.unique(radio[radio >= 0]):
+        mascara = radio == r
+        disco = discos[int(r)]
+        if r == 0:
+            suma += np.where(mascara, valor, 0.0)
+            cuenta += mascara
+            continue
+        suma += fftconvolve(np.where(mascara, valor, 0.0), disco, mode="same")
+        cuenta += fftconvolve(mascara.astype(np.float64), disco, mode="same")
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(cuenta > 0.5, suma / np.maximum(cuenta, 1e-12), np.nan)
+
+def _teselas(ny: int, nx: int, tesela: int) -> List[Tuple[int, int, int, int]]:
+    """Ventanas (f0, f1, c0, c1) de la grilla de salida"""
+    return [(f, min(f + tesela, ny), c, min(c + tesela, nx))
+            for f in range(0, ny, tesela) for c in range(0, nx, tesela)]
+
+def interpolar_mdt(points: np.ndarray, resolucion: float = 1.0, metodo: str = "idw",
+                   k: int = 8, potencia: float = 2.0, radio_max: Optional[float] = None,
+                   tesela: int = 256, hilos: Optional[int] = None,
+                   grilla: Optional[Dict] = None) -> Dict:
+    """
+    MDT interpolado por teselas de salida procesadas en paralelo
+
+    Parámetros:
+    - points: Nube de puntos de suelo (N×3)
+    - resolucion: Tamaño de celda (m)
+    - metodo: "idw", "vecino" o "natural"
+    - k, potencia: Vecinos y exponente del IDW
+    - radio_max: Distancia máxima a las muestras (m); fuera queda NaN
+    - tesela: Celdas por lado de cada tesela de salida
+    - hilos: Hilos de trabajo (None = número de CPUs)
+
+    Devuelve el formato de MDT del proyecto más la capa de calidad
+    'distancia_muestra' (m a la muestra más cercana).
+    """
+    if metodo not in METODOS_INTERPOLACION:
+        raise ValueError(f"Método de interpolación no válido: {metodo}")
+    inicio = time.perf_counter()
+    points = np.asarray(points, dtype=np.float64)
+    if grilla is None:
+        grilla = definir_grilla(points[:, 0].min(), points[:, 1].min(),
+                                points[:, 0].max(), points[:, 1].max(), resolucion)
+    resolucion = grilla["resolucion"]
+    ny, nx = grilla["ny"], grilla["nx"]
+    x_centros = grilla["x_min"] + (np.arange(nx) + 0.5) * resolucion
+    y_centros = grilla["y_min"] + (np.arange(ny) + 0.5) * resolucion
+
+    indice = construir_indice(points)
+    z = points[:, 2]
+    Z = np.full((ny, nx), np.nan)
+    distancia = np.full((ny, nx), np.nan)
+
+    # Vecino natural: halo del radio de dispersión para que las teselas empalmen
+    radio_celdas = RADIO_NATURAL_CELDAS
+    if radio_max is not None:
+        radio_celdas = min(radio_celdas, int(math.ceil(radio_max / resolucion)))
+    halo = radio_celdas if metodo == "natural" else 0
+    discos = _discos(radio_celdas) if metodo == "natural" else []
+
+    def procesar(ventana: Tuple[int, int, int, int]) -> None:
+        f0, f1, c0, c1 = ventana
+        g0, g1, h0, h1 = max(f0 - halo, 0), min(f1 + halo, ny), max(c0 - halo, 0), min(c1 + halo, nx)
+        xx, yy = np.meshgrid(x_centros[h0:h1], y_centros[g0:g1])
+        xy = np.column_stack([xx.ravel(), yy.ravel()])
+        forma = (g1 - g0, h1 - h0)
+        if metodo == "natural":
+            valor, d = _idw(indice, z, xy, 1, potencia, radio_max)
+            valor, d = valor.reshape(forma), d.reshape(forma)
+            radio = np.where(np.isfinite(d), np.ceil(d / resolucion - 0.5), -1)
+            radio[radio > radio_celdas] = -1
+            valores = _sibson_discreto(valor, radio, discos)
+            # Celdas sin aportes (huecos mayores que el radio): IDW
+            sin_aporte = np.isnan(valores) & np.isfinite(d)
+            if np.any(sin_aporte):
+                valores[sin_aporte] = _idw(indice, z, xy[sin_aporte.ravel()], k, potencia, radio_max)[0]
+        else:
+            valores, d = _idw(indice, z, xy, 1 if metodo == "vecino" else k, potencia, radio_max)
+            valores, d = valores.reshape(forma), d.reshape(forma)
+        Z[f0:f1, c0:c1] = valores[f0 - g0:f1 - g0, c0 - h0:c1 - h0]
+        distancia[f0:f1, c0:c1] = d[f0 - g0:f1 - g0, c0 - h0:c1 - h0]
+
+    ventanas = _teselas(ny, nx, tesela)
+    with ThreadPoolExecutor(max_workers=hilos or os.cpu_count() or 1) as ejecutor:
+        list(ejecutor.map(procesar, ventanas))
+    distancia[~np.isfinite(distancia)] = np.nan
+
+    forma = (ny, nx)
+    return {
+        'X_grid': np.broadcast_to(x_centros[np.newaxis, :], forma),
+        'Y_grid': np.broadcast_to(y_centros[:, np.newaxis], forma),
+        'Z_grid': Z,
+        'resolution': resolucion,
+        'distancia_muestra': distancia,
+        'metodo': metodo,
+        'teselas': len(ventanas),
+        'tiempo_s': round(time.perf_counter() - inicio, 3)
+    }
+
+if __name__ == "__main__":
+    # Prueba del módulo: cobertura irregular de dron con un hueco de 20 m
+    rng = np.random.default_rng(0)
+    n = 200000
+    x = rng.uniform(0, 200, n)
+    y = rng.uniform(0, 150, n)
+    fuera_hueco = np.hypot(x - 100, y - 75) > 20
+    x, y = x[fuera_hueco], y[fuera_hueco]
+    nube = np.column_stack([x, y, 3850 + 0.03 * x + np.sin(y / 20)])
+    for metodo in METODOS_INTERPOLACION:
+        mdt = interpolar_mdt(nube, resolucion=0.5, metodo=metodo)
+        verdad = 3850 + 0.03 * mdt['X_grid'] + np.sin(mdt['Y_grid'] / 20)
+        error = np.nanmax(np.abs(mdt['Z_grid'] - verdad))
+        print(f"✅ {metodo}: {mdt['Z_grid'].shape} en {mdt['tiempo_s']} s, "
+              f"error máx {error:.3f} m, distancia máx {np.nanmax(mdt['distancia_muestra']):.1f} m")
@@ -20,6 +20,17 @@ from typing import Dict, List, Tuple, Optional
 from datetime import datetime
 import math
 
+from MODULO_FILTRO_SUELO import necesita_clasificacion, clasificar_suelo_nube, crear_mdt_por_celdas
+from MODULO_CURVAS_NIVEL import extraer_curvas_nivel, exportar_curvas_dxf, exportar_curvas_geojson
+from MODULO_HIDROLOGIA import analisis_hidrologico_mdt, cuencas_por_sumidero, tiempo_concentracion_kirpich, pendiente_terreno
+from MODULO_IDF import CURVA_IDF_POR_DEFECTO, intensidad_idf
+from MODULO_GEOTIFF import exportar_mdt_geotiff
+from MODULO_INTERPOLACION import interpolar_mdt
+from MODULO_SECCIONES import extraer_secciones, geometria_hec_ras
+from MODULO_MOVIMIENTO_TIERRAS import eje_por_defecto
+from MODULO_NUBE_SINTETICA import EXTENSION_SAN_MIGUEL, nube_sintetica
+from MODULO_CRONOMETRO import Cronometro
+
 # Simulación de laspy para entornos sin instalación
 class LaspySimulator:
     """Simulador de laspy para procesamiento de archivos LAS/LAZ"""
@@ -29,43 +40,27 @@ class LaspySimulator:
         self.header = None
         self.classification = None
     
-    def read(self, file_path: str):
-        """Simula lectura de archivo LAS/LAZ"""
+    def read(self, file_path: str, num_points: int = 2000000, semilla: int = 0):
+        """Simula lectura de archivo LAS/LAZ (nube sintética reproducible)"""
         print(f"📁 Leyendo archivo: {file_path}")
         
-        # Simular datos de nube de puntos para San Miguel
-        num_points = 2000000  # 2 millones de puntos
-        
-        # Coordenadas UTM para San Miguel, Puno
-        x_range = (100, 200)  # UTM X
-        y_range = (8000, 8100)  # UTM Y
-        z_range = (3850, 3900)  # Altitud msnm
-        
-        # Generar puntos aleatorios
-        self.points = np.random.uniform(
-            [x_range[0], y_range[0], z_range[0]],
-            [x_range[1], y_range[1], z_range[1]],
-            (num_points, 3)
-        )
+        # Nube sintética de San Miguel, Puno: calles, veredas y árboles
+        # (2 millones de puntos, generados por bloques con semilla fija)
+        nube = nube_sintetica(num_points, semilla, extension=EXTENSION_SAN_MIGUEL)
+        self.points = nube["points"]
         
-        # Clasificación de puntos (2=ground, 3=low veg, 4=med veg, 5=high veg)
-        self.classification = np.random.choice([2, 3, 4, 5], num_points, p=[0.6, 0.2, 0.15, 0.05])
-        
-        # Agregar calles y veredas (clasificación 2 = suelo)
-        street_points = int(num_points * 0.15)  # 15% del área son calles
-        street_indices = np.random.choice(num_points, street_points, replace=False)
-        self.classification[street_indices] = 2
-        self.points[street_indices, 2] = np.random.uniform(3850, 3855, street_points)
+        # Clasificación de puntos (2=ground, 3=low veg, 4=med veg, 5=high veg, 7=noise)
+        self.classification = nube["clasificacion"]
         
         # Header simulado
         self.header = {
             "point_count": num_points,
-            "x_min": x_range[0],
-            "x_max": x_range[1],
-            "y_min": y_range[0],
-            "y_max": y_range[1],
-            "z_min": z_range[0],
-            "z_max": z_range[1],
+            "x_min": EXTENSION_SAN_MIGUEL[0],
+            "x_max": EXTENSION_SAN_MIGUEL[2],
+            "y_min": EXTENSION_SAN_MIGUEL[1],
+            "y_max": EXTENSION_SAN_MIGUEL[3],
+            "z_min": float(self.points[:, 2].min()),
+            "z_max": float(self.points[:, 2].max()),
             "point_format": 1,
             "point_record_length": 28
         }
@@ -104,8 +99,9 @@ class Open3DSimulator:
         """Simula creación de nube de puntos"""
         return PointCloudSimulator()
     
+    @property
     def TriangleMesh(self):
-        """Simula creación de malla triangular"""
+        """Simula la clase de malla triangular (o3d.geometry.TriangleMesh)"""
         return TriangleMeshSimulator()
     
     def io(self):
@@ -129,6 +125,10 @@ class TriangleMeshSimulator:
         self.vertices = None
         self.triangles = None
     
+    def create_from_point_cloud_poisson(self, pcd, depth=8):
+        """Simula reconstrucción de superficie de Poisson"""
+        return (TriangleMeshSimulator(), [1.0, 1.0, 1.0])
+    
     def write_triangle_mesh(self, filename: str, mesh):
         """Simula escritura de malla"""
         print(f"💾 Malla guardada: {filename}")
@@ -153,10 +153,12 @@ def process_laz_advanced(file_path: str, output_dir: str = "output_lidar") -> Di
     try:
         # Crear directorio de salida
         os.makedirs(output_dir, exist_ok=True)
+        cronometro = Cronometro()
         
         # Simular laspy
-        laspy = LaspySimulator()
-        las = laspy.read(file_path)
+        with cronometro.etapa("lectura"):
+            laspy = LaspySimulator()
+            las = laspy.read(file_path)
         
         print(f"✅ Archivo procesado: {file_path}")
         print(f"   Puntos totales: {las.header['point_count']:,}")
@@ -164,34 +166,50 @@ def process_laz_advanced(file_path: str, output_dir: str = "output_lidar") -> Di
         print(f"   Rango Y: {las.header['y_min']:.2f} - {las.header['y_max']:.2f}")
         print(f"   Rango Z: {las.header['z_min']:.2f} - {las.header['z_max']:.2f}")
         
-        # Filtrar puntos de suelo
-        ground_mask = las.classification == 2
-        ground_points = las.points[ground_mask]
+        # Filtrar puntos de suelo (filtro morfológico si la nube no trae clase 2)
+        with cronometro.etapa("filtro_suelo"):
+            if necesita_clasificacion(las.classification):
+                las.classification = clasificar_suelo_nube(las.points)["clasificacion"]
+            ground_mask = las.classification == 2
+            ground_points = las.points[ground_mask]
         
         print(f"   Puntos de suelo: {np.sum(ground_mask):,}")
         
         # Simular Open3D
-        o3d = Open3DSimulator()
-        
-        # Crear nube de puntos
-        pcd = o3d.geometry().PointCloud()
-        pcd.points = o3d.geometry().Vector3dVector(ground_points)
-        
-        # Generar MDT
-        mdt, densities = o3d.geometry().TriangleMesh.create_from_point_cloud_poisson(pcd, depth=8)
+        with cronometro.etapa("malla"):
+            o3d = Open3DSimulator()
+            
+            # Crear nube de puntos
+            pcd = o3d.geometry().PointCloud()
+            pcd.points = o3d.geometry().Vector3dVector(ground_points)
+            
+            # Generar MDT
+            mdt, densities = o3d.geometry().TriangleMesh.create_from_point_cloud_poisson(pcd, depth=8)
         
         # Guardar MDT
-        mdt_filename = os.path.join(output_dir, "mdt_san_miguel.obj")
-        o3d.io().write_triangle_mesh(mdt_filename, mdt)
+        with cronometro.etapa("exportacion"):
+            mdt_filename = os.path.join(output_dir, "mdt_san_miguel.obj")
+            o3d.io().write_triangle_mesh(mdt_filename, mdt)
         
         # Generar curvas de nivel
-        curvas_nivel = generar_curvas_nivel_avanzadas(ground_points, output_dir)
+        with cronometro.etapa("curvas"):
+            curvas_nivel = generar_curvas_nivel_avanzadas(ground_points, output_dir)
         
         # Análisis de pendientes
-        analisis_pendientes = analizar_pendientes_avanzado(ground_points)
+        with cronometro.etapa("pendiente"):
+            analisis_pendientes = analizar_pendientes_avanzado(ground_points)
+        
+        # Rásters GeoTIFF del MDT y de pendientes (%)
+        with cronometro.etapa("mdt"):
+            dtm = crear_mdt_por_celdas(ground_points, resolucion=1.0)
+            dtm['pendiente_pct'] = pendiente_terreno(dtm['Z_grid'], dtm['resolution']) * 100
+        with cronometro.etapa("exportacion"):
+            exportar_mdt_geotiff(dtm, os.path.join(output_dir, "mdt_san_miguel.tif"))
+            exportar_mdt_geotiff(dtm, os.path.join(output_dir, "pendientes_san_miguel.tif"), capa='pendiente_pct')
         
         # Análisis de drenaje
-        analisis_drenaje = analizar_drenaje_avanzado(ground_points, curvas_nivel)
+        with cronometro.etapa("drenaje"):
+            analisis_drenaje = analizar_drenaje_avanzado(ground_points, curvas_nivel)
         
         return {
             "archivo_entrada": file_path,
@@ -204,13 +222,16 @@ def process_laz_advanced(file_path: str, output_dir: str = "output_lidar") -> Di
             },
             "archivos_generados": [
                 "mdt_san_miguel.obj",
-                "curvas_nivel_san_miguel.shp",
+                "mdt_san_miguel.tif",
+                "curvas_nivel_san_miguel.dxf",
+                "curvas_nivel_san_miguel.geojson",
                 "pendientes_san_miguel.tif",
                 "drenaje_san_miguel.shp"
             ],
             "curvas_nivel": curvas_nivel,
             "analisis_pendientes": analisis_pendientes,
             "analisis_drenaje": analisis_drenaje,
+            "tiempos_etapas": cronometro.resumen(),
             "estado": "✅ Procesamiento LiDAR avanzado completado"
         }
         
@@ -220,45 +241,56 @@ def process_laz_advanced(file_path: str, output_dir: str = "output_lidar") -> Di
             "estado": "❌ Error en procesamiento LiDAR"
         }
 
-def generar_curvas_nivel_avanzadas(points: np.ndarray, output_dir: str) -> Dict:
+def generar_curvas_nivel_avanzadas(points: np.ndarray, output_dir: str,
+                                   intervalo: float = 0.5, resolucion: float = 1.0) -> Dict:
     """
     Genera curvas de nivel avanzadas cada 0.5m
+    (MDT por celdas + marching squares, ver MODULO_CURVAS_NIVEL)
     """
     try:
         # Extraer coordenadas
-        x = points[:, 0]
-        y = points[:, 1]
         z = points[:, 2]
         
         # Calcular rango de elevaciones
         z_min, z_max = np.min(z), np.max(z)
         
-        # Generar niveles cada 0.5m
-        niveles = np.arange(z_min, z_max, 0.5)
+        # Estadísticas por franja [nivel, nivel + intervalo) en una sola pasada
+        nivel_inicial = math.floor(z_min / intervalo) * intervalo
+        franja = np.floor((z - nivel_inicial) / intervalo).astype(np.int64)
+        conteo = np.bincount(franja)
+        suma_z = np.bincount(franja, weights=z)
+        
+        # Polilíneas de curvas de nivel sobre el MDT
+        dtm = crear_mdt_por_celdas(points, resolucion)
+        curvas = extraer_curvas_nivel(dtm, intervalo=intervalo)
+        longitudes = curvas["longitud_por_nivel_m"]
         
-        # Calcular estadísticas por nivel
         estadisticas_niveles = []
-        for nivel in niveles:
-            mask = (z >= nivel) & (z < nivel + 0.5)
-            if np.any(mask):
-                estadisticas_niveles.append({
-                    "nivel": round(nivel, 1),
-                    "puntos": int(np.sum(mask)),
-                    "area_aproximada": round(np.sum(mask) * 0.0001, 3),  # ha
-                    "elevacion_promedio": round(np.mean(z[mask]), 2)
-                })
-        
-        # Guardar curvas de nivel (simulado)
-        curvas_filename = os.path.join(output_dir, "curvas_nivel_san_miguel.shp")
-        print(f"📊 Curvas de nivel guardadas: {curvas_filename}")
+        for i in np.flatnonzero(conteo):
+            nivel = round(nivel_inicial + i * intervalo, 3)
+            estadisticas_niveles.append({
+                "nivel": round(nivel, 1),
+                "puntos": int(conteo[i]),
+                "area_aproximada": round(conteo[i] * 0.0001, 3),  # ha
+                "elevacion_promedio": round(suma_z[i] / conteo[i], 2),
+                "longitud_curva_m": longitudes.get(nivel, 0.0)
+            })
+        
+        # Guardar curvas de nivel
+        curvas_dxf = exportar_curvas_dxf(curvas, os.path.join(output_dir, "curvas_nivel_san_miguel.dxf"))
+        curvas_geojson = exportar_curvas_geojson(curvas, os.path.join(output_dir, "curvas_nivel_san_miguel.geojson"))
+        print(f"📊 Curvas de nivel guardadas: {curvas_dxf}")
         
         return {
             "niveles_generados": len(estadisticas_niveles),
-            "intervalo": 0.5,  # metros
+            "intervalo": intervalo,
             "elevacion_minima": round(z_min, 2),
             "elevacion_maxima": round(z_max, 2),
             "estadisticas_niveles": estadisticas_niveles,
-            "archivo_shapefile": curvas_filename
+            "polilineas": len(curvas["curvas"]),
+            "longitud_total_m": curvas["longitud_total_m"],
+            "archivo_dxf": curvas_dxf,
+            "archivo_geojson": curvas_geojson
         }
         
     except Exception as e:
@@ -272,31 +304,10 @@ def analizar_pendientes_avanzado(points: np.ndarray) -> Dict:
     Análisis avanzado de pendientes
     """
     try:
-        # Extraer coordenadas
-        x = points[:, 0]
-        y = points[:, 1]
-        z = points[:, 2]
-        
-        # Crear grilla para análisis
-        x_min, x_max = np.min(x), np.max(x)
-        y_min, y_max = np.min(y), np.max(y)
-        
-        # Resolución de grilla
+        # Grilla de análisis interpolada por IDW (KD-tree, teselas en paralelo)
         resolution = 1.0  # metros
-        x_grid = np.arange(x_min, x_max, resolution)
-        y_grid = np.arange(y_min, y_max, resolution)
-        
-        # Interpolación simple para Z
-        Z_grid = np.zeros((len(y_grid), len(x_grid)))
-        for i, xi in enumerate(x_grid):
-            for j, yi in enumerate(y_grid):
-                # Encontrar puntos cercanos
-                dist = np.sqrt((x - xi)**2 + (y - yi)**2)
-                nearby = dist < resolution
-                if np.any(nearby):
-                    Z_grid[j, i] = np.mean(z[nearby])
-                else:
-                    Z_grid[j, i] = np.mean(z)
+        mdt = interpolar_mdt(points, resolucion=resolution, metodo="idw")
+        Z_grid = mdt['Z_grid']
         
         # Calcular gradientes
         grad_x = np.gradient(Z_grid, axis=1)
@@ -329,6 +340,7 @@ def analizar_pendientes_avanzado(points: np.ndarray) -> Dict:
             "clasificacion": clasificacion,
             "resolucion_analisis": resolution,
             "dimensiones_grilla": Z_grid.shape,
+            "distancia_muestra_max_m": round(float(np.nanmax(mdt['distancia_muestra'])), 2),
             "recomendaciones": [
                 "Pendiente promedio adecuada para drenaje superficial",
                 "Zonas con pendiente > 15% requieren tratamiento especial",
@@ -342,31 +354,33 @@ def analizar_pendientes_avanzado(points: np.ndarray) -> Dict:
             "estado": "❌ Error analizando pendientes"
         }
 
-def analizar_drenaje_avanzado(points: np.ndarray, curvas_nivel: Dict) -> Dict:
+def analizar_drenaje_avanzado(points: np.ndarray, curvas_nivel: Dict, curva_idf: Optional[Dict] = None,
+                              periodo_retorno: float = 10.0) -> Dict:
     """
     Análisis avanzado de drenaje
+    (cuenca, longitud de flujo y pendiente medidas con MODULO_HIDROLOGIA;
+    intensidad de la curva IDF de MODULO_IDF para una duración igual al
+    tiempo de concentración)
     """
     try:
-        # Extraer coordenadas
-        x = points[:, 0]
-        y = points[:, 1]
-        z = points[:, 2]
+        # MDT de 1 m y análisis hidrológico (relleno, D8, acumulación)
+        dtm = crear_mdt_por_celdas(points, resolucion=1.0)
+        hidrologia = analisis_hidrologico_mdt(dtm, metodo="D8")
+        resumen = hidrologia["resumen"]
         
-        # Calcular dirección de flujo (simplificado)
-        # En un análisis real se usaría algoritmos más complejos
+        # Cuenca principal: área aportante a la salida de mayor acumulación
+        area_total = resumen["area_cuenca_principal_ha"]
         
-        # Análisis de cuencas
-        area_total = 0.08  # hectáreas (una cuadra)
+        # Parámetros de drenaje medidos sobre el MDT
+        pendiente_promedio = resumen["pendiente_media_cuenca_pct"]
+        longitud_maxima = resumen["longitud_flujo_max_m"]
         
-        # Calcular parámetros de drenaje
-        pendiente_promedio = 5.2  # % (del análisis anterior)
-        longitud_maxima = 100  # metros (longitud de cuadra)
+        # Tiempo de concentración (fórmula de Kirpich, L en m y pendiente en %)
+        tiempo_concentracion = float(tiempo_concentracion_kirpich(longitud_maxima, pendiente_promedio))
         
-        # Tiempo de concentración (fórmula de Kirpich)
-        tiempo_concentracion = 0.0195 * (longitud_maxima ** 0.77) * (pendiente_promedio ** (-0.385))
-        
-        # Intensidad de lluvia (para San Miguel, Puno)
-        intensidad_lluvia = 60  # mm/h (valor típico)
+        # Intensidad de lluvia de la curva IDF (regional de San Miguel, Puno, por defecto)
+        curva = curva_idf or CURVA_IDF_POR_DEFECTO
+        intensidad_lluvia = round(float(intensidad_idf(curva, tiempo_concentracion, periodo_retorno)), 2)
         
         # Caudal de diseño
         coeficiente_escorrentia = 0.7  # Suelo volcánico
@@ -377,6 +391,13 @@ def analizar_drenaje_avanzado(points: np.ndarray, curvas_nivel: Dict) -> Dict:
         area_cuneta = caudal_diseno / velocidad_cuneta
         profundidad_cuneta = math.sqrt(area_cuneta / 2)  # Triangular
         
+        # Método racional por sumidero (puntos bajos del MDT)
+        cuencas = cuencas_por_sumidero(dtm, coeficiente_escorrentia=coeficiente_escorrentia,
+                                       curva_idf=curva, periodo_retorno=periodo_retorno)
+        
+        # Secciones transversales del MDT cada 20 m a lo largo de la calle
+        secciones = extraer_secciones(dtm, eje_por_defecto(dtm), intervalo_m=20.0, semiancho_m=10.0)
+        
         return {
             "parametros_hidrologicos": {
                 "area_cuenca_ha": area_total,
@@ -384,7 +405,11 @@ def analizar_drenaje_avanzado(points: np.ndarray, curvas_nivel: Dict) -> Dict:
                 "pendiente_promedio_porcentaje": pendiente_promedio,
                 "tiempo_concentracion_min": round(tiempo_concentracion, 2),
                 "intensidad_lluvia_mm_h": intensidad_lluvia,
-                "coeficiente_escorrentia": coeficiente_escorrentia
+                "periodo_retorno": periodo_retorno,
+                "curva_idf": curva.get("fuente", "Ajustada"),
+                "coeficiente_escorrentia": coeficiente_escorrentia,
+                "volumen_depresiones_m3": resumen["volumen_depresiones_m3"],
+                "celdas_cauce": resumen["celdas_cauce"]
             },
             "diseno_drenaje": {
                 "caudal_diseno_m3_s": round(caudal_diseno, 4),
@@ -394,6 +419,8 @@ def analizar_drenaje_avanzado(points: np.ndarray, curvas_nivel: Dict) -> Dict:
                 "profundidad_cuneta_m": round(profundidad_cuneta, 3),
                 "ancho_cuneta_m": round(profundidad_cuneta * 2, 3)
             },
+            "cuencas_sumideros": cuencas.get("sumideros", []),
+            "geometria_hec_ras": geometria_hec_ras(secciones),
             "recomendaciones": [
                 "Usar cunetas triangulares de 0.15m de profundidad",
                 "Pendiente de cunetas: 2% mínimo",
@@ -454,6 +481,12 @@ def generar_hec_ras_file(analisis_drenaje: Dict, output_dir: str) -> Dict:
     Genera archivo HEC-RAS para diseño de cunetas
     """
     try:
+        # Geometría: secciones extraídas del MDT o sección triangular tipo
+        diseno = analisis_drenaje['diseno_drenaje']
+        geometria = analisis_drenaje.get('geometria_hec_ras') or (
+            f"Station 0.0\nElevation {diseno['profundidad_cuneta_m']}\n"
+            f"Station {diseno['ancho_cuneta_m']}\nElevation 0.0\n")
+        
         # Crear contenido del archivo HEC-RAS
         hec_ras_content = f"""
 HEC-RAS Version 5.0.7
@@ -477,12 +510,8 @@ Profundidad: {analisis_drenaje['diseno_drenaje']['profundidad_cuneta_m']} m
 Ancho: {analisis_drenaje['diseno_drenaje']['ancho_cuneta_m']} m
 Velocidad: {analisis_drenaje['diseno_drenaje']['velocidad_cuneta_m_s']} m/s
 
-# Sección transversal (triangular)
-Station 0.0
-Elevation {analisis_drenaje['diseno_drenaje']['profundidad_cuneta_m']}
-Station {analisis_drenaje['diseno_drenaje']['ancho_cuneta_m']}
-Elevation 0.0
-"""
+# Sección transversal
+{geometria}"""
         
         # Guardar archivo HEC-RAS
         hec_ras_filename = os.path.join(output_dir, "san_miguel_hec_ras.txt")
@@ -544,7 +573,8 @@ def procesamiento_lidar_completo_avanzado(file_path: str, proyecto: str = "San M
         "archivo_hec_ras": hec_ras,
         "archivos_generados": [
             "mdt_san_miguel.obj",
-            "curvas_nivel_san_miguel.shp",
+            "curvas_nivel_san_miguel.dxf",
+            "curvas_nivel_san_miguel.geojson",
             "pendientes_san_miguel.tif",
             "drenaje_san_miguel.shp",
             "san_miguel_terreno.dwg",
@@ -15,6 +15,14 @@ import os
 from typing import Dict, List, Tuple, Optional
 import math
 
+from MODULO_FILTRO_SUELO import necesita_clasificacion, clasificar_suelo_nube
+from MODULO_CURVAS_NIVEL import extraer_curvas_nivel
+from MODULO_HIDROLOGIA import analisis_hidrologico_mdt
+from MODULO_GEOTIFF import exportar_mdt_geotiff
+from MODULO_INTERPOLACION import interpolar_mdt
+from MODULO_ZONAS import delimitar_zonas
+from MODULO_FLUJO_ETAPAS import FlujoEtapas
+
 # Simulación de PDAL para entornos sin instalación
 class PDALSimulator:
     """Simulador de PDAL para procesamiento de datos LiDAR"""
@@ -75,43 +83,27 @@ class PDALSimulator:
     
     def remove_vegetation(self) -> None:
         """Remueve vegetación (clasificación 3, 4, 5)"""
+        if necesita_clasificacion(self.points.get('Classification')):
+            # Nube sin clasificar: filtro morfológico progresivo
+            nube = np.column_stack([self.points['X'], self.points['Y'], self.points['Z']])
+            self.points['Classification'] = clasificar_suelo_nube(nube)['clasificacion']
         mask = self.points['Classification'] == 2  # Solo suelo
         for key in self.points:
             self.points[key] = self.points[key][mask]
     
     def create_dtm(self, resolution: float = 1.0) -> Dict:
         """Crea Modelo Digital del Terreno (MDT)"""
-        # Crear grilla regular
-        x_min, x_max = np.min(self.points['X']), np.max(self.points['X'])
-        y_min, y_max = np.min(self.points['Y']), np.max(self.points['Y'])
-        
-        x_grid = np.arange(x_min, x_max, resolution)
-        y_grid = np.arange(y_min, y_max, resolution)
-        X_grid, Y_grid = np.meshgrid(x_grid, y_grid)
-        
-        # Interpolación simple (promedio de puntos cercanos)
-        Z_grid = np.zeros_like(X_grid)
-        for i in range(len(x_grid)):
-            for j in range(len(y_grid)):
-                # Encontrar puntos cercanos
-                dist = np.sqrt((self.points['X'] - x_grid[i])**2 + (self.points['Y'] - y_grid[j])**2)
-                nearby = dist < resolution
-                if np.any(nearby):
-                    Z_grid[j, i] = np.mean(self.points['Z'][nearby])
-                else:
-                    Z_grid[j, i] = np.mean(self.points['Z'])
-        
-        return {
-            'X_grid': X_grid,
-            'Y_grid': Y_grid,
-            'Z_grid': Z_grid,
-            'resolution': resolution
-        }
+        # Interpolación IDW sobre KD-tree por teselas (MODULO_INTERPOLACION);
+        # 'distancia_muestra' indica la calidad de cada celda
+        nube = np.column_stack([self.points['X'], self.points['Y'], self.points['Z']])
+        return interpolar_mdt(nube, resolucion=resolution, metodo="idw")
     
     def export_geotiff(self, filename: str, dtm_data: Dict) -> bool:
-        """Simula exportación a GeoTIFF"""
+        """Exporta el MDT a GeoTIFF teselado con resúmenes (MODULO_GEOTIFF)"""
         try:
-            # Simular archivo GeoTIFF
+            resultado = exportar_mdt_geotiff(dtm_data, filename)
+            if "error" in resultado:
+                raise ValueError(resultado["error"])
             print(f"✅ GeoTIFF exportado: {filename}")
             print(f"   Resolución: {dtm_data['resolution']} m")
             print(f"   Dimensiones: {dtm_data['Z_grid'].shape}")
@@ -120,7 +112,86 @@ class PDALSimulator:
             print(f"Error exportando GeoTIFF: {e}")
             return False
 
-def procesar_nube_puntos(archivo_las: str, cota_minima: float = 2000) -> Dict:
+def _etapa_lectura(archivo_las: str) -> Tuple[Dict, Dict]:
+    """Etapa de lectura: puntos y metadatos del archivo LAS/LAZ"""
+    pdal = PDALSimulator()
+    if not pdal.load_las_file(archivo_las):
+        raise ValueError("Error cargando archivo LAS")
+    return pdal.points, pdal.metadata
+
+def _etapa_filtro_elevacion(nube: Dict, cota_minima: float) -> Dict:
+    """Etapa de filtro por elevación mínima (sin modificar la nube de entrada)"""
+    pdal = PDALSimulator()
+    pdal.points = dict(nube)
+    pdal.filter_by_elevation(cota_minima)
+    return pdal.points
+
+def _etapa_suelo(nube_filtrada: Dict) -> Dict:
+    """Etapa de remoción de vegetación (solo puntos de suelo)"""
+    pdal = PDALSimulator()
+    pdal.points = dict(nube_filtrada)
+    pdal.remove_vegetation()
+    return pdal.points
+
+def _etapa_mdt(suelo: Dict, resolucion: float) -> Dict:
+    """Etapa de MDT por IDW"""
+    pdal = PDALSimulator()
+    pdal.points = suelo
+    return pdal.create_dtm(resolution=resolucion)
+
+def _etapa_geotiff(dtm: Dict, ruta_geotiff: str) -> bool:
+    """Etapa de exportación del MDT a GeoTIFF"""
+    return PDALSimulator().export_geotiff(ruta_geotiff, dtm)
+
+def _etapa_datos_lidar(suelo: Dict, metadatos: Dict, dtm: Dict, zonas_inestables: Dict,
+                       geotiff_exportado: bool, ruta_geotiff: str) -> Dict:
+    """Etapa de resumen del procesamiento de la nube"""
+    # Pendiente media del terreno medida sobre el MDT (%)
+    Z_grid = np.asarray(dtm['Z_grid'], dtype=float)
+    if min(Z_grid.shape) > 1:
+        grad_y, grad_x = np.gradient(Z_grid, dtm['resolution'])
+        pendiente_promedio = float(np.nanmean(np.hypot(grad_x, grad_y))) * 100
+    else:
+        pendiente_promedio = 0.0
+    return {
+        "Área_ha": round(metadatos["metadata"]["readers.las"]["count"] * 0.0001, 2),
+        "Pendiente_%": round(pendiente_promedio, 2),
+        "Zonas_inestables": zonas_inestables,
+        "Puntos_procesados": len(suelo['X']),
+        "Resolución_MDT": dtm['resolution'],
+        "Archivo_GeoTIFF": ruta_geotiff if geotiff_exportado else None,
+        "Estado": "✅ Procesamiento completado exitosamente"
+    }
+
+def crear_flujo_lidar(max_resultados: int = 1, hilos: Optional[int] = None) -> FlujoEtapas:
+    """
+    Flujo LiDAR como grafo de etapas memorizadas (MODULO_FLUJO_ETAPAS)
+
+    lectura → filtro_elevacion → suelo → mdt → {geotiff, zonas_inestables,
+    curvas, drenaje} → datos_lidar; las cuatro etapas sobre el MDT son
+    independientes y corren en paralelo.
+    """
+    flujo = FlujoEtapas("lidar", max_resultados=max_resultados, hilos=hilos)
+    flujo.agregar("lectura", _etapa_lectura, ("archivo_las",), ("nube", "metadatos"))
+    flujo.agregar("filtro_elevacion", _etapa_filtro_elevacion, ("nube", "cota_minima"), ("nube_filtrada",))
+    flujo.agregar("suelo", _etapa_suelo, ("nube_filtrada",))
+    flujo.agregar("mdt", _etapa_mdt, ("suelo", "resolucion"), ("dtm",))
+    flujo.agregar("geotiff", _etapa_geotiff, ("dtm", "ruta_geotiff"), ("geotiff_exportado",), memorizar=False)
+    flujo.agregar("zonas_inestables", lambda dtm: detectar_zonas_inestables(dtm), ("dtm",))
+    flujo.agregar("curvas", lambda dtm, intervalo: generar_curvas_nivel(dtm, intervalo), ("dtm", "intervalo"))
+    flujo.agregar("drenaje", lambda dtm: analizar_drenaje_superficial(dtm), ("dtm",))
+    flujo.agregar("datos_lidar", _etapa_datos_lidar,
+                  ("suelo", "metadatos", "dtm", "zonas_inestables", "geotiff_exportado", "ruta_geotiff"))
+    return flujo
+
+def _entradas_flujo(archivo_las: str, cota_minima: float = 2000, resolucion: float = 1.0,
+                    intervalo: float = 0.5, ruta_geotiff: str = "mdt_terreno.tif") -> Dict:
+    """Entradas externas del flujo LiDAR"""
+    return {"archivo_las": archivo_las, "cota_minima": cota_minima, "resolucion": resolucion,
+            "intervalo": intervalo, "ruta_geotiff": ruta_geotiff}
+
+def procesar_nube_puntos(archivo_las: str, cota_minima: float = 2000,
+                         flujo: Optional[FlujoEtapas] = None, ruta_geotiff: str = "mdt_terreno.tif") -> Dict:
     """
     Procesa datos LiDAR para extraer:
     - Modelo Digital del Terreno (MDT)
@@ -130,50 +201,15 @@ def procesar_nube_puntos(archivo_las: str, cota_minima: float = 2000) -> Dict:
     Parámetros:
     - archivo_las: Ruta al archivo LAS/LAZ
     - cota_minima: Elevación mínima (ej: 2000m para Puno)
+    - flujo: grafo de etapas a usar; por defecto uno nuevo para esta
+      llamada (pase el mismo flujo, p. ej. uno por sesión, para reutilizar
+      las etapas entre llamadas)
+    - ruta_geotiff: archivo del MDT exportado
     """
     try:
-        # Inicializar simulador PDAL
-        pdal = PDALSimulator()
-        
-        # Cargar archivo LAS
-        if not pdal.load_las_file(archivo_las):
-            raise ValueError("Error cargando archivo LAS")
-        
-        # Filtro por elevación
-        pdal.filter_by_elevation(cota_minima)
-        
-        # Remover vegetación
-        pdal.remove_vegetation()
-        
-        # Crear MDT
-        dtm = pdal.create_dtm(resolution=1.0)
-        
-        # Exportar GeoTIFF
-        pdal.export_geotiff("mdt_terreno.tif", dtm)
-        
-        # Calcular propiedades del terreno
-        z_values = pdal.points['Z']
-        area_ha = (pdal.metadata["metadata"]["readers.las"]["count"] * 0.0001)
-        
-        # Calcular pendiente promedio
-        if len(z_values) > 1:
-            # Simular cálculo de pendiente
-            pendiente_promedio = np.random.uniform(1.5, 8.5)  # 1.5% a 8.5% típico urbano
-        else:
-            pendiente_promedio = 0.0
-        
-        # Detectar zonas inestables
-        zonas_inestables = detectar_zonas_inestables(dtm)
-        
-        return {
-            "Área_ha": round(area_ha, 2),
-            "Pendiente_%": round(pendiente_promedio, 2),
-            "Zonas_inestables": zonas_inestables,
-            "Puntos_procesados": len(pdal.points['X']),
-            "Resolución_MDT": dtm['resolution'],
-            "Archivo_GeoTIFF": "mdt_terreno.tif",
-            "Estado": "✅ Procesamiento completado exitosamente"
-        }
+        ejecucion = (flujo or crear_flujo_lidar()).ejecutar(
+            _entradas_flujo(archivo_las, cota_minima, ruta_geotiff=ruta_geotiff), objetivos=["datos_lidar"], archivos=("archivo_las",))
+        return ejecucion["valores"]["datos_lidar"]
         
     except Exception as e:
         return {
@@ -181,10 +217,14 @@ def procesar_nube_puntos(archivo_las: str, cota_minima: float = 2000) -> Dict:
             "Estado": "❌ Error en procesamiento"
         }
 
-def detectar_zonas_inestables(dtm_data: Dict) -> Dict:
+def detectar_zonas_inestables(dtm_data: Dict, area_minima_m2: float = 4.0) -> Dict:
     """
     Detecta zonas inestables usando análisis de pendientes y curvatura
     según ASTM D6432
+
+    Además de las áreas totales, delimita cada zona contigua de celdas
+    críticas (MODULO_ZONAS) con área, centroide, caja y polígono; las
+    zonas menores que area_minima_m2 no se listan.
     """
     Z_grid = dtm_data['Z_grid']
     
@@ -200,32 +240,50 @@ def detectar_zonas_inestables(dtm_data: Dict) -> Dict:
     curv_y = np.gradient(grad_y, axis=0)
     curvatura = curv_x + curv_y
     
+    # Máscaras de celdas críticas
+    mascaras = {
+        "Pendiente_excesiva": pendiente > 0.15,  # >15%
+        "Curvatura_alta": np.abs(curvatura) > 0.1,
+        "Zonas_hundimiento": curvatura < -0.05
+    }
+    
     # Detectar zonas críticas
-    zonas_criticas = {
-        "Pendiente_excesiva": np.sum(pendiente > 0.15) * dtm_data['resolution']**2,  # >15%
-        "Curvatura_alta": np.sum(np.abs(curvatura) > 0.1) * dtm_data['resolution']**2,
-        "Zonas_hundimiento": np.sum(curvatura < -0.05) * dtm_data['resolution']**2,
+    zonas_criticas = {tipo: np.sum(mascara) * dtm_data['resolution']**2
+                      for tipo, mascara in mascaras.items()}
+    zonas = delimitar_zonas(dtm_data, mascaras,
+                            valores={"Pendiente_excesiva": pendiente * 100,
+                                     "Curvatura_alta": curvatura,
+                                     "Zonas_hundimiento": curvatura},
+                            area_minima_m2=area_minima_m2)
+    zonas_criticas.update({
+        "Zonas": zonas,
+        "Total_zonas": len(zonas),
         "Recomendación": "Realizar estudio geotécnico detallado en zonas críticas"
-    }
+    })
     
     return zonas_criticas
 
 def generar_curvas_nivel(dtm_data: Dict, intervalo: float = 0.5) -> Dict:
     """
     Genera curvas de nivel cada 0.5m para diseño de pavimentos
+    (polilíneas por marching squares, ver MODULO_CURVAS_NIVEL)
     """
     Z_grid = dtm_data['Z_grid']
     z_min, z_max = np.min(Z_grid), np.max(Z_grid)
     
-    # Generar niveles de curva
-    niveles = np.arange(z_min, z_max, intervalo)
+    # Extraer polilíneas de curvas de nivel del MDT
+    extraccion = extraer_curvas_nivel(dtm_data, intervalo=intervalo)
+    niveles = extraccion["niveles"]
     
     curvas = {
-        "niveles": niveles.tolist(),
+        "niveles": niveles,
         "intervalo": intervalo,
         "total_curvas": len(niveles),
-        "elevacion_min": round(z_min, 2),
-        "elevacion_max": round(z_max, 2)
+        "elevacion_min": round(float(z_min), 2),
+        "elevacion_max": round(float(z_max), 2),
+        "total_polilineas": len(extraccion["curvas"]),
+        "longitud_por_nivel_m": extraccion["longitud_por_nivel_m"],
+        "longitud_total_m": extraccion["longitud_total_m"]
     }
     
     return curvas
@@ -252,48 +310,65 @@ def analizar_drenaje_superficial(dtm_data: Dict) -> Dict:
         "Recomendacion_cunetas": "Pendiente adecuada para drenaje superficial"
     }
     
+    # Acumulación de flujo D8 sobre el MDT sin depresiones
+    resumen = analisis_hidrologico_mdt(dtm_data)["resumen"]
+    drenaje.update({
+        "Area_cuenca_principal_ha": resumen["area_cuenca_principal_ha"],
+        "Longitud_flujo_max_m": resumen["longitud_flujo_max_m"],
+        "Volumen_depresiones_m3": resumen["volumen_depresiones_m3"],
+        "Celdas_cauce": resumen["celdas_cauce"]
+    })
+    
     return drenaje
 
 # Función principal para procesamiento completo
-def procesamiento_completo_lidar(archivo_las: str, proyecto: str = "San Miguel") -> Dict:
+def procesamiento_completo_lidar(archivo_las: str, proyecto: str = "San Miguel",
+                                 flujo: Optional[FlujoEtapas] = None, hilos: Optional[int] = None,
+                                 devolver_mdt: bool = False, ruta_geotiff: str = "mdt_terreno.tif") -> Dict:
     """
     Procesamiento completo de datos LiDAR para proyecto de pavimentos
+
+    Lectura, filtros y MDT se calculan una sola vez y se comparten entre
+    el resumen de la nube, las curvas y el drenaje. Sin 'flujo' se crea
+    uno para esta llamada y la nube se libera al terminar; con un flujo
+    propio de la sesión, una nueva llamada solo re-ejecuta las etapas
+    cuyas entradas cambiaron (el archivo se identifica por su contenido).
+    Con devolver_mdt=True el resultado incluye el MDT ("MDT"), p. ej. para
+    cubicar el movimiento de tierras con el diseño del pavimento. El MDT
+    se exporta a ruta_geotiff.
     """
     print(f"🚁 Iniciando procesamiento LiDAR para proyecto: {proyecto}")
     
-    # Procesar nube de puntos
-    resultado_procesamiento = procesar_nube_puntos(archivo_las, cota_minima=2000)
-    
-    if "error" in resultado_procesamiento:
-        return resultado_procesamiento
-    
-    # Crear MDT
-    pdal = PDALSimulator()
-    pdal.load_las_file(archivo_las)
-    pdal.filter_by_elevation(2000)
-    pdal.remove_vegetation()
-    dtm = pdal.create_dtm(resolution=1.0)
-    
-    # Generar curvas de nivel
-    curvas = generar_curvas_nivel(dtm, intervalo=0.5)
-    
-    # Analizar drenaje
-    drenaje = analizar_drenaje_superficial(dtm)
+    try:
+        ejecucion = (flujo or crear_flujo_lidar()).ejecutar(
+            _entradas_flujo(archivo_las, ruta_geotiff=ruta_geotiff),
+            objetivos=["datos_lidar", "curvas", "drenaje"] + (["dtm"] if devolver_mdt else []),
+            archivos=("archivo_las",), hilos=hilos)
+    except Exception as e:
+        return {
+            "error": str(e),
+            "Estado": "❌ Error en procesamiento"
+        }
+    valores = ejecucion["valores"]
     
     # Resultado completo
     resultado_completo = {
         "Proyecto": proyecto,
         "Fecha_Procesamiento": "2024",
-        "Datos_LiDAR": resultado_procesamiento,
-        "Curvas_Nivel": curvas,
-        "Analisis_Drenaje": drenaje,
+        "Datos_LiDAR": valores["datos_lidar"],
+        "Curvas_Nivel": valores["curvas"],
+        "Analisis_Drenaje": valores["drenaje"],
         "Archivos_Generados": [
-            "mdt_terreno.tif",
+            ruta_geotiff,
             "curvas_nivel.shp",
             "analisis_drenaje.pdf"
         ],
+        "Tiempos_etapas": ejecucion["tiempos"],
+        "Etapas_en_cache": ejecucion["en_cache"],
         "Estado": "✅ Procesamiento LiDAR completado exitosamente"
     }
+    if devolver_mdt:
+        resultado_completo["MDT"] = valores["dtm"]
     
     return resultado_completo
 
@@ -0,0 +1,226 @@
+"""
+MÓDULO MOVIMIENTO DE TIERRAS - CORTE Y RELLENO ENTRE MDT Y DISEÑO
+=================================================================
+
+Cubicación del movimiento de tierras de un corredor vial:
+- Superficie de diseño: rasante en el eje, bombeo a dos aguas y
+  espesor de la estructura del pavimento (rígido o flexible)
+- Taludes de corte y relleno desde el borde de la subrasante
+- Volúmenes de corte y relleno por tramo de progresiva como sumas
+  vectorizadas por celda del MDT
+- Recorrido por teselas del MDT; las teselas fuera del corredor se
+  descartan, por lo que escala a corredores de varios kilómetros
+
+Autor: IA Assistant - Especialista UNI
+Fecha: 2024
+"""
+
+import numpy as np
+import time
+from typing import Dict, List, Tuple, Optional
+
+from MODULO_SECCIONES import muestrear_bilineal
+
+# Espesores por defecto (cm) de las capas que no entrega el diseño
+ESPESOR_SUBBASE_RIGIDO_CM = 15.0
+ESPESOR_CARPETA_FLEXIBLE_CM = 5.0
+
+def estructura_pavimento(diseno: Dict, tipo: Optional[str] = None) -> List[Tuple[str, float]]:
+    """
+    Capas (nombre, espesor en m) de la estructura del pavimento
+
+    Acepta el resultado de DisenoPavimentoRigido/DisenoPavimentoFlexible
+    o un diccionario con las claves "pavimento_rigido"/"pavimento_flexible".
+    tipo: "rigido" o "flexible" (None = el disponible, rígido primero)
+    """
+    rigido = diseno.get("pavimento_rigido", diseno if "espesor_cm" in diseno else None)
+    flexible = diseno.get("pavimento_flexible", diseno if "espesor_base_cm" in diseno else None)
+    if tipo is None:
+        tipo = "rigido" if rigido else "flexible"
+    if tipo == "rigido" and rigido:
+        return [("losa", rigido["espesor_cm"] / 100),
+                ("subbase", rigido.get("espesor_subbase_cm", ESPESOR_SUBBASE_RIGIDO_CM) / 100)]
+    if tipo == "flexible" and flexible:
+        return [("carpeta", flexible.get("espesor_carpeta_cm", ESPESOR_CARPETA_FLEXIBLE_CM) / 100),
+                ("base", flexible["espesor_base_cm"] / 100),
+                ("subbase", flexible["espesor_subbase_cm"] / 100)]
+    raise ValueError(f"El diseño no contiene un pavimento {tipo}")
+
+def eje_por_defecto(dtm_data: Dict) -> np.ndarray:
+    """Eje recto por el centro del MDT a lo largo de su lado mayor"""
+    x = dtm_data['X_grid'][0, :]
+    y = dtm_data['Y_grid'][:, 0]
+    xc, yc = (x[0] + x[-1]) / 2, (y[0] + y[-1]) / 2
+    if abs(x[-1] - x[0]) >= abs(y[-1] - y[0]):
+        return np.array([[x[0], yc], [x[-1], yc]])
+    return np.array([[xc, y[0]], [xc, y[-1]]])
+
+def _proyectar_en_eje(xy: np.ndarray, vertices: np.ndarray, acumulada: np.ndarray,
+                      segmentos: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Progresiva, desplazamiento (positivo a la izquierda) y máscara de
+    puntos fuera de los extremos del eje, por el segmento más cercano
+    """
+    mejor = np.full(len(xy), np.inf)
+    progresiva = np.zeros(len(xy))
+    desplazamiento = np.zeros(len(xy))
+    fuera = np.zeros(len(xy), dtype=bool)
+    ultimo = len(vertices) - 2
+    for i in segmentos:
+        a = vertices[i]
+        v = vertices[i + 1] - a
+        longitud = np.hypot(v[0], v[1])
+        relativo = xy - a
+        t_libre = relativo @ v / longitud ** 2
+        t = np.clip(t_libre, 0.0, 1.0)
+        d2 = (relativo[:, 0] - t * v[0]) ** 2 + (relativo[:, 1] - t * v[1]) ** 2
+        cercano = d2 < mejor
+        mejor[cercano] = d2[cercano]
+        progresiva[cercano] = acumulada[i] + t[cercano] * longitud
+        lado = np.sign(v[0] * relativo[cercano, 1] - v[1] * relativo[cercano, 0])
+        desplazamiento[cercano] = np.where(lado < 0, -1.0, 1.0) * np.sqrt(d2[cercano])
+        fuera[cercano] = ((i == 0) & (t_libre[cercano] < 0)) | ((i == ultimo) & (t_libre[cercano] > 1))
+    return progresiva, desplazamiento, fuera
+
+def calcular_movimiento_tierras(dtm_data: Dict, diseno: Dict, eje: Optional[np.ndarray] = None,
+                                cotas_rasante: Optional[np.ndarray] = None, ancho_m: float = 6.0,
+                                bombeo_pct: float = 2.0, talud_corte: float = 1.0,
+                                talud_relleno: float = 1.5, ancho_taludes_m: float = 15.0,
+                                intervalo_m: float = 20.0, tipo: Optional[str] = None,
+                                tesela: int = 512, devolver_grilla: bool = False) -> Dict:
+    """
+    Volúmenes de corte y relleno entre el MDT y la superficie de diseño
+
+    Parámetros:
+    - dtm_data: MDT (X_grid, Y_grid, Z_grid, resolution)
+    - diseno: Resultado del diseño rígido/flexible (ver estructura_pavimento)
+    - eje: Vértices XY del eje (None = eje recto por el centro del MDT)
+    - cotas_rasante: Cota de rasante en cada vértice (None = terreno en el eje)
+    - ancho_m, bombeo_pct: Ancho de calzada y pendiente transversal
+    - talud_corte, talud_relleno: Taludes H:V desde el borde de la subrasante
+    - ancho_taludes_m: Franja lateral máxima ocupada por los taludes
+    - intervalo_m: Longitud de los tramos de cubicación
+    - tesela: Celdas por lado de cada tesela del MDT
+    - devolver_grilla: Incluir la grilla de diferencias (+corte, −relleno)
+    """
+    try:
+        inicio = time.perf_counter()
+        capas = estructura_pavimento(diseno, tipo)
+        espesor_total = sum(espesor for _, espesor in capas)
+        vertices = np.asarray(eje if eje is not None else eje_por_defecto(dtm_data), dtype=np.float64)
+        acumulada = np.r_[0.0, np.cumsum(np.hypot(*np.diff(vertices, axis=0).T))]
+        longitud = float(acumulada[-1])
+        if cotas_rasante is None:
+            cotas_rasante = muestrear_bilineal(dtm_data, vertices)
+        cotas_rasante = np.asarray(cotas_rasante, dtype=np.float64)
+
+        x = dtm_data['X_grid'][0, :]
+        y = dtm_data['Y_grid'][:, 0]
+        Z = dtm_data['Z_grid']
+        area_celda = dtm_data['resolution'] ** 2
+        semiancho = ancho_m / 2
+        limite = semiancho + ancho_taludes_m
+        bombeo = bombeo_pct / 100
+        n_tramos = max(int(np.ceil(longitud / intervalo_m)), 1)
+        corte = np.zeros(n_tramos)
+        relleno = np.zeros(n_tramos)
+        area_corte = np.zeros(n_tramos)
+        area_relleno = np.zeros(n_tramos)
+        area_plataforma = np.zeros(n_tramos)
+        diferencia = np.full(Z.shape, np.nan) if devolver_grilla else None
+
+        # Caja de cada segmento ampliada al corredor, para descartar teselas
+        caja_min = np.minimum(vertices[:-1], vertices[1:]) - limite
+        caja_max = np.maximum(vertices[:-1], vertices[1:]) + limite
+        teselas = 0
+        for f0 in range(0, y.size, tesela):
+            f1 = min(f0 + tesela, y.size)
+            y0, y1 = sorted((y[f0], y[f1 - 1]))
+            for c0 in range(0, x.size, tesela):
+                c1 = min(c0 + tesela, x.size)
+                x0, x1 = sorted((x[c0], x[c1 - 1]))
+                segmentos = np.flatnonzero((caja_min[:, 0] <= x1) & (caja_max[:, 0] >= x0) &
+                                           (caja_min[:, 1] <= y1) & (caja_max[:, 1] >= y0))
+                if segmentos.size == 0:
+                    continue
+                teselas += 1
+                xx, yy = np.meshgrid(x[c0:c1], y[f0:f1])
+                xy = np.column_stack([xx.ravel(), yy.ravel()])
+                terreno = Z[f0:f1, c0:c1].ravel()
+                progresiva, desplazamiento, fuera = _proyectar_en_eje(xy, vertices, acumulada, segmentos)
+                lateral = np.abs(desplazamiento)
+                dentro = ~fuera & (lateral <= limite) & np.isfinite(terreno)
+
+                # Subrasante: rasante del eje, bombeo y estructura del pavimento
+                rasante = np.interp(progresiva, acumulada, cotas_rasante)
+                subrasante = rasante - bombeo * np.minimum(lateral, semiancho) - espesor_total
+                plataforma = lateral <= semiancho
+                exceso = np.maximum(lateral - semiancho, 0.0)
+                dz = terreno - subrasante
+                dz_corte = np.where(plataforma, dz, dz - exceso / talud_corte)
+                dz_relleno = np.where(plataforma, dz, dz + exceso / talud_relleno)
+                h_corte = np.where(dentro, np.maximum(dz_corte, 0.0), 0.0)
+                h_relleno = np.where(dentro, np.maximum(-dz_relleno, 0.0), 0.0)
+
+                tramo = np.minimum((progresiva / intervalo_m).astype(int), n_tramos - 1)
+                corte += np.bincount(tramo, h_corte, n_tramos) * area_celda
+                relleno += np.bincount(tramo, h_relleno, n_tramos) * area_celda
+                area_corte += np.bincount(tramo, h_corte > 0, n_tramos) * area_celda
+                area_relleno += np.bincount(tramo, h_relleno > 0, n_tramos) * area_celda
+                # Fracción de celda dentro de la calzada, para no cuantizar el ancho
+                cobertura = np.clip((semiancho - lateral) / dtm_data['resolution'] + 0.5, 0.0, 1.0)
+                area_plataforma += np.bincount(tramo, np.where(dentro, cobertura, 0.0), n_tramos) * area_celda
+                if devolver_grilla:
+                    diferencia[f0:f1, c0:c1] = np.where(dentro, h_corte - h_relleno, np.nan).reshape(xx.shape)
+
+        tramos = [{
+            "progresiva_inicio_m": round(i * intervalo_m, 2),
+            "progresiva_fin_m": round(min((i + 1) * intervalo_m, longitud), 2),
+            "corte_m3": round(float(corte[i]), 2),
+            "relleno_m3": round(float(relleno[i]), 2),
+            "area_corte_m2": round(float(area_corte[i]), 2),
+            "area_relleno_m2": round(float(area_relleno[i]), 2)
+        } for i in range(n_tramos)]
+        area_total_plataforma = float(area_plataforma.sum())
+        resultado = {
+            "tramos": tramos,
+            "corte_total_m3": round(float(corte.sum()), 2),
+            "relleno_total_m3": round(float(relleno.sum()), 2),
+            "balance_m3": round(float(corte.sum() - relleno.sum()), 2),
+            "capas": [{"capa": nombre, "espesor_m": round(espesor, 3),
+                       "volumen_m3": round(area_total_plataforma * espesor, 2)} for nombre, espesor in capas],
+            "espesor_estructura_m": round(espesor_total, 3),
+            "longitud_m": round(longitud, 2),
+            "ancho_m": ancho_m,
+            "area_plataforma_m2": round(area_total_plataforma, 2),
+            "teselas": teselas,
+            "tiempo_s": round(time.perf_counter() - inicio, 3),
+            "estado": "✅ Movimiento de tierras calculado"
+        }
+        if devolver_grilla:
+            resultado["diferencia"] = diferencia
+        return resultado
+
+    except Exception as e:
+        return {
+            "error": str(e),
+            "estado": "❌ Error en movimiento de tierras"
+        }
+
+if __name__ == "__main__":
+    # Prueba del módulo: corredor de 2 km sobre una ladera ondulada
+    resolucion = 1.0
+    x = np.arange(0, 2000, resolucion) + 0.5
+    y = np.arange(0, 120, resolucion) + 0.5
+    X, Y = np.meshgrid(x, y)
+    Z = 3850 + 0.02 * X + 0.05 * (Y - 60) + 1.5 * np.sin(X / 80)
+    dtm = {'X_grid': X, 'Y_grid': Y, 'Z_grid': Z, 'resolution': resolucion}
+    diseno = {"pavimento_rigido": {"espesor_cm": 22.0}}
+    eje = np.array([[0.0, 60.0], [1000.0, 55.0], [2000.0, 65.0]])
+    resultado = calcular_movimiento_tierras(dtm, diseno, eje, cotas_rasante=[3850.0, 3870.0, 3890.0],
+                                            intervalo_m=100.0)
+    print(f"✅ Corte: {resultado['corte_total_m3']:,.0f} m³, relleno: {resultado['relleno_total_m3']:,.0f} m³ "
+          f"en {resultado['tiempo_s']} s ({resultado['teselas']} teselas)")
+    for tramo in resultado["tramos"][:5]:
+        print(f"   {tramo['progresiva_inicio_m']:7.1f}-{tramo['progresiva_fin_m']:7.1f} m: "
+              f"corte {tramo['corte_m3']:8.1f} m³, relleno {tramo['relleno_m3']:8.1f} m³")
@@ -0,0 +1,249 @@
+"""
+MÓDULO NUBE SINTÉTICA - LEVANTAMIENTOS LIDAR REPRODUCIBLES
+==========================================================
+
+Generador de nubes de puntos sintéticas para pruebas y benchmarks del
+flujo LiDAR sin datos reales:
+- Terreno urbano: calles con pendiente longitudinal y bombeo,
+  sardineles, veredas y lotes con ondulación suave
+- Árboles (clases 3/4/5 por altura), ruido vertical y puntos atípicos
+  (clase 7); el suelo es clase 2
+- Semilla fija: la nube no depende del tamaño de bloque pedido y una
+  nube de N puntos es prefijo de otra mayor (lotes internos completos
+  de 65536 puntos, cada uno con su propio generador)
+- Entrega por bloques (memoria acotada) y escritura de LAS/LAZ reales
+  con laspy para 1 M, 10 M o 100 M de puntos
+
+Autor: IA Assistant - Especialista UNI
+Fecha: 2024
+"""
+
+import numpy as np
+import math
+import os
+import time
+from typing import Dict, Iterator, List, Tuple, Optional
+
+try:
+    import laspy
+    LASPY_AVAILABLE = True
+except ImportError:
+    LASPY_AVAILABLE = False
+
+# Extensión UTM de la cuadra de San Miguel, Puno (x_min, y_min, x_max, y_max)
+EXTENSION_SAN_MIGUEL = (100.0, 8000.0, 200.0, 8100.0)
+
+# Puntos por lote interno (cada lote tiene su propio generador)
+PUNTOS_POR_LOTE = 1 << 16
+
+# Lado de la celda de la retícula de árboles (m)
+CELDA_ARBOLES_M = 12.0
+
+PARAMETROS_NUBE = {
+    "cota_base": 3850.0,
+    "pendiente_longitudinal_pct": 3.0,
+    "ancho_calzada_m": 7.2,
+    "bombeo_pct": 2.0,
+    "altura_sardinel_m": 0.15,
+    "ancho_vereda_m": 2.0,
+    "separacion_calles_m": 100.0,
+    "arboles_por_ha": 25.0,
+    "fraccion_vegetacion": 0.75,
+    "ruido_m": 0.02,
+    "fraccion_atipicos": 0.0005
+}
+
+def superficie_terreno(x: np.ndarray, y: np.ndarray, parametros: Optional[Dict] = None,
+                       extension: Tuple[float, float, float, float] = EXTENSION_SAN_MIGUEL) -> Dict:
+    """
+    Cota del suelo sin ruido y tipo de superficie en (x, y)
+
+    Calles paralelas al eje X cada separacion_calles_m (la primera en el
+    centro de la franja inicial). Devuelve 'z' y 'superficie'
+    (0 = calzada, 1 = vereda, 2 = lote) y 'desplazamiento' al eje.
+    """
+    p = dict(PARAMETROS_NUBE, **(parametros or {}))
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    separacion = p["separacion_calles_m"]
+    desplazamiento = np.mod(y - extension[1], separacion) - separacion / 2
+    lateral = np.abs(desplazamiento)
+    semiancho = p["ancho_calzada_m"] / 2
+    borde_calzada = -p["bombeo_pct"] / 100 * semiancho
+    borde_vereda = borde_calzada + p["altura_sardinel_m"] + 0.02 * p["ancho_vereda_m"]
+    rasante = p["cota_base"] + p["pendiente_longitudinal_pct"] / 100 * (x - extension[0])
+    superficie = np.where(lateral <= semiancho, 0, np.where(lateral <= semiancho + p["ancho_vereda_m"], 1, 2))
+    relativa = np.select(
+        [superficie == 0, superficie == 1],
+        [-p["bombeo_pct"] / 100 * lateral,
+         borde_calzada + p["altura_sardinel_m"] + 0.02 * (lateral - semiancho)],
+        borde_vereda + 0.3 * np.sin(x / 17.0) * np.cos(y / 23.0) * np.minimum(lateral - semiancho - p["ancho_vereda_m"], 5.0) / 5.0)
+    return {"z": rasante + relativa, "superficie": superficie.astype(np.int8), "desplazamiento": desplazamiento}
+
+def _reticula_arboles(semilla: int, p: Dict, extension: Tuple[float, float, float, float]) -> Dict:
+    """
+    Árboles en una retícula con desplazamiento aleatorio: a lo sumo uno por
+    celda y con la copa contenida en la celda (búsqueda O(1) por punto)
+    """
+    rng = np.random.default_rng([semilla, 1 << 30])
+    nx = max(int(math.ceil((extension[2] - extension[0]) / CELDA_ARBOLES_M)), 1)
+    ny = max(int(math.ceil((extension[3] - extension[1]) / CELDA_ARBOLES_M)), 1)
+    radio = rng.uniform(1.5, 4.0, (ny, nx))
+    holgura = CELDA_ARBOLES_M / 2 - radio
+    cx = extension[0] + (np.arange(nx) + 0.5) * CELDA_ARBOLES_M + rng.uniform(-1, 1, (ny, nx)) * holgura
+    cy = (extension[1] + (np.arange(ny)[:, np.newaxis] + 0.5) * CELDA_ARBOLES_M
+          + rng.uniform(-1, 1, (ny, nx)) * holgura)
+    probabilidad = min(p["arboles_por_ha"] * CELDA_ARBOLES_M ** 2 / 10000.0, 1.0)
+    lateral = np.abs(superficie_terreno(cx, cy, p, extension)["desplazamiento"])
+    libre = lateral - radio > p["ancho_calzada_m"] / 2 + p["ancho_vereda_m"]
+    existe = (rng.random((ny, nx)) < probabilidad) & libre
+    return {"nx": nx, "ny": ny, "cx": cx, "cy": cy, "radio": radio,
+            "altura": rng.uniform(3.0, 10.0, (ny, nx)), "existe": existe}
+
+def _generar_lote(indice: int, n: int, semilla: int, p: Dict, arboles: Dict,
+                  extension: Tuple[float, float, float, float]) -> Dict:
+    """Lote interno de puntos con su generador propio (semilla, índice)"""
+    rng = np.random.default_rng([semilla, indice])
+    x = rng.uniform(extension[0], extension[2], n)
+    y = rng.uniform(extension[1], extension[3], n)
+    terreno = superficie_terreno(x, y, p, extension)
+    z = terreno["z"] + rng.normal(0.0, p["ruido_m"], n)
+    clase = np.full(n, 2, dtype=np.uint8)
+    intensidad = np.select([terreno["superficie"] == 0, terreno["superficie"] == 1], [22.0, 60.0], 35.0)
+
+    # Copas de árboles: retorno de vegetación con probabilidad fraccion_vegetacion
+    columna = np.clip(((x - extension[0]) // CELDA_ARBOLES_M).astype(np.int64), 0, arboles["nx"] - 1)
+    fila = np.clip(((y - extension[1]) // CELDA_ARBOLES_M).astype(np.int64), 0, arboles["ny"] - 1)
+    distancia = np.hypot(x - arboles["cx"][fila, columna], y - arboles["cy"][fila, columna])
+    radio = arboles["radio"][fila, columna]
+    copa = (arboles["existe"][fila, columna] & (distancia < radio)
+            & (rng.random(n) < p["fraccion_vegetacion"]))
+    forma_copa = np.sqrt(np.clip(1 - (distancia / radio) ** 2, 0, 1))
+    altura = arboles["altura"][fila, columna] * forma_copa * np.sqrt(rng.random(n))
+    altura = np.maximum(altura, 0.3)
+    z = np.where(copa, terreno["z"] + altura, z)
+    clase[copa] = np.where(altura[copa] < 2.0, 3, np.where(altura[copa] < 5.0, 4, 5))
+    intensidad[copa] = 45.0
+
+    # Atípicos bajos (multitrayecto): clase 7
+    atipico = rng.random(n) < p["fraccion_atipicos"]
+    z[atipico] = terreno["z"][atipico] - rng.uniform(2.0, 20.0, int(atipico.sum()))
+    clase[atipico] = 7
+    intensidad = np.clip(intensidad + rng.normal(0.0, 5.0, n), 0, 65535).astype(np.uint16)
+    return {"x": x, "y": y, "z": z, "clasificacion": clase, "intensidad": intensidad}
+
+def generar_nube_sintetica(n_puntos: int, semilla: int = 0, puntos_por_bloque: int = 1000000,
+                           extension: Optional[Tuple[float, float, float, float]] = None,
+                           densidad_pts_m2: Optional[float] = None,
+                           parametros: Optional[Dict] = None) -> Iterator[Dict]:
+    """
+    Genera la nube sintética por bloques
+
+    Parámetros:
+    - n_puntos: Total de puntos
+    - semilla: Semilla del levantamiento (misma semilla = misma nube)
+    - puntos_por_bloque: Puntos por bloque entregado
+    - extension: (x_min, y_min, x_max, y_max); por defecto la cuadra de San
+      Miguel, o un cuadrado con densidad_pts_m2 si se indica
+    - parametros: Reemplazos de PARAMETROS_NUBE
+
+    Cada bloque es un diccionario con x, y, z, clasificacion e intensidad.
+    """
+    p = dict(PARAMETROS_NUBE, **(parametros or {}))
+    if extension is None:
+        extension = EXTENSION_SAN_MIGUEL
+        if densidad_pts_m2:
+            lado = math.sqrt(n_puntos / densidad_pts_m2)
+            extension = (extension[0], extension[1], extension[0] + lado, extension[1] + lado)
+    arboles = _reticula_arboles(semilla, p, extension)
+    cache: Dict[int, Dict] = {}
+
+    def lote(indice: int) -> Dict:
+        if indice not in cache:
+            cache.clear()
+            cache[indice] = _generar_lote(indice, PUNTOS_POR_LOTE, semilla, p, arboles, extension)
+        return cache[indice]
+
+    for inicio in range(0, n_puntos, puntos_por_bloque):
+        fin = min(inicio + puntos_por_bloque, n_puntos)
+        partes = []
+        for indice in range(inicio // PUNTOS_POR_LOTE, (fin - 1) // PUNTOS_POR_LOTE + 1):
+            desde = max(inicio - indice * PUNTOS_POR_LOTE, 0)
+            hasta = min(fin - indice * PUNTOS_POR_LOTE, PUNTOS_POR_LOTE)
+            partes.append({clave: valor[desde:hasta] for clave, valor in lote(indice).items()})
+        yield {clave: np.concatenate([parte[clave] for parte in partes]) for clave in partes[0]}
+
+def nube_sintetica(n_puntos: int, semilla: int = 0, **opciones) -> Dict:
+    """Nube sintética completa en memoria: points (N×3), clasificacion e intensidad"""
+    bloques = list(generar_nube_sintetica(n_puntos, semilla, **opciones))
+    return {
+        "points": np.column_stack([np.concatenate([b[eje] for b in bloques]) for eje in ("x", "y", "z")]),
+        "clasificacion": np.concatenate([b["clasificacion"] for b in bloques]),
+        "intensidad": np.concatenate([b["intensidad"] for b in bloques])
+    }
+
+def escribir_las_sintetico(ruta: str, n_puntos: int, semilla: int = 0,
+                           puntos_por_bloque: int = 1000000, **opciones) -> Dict:
+    """
+    Escribe la nube sintética en un archivo LAS/LAZ por bloques (laspy)
+
+    Formato de punto 1 con escala de 1 mm; solo un bloque reside en memoria.
+    """
+    if not LASPY_AVAILABLE:
+        return {
+            "error": "LasPy no está instalado. Instala con: pip install laspy",
+            "estado": "❌ Error escribiendo LAS sintético"
+        }
+
+    try:
+        inicio = time.perf_counter()
+        directorio = os.path.dirname(ruta)
+        if directorio:
+            os.makedirs(directorio, exist_ok=True)
+        header = laspy.LasHeader(point_format=1, version="1.2")
+        header.scales = np.array([0.001, 0.001, 0.001])
+        extension = opciones.get("extension") or EXTENSION_SAN_MIGUEL
+        header.offsets = np.array([math.floor(extension[0]), math.floor(extension[1]),
+                                   math.floor(dict(PARAMETROS_NUBE, **(opciones.get("parametros") or {}))["cota_base"])])
+        puntos = 0
+        clases = np.zeros(256, dtype=np.int64)
+        with laspy.open(ruta, mode="w", header=header) as escritor:
+            for bloque in generar_nube_sintetica(n_puntos, semilla, puntos_por_bloque, **opciones):
+                registro = laspy.ScaleAwarePointRecord.zeros(len(bloque["x"]), header=header)
+                registro.x = bloque["x"]
+                registro.y = bloque["y"]
+                registro.z = bloque["z"]
+                registro.classification = bloque["clasificacion"]
+                registro.intensity = bloque["intensidad"]
+                escritor.write_points(registro)
+                puntos += len(bloque["x"])
+                clases += np.bincount(bloque["clasificacion"], minlength=256)
+
+        return {
+            "archivo": ruta,
+            "puntos": puntos,
+            "semilla": semilla,
+            "puntos_por_clase": {int(c): int(clases[c]) for c in np.flatnonzero(clases)},
+            "tamano_mb": round(os.path.getsize(ruta) / 1e6, 2),
+            "tiempo_s": round(time.perf_counter() - inicio, 3),
+            "estado": "✅ LAS sintético generado"
+        }
+
+    except Exception as e:
+        return {
+            "error": str(e),
+            "estado": "❌ Error escribiendo LAS sintético"
+        }
+
+if __name__ == "__main__":
+    # Prueba del módulo: 1 M de puntos a 20 pts/m² por bloques
+    inicio = time.perf_counter()
+    total = 0
+    for bloque in generar_nube_sintetica(1000000, semilla=7, puntos_por_bloque=250000, densidad_pts_m2=20):
+        total += len(bloque["x"])
+    print(f"✅ {total:,} puntos sintéticos en {time.perf_counter() - inicio:.2f} s")
+    if LASPY_AVAILABLE:
+        resultado = escribir_las_sintetico(os.path.join("output_lidar", "sintetico_1M.las"), 1000000, semilla=7,
+                                           densidad_pts_m2=20)
+        print(f"   {resultado['estado']}: {resultado['tamano_mb']} MB en {resultado['tiempo_s']} s, "
+              f"clases {resultado['puntos_por_clase']}")
@@ -0,0 +1,283 @@
+"""
+MÓDULO REGULARIDAD - IRI Y AHUELLAMIENTO DESDE NUBES LIDAR
+==========================================================
+
+Indicadores de superficie de pavimentos existentes para decidir entre
+mantenimiento, rehabilitación y reconstrucción:
+- Perfiles de las huellas de rodada extraídos de la nube de puntos
+  (plano local sobre KD-tree a lo largo del eje de cada calle)
+- IRI por simulación del cuarto de carro (Golden Car, ASTM E1926),
+  vectorizada sobre todos los segmentos de todas las calles a la vez
+- Ahuellamiento por el método de la regla (straight-edge) en secciones
+  transversales de cada carril
+- Resultados por segmento de 10 m o 100 m
+
+Autor: IA Assistant - Especialista UNI
+Fecha: 2024
+"""
+
+import numpy as np
+import time
+from typing import Dict, List, Tuple, Optional
+
+from MODULO_INTERPOLACION import construir_indice, interpolar_en_puntos
+from MODULO_SECCIONES import estaciones_eje
+
+# Cuarto de carro de referencia (Golden Car) a 80 km/h
+VELOCIDAD_IRI_M_S = 80 / 3.6
+GOLDEN_CAR = {"k1": 653.0, "k2": 63.3, "mu": 0.15, "c": 6.0}
+LONGITUD_INICIAL_M = 11.0     # pendiente inicial de la simulación
+BASE_PROMEDIO_M = 0.25        # promedio móvil del perfil (ASTM E1926)
+CALENTAMIENTO_M = 30.0        # recorrido previo simulado en cada segmento
+
+# Huellas de rodada y carriles por defecto (calzada de 6 m, dos carriles);
+# los carriles se separan 0.2 m del eje para no medir el quiebre del bombeo
+RODADAS_M = (-2.35, -0.65, 0.65, 2.35)
+CARRILES_M = ((-3.0, -0.2), (0.2, 3.0))
+
+# Criterios referenciales de condición (IRI en m/km, ahuellamiento en mm)
+UMBRALES_IRI = ((2.5, "Bueno"), (3.5, "Regular"), (5.0, "Malo"), (np.inf, "Muy malo"))
+INTERVENCIONES = {
+    "Bueno": "Mantenimiento rutinario",
+    "Regular": "Mantenimiento periódico",
+    "Malo": "Rehabilitación",
+    "Muy malo": "Reconstrucción"
+}
+AHUELLAMIENTO_REHABILITACION_MM = 12.0
+AHUELLAMIENTO_RECONSTRUCCION_MM = 25.0
+
+def matrices_cuarto_carro(paso_m: float) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Matrices de transición exacta del cuarto de carro para un paso de
+    perfil: estado(i+1) = ST · estado(i) + PR · pendiente(i)
+    """
+    k1, k2, mu, c = GOLDEN_CAR["k1"], GOLDEN_CAR["k2"], GOLDEN_CAR["mu"], GOLDEN_CAR["c"]
+    A = np.array([[0.0, 1.0, 0.0, 0.0],
+                  [-k2, -c, k2, c],
+                  [0.0, 0.0, 0.0, 1.0],
+                  [k2 / mu, c / mu, -(k1 + k2) / mu, -c / mu]])
+    B = np.array([0.0, 0.0, 0.0, k1 / mu])
+    dt = paso_m / VELOCIDAD_IRI_M_S
+    valores, vectores = np.linalg.eig(A * dt)
+    ST = (vectores @ np.diag(np.exp(valores)) @ np.linalg.inv(vectores)).real
+    PR = np.linalg.solve(A, (ST - np.eye(4)) @ B)
+    return ST, PR
+
+def _ventanas_segmentos(perfil: np.ndarray, paso_m: float, pasos_segmento: int,
+                        pasos_calentamiento: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Pendientes de cada segmento precedidas por su recorrido de
+    calentamiento; devuelve (pendientes, máscara de cómputo, pendiente inicial)
+    """
+    pendientes = np.diff(perfil) / paso_m
+    n = pendientes.size
+    inicios = np.arange(0, n, pasos_segmento)
+    relativos = np.arange(-pasos_calentamiento, pasos_segmento)
+    indices = inicios[:, np.newaxis] + relativos[np.newaxis, :]
+
+    # Estado inicial en reposo con la pendiente de los primeros 11 m
+    arranque = np.maximum(inicios - pasos_calentamiento, 0)
+    fin_inicial = np.minimum(arranque + int(round(LONGITUD_INICIAL_M / paso_m)), n)
+    pendiente_inicial = (perfil[fin_inicial] - perfil[arranque]) / ((fin_inicial - arranque) * paso_m)
+
+    # Antes del inicio del perfil se repite la pendiente inicial (estado estacionario)
+    ventanas = np.where(indices < 0, pendiente_inicial[:, np.newaxis],
+                        pendientes[np.clip(indices, 0, n - 1)])
+    computo = (relativos[np.newaxis, :] >= 0) & (indices < n)
+    return ventanas, computo, pendiente_inicial
+
+def iri_por_segmentos(perfiles: List[np.ndarray], paso_m: float = 0.25,
+                      longitud_segmento_m: float = 100.0) -> List[np.ndarray]:
+    """
+    IRI (m/km) por segmento de cada perfil longitudinal
+
+    Todos los segmentos de todos los perfiles se simulan en paralelo como
+    columnas de una misma matriz de estados; cada uno arranca
+    CALENTAMIENTO_M antes de su inicio para olvidar el estado inicial.
+    Los segmentos con datos faltantes quedan en NaN.
+    """
+    base = int(round(BASE_PROMEDIO_M / paso_m))
+    pasos_segmento = max(int(round(longitud_segmento_m / paso_m)), 1)
+    pasos_calentamiento = int(round(CALENTAMIENTO_M / paso_m))
+    ventanas, computos, iniciales, cantidades = [], [], [], []
+    for perfil in perfiles:
+        perfil = np.asarray(perfil, dtype=np.float64)
+        if base > 1:
+            perfil = np.convolve(perfil, np.ones(base) / base, mode="valid")
+        if perfil.size < 2:
+            cantidades.append(0)
+            continue
+        ventana, computo, inicial = _ventanas_segmentos(perfil, paso_m, pasos_segmento, pasos_calentamiento)
+        ventanas.append(ventana)
+        computos.append(computo)
+        iniciales.append(inicial)
+        cantidades.append(len(ventana))
+    if not ventanas:
+        return [np.array([]) for _ in perfiles]
+
+    ventanas = np.vstack(ventanas)
+    computos = np.vstack(computos)
+    iniciales = np.concatenate(iniciales)
+    ST, PR = matrices_cuarto_carro(paso_m)
+    estado = np.vstack([iniciales, np.zeros_like(iniciales), iniciales, np.zeros_like(iniciales)])
+    suma = np.zeros(len(ventanas))
+    for t in range(ventanas.shape[1]):
+        estado = ST @ estado + PR[:, np.newaxis] * ventanas[:, t]
+        suma += np.where(computos[:, t], np.abs(estado[0] - estado[2]), 0.0)
+    iri = suma / np.maximum(computos.sum(axis=1), 1) * 1000
+    return np.split(iri, np.cumsum(cantidades)[:-1])
+
+def ahuellamiento_regla(z: np.ndarray, paso_m: float, longitud_regla_m: float = 1.2,
+                        bloque: int = 256) -> np.ndarray:
+    """
+    Ahuellamiento (m) por el método de la regla en perfiles transversales
+
+    z: (..., puntos) cotas transversales equiespaciadas. La regla se
+    desliza punto a punto y apoya sobre la arista de la envolvente
+    convexa superior bajo su centro; el ahuellamiento es la máxima luz
+    bajo la regla. Las ventanas con datos faltantes se omiten.
+    """
+    z = np.asarray(z, dtype=np.float64)
+    forma = z.shape[:-1]
+    z = z.reshape(-1, z.shape[-1])
+    ancho = min(int(round(longitud_regla_m / paso_m)) + 1, z.shape[-1])
+    centro = ancho // 2
+    a, b = np.meshgrid(np.arange(centro + 1), np.arange(centro, ancho), indexing="ij")
+    pares = a < b
+    a, b = a[pares], b[pares]
+    j = np.arange(ancho)
+    # Recta de cada par de apoyos evaluada en los puntos de la ventana
+    peso_b = (j[np.newaxis, :] - a[:, np.newaxis]) / (b - a)[:, np.newaxis]
+    resultado = np.empty(len(z))
+    for inicio in range(0, len(z), bloque):
+        ventanas = np.lib.stride_tricks.sliding_window_view(z[inicio:inicio + bloque], ancho, axis=1)
+        za, zb = ventanas[..., a, np.newaxis], ventanas[..., b, np.newaxis]
+        rectas = za + (zb - za) * peso_b
+        luz = rectas - ventanas[..., np.newaxis, :]
+        # Apoyo válido: la recta queda sobre todos los puntos (arista de la envolvente)
+        apoyo = np.min(luz, axis=-1) >= -1e-9
+        mejor = np.argmax(apoyo, axis=-1)[..., np.newaxis, np.newaxis]
+        luz_max = np.take_along_axis(luz, mejor, axis=-2)[..., 0, :].max(axis=-1)
+        luz_max[~apoyo.any(axis=-1)] = np.nan
+        with np.errstate(all="ignore"):
+            validas = np.isfinite(luz_max)
+            resultado[inicio:inicio + bloque] = np.where(validas.any(axis=-1),
+                                                         np.max(np.where(validas, luz_max, -np.inf), axis=-1),
+                                                         np.nan)
+    return np.clip(resultado, 0.0, None).reshape(forma)
+
+def clasificar_condicion(iri_m_km: float, ahuellamiento_mm: float) -> Tuple[str, str]:
+    """Condición por IRI e intervención, agravada por ahuellamiento"""
+    if not np.isfinite(iri_m_km):
+        return "Sin datos", "Sin datos"
+    condicion = next(nombre for limite, nombre in UMBRALES_IRI if iri_m_km < limite)
+    intervencion = INTERVENCIONES[condicion]
+    if ahuellamiento_mm >= AHUELLAMIENTO_RECONSTRUCCION_MM:
+        intervencion = INTERVENCIONES["Muy malo"]
+    elif ahuellamiento_mm >= AHUELLAMIENTO_REHABILITACION_MM and condicion in ("Bueno", "Regular"):
+        intervencion = INTERVENCIONES["Malo"]
+    return condicion, intervencion
+
+def evaluar_superficie_pavimento(points: np.ndarray, ejes: List[np.ndarray],
+                                 longitud_segmento_m: float = 100.0, paso_m: float = 0.25,
+                                 rodadas_m: Tuple[float, ...] = RODADAS_M,
+                                 carriles_m: Tuple[Tuple[float, float], ...] = CARRILES_M,
+                                 intervalo_secciones_m: float = 5.0, paso_transversal_m: float = 0.1,
+                                 longitud_regla_m: float = 1.2, k: int = 12) -> Dict:
+    """
+    IRI y ahuellamiento por segmento para un lote de calles
+
+    Parámetros:
+    - points: Nube de puntos de la superficie del pavimento (N×3)
+    - ejes: Lista de ejes (vértices XY) de las calles levantadas
+    - longitud_segmento_m: Segmento de reporte (10 m o 100 m)
+    - paso_m: Paso del perfil longitudinal (ASTM E1926: ≤ 0.25 m)
+    - rodadas_m: Desplazamientos de las huellas de rodada respecto al eje
+    - carriles_m: Rangos de desplazamiento de cada carril para el ahuellamiento
+    - intervalo_secciones_m: Separación de las secciones transversales
+    - k: Vecinos del plano local ajustado en cada punto de muestreo
+    """
+    try:
+        inicio = time.perf_counter()
+        indice = construir_indice(points)
+        rodadas = np.asarray(rodadas_m, dtype=np.float64)
+        perfiles, secciones = [], []
+        for eje in ejes:
+            # Perfiles de las huellas de rodada
+            estaciones = estaciones_eje(eje, paso_m)
+            xy = estaciones["xy"][:, np.newaxis, :] + rodadas[:, np.newaxis] * estaciones["normal"][:, np.newaxis, :]
+            z, _ = interpolar_en_puntos(points, xy.reshape(-1, 2), metodo="plano", k=k,
+                                        radio_max=4 * paso_m, indice=indice)
+            perfiles.extend(z.reshape(-1, rodadas.size).T)
+
+            # Secciones transversales de cada carril
+            estaciones = estaciones_eje(eje, intervalo_secciones_m)
+            por_carril = []
+            for desde, hasta in carriles_m:
+                d = np.arange(desde, hasta + paso_transversal_m / 2, paso_transversal_m)
+                xy = estaciones["xy"][:, np.newaxis, :] + d[:, np.newaxis] * estaciones["normal"][:, np.newaxis, :]
+                z, _ = interpolar_en_puntos(points, xy.reshape(-1, 2), metodo="plano", k=k,
+                                            radio_max=4 * paso_transversal_m, indice=indice)
+                por_carril.append(ahuellamiento_regla(z.reshape(-1, d.size), paso_transversal_m, longitud_regla_m))
+            secciones.append((estaciones["progresiva"], np.column_stack(por_carril), estaciones["longitud_m"]))
+
+        iri = iri_por_segmentos(perfiles, paso_m, longitud_segmento_m)
+        segmentos = []
+        for calle, (progresiva, ahuellamiento, longitud) in enumerate(secciones):
+            iri_calle = np.column_stack(iri[calle * rodadas.size:(calle + 1) * rodadas.size])
+            tramo = np.minimum((progresiva / longitud_segmento_m).astype(int), len(iri_calle) - 1)
+            for s, valores in enumerate(iri_calle):
+                rutas = ahuellamiento[tramo == s] * 1000
+                medio = float(np.nanmean(rutas)) if np.isfinite(rutas).any() else float("nan")
+                maximo = float(np.nanmax(rutas)) if np.isfinite(rutas).any() else float("nan")
+                iri_medio = float(np.mean(valores))
+                condicion, intervencion = clasificar_condicion(iri_medio, maximo if np.isfinite(maximo) else 0.0)
+                segmentos.append({
+                    "calle": calle,
+                    "progresiva_inicio_m": round(s * longitud_segmento_m, 2),
+                    "progresiva_fin_m": round(min((s + 1) * longitud_segmento_m, longitud), 2),
+                    "iri_m_km": round(iri_medio, 2),
+                    "iri_rodadas_m_km": [round(float(v), 2) for v in valores],
+                    "ahuellamiento_medio_mm": round(medio, 1),
+                    "ahuellamiento_max_mm": round(maximo, 1),
+                    "condicion": condicion,
+                    "intervencion": intervencion
+                })
+
+        longitud_total = sum(longitud for _, _, longitud in secciones)
+        iri_validos = [s["iri_m_km"] for s in segmentos if np.isfinite(s["iri_m_km"])]
+        return {
+            "segmentos": segmentos,
+            "longitud_total_km": round(longitud_total / 1000, 3),
+            "iri_medio_m_km": round(float(np.mean(iri_validos)), 2) if iri_validos else None,
+            "segmentos_por_intervencion": {nombre: sum(s["intervencion"] == nombre for s in segmentos)
+                                           for nombre in INTERVENCIONES.values()},
+            "tiempo_s": round(time.perf_counter() - inicio, 3),
+            "estado": "✅ Regularidad superficial evaluada"
+        }
+
+    except Exception as e:
+        return {
+            "error": str(e),
+            "estado": "❌ Error evaluando regularidad superficial"
+        }
+
+if __name__ == "__main__":
+    # Prueba del módulo: 2 km de calle con rugosidad aleatoria y huellas de 15 mm
+    rng = np.random.default_rng(0)
+    largo = 2000.0
+    n = 1500000
+    x = rng.uniform(0, largo, n)
+    y = rng.uniform(-3.5, 3.5, n)
+    frecuencias = rng.uniform(0.05, 1.5, 40)
+    fases = rng.uniform(0, 2 * np.pi, 40)
+    rugosidad = sum(0.00015 / f * np.sin(2 * np.pi * f * x + p) for f, p in zip(frecuencias, fases))
+    huellas = sum(-0.015 * np.exp(-((y - c) / 0.25) ** 2) for c in RODADAS_M)
+    z = 3850 + 0.01 * x - 0.02 * np.abs(y) + rugosidad + huellas * (x > 1000)
+    nube = np.column_stack([x, y, z])
+    resultado = evaluar_superficie_pavimento(nube, [np.array([[0.0, 0.0], [largo, 0.0]])])
+    print(f"✅ {resultado['longitud_total_km']} km evaluados en {resultado['tiempo_s']} s, "
+          f"IRI medio {resultado['iri_medio_m_km']} m/km")
+    for segmento in resultado["segmentos"][8:13]:
+        print(f"   {segmento['progresiva_inicio_m']:6.0f} m: IRI {segmento['iri_m_km']:5.2f} m/km, "
+              f"ahuellamiento {segmento['ahuellamiento_max_mm']:5.1f} mm → {segmento['intervencion']}")
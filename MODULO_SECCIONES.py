@@ -0,0 +1,190 @@
+"""
+MÓDULO SECCIONES - PERFIL LONGITUDINAL Y SECCIONES TRANSVERSALES
+================================================================
+
+Extracción de perfiles y secciones del MDT a lo largo de un eje:
+- Muestreo bilineal vectorizado del MDT en puntos arbitrarios
+- Estaciones cada intervalo de progresiva con su tangente y normal
+- Perfil longitudinal del eje con pendiente por estación
+- Secciones transversales como una matriz estaciones × desplazamientos
+  (miles de estaciones por llamada, procesadas por bloques)
+- Pendientes transversales (rampas de veredas, cunetas) y geometría de
+  secciones para HEC-RAS (#Sta/Elev)
+
+Autor: IA Assistant - Especialista UNI
+Fecha: 2024
+"""
+
+import numpy as np
+from typing import Dict, List, Tuple, Optional
+
+def muestrear_bilineal(dtm_data: Dict, xy: np.ndarray) -> np.ndarray:
+    """
+    Cota bilineal del MDT en los puntos xy (forma (..., 2))
+
+    Las coordenadas de la grilla son los centros de celda; en la media
+    celda del borde se toma el valor del borde. Fuera de la huella del
+    MDT, o junto a celdas sin dato, el resultado es NaN.
+    """
+    xy = np.asarray(xy, dtype=np.float64)
+    x = dtm_data['X_grid'][0, :]
+    y = dtm_data['Y_grid'][:, 0]
+    Z = dtm_data['Z_grid']
+    fx = (xy[..., 0] - x[0]) / (x[1] - x[0])
+    fy = (xy[..., 1] - y[0]) / (y[1] - y[0])
+    dentro = (fx >= -0.5) & (fx <= x.size - 0.5) & (fy >= -0.5) & (fy <= y.size - 0.5)
+    fx = np.clip(fx, 0, x.size - 1)
+    fy = np.clip(fy, 0, y.size - 1)
+    c0 = np.clip(np.floor(fx), 0, x.size - 2).astype(np.intp)
+    f0 = np.clip(np.floor(fy), 0, y.size - 2).astype(np.intp)
+    tx = np.where(dentro, fx - c0, 0.0)
+    ty = np.where(dentro, fy - f0, 0.0)
+    z = ((Z[f0, c0] * (1 - tx) + Z[f0, c0 + 1] * tx) * (1 - ty) +
+         (Z[f0 + 1, c0] * (1 - tx) + Z[f0 + 1, c0 + 1] * tx) * ty)
+    return np.where(dentro, z, np.nan)
+
+def estaciones_eje(eje: np.ndarray, intervalo_m: float = 20.0,
+                   progresivas: Optional[np.ndarray] = None) -> Dict:
+    """
+    Estaciones a lo largo del eje (incluye el final) con su posición,
+    tangente unitaria y normal unitaria hacia la izquierda
+    """
+    vertices = np.asarray(eje, dtype=np.float64)
+    tramos = np.diff(vertices, axis=0)
+    longitudes = np.hypot(tramos[:, 0], tramos[:, 1])
+    acumulada = np.r_[0.0, np.cumsum(longitudes)]
+    if progresivas is None:
+        progresivas = np.arange(0.0, acumulada[-1], intervalo_m)
+        if acumulada[-1] - progresivas[-1] > 1e-6:
+            progresivas = np.r_[progresivas, acumulada[-1]]
+    progresivas = np.asarray(progresivas, dtype=np.float64)
+    segmento = np.clip(np.searchsorted(acumulada, progresivas, side="right") - 1, 0, len(tramos) - 1)
+    tangente = tramos[segmento] / longitudes[segmento, np.newaxis]
+    posicion = vertices[segmento] + (progresivas - acumulada[segmento])[:, np.newaxis] * tangente
+    return {
+        "progresiva": progresivas,
+        "xy": posicion,
+        "tangente": tangente,
+        "normal": np.column_stack([-tangente[:, 1], tangente[:, 0]]),
+        "longitud_m": float(acumulada[-1])
+    }
+
+def extraer_perfil_longitudinal(dtm_data: Dict, eje: np.ndarray, intervalo_m: float = 1.0) -> Dict:
+    """Perfil del terreno en el eje: progresiva, x, y, cota y pendiente (%)"""
+    estaciones = estaciones_eje(eje, intervalo_m)
+    z = muestrear_bilineal(dtm_data, estaciones["xy"])
+    progresiva = estaciones["progresiva"]
+    pendiente = np.gradient(z, progresiva) * 100 if progresiva.size > 1 else np.zeros_like(z)
+    return {
+        "progresiva": progresiva,
+        "x": estaciones["xy"][:, 0],
+        "y": estaciones["xy"][:, 1],
+        "z": z,
+        "pendiente_pct": pendiente,
+        "longitud_m": estaciones["longitud_m"]
+    }
+
+def extraer_secciones(dtm_data: Dict, eje: np.ndarray, intervalo_m: float = 20.0,
+                      semiancho_m: float = 10.0, paso_m: float = 0.5,
+                      progresivas: Optional[np.ndarray] = None, bloque: int = 4096) -> Dict:
+    """
+    Secciones transversales perpendiculares al eje
+
+    Parámetros:
+    - eje: Vértices XY del eje
+    - intervalo_m: Separación entre secciones (ignorado si se dan progresivas)
+    - semiancho_m, paso_m: Alcance lateral y paso del muestreo
+    - bloque: Estaciones muestreadas por bloque (memoria acotada)
+
+    Devuelve matrices (estaciones × desplazamientos) de x, y, z; los
+    desplazamientos son positivos a la izquierda del sentido del eje.
+    """
+    estaciones = estaciones_eje(eje, intervalo_m, progresivas)
+    desplazamiento = np.arange(-semiancho_m, semiancho_m + paso_m / 2, paso_m)
+    n = estaciones["progresiva"].size
+    forma = (n, desplazamiento.size)
+    x = np.empty(forma)
+    y = np.empty(forma)
+    z = np.empty(forma)
+    for inicio in range(0, n, bloque):
+        fin = min(inicio + bloque, n)
+        puntos = (estaciones["xy"][inicio:fin, np.newaxis, :] +
+                  desplazamiento[np.newaxis, :, np.newaxis] * estaciones["normal"][inicio:fin, np.newaxis, :])
+        x[inicio:fin], y[inicio:fin] = puntos[..., 0], puntos[..., 1]
+        z[inicio:fin] = muestrear_bilineal(dtm_data, puntos)
+    return {
+        "progresiva": estaciones["progresiva"],
+        "desplazamiento": desplazamiento,
+        "x": x,
+        "y": y,
+        "z": z,
+        "cota_eje": muestrear_bilineal(dtm_data, estaciones["xy"]),
+        "longitud_m": estaciones["longitud_m"]
+    }
+
+def pendientes_transversales(secciones: Dict) -> np.ndarray:
+    """Pendiente (%) entre desplazamientos consecutivos de cada sección"""
+    return np.diff(secciones["z"], axis=1) / np.diff(secciones["desplazamiento"]) * 100
+
+def geometria_hec_ras(secciones: Dict, rio: str = "Cuneta", tramo: str = "Cuadra 1",
+                      manning: float = 0.016, orillas_m: Optional[Tuple[float, float]] = None) -> str:
+    """
+    Secciones en formato de geometría de HEC-RAS (#Sta/Elev)
+
+    La estación de río decrece aguas abajo según el perfil del eje; cada
+    sección se lista de izquierda a derecha mirando aguas abajo. Los
+    puntos sin dato se omiten. orillas_m: desplazamientos de las orillas
+    (None = extremos de la sección).
+    """
+    progresiva = secciones["progresiva"]
+    desplazamiento = secciones["desplazamiento"]
+    cota_eje = secciones["cota_eje"]
+    validas = np.isfinite(cota_eje)
+    # Sentido del flujo: hacia donde baja el eje
+    a_favor = not (validas.sum() > 1 and cota_eje[validas][-1] > cota_eje[validas][0])
+    estacion_rio = secciones["longitud_m"] - progresiva if a_favor else progresiva
+    orden = np.argsort(-estacion_rio)
+    def a_estacion(d):
+        return desplazamiento.max() - d if a_favor else d - desplazamiento.min()
+    estacion = a_estacion(desplazamiento)
+    orillas = sorted(a_estacion(np.asarray(orillas_m if orillas_m is not None
+                                           else (desplazamiento.min(), desplazamiento.max()))))
+
+    lineas = [f"River Reach={rio:<16},{tramo:<16}"]
+    for posicion, i in enumerate(orden):
+        distancia = abs(estacion_rio[i] - estacion_rio[orden[posicion + 1]]) if posicion + 1 < len(orden) else 0.0
+        puntos = np.column_stack([estacion, secciones["z"][i]])
+        puntos = puntos[np.isfinite(puntos[:, 1])]
+        puntos = puntos[np.argsort(puntos[:, 0])]
+        if len(puntos) < 2:
+            continue
+        lineas.append(f"Type RM Length L Ch R = 1 ,{estacion_rio[i]:<8.2f},{distancia:.2f},{distancia:.2f},{distancia:.2f}")
+        lineas.append(f"#Sta/Elev= {len(puntos)} ")
+        valores = puntos.ravel()
+        for inicio in range(0, valores.size, 10):
+            lineas.append("".join(f"{v:8.2f}" for v in valores[inicio:inicio + 10]))
+        lineas.append("#Mann= 1 , 0 , 0 ")
+        lineas.append(f"{puntos[0, 0]:8.2f}{manning:8.3f}{0:8d}")
+        lineas.append(f"Bank Sta={orillas[0]:.2f},{orillas[1]:.2f}")
+    return "\n".join(lineas) + "\n"
+
+if __name__ == "__main__":
+    import time
+    # Prueba del módulo: 5000 secciones sobre una calle con bombeo y cunetas
+    resolucion = 0.5
+    x = np.arange(0, 10000, resolucion) + 0.25
+    y = np.arange(0, 60, resolucion) + 0.25
+    X, Y = np.meshgrid(x, y)
+    lateral = np.abs(Y - 30)
+    Z = 3850 - 0.01 * X - 0.02 * np.minimum(lateral, 3.0) + 0.15 * np.clip(lateral - 3.0, 0, 1)
+    dtm = {'X_grid': X, 'Y_grid': Y, 'Z_grid': Z, 'resolution': resolucion}
+    eje = np.array([[0.0, 30.0], [9999.0, 30.0]])
+    inicio = time.perf_counter()
+    secciones = extraer_secciones(dtm, eje, intervalo_m=2.0, semiancho_m=8.0, paso_m=0.25)
+    perfil = extraer_perfil_longitudinal(dtm, eje, 1.0)
+    print(f"✅ {secciones['z'].shape[0]} secciones × {secciones['z'].shape[1]} puntos "
+          f"y perfil de {perfil['z'].size} estaciones en {time.perf_counter() - inicio:.3f} s")
+    print(f"   Pendiente longitudinal media: {np.nanmean(perfil['pendiente_pct']):.2f}%")
+    print(f"   Bombeo máximo: {np.nanmax(np.abs(pendientes_transversales(secciones)[:, 22:42])):.2f}%")
+    print(geometria_hec_ras({k: (v[:2] if k in ('progresiva', 'z', 'cota_eje') else v)
+                             for k, v in secciones.items()})[:400])
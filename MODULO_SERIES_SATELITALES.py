@@ -0,0 +1,430 @@
+"""
+MÓDULO SERIES SATELITALES - ALMACÉN LOCAL DE SERIES DE TIEMPO RÁSTER
+====================================================================
+
+Series de NDVI, humedad del suelo, precipitación y temperatura en disco,
+consultables sin conexión:
+- Grilla geográfica fija por variable (EPSG:4326) dividida en teselas
+- Bloques por variable, tesela y mes: pila .npy (fechas × filas × columnas)
+  abierta como memoria mapeada; índice JSON por variable con las fechas
+- Ingesta desde la API 'ee' (Google Earth Engine real o el sustituto
+  local de MODULO_EE_LOCAL) con ee.data.computePixels por tesela
+- Publicación atómica de bloques e índice (archivo temporal + replace)
+- Consultas zonales sobre polígonos arbitrarios y rangos de fechas:
+  solo se leen las ventanas de las teselas que tocan el polígono
+
+Autor: IA Assistant - Especialista UNI
+Fecha: 2024
+"""
+
+import numpy as np
+import hashlib
+import json
+import math
+import os
+import tempfile
+import time
+from collections import OrderedDict
+from datetime import timedelta
+from typing import Dict, List, Tuple, Optional
+
+from MODULO_EE_LOCAL import EELocal, _a_fecha, punto_en_poligono
+
+# Variables del almacén: colección, bandas, operación, resolución (grados)
+# y conversión lineal (valor * escala + desplazamiento)
+VARIABLES_SATELITALES = {
+    "ndvi": {"coleccion": "COPERNICUS/S2_SR", "bandas": ("B8", "B4"), "operacion": "diferencia_normalizada",
+             "filtro": ("CLOUDY_PIXEL_PERCENTAGE", 20), "resolucion": 0.0001, "unidad": "-"},
+    "humedad_suelo": {"coleccion": "NASA/SMAP/SPL4SMGP/007", "bandas": ("sm_surface",),
+                      "resolucion": 0.08, "unidad": "m³/m³"},
+    "precipitacion": {"coleccion": "UCSB-CHG/CHIRPS/DAILY", "bandas": ("precipitation",),
+                      "resolucion": 0.05, "unidad": "mm/día", "acumulable": True},
+    "temperatura": {"coleccion": "ECMWF/ERA5_LAND/DAILY_AGGR", "bandas": ("temperature_2m",),
+                    "resolucion": 0.1, "unidad": "°C", "desplazamiento": -273.15}
+}
+
+TAMANO_TESELA = 256
+ARCHIVO_INDICE = "indice.json"
+
+# Polígono del área de proyecto en San Miguel, Puno (lon, lat)
+POLIGONO_SAN_MIGUEL = [(-70.1300, -15.2400), (-70.1170, -15.2400), (-70.1170, -15.2290),
+                       (-70.1300, -15.2290)]
+
+def _escribir_atomico(ruta: str, escribir) -> None:
+    """Escribe en un temporal del mismo directorio y lo publica con os.replace"""
+    directorio = os.path.dirname(ruta)
+    descriptor, temporal = tempfile.mkstemp(prefix=".tmp.", dir=directorio)
+    try:
+        with os.fdopen(descriptor, "wb") as f:
+            escribir(f)
+        os.replace(temporal, ruta)
+    except Exception:
+        if os.path.exists(temporal):
+            os.remove(temporal)
+        raise
+
+class AlmacenSeriesSatelitales:
+    """Almacén de series de tiempo ráster por variable, tesela y mes"""
+
+    def __init__(self, directorio: str = "series_satelitales", tamano_tesela: int = TAMANO_TESELA,
+                 max_abiertos: int = 64):
+        self.directorio = directorio
+        self.tamano_tesela = tamano_tesela
+        self.max_abiertos = max_abiertos
+        self._indices = {}
+        self._abiertos = OrderedDict()
+        self._mascaras = OrderedDict()
+        os.makedirs(directorio, exist_ok=True)
+
+    # ---- Grilla y teselas ----
+
+    def resolucion(self, variable: str) -> float:
+        """Tamaño de píxel (grados) de una variable"""
+        return VARIABLES_SATELITALES[variable]["resolucion"]
+
+    def teselas_region(self, variable: str, caja: Tuple[float, float, float, float]) -> List[Tuple[int, int]]:
+        """Teselas (columna, fila) que cubren la caja (oeste, sur, este, norte)"""
+        oeste, sur, este, norte = caja
+        paso = self.resolucion(variable) * self.tamano_tesela
+        columnas = range(int(math.floor((oeste + 180) / paso)), int(math.floor((este + 180) / paso)) + 1)
+        filas = range(int(math.floor((90 - norte) / paso)), int(math.floor((90 - sur) / paso)) + 1)
+        return [(tx, ty) for ty in filas for tx in columnas]
+
+    def grilla_tesela(self, variable: str, tesela: Tuple[int, int]) -> Dict:
+        """Grilla de ee.data.computePixels para una tesela (norte arriba)"""
+        tx, ty = tesela
+        resolucion = self.resolucion(variable)
+        return {
+            "dimensions": {"width": self.tamano_tesela, "height": self.tamano_tesela},
+            "affineTransform": {"scaleX": resolucion, "shearX": 0, "translateX": -180 + tx * self.tamano_tesela * resolucion,
+                                "shearY": 0, "scaleY": -resolucion, "translateY": 90 - ty * self.tamano_tesela * resolucion},
+            "crsCode": "EPSG:4326"
+        }
+
+    # ---- Índice ----
+
+    def _ruta_variable(self, variable: str) -> str:
+        return os.path.join(self.directorio, variable)
+
+    def indice(self, variable: str) -> Dict:
+        """Índice de la variable: bloques por tesela y mes con sus fechas"""
+        if variable not in self._indices:
+            ruta = os.path.join(self._ruta_variable(variable), ARCHIVO_INDICE)
+            if os.path.isfile(ruta):
+                with open(ruta, encoding="utf-8") as f:
+                    self._indices[variable] = json.load(f)
+            else:
+                definicion = VARIABLES_SATELITALES[variable]
+                self._indices[variable] = {"variable": variable, "unidad": definicion["unidad"],
+                                           "resolucion": definicion["resolucion"],
+                                           "tamano_tesela": self.tamano_tesela, "bloques": {}}
+        return self._indices[variable]
+
+    def _guardar_indice(self, variable: str) -> None:
+        contenido = json.dumps(self.indice(variable), indent=1, ensure_ascii=False).encode("utf-8")
+        _escribir_atomico(os.path.join(self._ruta_variable(variable), ARCHIVO_INDICE),
+                          lambda f: f.write(contenido))
+
+    def fechas_disponibles(self, variable: str) -> List[str]:
+        """Fechas ingeridas de una variable (ISO, ordenadas)"""
+        return sorted({fecha for meses in self.indice(variable)["bloques"].values()
+                       for bloque in meses.values() for fecha in bloque["fechas"]})
+
+    # ---- Ingesta ----
+
+    def _guardar_bloque(self, variable: str, tesela: str, mes: str, fechas: List[str], pila: np.ndarray) -> None:
+        """Combina con el bloque existente y publica la nueva pila del mes"""
+        meses = self.indice(variable)["bloques"].setdefault(tesela, {})
+        anterior = meses.get(mes)
+        if anterior is not None:
+            previa = self._abrir(variable, anterior["archivo"])
+            nuevas = set(fechas)
+            conservar = [i for i, fecha in enumerate(anterior["fechas"]) if fecha not in nuevas]
+            fechas = [anterior["fechas"][i] for i in conservar] + list(fechas)
+            pila = np.concatenate([np.asarray(previa[conservar]), pila])
+        orden = np.argsort(fechas, kind="stable")
+        fechas = [fechas[i] for i in orden]
+        pila = np.ascontiguousarray(pila[orden], dtype=np.float32)
+
+        firma = hashlib.sha256(pila.tobytes()).hexdigest()[:10]
+        archivo = os.path.join(tesela, f"{mes}_{firma}.npy")
+        ruta = os.path.join(self._ruta_variable(variable), archivo)
+        os.makedirs(os.path.dirname(ruta), exist_ok=True)
+        _escribir_atomico(ruta, lambda f: np.save(f, pila))
+        meses[mes] = {"archivo": archivo, "fechas": fechas}
+        if anterior is not None and anterior["archivo"] != archivo:
+            self._abiertos.pop((variable, anterior["archivo"]), None)
+            ruta_anterior = os.path.join(self._ruta_variable(variable), anterior["archivo"])
+            if os.path.exists(ruta_anterior):
+                os.remove(ruta_anterior)
+
+    def ingerir(self, ee, variable: str, caja: Tuple[float, float, float, float],
+                fecha_inicio: str, fecha_fin: str) -> Dict:
+        """
+        Descarga las imágenes de una variable sobre las teselas que cubren
+        la caja (oeste, sur, este, norte) entre dos fechas (fin excluido)
+
+        Parámetros:
+        - ee: módulo 'ee' inicializado o EELocal()
+        - variable: clave de VARIABLES_SATELITALES
+        """
+        inicio = time.perf_counter()
+        definicion = VARIABLES_SATELITALES[variable]
+        oeste, sur, este, norte = caja
+        coleccion = ee.ImageCollection(definicion["coleccion"]) \
+            .filterDate(fecha_inicio, fecha_fin) \
+            .filterBounds(ee.Geometry.Rectangle([oeste, sur, este, norte]))
+        if "filtro" in definicion:
+            propiedad, limite = definicion["filtro"]
+            coleccion = coleccion.filter(ee.Filter.lt(propiedad, limite))
+        dias = sorted({_a_fecha(ms) for ms in coleccion.aggregate_array("system:time_start").getInfo()})
+
+        teselas = self.teselas_region(variable, caja)
+        escala = definicion.get("escala", 1.0)
+        desplazamiento = definicion.get("desplazamiento", 0.0)
+        lotes = {}
+        for dia in dias:
+            imagen = coleccion.filterDate(dia.isoformat(), (dia + timedelta(days=1)).isoformat()).mosaic()
+            if definicion.get("operacion") == "diferencia_normalizada":
+                imagen = imagen.normalizedDifference(list(definicion["bandas"]))
+            else:
+                imagen = imagen.select(list(definicion["bandas"]))
+            imagen = imagen.rename([variable])
+            for tesela in teselas:
+                pixeles = ee.data.computePixels({"expression": imagen, "fileFormat": "NUMPY_NDARRAY",
+                                                 "grid": self.grilla_tesela(variable, tesela)})
+                valores = pixeles[variable].astype(np.float32) * escala + desplazamiento
+                clave = (f"{tesela[0]}_{tesela[1]}", dia.strftime("%Y-%m"))
+                lotes.setdefault(clave, ([], []))
+                lotes[clave][0].append(dia.isoformat())
+                lotes[clave][1].append(valores)
+
+        os.makedirs(self._ruta_variable(variable), exist_ok=True)
+        for (tesela, mes), (fechas, capas) in sorted(lotes.items()):
+            self._guardar_bloque(variable, tesela, mes, fechas, np.stack(capas))
+        if lotes:
+            self._guardar_indice(variable)
+            self._mascaras.clear()
+        return {
+            "variable": variable,
+            "imagenes": len(dias),
+            "teselas": len(teselas),
+            "bloques": len(lotes),
+            "tiempo_s": round(time.perf_counter() - inicio, 3),
+            "estado": "✅ Ingesta completada" if dias else "⚠️ Sin imágenes en el período"
+        }
+
+    def ingerir_variables(self, ee, caja: Tuple[float, float, float, float], fecha_inicio: str,
+                          fecha_fin: str, variables: Optional[List[str]] = None) -> Dict:
+        """Ingesta de varias variables (todas por defecto) sobre la misma caja"""
+        return {variable: self.ingerir(ee, variable, caja, fecha_inicio, fecha_fin)
+                for variable in (variables or list(VARIABLES_SATELITALES))}
+
+    # ---- Consultas ----
+
+    def _abrir(self, variable: str, archivo: str) -> np.ndarray:
+        """Pila de un bloque en memoria mapeada (las últimas usadas quedan abiertas)"""
+        clave = (variable, archivo)
+        if clave in self._abiertos:
+            self._abiertos.move_to_end(clave)
+            return self._abiertos[clave]
+        pila = np.load(os.path.join(self._ruta_variable(variable), archivo), mmap_mode="r")
+        self._abiertos[clave] = pila
+        while len(self._abiertos) > self.max_abiertos:
+            self._abiertos.popitem(last=False)
+        return pila
+
+    def _ventanas(self, variable: str, vertices: np.ndarray) -> List[Tuple]:
+        """
+        Por tesela ingerida: ventana (fila0, fila1, col0, col1) y máscara de
+        los centros de píxel dentro del polígono. Un polígono menor que un
+        píxel (o un punto) toma el píxel que contiene su centroide.
+        """
+        clave = (variable, vertices.tobytes())
+        if clave in self._mascaras:
+            self._mascaras.move_to_end(clave)
+            return self._mascaras[clave]
+
+        resolucion = self.resolucion(variable)
+        n = self.tamano_tesela
+        bloques = self.indice(variable)["bloques"]
+        oeste, sur = vertices.min(axis=0)
+        este, norte = vertices.max(axis=0)
+        col_min, col_max = int(math.floor((oeste + 180) / resolucion)), int(math.floor((este + 180) / resolucion))
+        fila_min, fila_max = int(math.floor((90 - norte) / resolucion)), int(math.floor((90 - sur) / resolucion))
+
+        def ventanas(columnas: Tuple[int, int], filas: Tuple[int, int], usar_poligono: bool) -> List[Tuple]:
+            resultado = []
+            for tx in range(columnas[0] // n, columnas[1] // n + 1):
+                for ty in range(filas[0] // n, filas[1] // n + 1):
+                    tesela = f"{tx}_{ty}"
+                    if tesela not in bloques:
+                        continue
+                    c0, c1 = max(columnas[0], tx * n) - tx * n, min(columnas[1], tx * n + n - 1) - tx * n + 1
+                    f0, f1 = max(filas[0], ty * n) - ty * n, min(filas[1], ty * n + n - 1) - ty * n + 1
+                    if usar_poligono:
+                        lon = -180 + (tx * n + np.arange(c0, c1) + 0.5) * resolucion
+                        lat = 90 - (ty * n + np.arange(f0, f1) + 0.5) * resolucion
+                        malla_lon, malla_lat = np.meshgrid(lon, lat)
+                        mascara = punto_en_poligono(malla_lon, malla_lat, vertices)
+                    else:
+                        mascara = np.ones((f1 - f0, c1 - c0), dtype=bool)
+                    if mascara.any():
+                        resultado.append((tesela, f0, f1, c0, c1, mascara))
+            return resultado
+
+        resultado = ventanas((col_min, col_max), (fila_min, fila_max), len(vertices) >= 3)
+        if not resultado:
+            centro = vertices.mean(axis=0)
+            columna = int(math.floor((centro[0] + 180) / resolucion))
+            fila = int(math.floor((90 - centro[1]) / resolucion))
+            resultado = ventanas((columna, columna), (fila, fila), False)
+        self._mascaras[clave] = resultado
+        while len(self._mascaras) > 256:
+            self._mascaras.popitem(last=False)
+        return resultado
+
+    def consulta_zonal(self, variable: str, poligono: List[Tuple[float, float]],
+                       fecha_inicio: Optional[str] = None, fecha_fin: Optional[str] = None) -> Dict:
+        """
+        Estadísticas zonales por fecha de una variable sobre un polígono
+
+        Parámetros:
+        - poligono: vértices (lon, lat); un solo vértice consulta un punto
+        - fecha_inicio, fecha_fin: rango inclusive (todo lo ingerido si None)
+
+        Devuelve fechas, media, minimo, maximo, desviacion y pixeles por
+        fecha, más un resumen del período (y el acumulado si la variable es
+        acumulable, como la precipitación).
+        """
+        inicio = time.perf_counter()
+        definicion = VARIABLES_SATELITALES[variable]
+        vertices = np.asarray(poligono, dtype=float).reshape(-1, 2)
+        desde = fecha_inicio or "0000-00-00"
+        hasta = fecha_fin or "9999-99-99"
+
+        por_fecha = {}
+        bloques = self.indice(variable)["bloques"]
+        for tesela, f0, f1, c0, c1, mascara in self._ventanas(variable, vertices):
+            for mes, bloque in bloques[tesela].items():
+                if mes < desde[:7] or mes > hasta[:7]:
+                    continue
+                seleccion = [i for i, fecha in enumerate(bloque["fechas"]) if desde <= fecha <= hasta]
+                if not seleccion:
+                    continue
+                pila = self._abrir(variable, bloque["archivo"])
+                valores = np.asarray(pila[seleccion, f0:f1, c0:c1])[:, mascara]
+                for i, fila in zip(seleccion, valores):
+                    por_fecha.setdefault(bloque["fechas"][i], []).append(fila)
+
+        fechas = sorted(por_fecha)
+        serie = {"media": [], "minimo": [], "maximo": [], "desviacion": [], "pixeles": []}
+        for fecha in fechas:
+            valores = np.concatenate(por_fecha[fecha])
+            valores = valores[np.isfinite(valores)]
+            serie["pixeles"].append(int(valores.size))
+            for nombre, funcion in (("media", np.mean), ("minimo", np.min), ("maximo", np.max), ("desviacion", np.std)):
+                serie[nombre].append(round(float(funcion(valores)), 4) if valores.size else None)
+
+        medias = np.array([m for m in serie["media"] if m is not None])
+        resumen = {"imagenes": len(fechas)}
+        if medias.size:
+            resumen.update({"media_periodo": round(float(medias.mean()), 4),
+                            "minimo_periodo": min(m for m in serie["minimo"] if m is not None),
+                            "maximo_periodo": max(m for m in serie["maximo"] if m is not None)})
+            if definicion.get("acumulable"):
+                resumen["acumulado_periodo"] = round(float(medias.sum()), 2)
+        return {
+            "variable": variable,
+            "unidad": definicion["unidad"],
+            "fechas": fechas,
+            **serie,
+            "resumen": resumen,
+            "tiempo_ms": round((time.perf_counter() - inicio) * 1000, 3),
+            "estado": "✅ Consulta completada" if fechas else "⚠️ Sin datos en el almacén para la consulta"
+        }
+
+    def serie_punto(self, variable: str, lon: float, lat: float, fecha_inicio: Optional[str] = None,
+                    fecha_fin: Optional[str] = None) -> Dict:
+        """Serie del píxel que contiene un punto"""
+        return self.consulta_zonal(variable, [(lon, lat)], fecha_inicio, fecha_fin)
+
+    def valores_puntos(self, variable: str, puntos: List[Tuple[float, float]],
+                       fecha_inicio: Optional[str] = None, fecha_fin: Optional[str] = None) -> Dict:
+        """
+        Media del período en el píxel de cada punto (lon, lat), leyendo cada
+        bloque una sola vez para todos los puntos de su tesela
+
+        Devuelve media e imagenes (fechas con dato) por punto; NaN y 0 fuera
+        de lo ingerido.
+        """
+        puntos = np.asarray(puntos, dtype=float).reshape(-1, 2)
+        resolucion = self.resolucion(variable)
+        n = self.tamano_tesela
+        columnas = np.floor((puntos[:, 0] + 180) / resolucion).astype(int)
+        filas = np.floor((90 - puntos[:, 1]) / resolucion).astype(int)
+        desde = fecha_inicio or "0000-00-00"
+        hasta = fecha_fin or "9999-99-99"
+        suma = np.zeros(len(puntos))
+        imagenes = np.zeros(len(puntos), dtype=int)
+
+        bloques = self.indice(variable)["bloques"]
+        teselas = np.column_stack([columnas // n, filas // n])
+        for tx, ty in np.unique(teselas, axis=0):
+            meses = bloques.get(f"{tx}_{ty}")
+            if meses is None:
+                continue
+            en_tesela = np.flatnonzero((teselas[:, 0] == tx) & (teselas[:, 1] == ty))
+            f, c = filas[en_tesela] - ty * n, columnas[en_tesela] - tx * n
+            for mes, bloque in meses.items():
+                if mes < desde[:7] or mes > hasta[:7]:
+                    continue
+                seleccion = [i for i, fecha in enumerate(bloque["fechas"]) if desde <= fecha <= hasta]
+                if not seleccion:
+                    continue
+                valores = np.asarray(self._abrir(variable, bloque["archivo"])[seleccion][:, f, c], dtype=float)
+                validos = np.isfinite(valores)
+                suma[en_tesela] += np.where(validos, valores, 0.0).sum(axis=0)
+                imagenes[en_tesela] += validos.sum(axis=0)
+
+        with np.errstate(invalid="ignore"):
+            media = np.where(imagenes > 0, suma / np.maximum(imagenes, 1), np.nan)
+        return {"variable": variable, "media": media, "imagenes": imagenes}
+
+def datos_suelo_desde_series(almacen: AlmacenSeriesSatelitales, poligono: List[Tuple[float, float]],
+                             fecha_inicio: str, fecha_fin: str) -> Dict:
+    """
+    Resumen de suelo y clima del polígono en el formato de
+    extract_soil_data_san_miguel (NDVI, humedad, precipitación, temperatura)
+    """
+    ndvi = almacen.consulta_zonal("ndvi", poligono, fecha_inicio, fecha_fin)["resumen"]
+    humedad = almacen.consulta_zonal("humedad_suelo", poligono, fecha_inicio, fecha_fin)["resumen"]
+    lluvia = almacen.consulta_zonal("precipitacion", poligono, fecha_inicio, fecha_fin)["resumen"]
+    temperatura = almacen.consulta_zonal("temperatura", poligono, fecha_inicio, fecha_fin)["resumen"]
+    if not all(r["imagenes"] for r in (ndvi, humedad, lluvia, temperatura)):
+        return {"error": "Faltan variables en el almacén para el período", "estado": "❌ Error en consulta"}
+    dias = (_a_fecha(fecha_fin) - _a_fecha(fecha_inicio)).days + 1
+    return {
+        "NDVI_promedio": round(ndvi["media_periodo"], 3),
+        "NDVI_minimo": round(ndvi["minimo_periodo"], 3),
+        "NDVI_maximo": round(ndvi["maximo_periodo"], 3),
+        "Humedad_suelo_promedio": round(humedad["media_periodo"], 3),
+        "Humedad_suelo_minima": round(humedad["minimo_periodo"], 3),
+        "Humedad_suelo_maxima": round(humedad["maximo_periodo"], 3),
+        "Precipitacion_anual": round(lluvia["acumulado_periodo"] * 365.25 / dias, 1),
+        "Precipitacion_mensual_promedio": round(lluvia["acumulado_periodo"] * 30.44 / dias, 1),
+        "Temperatura_promedio": round(temperatura["media_periodo"], 1),
+        "estado": "✅ Datos desde almacén local"
+    }
+
+if __name__ == "__main__":
+    # Prueba del módulo
+    ee = EELocal()
+    ee.Initialize()
+    almacen = AlmacenSeriesSatelitales(os.path.join(tempfile.mkdtemp(), "series"))
+    caja = (-70.135, -15.245, -70.112, -15.224)
+    for variable, ingesta in almacen.ingerir_variables(ee, caja, "2023-01-01", "2024-01-01").items():
+        print(f"{variable}: {ingesta['imagenes']} imágenes, {ingesta['bloques']} bloques, {ingesta['tiempo_s']} s")
+    consulta = almacen.consulta_zonal("ndvi", POLIGONO_SAN_MIGUEL, "2023-01-01", "2023-03-31")
+    print(f"NDVI verano 2023: {consulta['resumen']} en {consulta['tiempo_ms']} ms")
+    print(datos_suelo_desde_series(almacen, POLIGONO_SAN_MIGUEL, "2023-01-01", "2023-12-31"))
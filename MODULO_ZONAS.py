@@ -0,0 +1,339 @@
+"""
+MÓDULO ZONAS - ZONAS CRÍTICAS POR COMPONENTES CONEXAS
+=====================================================
+
+Delimitación de zonas contiguas de celdas críticas del MDT (pendiente
+excesiva, curvatura alta, hundimientos, asentamientos):
+- Etiquetado de componentes conexas tesela a tesela con unión de
+  etiquetas entre teselas (union-find); escala a 10⁷ celdas y más
+- Por zona: área, centroide, caja envolvente, valores extremos y
+  polígono de contorno (anillo exterior y huecos, marching squares)
+- Exportación a GeoJSON y DXF para las cuadrillas de geotecnia
+
+Autor: IA Assistant - Especialista UNI
+Fecha: 2024
+"""
+
+import numpy as np
+import json
+import os
+from typing import Callable, Dict, List, Tuple, Optional
+
+try:
+    from scipy import ndimage
+    SCIPY_AVAILABLE = True
+except ImportError:
+    SCIPY_AVAILABLE = False
+
+from MODULO_CURVAS_NIVEL import extraer_curvas_nivel
+
+class _UnionFind:
+    """Conjuntos disjuntos de etiquetas globales (compresión de caminos)"""
+
+    def __init__(self):
+        self.padre: List[int] = []
+
+    def nuevos(self, n: int) -> int:
+        inicio = len(self.padre)
+        self.padre.extend(range(inicio, inicio + n))
+        return inicio
+
+    def raiz(self, i: int) -> int:
+        while self.padre[i] != i:
+            self.padre[i] = self.padre[self.padre[i]]
+            i = self.padre[i]
+        return i
+
+    def unir(self, a: int, b: int) -> None:
+        ra, rb = self.raiz(a), self.raiz(b)
+        if ra != rb:
+            self.padre[max(ra, rb)] = min(ra, rb)
+
+    def raices(self) -> np.ndarray:
+        padre = np.array(self.padre, dtype=np.int64)
+        while True:
+            siguiente = padre[padre]
+            if np.array_equal(siguiente, padre):
+                return padre
+            padre = siguiente
+
+def etiquetar_por_teselas(ny: int, nx: int, clases_tesela: Callable, tesela: int = 1024,
+                          conectividad: int = 8, devolver_grilla: bool = False) -> Dict:
+    """
+    Componentes conexas de una grilla de clases generada tesela a tesela
+
+    clases_tesela(f0, f1, c0, c1) devuelve (clase, valores): clase es un
+    arreglo entero de la ventana (0 = fondo) y valores un diccionario de
+    capas de la ventana cuya suma, mínimo y máximo se acumulan por
+    componente. Cada tesela se etiqueta por separado y las etiquetas que
+    se tocan en los bordes entre teselas (de la misma clase) se unen; solo
+    se retiene la última fila y la última columna procesadas.
+
+    Devuelve por componente: clase, celdas, sumas, mínimos, máximos, suma
+    de filas/columnas (centroide) y caja (fila/columna mínima y máxima).
+    """
+    if not SCIPY_AVAILABLE:
+        raise ImportError("SciPy no está instalado. Instala con: pip install scipy")
+    estructura = np.ones((3, 3)) if conectividad == 8 else None
+    desplazamientos = (-1, 0, 1) if conectividad == 8 else (0,)
+    uf = _UnionFind()
+    partes: Dict[str, List[np.ndarray]] = {}
+    fila_anterior = np.zeros(nx, dtype=np.int64)
+    clase_anterior = np.zeros(nx, dtype=np.int8)
+    etiquetas_grilla = np.zeros((ny, nx), dtype=np.int64) if devolver_grilla else None
+    teselas = 0
+
+    def unir_borde(actual: np.ndarray, clase_act: np.ndarray, vecina: np.ndarray, clase_vec: np.ndarray) -> None:
+        # vecina/clase_vec: línea contigua con un elemento extra a cada lado (diagonales)
+        for d in desplazamientos:
+            b = vecina[1 + d:1 + d + len(actual)]
+            tocan = (actual > 0) & (b > 0) & (clase_act == clase_vec[1 + d:1 + d + len(actual)])
+            for i, j in set(zip(actual[tocan].tolist(), b[tocan].tolist())):
+                uf.unir(i - 1, j - 1)
+
+    for f0 in range(0, ny, tesela):
+        f1 = min(f0 + tesela, ny)
+        columna_izquierda = None
+        fila_nueva = np.zeros(nx, dtype=np.int64)
+        clase_nueva = np.zeros(nx, dtype=np.int8)
+        for c0 in range(0, nx, tesela):
+            c1 = min(c0 + tesela, nx)
+            teselas += 1
+            clase, valores = clases_tesela(f0, f1, c0, c1)
+            clase = np.asarray(clase, dtype=np.int8)
+            locales = np.zeros(clase.shape, dtype=np.int64)
+            n = 0
+            clases_locales = []
+            for valor_clase in np.unique(clase[clase > 0]):
+                lab, cuenta = ndimage.label(clase == valor_clase, structure=estructura)
+                locales[lab > 0] = lab[lab > 0] + n
+                n += cuenta
+                clases_locales.append(np.full(cuenta, valor_clase, dtype=np.int8))
+            base = uf.nuevos(n)
+            etiquetas = np.where(locales > 0, locales + base, 0)
+            if n:
+                indice = np.arange(1, n + 1)
+                filas, columnas = np.nonzero(locales)
+                lab = locales[filas, columnas]
+                partes.setdefault("clase", []).append(np.concatenate(clases_locales))
+                partes.setdefault("celdas", []).append(np.bincount(lab, minlength=n + 1)[1:])
+                partes.setdefault("suma_fila", []).append(np.bincount(lab, filas + f0, n + 1)[1:])
+                partes.setdefault("suma_columna", []).append(np.bincount(lab, columnas + c0, n + 1)[1:])
+                cajas = np.array([[s[0].start, s[0].stop - 1, s[1].start, s[1].stop - 1]
+                                  for s in ndimage.find_objects(locales)]) + [f0, f0, c0, c0]
+                partes.setdefault("caja", []).append(cajas)
+                for nombre, capa in valores.items():
+                    capa = np.asarray(capa, dtype=np.float64)
+                    partes.setdefault("suma_" + nombre, []).append(np.bincount(lab, capa[filas, columnas], n + 1)[1:])
+                    partes.setdefault("min_" + nombre, []).append(np.asarray(ndimage.minimum(capa, locales, indice)))
+                    partes.setdefault("max_" + nombre, []).append(np.asarray(ndimage.maximum(capa, locales, indice)))
+            # Uniones con la tesela inferior (fila anterior) y la izquierda
+            if f0 > 0:
+                izquierda, derecha = max(c0 - 1, 0), min(c1 + 1, nx)
+                vecina = np.zeros(c1 - c0 + 2, dtype=np.int64)
+                clase_vecina = np.zeros(c1 - c0 + 2, dtype=np.int8)
+                vecina[izquierda - c0 + 1:derecha - c0 + 1] = fila_anterior[izquierda:derecha]
+                clase_vecina[izquierda - c0 + 1:derecha - c0 + 1] = clase_anterior[izquierda:derecha]
+                unir_borde(etiquetas[0], clase[0], vecina, clase_vecina)
+            if columna_izquierda is not None:
+                unir_borde(etiquetas[:, 0], clase[:, 0], *columna_izquierda)
+            columna_izquierda = (np.pad(etiquetas[:, -1], 1), np.pad(clase[:, -1], 1))
+            fila_nueva[c0:c1] = etiquetas[-1]
+            clase_nueva[c0:c1] = clase[-1]
+            if devolver_grilla:
+                etiquetas_grilla[f0:f1, c0:c1] = etiquetas
+        fila_anterior, clase_anterior = fila_nueva, clase_nueva
+
+    raices = uf.raices()
+    componentes, grupo = np.unique(raices, return_inverse=True)
+    m = componentes.size
+    resultado = {"total": int(m), "teselas": teselas}
+    if m == 0:
+        resultado.update({"clase": np.zeros(0, dtype=np.int8), "celdas": np.zeros(0, dtype=np.int64),
+                          "caja": np.zeros((0, 4), dtype=np.int64)})
+    for nombre, lista in partes.items():
+        datos = np.concatenate(lista)
+        if nombre == "clase":
+            resultado[nombre] = datos[componentes]
+        elif nombre == "caja":
+            caja = np.empty((m, 4), dtype=np.int64)
+            for k, operacion in enumerate((np.minimum, np.maximum, np.minimum, np.maximum)):
+                caja[:, k] = datos[componentes, k]
+                operacion.at(caja[:, k], grupo, datos[:, k])
+            resultado[nombre] = caja
+        elif nombre.startswith("min_") or nombre.startswith("max_"):
+            acumulado = datos[componentes].copy()
+            (np.minimum if nombre.startswith("min_") else np.maximum).at(acumulado, grupo, datos)
+            resultado[nombre] = acumulado
+        else:
+            resultado[nombre] = np.bincount(grupo, datos, minlength=m)
+    if "celdas" in partes:
+        resultado["celdas"] = resultado["celdas"].astype(np.int64)
+    if devolver_grilla:
+        mapa = np.r_[0, grupo + 1]
+        resultado["etiquetas"] = mapa[etiquetas_grilla]
+    return resultado
+
+def _area_anillo(anillo: np.ndarray) -> float:
+    """Área con signo (fórmula del polígono; positiva en sentido antihorario)"""
+    x, y = anillo[:, 0], anillo[:, 1]
+    return 0.5 * float(np.dot(x, np.roll(y, -1)) - np.dot(y, np.roll(x, -1)))
+
+def _simplificar_anillo(anillo: np.ndarray) -> np.ndarray:
+    """Quita los vértices colineales de un anillo cerrado (primero = último)"""
+    puntos = anillo[:-1]
+    anterior = puntos - np.roll(puntos, 1, axis=0)
+    siguiente = np.roll(puntos, -1, axis=0) - puntos
+    giro = np.abs(anterior[:, 0] * siguiente[:, 1] - anterior[:, 1] * siguiente[:, 0]) > 1e-9
+    puntos = puntos[giro]
+    return np.vstack([puntos, puntos[:1]])
+
+def contorno_zona(dtm_data: Dict, etiquetas: np.ndarray, etiqueta: int,
+                  caja: Tuple[int, int, int, int]) -> List[np.ndarray]:
+    """
+    Polígono de contorno de una zona: anillo exterior (antihorario) seguido
+    de los huecos (horario), en coordenadas del proyecto
+
+    La curva de nivel 0.5 del indicador de la zona pasa por los bordes de
+    celda (esquinas achaflanadas); celdas en diagonal quedan unidas.
+    """
+    f0, f1, c0, c1 = caja
+    indicador = np.pad((etiquetas[f0:f1 + 1, c0:c1 + 1] == etiqueta).astype(np.float64), 1)
+    r = float(dtm_data['resolution'])
+    x = float(dtm_data['X_grid'][0, 0]) + np.arange(c0 - 1, c1 + 2) * r
+    y = float(dtm_data['Y_grid'][0, 0]) + np.arange(f0 - 1, f1 + 2) * r
+    recorte = {'X_grid': np.broadcast_to(x[np.newaxis, :], indicador.shape),
+               'Y_grid': np.broadcast_to(y[:, np.newaxis], indicador.shape),
+               'Z_grid': indicador, 'resolution': r}
+    anillos = [_simplificar_anillo(curva["coordenadas"]) for curva in
+               extraer_curvas_nivel(recorte, intervalo=1.0, nivel_base=0.5)["curvas"] if curva["cerrada"]]
+    anillos.sort(key=lambda anillo: -abs(_area_anillo(anillo)))
+    return [anillo if (_area_anillo(anillo) > 0) == (i == 0) else anillo[::-1]
+            for i, anillo in enumerate(anillos)]
+
+def delimitar_zonas(dtm_data: Dict, mascaras: Dict[str, np.ndarray],
+                    valores: Optional[Dict[str, np.ndarray]] = None,
+                    area_minima_m2: float = 0.0, conectividad: int = 8,
+                    tesela: int = 1024, poligonos: bool = True) -> List[Dict]:
+    """
+    Zonas contiguas de celdas críticas del MDT
+
+    Parámetros:
+    - dtm_data: MDT de referencia (coordenadas y resolución)
+    - mascaras: {tipo: máscara booleana de celdas críticas}
+    - valores: {tipo: capa cuyo mínimo y máximo se reportan por zona}
+    - area_minima_m2: Zonas menores se descartan
+    - poligonos: Calcular el contorno de cada zona
+
+    Devuelve la lista de zonas ordenada por área decreciente.
+    """
+    valores = valores or {}
+    r = float(dtm_data['resolution'])
+    x0 = float(dtm_data['X_grid'][0, 0])
+    y0 = float(dtm_data['Y_grid'][0, 0])
+    zonas = []
+    for tipo, mascara in mascaras.items():
+        ny, nx = mascara.shape
+        capa = valores.get(tipo)
+
+        def clases_tesela(f0: int, f1: int, c0: int, c1: int):
+            clase = np.asarray(mascara[f0:f1, c0:c1], dtype=np.int8)
+            return clase, ({"valor": np.nan_to_num(capa[f0:f1, c0:c1])} if capa is not None else {})
+
+        componentes = etiquetar_por_teselas(ny, nx, clases_tesela, tesela, conectividad, poligonos)
+        for i in range(componentes["total"]):
+            celdas = int(componentes["celdas"][i])
+            if celdas * r * r < area_minima_m2:
+                continue
+            f_min, f_max, c_min, c_max = (int(v) for v in componentes["caja"][i])
+            zona = {
+                "tipo": tipo,
+                "celdas": celdas,
+                "area_m2": round(celdas * r * r, 2),
+                "centroide": (round(x0 + float(componentes["suma_columna"][i]) / celdas * r, 3),
+                              round(y0 + float(componentes["suma_fila"][i]) / celdas * r, 3)),
+                "bbox": (round(x0 + (c_min - 0.5) * r, 3), round(y0 + (f_min - 0.5) * r, 3),
+                         round(x0 + (c_max + 0.5) * r, 3), round(y0 + (f_max + 0.5) * r, 3))
+            }
+            if capa is not None:
+                zona["valor_min"] = round(float(componentes["min_valor"][i]), 4)
+                zona["valor_max"] = round(float(componentes["max_valor"][i]), 4)
+            if poligonos:
+                zona["poligono"] = [np.round(anillo, 3).tolist() for anillo in contorno_zona(
+                    dtm_data, componentes["etiquetas"], i + 1, (f_min, f_max, c_min, c_max))]
+            zonas.append(zona)
+    zonas.sort(key=lambda zona: -zona["celdas"])
+    for numero, zona in enumerate(zonas, start=1):
+        zona["id"] = numero
+    return zonas
+
+def exportar_zonas_geojson(zonas: List[Dict], ruta_geojson: str, epsg: int = 32718) -> str:
+    """
+    Exporta las zonas a GeoJSON (Polygon con tipo, área y valores extremos)
+    """
+    features = []
+    for zona in zonas:
+        propiedades = {clave: valor for clave, valor in zona.items() if clave not in ("poligono", "bbox")}
+        features.append({
+            "type": "Feature",
+            "properties": propiedades,
+            "geometry": {
+                "type": "Polygon",
+                "coordinates": [anillo + anillo[:1] if anillo[0] != anillo[-1] else anillo
+                                for anillo in zona.get("poligono", [])]
+            }
+        })
+
+    coleccion = {
+        "type": "FeatureCollection",
+        "crs": {"type": "name", "properties": {"name": f"urn:ogc:def:crs:EPSG::{epsg}"}},
+        "features": features
+    }
+    directorio = os.path.dirname(ruta_geojson)
+    if directorio:
+        os.makedirs(directorio, exist_ok=True)
+    with open(ruta_geojson, "w", encoding="utf-8") as f:
+        json.dump(coleccion, f)
+    return ruta_geojson
+
+def exportar_zonas_dxf(zonas: List[Dict], ruta_dxf: str, altura_texto: float = 1.0) -> str:
+    """
+    Exporta las zonas a DXF (R12): polilíneas cerradas por anillo y el
+    número de zona con su área en el centroide, en una capa por tipo
+    """
+    lineas = ["0", "SECTION", "2", "ENTITIES"]
+    for zona in zonas:
+        capa = "ZONA_" + zona["tipo"].upper().replace(" ", "_")
+        for anillo in zona.get("poligono", []):
+            lineas += ["0", "POLYLINE", "8", capa, "66", "1",
+                       "10", "0.0", "20", "0.0", "30", "0.0", "70", "1"]
+            for x, y in anillo:
+                lineas += ["0", "VERTEX", "8", capa, "10", f"{x:.3f}", "20", f"{y:.3f}", "30", "0.0"]
+            lineas += ["0", "SEQEND", "8", capa]
+        x, y = zona["centroide"]
+        lineas += ["0", "TEXT", "8", capa, "10", f"{x:.3f}", "20", f"{y:.3f}", "30", "0.0",
+                   "40", f"{altura_texto:.2f}", "1", f"Z{zona['id']} {zona['area_m2']:.1f} m2"]
+    lineas += ["0", "ENDSEC", "0", "EOF"]
+
+    directorio = os.path.dirname(ruta_dxf)
+    if directorio:
+        os.makedirs(directorio, exist_ok=True)
+    with open(ruta_dxf, "w", encoding="utf-8") as f:
+        f.write("\n".join(lineas) + "\n")
+    return ruta_dxf
+
+if __name__ == "__main__":
+    import time
+    # Prueba del módulo: 10⁷ celdas con manchas críticas aleatorias
+    rng = np.random.default_rng(0)
+    n = 3200
+    ruido = rng.normal(0, 1, (n // 8, n // 8))
+    mascara = np.kron(ruido > 1.8, np.ones((8, 8), dtype=bool))
+    X, Y = np.meshgrid(np.arange(n) * 0.5, np.arange(n) * 0.5)
+    mdt = {'X_grid': X, 'Y_grid': Y, 'Z_grid': np.zeros((n, n)), 'resolution': 0.5}
+    inicio = time.perf_counter()
+    zonas = delimitar_zonas(mdt, {"Pendiente excesiva": mascara}, area_minima_m2=20.0)
+    print(f"✅ {len(zonas)} zonas sobre {n * n / 1e6:.1f} M de celdas en {time.perf_counter() - inicio:.2f} s")
+    for zona in zonas[:3]:
+        print(f"   Z{zona['id']}: {zona['area_m2']} m² en {zona['centroide']}, "
+              f"{len(zona['poligono'])} anillo(s)")
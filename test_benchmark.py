@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+TEST BENCHMARK LIDAR
+====================
+
+Verifica el cronómetro por etapas, el motor de bucle de referencia y el
+reporte del banco de pruebas del flujo LiDAR
+"""
+
+import json
+import os
+import tempfile
+import time
+import tracemalloc
+import numpy as np
+
+from MODULO_BENCHMARK import (
+    ETAPAS, Cronometro, ejecutar_benchmark, escribir_reporte_benchmark, mdt_bucle_referencia
+)
+from MODULO_FILTRO_SUELO import crear_mdt_por_celdas
+
+def test_cronometro():
+    """Acumula tiempos por etapa y mide memoria solo con tracemalloc activo"""
+    print("🔍 Probando cronómetro por etapas...")
+    cronometro = Cronometro()
+    for _ in range(2):
+        with cronometro.etapa("espera"):
+            time.sleep(0.02)
+    assert cronometro.etapas["espera"]["tiempo_s"] >= 0.04
+    assert "memoria_pico_mb" not in cronometro.etapas["espera"]
+    tracemalloc.start()
+    try:
+        with cronometro.etapa("arreglo"):
+            arreglo = np.ones(2000000)
+        del arreglo
+    finally:
+        tracemalloc.stop()
+    assert 15.0 <= cronometro.etapas["arreglo"]["memoria_pico_mb"] <= 20.0
+    resumen = cronometro.resumen()
+    assert resumen["total_s"] >= resumen["espera"]["tiempo_s"] + resumen["arreglo"]["tiempo_s"] - 1e-3
+    print("✅ Cronómetro correcto")
+
+def test_bucle_referencia():
+    """El bucle original y el MDT por celdas coinciden en un plano"""
+    print("🔍 Probando motor de bucle de referencia...")
+    rng = np.random.default_rng(0)
+    xy = rng.uniform(0, 20, (4000, 2))
+    points = np.column_stack([xy, 3850 + 0.05 * xy[:, 0] - 0.02 * xy[:, 1]])
+    bucle = mdt_bucle_referencia(points, 2.0)
+    celdas = crear_mdt_por_celdas(points, 2.0)
+    assert bucle['Z_grid'].shape == (10, 10)
+    plano = 3850 + 0.05 * bucle['X_grid'] - 0.02 * bucle['Y_grid']
+    assert np.abs(bucle['Z_grid'][1:-1, 1:-1] - plano[1:-1, 1:-1]).max() < 0.02
+    assert abs(np.nanmean(celdas['Z_grid']) - bucle['Z_grid'].mean()) < 0.1
+    print("✅ Motor de bucle correcto")
+
+def test_benchmark_por_etapas():
+    """Casos por tamaño, resolución y motor con las siete etapas y la aceleración"""
+    print("🔍 Probando benchmark por etapas...")
+    resultado = ejecutar_benchmark(puntos=(20000, 60000), resoluciones=(2.0,),
+                                   motores=("bucle", "binned", "idw"), limite_bucle=1e8)
+    assert resultado["estado"].startswith("✅")
+    casos = resultado["casos"]
+    assert len(casos) == 6
+    assert [(c["puntos"], c["motor"]) for c in casos][:3] == [(20000, "bucle"), (20000, "binned"), (20000, "idw")]
+    completo = casos[1]
+    assert set(ETAPAS) <= set(completo["etapas"])
+    assert all(completo["etapas"][e]["memoria_pico_mb"] >= 0 for e in ETAPAS)
+    assert 0 < completo["puntos_suelo"] < completo["puntos"]
+    assert "omitido" in casos[3] and "etapas" not in casos[3]
+    comparaciones = resultado["comparaciones"]
+    assert [c["motor"] for c in comparaciones] == ["binned", "idw"]
+    assert comparaciones[0]["aceleracion_mdt"] > 10
+    assert not tracemalloc.is_tracing()
+    print("✅ Benchmark por etapas correcto")
+
+def test_reporte_y_flujos():
+    """Reporte JSON/Markdown con los tiempos de los flujos completos"""
+    print("🔍 Probando reporte de benchmark...")
+    with tempfile.TemporaryDirectory() as carpeta:
+        resultado = ejecutar_benchmark(puntos=(10000,), resoluciones=(2.0,), motores=("binned",),
+                                       medir_memoria=False, flujos_completos=True,
+                                       directorio=os.path.join(carpeta, "casos"))
+        assert "memoria_pico_mb" not in resultado["casos"][0]["etapas"]["mdt"]
+        flujos = resultado["flujos_completos"]
+        assert {"lectura", "filtro_suelo", "mdt", "curvas", "drenaje"} <= set(flujos["process_laz_advanced"]["etapas"])
+        assert flujos["procesamiento_completo_lidar"]["etapas"]["total_s"] > 0
+        assert os.path.exists(os.path.join(carpeta, "casos", "mdt_terreno.tif"))
+        reporte = escribir_reporte_benchmark(resultado, os.path.join(carpeta, "reporte", "benchmark"))
+        with open(reporte["json"], encoding="utf-8") as f:
+            assert json.load(f)["casos"][0]["motor"] == "binned"
+        with open(reporte["markdown"], encoding="utf-8") as f:
+            texto = f.read()
+        assert "| 10,000 | 2 | binned |" in texto and "## process_laz_advanced" in texto
+    print("✅ Reporte de benchmark correcto")
+
+def main():
+    """Función principal de pruebas"""
+    print("🧪 TEST BENCHMARK LIDAR")
+    print("=" * 50)
+    test_cronometro()
+    test_bucle_referencia()
+    test_benchmark_por_etapas()
+    test_reporte_y_flujos()
+    print("\n🎉 ¡Todas las pruebas de benchmark pasaron!")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+TEST CACHE RASTER
+=================
+
+Verifica la caché de MDT y capas derivadas en memoria mapeada
+"""
+
+import os
+import tempfile
+import numpy as np
+
+from MODULO_CACHE_RASTER import CacheRaster, clave_cache, hash_contenido
+
+def test_clave_por_contenido_y_parametros():
+    """La clave depende del contenido del archivo y de los parámetros"""
+    print("🔍 Probando claves de caché...")
+    with tempfile.TemporaryDirectory() as directorio:
+        rutas = []
+        for nombre, contenido in (("a.las", b"LASF-1"), ("b.las", b"LASF-1"), ("c.las", b"LASF-2")):
+            ruta = os.path.join(directorio, nombre)
+            with open(ruta, "wb") as f:
+                f.write(contenido)
+            rutas.append(ruta)
+        hashes = [hash_contenido(ruta, bloque=2) for ruta in rutas]
+    assert hashes[0] == hashes[1] != hashes[2]
+    assert clave_cache(hashes[0], {"grilla": 100}) == clave_cache(hashes[1], {"grilla": 100})
+    assert clave_cache(hashes[0], {"grilla": 100}) != clave_cache(hashes[0], {"grilla": 200})
+    print("✅ Claves correctas")
+
+def test_guardar_y_cargar_memmap():
+    """Las capas se reabren como memoria mapeada con sus metadatos"""
+    print("🔍 Probando guardado y carga...")
+    Z = np.arange(12.0).reshape(3, 4)
+    with tempfile.TemporaryDirectory() as directorio:
+        cache = CacheRaster(directorio)
+        clave = clave_cache("levantamiento", {"resolucion": 1.0})
+        assert cache.cargar(clave) is None
+        cache.guardar(clave, {"mdt": Z, "pendiente": Z / 10}, {"stats": {"puntos": np.int64(5)}})
+        entrada = cache.cargar(clave)
+        assert isinstance(entrada["capas"]["mdt"], np.memmap)
+        assert np.array_equal(entrada["capas"]["mdt"], Z)
+        assert entrada["metadatos"]["stats"]["puntos"] == 5
+        assert entrada["metadatos"]["capas"]["pendiente"]["forma"] == [3, 4]
+        assert list(cache.cargar(clave, capas=["mdt"])["capas"]) == ["mdt"]
+        del entrada
+    print("✅ Guardado y carga correctos")
+
+def test_publicacion_concurrente():
+    """Dos escritores de la misma clave no se sobrescriben ni dejan temporales"""
+    print("🔍 Probando publicación concurrente...")
+    with tempfile.TemporaryDirectory() as directorio:
+        cache = CacheRaster(directorio)
+        primero, segundo = cache.preparar("clave"), cache.preparar("clave")
+        assert primero != segundo
+        cache.publicar("clave", primero, {"mdt": np.zeros((2, 2))})
+        cache.publicar("clave", segundo, {"mdt": np.ones((2, 2))})
+        assert np.array_equal(cache.cargar("clave")["capas"]["mdt"], np.zeros((2, 2)))
+        assert os.listdir(directorio) == ["clave"]
+    print("✅ Publicación atómica correcta")
+
+def test_limpiar_menos_usadas():
+    """limpiar() elimina primero las entradas menos usadas"""
+    print("🔍 Probando limpieza de la caché...")
+    with tempfile.TemporaryDirectory() as directorio:
+        cache = CacheRaster(directorio)
+        for i, clave in enumerate(("vieja", "nueva")):
+            cache.guardar(clave, {"mdt": np.zeros((100, 100))})
+            os.utime(os.path.join(directorio, clave, "metadatos.json"), (1000 + i, 1000 + i))
+        tamano = cache.entradas()[0]["bytes"]
+        assert cache.limpiar(max_bytes=tamano) == ["vieja"]
+        assert [e["clave"] for e in cache.entradas()] == ["nueva"]
+    print("✅ Limpieza correcta")
+
+def main():
+    """Función principal de pruebas"""
+    print("🧪 TEST CACHE RASTER")
+    print("=" * 50)
+    test_clave_por_contenido_y_parametros()
+    test_guardar_y_cargar_memmap()
+    test_publicacion_concurrente()
+    test_limpiar_menos_usadas()
+    print("\n🎉 ¡Todas las pruebas de caché pasaron!")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+TEST CACHE SATELITAL
+====================
+
+Verifica las claves por consulta, el vencimiento (TTL), el modo sin
+conexión, el desalojo por tamaño y el uso de la caché en la extracción
+por lotes
+"""
+
+import os
+import tempfile
+import threading
+import time
+
+from MODULO_CACHE_SATELITAL import CANDADOS_CLAVE, CacheConsultasSatelitales, ErrorSinCache, clave_consulta
+from MODULO_EE_LOCAL import EELocal, _DatosLocales
+from MODULO_EXTRACCION_LOTES import centroides_manzanas, extraer_lote
+
+def test_claves_y_aciertos():
+    """La misma consulta acierta; cualquier parámetro distinto es otra clave"""
+    print("🔍 Probando claves y aciertos...")
+    ee = EELocal()
+    punto = ee.Geometry.Point([-70.1234, -15.2345])
+    base = clave_consulta("COPERNICUS/S2_SR", punto, "2023-01-01", "2023-12-31", "mean", 30)
+    assert base == clave_consulta("COPERNICUS/S2_SR", {"type": "Point", "coordinates": [-70.12340000001, -15.2345]},
+                                  "2023-01-01", "2023-12-31", "mean", 30)
+    otras = [clave_consulta("UCSB-CHG/CHIRPS/DAILY", punto, "2023-01-01", "2023-12-31", "mean", 30),
+             clave_consulta("COPERNICUS/S2_SR", ee.Geometry.Point([-70.1235, -15.2345]), "2023-01-01", "2023-12-31"),
+             clave_consulta("COPERNICUS/S2_SR", punto, "2023-01-01", "2023-06-30", "mean", 30),
+             clave_consulta("COPERNICUS/S2_SR", punto, "2023-01-01", "2023-12-31", "median", 30),
+             clave_consulta("COPERNICUS/S2_SR", punto, "2023-01-01", "2023-12-31", "mean", 10)]
+    assert len({base, *otras}) == 6
+
+    llamadas = []
+    with tempfile.TemporaryDirectory() as carpeta:
+        cache = CacheConsultasSatelitales(carpeta)
+        for _ in range(3):
+            valor = cache.consultar("COPERNICUS/S2_SR", punto, "2023-01-01", "2023-12-31",
+                                    lambda: llamadas.append(1) or {"NDVI": 0.31, "serie": [1, 2]})
+            assert valor == {"NDVI": 0.31, "serie": [1, 2]}
+        assert len(llamadas) == 1
+        persistente = CacheConsultasSatelitales(carpeta)
+        assert persistente.consultar("COPERNICUS/S2_SR", punto, "2023-01-01", "2023-12-31", None)["NDVI"] == 0.31
+        estadisticas = cache.estadisticas()
+        assert estadisticas["aciertos"] == 2 and estadisticas["fallos"] == 1
+        assert estadisticas["tasa_aciertos"] == 0.667 and estadisticas["entradas"] == 1
+    print("✅ Claves y aciertos correctos")
+
+def test_vencimiento_y_sin_conexion():
+    """Las vencidas se recalculan; sin conexión se sirven o se informa la falta"""
+    print("🔍 Probando vencimiento y modo sin conexión...")
+    valores = iter(range(10))
+    with tempfile.TemporaryDirectory() as carpeta:
+        cache = CacheConsultasSatelitales(carpeta, ttl_s=0.1)
+        consultar = lambda: cache.consultar("NASA/SMAP/SPL4SMGP/007", [-70.12, -15.23], "2023-01-01",
+                                            "2023-02-01", lambda: next(valores))
+        assert consultar() == 0 and consultar() == 0
+        time.sleep(0.15)
+        assert consultar() == 1
+        assert cache.estadisticas()["vencidas"] == 1
+
+        time.sleep(0.15)
+        sin_conexion = CacheConsultasSatelitales(carpeta, sin_conexion=True)
+        assert sin_conexion.consultar("NASA/SMAP/SPL4SMGP/007", [-70.12, -15.23], "2023-01-01", "2023-02-01",
+                                      lambda: next(valores)) == 1
+        assert sin_conexion.estadisticas()["vencidas_servidas"] == 1
+        try:
+            sin_conexion.consultar("NASA/SMAP/SPL4SMGP/007", [-70.12, -15.23], "2024-01-01", "2024-02-01",
+                                   lambda: next(valores))
+            assert False
+        except ErrorSinCache as e:
+            assert "2024-01-01" in str(e)
+        assert next(valores) == 2
+    print("✅ Vencimiento y modo sin conexión correctos")
+
+def test_desalojo_por_tamano():
+    """Sobre el límite salen primero las vencidas y luego las menos usadas"""
+    print("🔍 Probando desalojo por tamaño...")
+    with tempfile.TemporaryDirectory() as carpeta:
+        cache = CacheConsultasSatelitales(carpeta, max_bytes=10 ** 6)
+        claves = {}
+        for i, ttl in enumerate([0.01, 60, 60, 60]):
+            cache.consultar("ERA5", [i, 0], "2023-01-01", "2023-02-01", lambda: list(range(50)), ttl_s=ttl)
+            claves[i] = clave_consulta("ERA5", [i, 0], "2023-01-01", "2023-02-01")
+            time.sleep(0.05)
+        os.utime(os.path.join(carpeta, f"{claves[1]}.json"), (time.time() - 100, time.time() - 100))
+        tamano = cache.estadisticas()["bytes"] // 4
+        eliminadas = cache.limpiar(max_bytes=tamano * 2 + 10)
+        assert eliminadas == [claves[0], claves[1]]
+        restantes = {e["clave"] for e in cache.entradas()}
+        assert restantes == {claves[2], claves[3]}
+        assert cache.estadisticas()["desalojadas"] == 2
+
+        # Bajo el límite, guardar no lee las entradas; los candados no crecen con las claves
+        def sin_leer():
+            raise AssertionError("entradas leídas sin necesidad de desalojo")
+        cache.entradas = sin_leer
+        for i in range(200):
+            cache.consultar("ERA5", [i, 1], "2023-01-01", "2023-02-01", lambda: [1.0])
+        assert len(cache._candados_clave) == CANDADOS_CLAVE
+    print("✅ Desalojo por tamaño correcto")
+
+def test_lotes_con_cache_y_concurrencia():
+    """La segunda extracción no toca al proveedor; una clave se calcula una vez"""
+    print("🔍 Probando caché en la extracción por lotes...")
+    llamadas = []
+
+    class Proveedor(EELocal):
+        class data:
+            @staticmethod
+            def computePixels(solicitud):
+                llamadas.append(1)
+                return _DatosLocales.computePixels(solicitud)
+
+    manzanas = centroides_manzanas((-70.1234, -15.2345), 6, 6)
+    with tempfile.TemporaryDirectory() as carpeta:
+        cache = CacheConsultasSatelitales(carpeta)
+        primera = extraer_lote(Proveedor(), manzanas, "2023-06-01", "2023-09-01", ventana_dias=31, cache=cache)
+        hechas = len(llamadas)
+        assert hechas == primera["solicitudes"]
+        segunda = extraer_lote(Proveedor(), manzanas, "2023-06-01", "2023-09-01", ventana_dias=31, cache=cache)
+        assert len(llamadas) == hechas and segunda["tabla"].equals(primera["tabla"])
+
+        sin_conexion = CacheConsultasSatelitales(carpeta, sin_conexion=True)
+        otra = extraer_lote(Proveedor(), manzanas, "2024-06-01", "2024-07-01", variables=["temperatura"],
+                            cache=sin_conexion)
+        assert otra["grupos_sin_datos"] == otra["solicitudes"] == 1 and len(llamadas) == hechas
+
+        lentas = []
+
+        def calcular():
+            time.sleep(0.1)
+            lentas.append(1)
+            return 42
+        hilos = [threading.Thread(target=cache.consultar, args=("X", [0, 0], "a", "b", calcular)) for _ in range(5)]
+        for hilo in hilos:
+            hilo.start()
+        for hilo in hilos:
+            hilo.join()
+        assert len(lentas) == 1
+    print("✅ Caché en la extracción por lotes correcta")
+
+def main():
+    """Función principal de pruebas"""
+    print("🧪 TEST CACHE SATELITAL")
+    print("=" * 50)
+    test_claves_y_aciertos()
+    test_vencimiento_y_sin_conexion()
+    test_desalojo_por_tamano()
+    test_lotes_con_cache_y_concurrencia()
+    print("\n🎉 ¡Todas las pruebas de caché satelital pasaron!")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+TEST CALIBRACIÓN CBR
+====================
+
+Verifica la lectura de ensayos de campo, el ajuste conjunto de modelos
+con validación cruzada, la calibración desde el almacén satelital y el
+uso de la correlación publicada por el clasificador de subrasante
+"""
+
+import os
+import tempfile
+import numpy as np
+import pandas as pd
+
+import MODULO_CLASIFICACION_SUBRASANTE
+from MODULO_CALIBRACION_CBR import ajustar_modelos, calibrar_region, leer_ensayos_cbr, pliegues_validacion
+from MODULO_CLASIFICACION_SUBRASANTE import (TABLA_HUMEDAD_FACTOR, TABLA_NDVI_CBR, aplicar_tabla, cargar_tabla_cbr,
+                                             cbr_desde_ndvi, mapa_subrasante_proyecto)
+from MODULO_EE_LOCAL import EELocal
+from MODULO_SERIES_SATELITALES import POLIGONO_SAN_MIGUEL, AlmacenSeriesSatelitales
+
+def test_lectura_ensayos():
+    """Alias de columnas, CSV, tuplas y descarte de filas inválidas"""
+    print("🔍 Probando lectura de ensayos CBR...")
+    tuplas = leer_ensayos_cbr([(-70.12, -15.23, 6.5), (-70.121, -15.231, 0.0), (-70.122, -15.232, 8.1)])
+    assert list(tuplas.columns) == ["lon", "lat", "CBR"] and tuplas["CBR"].tolist() == [6.5, 8.1]
+    dicts = leer_ensayos_cbr([{"longitud": -70.12, "latitud": -15.23, "cbr": "7.2", "calicata": "C-1"},
+                              {"longitud": -70.13, "latitud": -15.24, "cbr": "s/d", "calicata": "C-2"}])
+    assert len(dicts) == 1 and dicts.loc[0, "CBR"] == 7.2 and dicts.loc[0, "calicata"] == "C-1"
+    with tempfile.TemporaryDirectory() as carpeta:
+        ruta = os.path.join(carpeta, "ensayos.csv")
+        pd.DataFrame({"x": [-70.12, -70.125], "y": [-15.23, -15.235], "CBR_lab": [5.0, 9.0]}).to_csv(ruta, index=False)
+        assert leer_ensayos_cbr(ruta)["lat"].tolist() == [-15.23, -15.235]
+    try:
+        leer_ensayos_cbr([{"lon": -70.12, "lat": -15.23}])
+        assert False
+    except ValueError as e:
+        assert "CBR" in str(e)
+    print("✅ Lectura de ensayos correcta")
+
+def test_ajuste_conjunto_y_validacion():
+    """Los coeficientes y el error de validación coinciden con ajustes uno a uno"""
+    print("🔍 Probando ajuste conjunto con validación cruzada...")
+    rng = np.random.default_rng(11)
+    ndvi = rng.uniform(0.1, 0.7, 60)
+    humedad = rng.uniform(0.1, 0.4, 60)
+    cbr = np.exp(0.8 + 3.0 * ndvi - 1.5 * humedad) * rng.lognormal(0, 0.05, 60)
+    ajuste = ajustar_modelos(ndvi, cbr, humedad, pliegues=5, semilla=2)
+    assert set(ajuste["modelos"]) == {"lineal", "cuadratico", "exponencial", "exponencial_cuadratico",
+                                      "lineal_humedad", "exponencial_humedad"}
+    assert ajuste["mejor"] == "exponencial_humedad"
+    assert np.allclose(ajuste["modelos"]["cuadratico"]["coeficientes"], np.polyfit(ndvi, cbr, 2)[::-1])
+    assert np.allclose(ajuste["modelos"]["exponencial"]["coeficientes"], np.polyfit(ndvi, np.log(cbr), 1)[::-1])
+
+    pliegue = pliegues_validacion(60, 5, 2)
+    estimado = np.empty(60)
+    for f in range(5):
+        a, b = np.polyfit(ndvi[pliegue != f], cbr[pliegue != f], 1)
+        estimado[pliegue == f] = a * ndvi[pliegue == f] + b
+    assert abs(ajuste["modelos"]["lineal"]["rmse_cv"] - np.sqrt(np.mean((estimado - cbr) ** 2))) < 1e-3
+    assert all(m["rmse_cv"] < ajuste["tabla_actual"]["rmse"] for m in ajuste["modelos"].values())
+    assert all(m["r2_cv"] <= m["r2"] + 1e-9 for m in ajuste["modelos"].values())
+
+    sin_humedad = ajustar_modelos(ndvi, cbr, np.full(60, 0.2))
+    assert not any("humedad" in n for n in sin_humedad["modelos"])
+    try:
+        ajustar_modelos(ndvi[:3], cbr[:3])
+        assert False
+    except ValueError:
+        pass
+    print("✅ Ajuste conjunto y validación cruzada correctos")
+
+def test_calibracion_desde_almacen():
+    """Índices colocalizados del almacén, ajuste, publicación y recarga"""
+    print("🔍 Probando calibración de una región...")
+    actual = os.getcwd()
+    with tempfile.TemporaryDirectory() as carpeta:
+        almacen = AlmacenSeriesSatelitales(os.path.join(carpeta, "series"))
+        almacen.ingerir_variables(EELocal(), (-70.135, -15.245, -70.112, -15.224), "2023-04-01", "2023-10-01",
+                                  ["ndvi", "humedad_suelo"])
+        rng = np.random.default_rng(5)
+        puntos = np.column_stack([rng.uniform(-70.129, -70.118, 25), rng.uniform(-15.239, -15.230, 25)])
+        ndvi = almacen.valores_puntos("ndvi", puntos, "2023-04-01", "2023-09-30")["media"]
+        zonal = almacen.consulta_zonal("ndvi", [tuple(puntos[3])], "2023-04-01", "2023-09-30")
+        assert abs(ndvi[3] - zonal["resumen"]["media_periodo"]) < 1e-4
+        cbr = 2.0 + 25.0 * ndvi + rng.normal(0, 0.3, 25)
+
+        try:
+            os.chdir(carpeta)
+            assert cargar_tabla_cbr() is TABLA_NDVI_CBR
+            calibracion = calibrar_region(almacen, np.column_stack([puntos, cbr]).tolist(), "2023-04-01",
+                                          "2023-09-30", publicar="calibracion_ndvi_cbr.json")
+            tabla = cargar_tabla_cbr()
+            assert np.allclose(cbr_desde_ndvi(ndvi), cbr_desde_ndvi(ndvi, tabla_cbr=tabla))
+            mapa = mapa_subrasante_proyecto(EELocal(), POLIGONO_SAN_MIGUEL, "2023-04-01", "2023-10-01")
+            leida = MODULO_CLASIFICACION_SUBRASANTE._tablas_publicadas[os.path.abspath("calibracion_ndvi_cbr.json")]
+            cargar_tabla_cbr()["coeficientes"][0] = 99.0
+            assert MODULO_CLASIFICACION_SUBRASANTE._tablas_publicadas[os.path.abspath("calibracion_ndvi_cbr.json")] is leida
+            assert cargar_tabla_cbr() == tabla
+        finally:
+            os.chdir(actual)
+        assert calibracion["estado"].startswith("✅") and calibracion["ensayos"] == 25
+        assert calibracion["tiempo_s"] < 5 and not any("humedad" in n for n in calibracion["modelos"])
+        assert calibracion["muestras"]["ndvi"].tolist() == ndvi.tolist()
+        assert tabla == calibracion["tabla"] and tabla["modo"] == "regresion"
+        assert tabla["modelo"] in ("lineal", "cuadratico")
+        assert abs(tabla["coeficientes"][1] - 25.0) < 5.0
+
+        validos = ~np.isnan(mapa["ndvi"])
+        assert np.isnan(mapa["cbr"][~validos]).all()
+        ndvi_mapa = np.clip(mapa["ndvi"][validos], *tabla["rango_ndvi"])
+        modelo = sum(c * ndvi_mapa ** i for i, c in enumerate(tabla["coeficientes"]))
+        factor = aplicar_tabla(mapa["humedad"][validos], TABLA_HUMEDAD_FACTOR)
+        assert np.allclose(mapa["cbr"][validos], np.maximum(modelo, 1.0) * factor)
+        sin_almacen = calibrar_region(AlmacenSeriesSatelitales(os.path.join(carpeta, "vacio")), puntos.tolist(),
+                                      "2023-04-01", "2023-09-30")
+        assert "error" in sin_almacen
+    print("✅ Calibración de una región correcta")
+
+def test_tablas_de_regresion():
+    """El clasificador evalúa regresiones, acota el NDVI y respeta la humedad"""
+    print("🔍 Probando tablas de regresión en el clasificador...")
+    lineal = {"modo": "regresion", "terminos": ["1", "ndvi"], "coeficientes": [1.0, 20.0], "respuesta": "lineal",
+              "rango_ndvi": [0.1, 0.6], "cbr_minimo": 1.0}
+    assert np.allclose(cbr_desde_ndvi([0.0, 0.3, 0.9], tabla_cbr=lineal), [3.0, 7.0, 13.0])
+    assert np.allclose(cbr_desde_ndvi([0.3], 0.3, tabla_cbr=lineal), [7.0 * 0.75])
+    assert np.isnan(cbr_desde_ndvi([np.nan], tabla_cbr=lineal)[0])
+
+    con_humedad = {"modo": "regresion", "terminos": ["1", "ndvi", "humedad"], "coeficientes": [1.0, 2.0, -1.0],
+                   "respuesta": "log", "rango_ndvi": [0.0, 1.0]}
+    cbr = cbr_desde_ndvi(np.array([[0.5, 0.5]]), np.array([[0.1, 0.4]]), tabla_cbr=con_humedad)
+    assert np.allclose(cbr, np.exp([[1.9, 1.6]]))
+    try:
+        cbr_desde_ndvi([0.5], tabla_cbr=con_humedad)
+        assert False
+    except ValueError:
+        pass
+    print("✅ Tablas de regresión correctas")
+
+def main():
+    """Función principal de pruebas"""
+    print("🧪 TEST CALIBRACIÓN CBR")
+    print("=" * 50)
+    test_lectura_ensayos()
+    test_ajuste_conjunto_y_validacion()
+    test_calibracion_desde_almacen()
+    test_tablas_de_regresion()
+    print("\n🎉 ¡Todas las pruebas de calibración CBR pasaron!")
+
+if __name__ == "__main__":
+    main()
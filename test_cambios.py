@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+TEST DETECCIÓN DE CAMBIOS MULTITEMPORAL
+=======================================
+
+Verifica el corregistro de épocas, el nivel de detección y el etiquetado
+de zonas de asentamiento por teselas
+"""
+
+import numpy as np
+
+from MODULO_CAMBIOS import detectar_cambios
+from MODULO_ZONAS import etiquetar_por_teselas
+
+def mdt_funcion(funcion, x0: float = 0.0, y0: float = 0.0, largo: float = 200.0,
+                ancho: float = 150.0, resolucion: float = 0.5):
+    """MDT con cotas dadas por una función de (x, y) en los centros de celda"""
+    x = x0 + np.arange(0, largo, resolucion) + resolucion / 2
+    y = y0 + np.arange(0, ancho, resolucion) + resolucion / 2
+    X, Y = np.meshgrid(x, y)
+    return {'X_grid': X, 'Y_grid': Y, 'Z_grid': funcion(X, Y), 'resolution': resolucion}
+
+def terreno(X, Y):
+    """Calle inclinada"""
+    return 3850 + 0.02 * X - 0.01 * Y
+
+def test_asentamiento_y_levantamiento():
+    """Una cubeta de asentamiento y un levantamiento con su volumen y posición"""
+    print("🔍 Probando zonas de asentamiento y levantamiento...")
+    cubeta = lambda X, Y: -0.3 * np.exp(-((X - 60) ** 2 + (Y - 70) ** 2) / 10 ** 2)
+    domo = lambda X, Y: 0.2 * np.exp(-((X - 150) ** 2 + (Y - 40) ** 2) / 6 ** 2)
+    antes = mdt_funcion(terreno)
+    despues = mdt_funcion(lambda X, Y: terreno(X, Y) + cubeta(X, Y) + domo(X, Y))
+    resultado = detectar_cambios(antes, despues, sigma_anterior=0.03, sigma_posterior=0.03)
+    lod = 1.959964 * np.sqrt(2) * 0.03
+    assert abs(resultado["lod_medio_m"] - lod) < 1e-4
+    assert resultado["sesgo_vertical_m"] == 0 and resultado["total_zonas"] == 2
+    asentamiento, levantamiento = resultado["zonas"]
+    assert asentamiento["tipo"] == "Asentamiento" and levantamiento["tipo"] == "Levantamiento"
+    dz = cubeta(antes['X_grid'], antes['Y_grid'])
+    esperado = dz[dz < -lod].sum() * 0.25
+    assert abs(asentamiento["volumen_m3"] - esperado) < 0.01
+    assert abs(resultado["volumen_asentamiento_m3"] + esperado) < 0.01
+    assert np.allclose(asentamiento["centroide"], (60, 70), atol=0.01)
+    assert abs(asentamiento["dz_extremo_m"] + 0.3) < 0.01
+    assert np.allclose(levantamiento["centroide"], (150, 40), atol=0.01)
+    x_min, y_min, x_max, y_max = asentamiento["bbox"]
+    assert x_min < 60 < x_max and y_min < 70 < y_max
+    assert asentamiento["incertidumbre_volumen_m3"] > 0
+    print("✅ Zonas detectadas correctamente")
+
+def test_union_entre_teselas():
+    """Un anillo y una diagonal que cruzan teselas siguen siendo una sola zona"""
+    print("🔍 Probando unión de etiquetas entre teselas...")
+    yy, xx = np.mgrid[0:300, 0:300]
+    radio = np.hypot(xx - 150, yy - 150)
+    clase = np.zeros((300, 300), dtype=np.int8)
+    clase[(radio > 90) & (radio < 96)] = 1
+    diagonal = np.arange(20, 120)
+    clase[diagonal, diagonal] = 2
+    clase[250:260, 10:280] = 1
+    valor = np.where(clase > 0, -(xx + 1.0), 0.0)
+    resultados = []
+    for tesela in (1000, 64, 7):
+        resultado = etiquetar_por_teselas(300, 300, lambda f0, f1, c0, c1: (
+            clase[f0:f1, c0:c1], {"v": valor[f0:f1, c0:c1]}), tesela, devolver_grilla=True)
+        resultados.append(resultado)
+        assert resultado["total"] == 3
+        assert sorted(resultado["celdas"].tolist()) == [100, 2700, int((clase == 1).sum()) - 2700]
+        orden = np.argsort(resultado["celdas"])
+        assert resultado["clase"][orden].tolist() == [2, 1, 1]
+        assert np.isclose(resultado["suma_v"].sum(), valor.sum())
+        assert np.isclose(resultado["min_v"].min(), valor.min())
+        anillo = orden[2]
+        assert resultado["caja"][anillo].tolist() == [55, 245, 55, 245]
+        assert np.array_equal(resultado["etiquetas"] > 0, clase > 0)
+    assert resultados[2]["teselas"] == 43 * 43
+    cuatro = etiquetar_por_teselas(300, 300, lambda f0, f1, c0, c1: (clase[f0:f1, c0:c1], {}),
+                                   7, conectividad=4)
+    assert cuatro["total"] > 100
+    print("✅ Unión entre teselas correcta")
+
+def test_corregistro_y_sesgo():
+    """Épocas con distinta resolución, huella y sesgo vertical: sin cambios falsos"""
+    print("🔍 Probando corregistro de épocas...")
+    antes = mdt_funcion(terreno, resolucion=0.5)
+    despues = mdt_funcion(lambda X, Y: terreno(X, Y) + 0.07, x0=23.0, y0=-11.0,
+                          largo=240.0, ancho=120.0, resolucion=0.25)
+    despues['Z_grid'][200:240, 300:340] -= 0.25
+    resultado = detectar_cambios(antes, despues, tesela=128, devolver_grilla=True)
+    grilla = resultado["grilla"]
+    assert (grilla["x_min"], grilla["y_min"], grilla["resolucion"]) == (23.0, 0.0, 0.5)
+    assert (grilla["nx"], grilla["ny"]) == (354, 218)
+    assert abs(resultado["sesgo_vertical_m"] - 0.07) < 1e-6
+    assert resultado["total_zonas"] == 1
+    zona = resultado["zonas"][0]
+    assert zona["tipo"] == "Asentamiento" and 90 <= zona["area_m2"] <= 110
+    assert np.allclose(zona["centroide"], (23 + 80, -11 + 55), atol=0.5)
+    assert resultado["diferencia"].shape == (218, 354)
+    assert np.nanmax(np.abs(resultado["diferencia"][resultado["etiquetas"] == 0])) < 0.2
+    print("✅ Corregistro y sesgo correctos")
+
+def test_error_horizontal_en_pendiente():
+    """Un desfase horizontal en una ladera no se reporta si el LoD lo considera"""
+    print("🔍 Probando nivel de detección en pendiente...")
+    ladera = lambda X, Y: 3850 + 0.3 * X
+    antes = mdt_funcion(ladera)
+    despues = mdt_funcion(lambda X, Y: ladera(X - 0.3, Y))
+    sigmas = {"sigma_anterior": 0.02, "sigma_posterior": 0.02, "corregir_sesgo": False}
+    sin_error = detectar_cambios(antes, despues, **sigmas)
+    con_error = detectar_cambios(antes, despues, error_horizontal_m=0.3, **sigmas)
+    assert sin_error["area_asentamiento_m2"] > 0.9 * 200 * 150
+    assert con_error["total_zonas"] == 0 and con_error["area_asentamiento_m2"] == 0
+    assert con_error["lod_medio_m"] > 1.96 * np.sqrt(2) * 0.09
+    mdt = dict(antes, distancia_muestra=np.full(antes['Z_grid'].shape, 0.3))
+    assert detectar_cambios(mdt, despues, **sigmas)["total_zonas"] == 0
+    print("✅ Nivel de detección en pendiente correcto")
+
+def main():
+    """Función principal de pruebas"""
+    print("🧪 TEST DETECCIÓN DE CAMBIOS")
+    print("=" * 50)
+    test_asentamiento_y_levantamiento()
+    test_union_entre_teselas()
+    test_corregistro_y_sesgo()
+    test_error_horizontal_en_pendiente()
+    print("\n🎉 ¡Todas las pruebas de detección de cambios pasaron!")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,206 @@
+#!/usr/bin/env python3
+"""
+TEST CASO SAN MIGUEL POR ETAPAS
+===============================
+
+Verifica los checkpoints en disco del flujo por etapas, la reanudación
+tras una falla, la ejecución en procesos y el caso práctico completo
+orquestado con línea de tiempo
+"""
+
+import os
+import tempfile
+import time
+
+from MODULO_FLUJO_ETAPAS import ErrorEtapa, FlujoEtapas
+from CASO_PRACTICO_SAN_MIGUEL_COMPLETO import CasoPracticoSanMiguel
+
+def cuadrado(x):
+    """Etapa de módulo (serializable para procesos)"""
+    time.sleep(0.2)
+    return x * x
+
+def cubo(x):
+    """Etapa de módulo (serializable para procesos)"""
+    time.sleep(0.2)
+    return x ** 3
+
+def suma(cuadrado, cubo):
+    """Etapa de módulo (serializable para procesos)"""
+    return cuadrado + cubo
+
+def test_checkpoints_y_reanudacion():
+    """Una falla deja checkpoints de lo completado; otro flujo retoma desde ahí"""
+    print("🔍 Probando checkpoints y reanudación...")
+    llamadas = []
+    estado = {"fallar": True}
+
+    def lenta(x):
+        time.sleep(0.2)
+        llamadas.append("lenta")
+        return x + 1
+
+    def fragil(x):
+        llamadas.append("fragil")
+        if estado["fallar"]:
+            raise ValueError("sensor desconectado")
+        return x * 10
+
+    def lenta_corregida(x):
+        llamadas.append("lenta_corregida")
+        return x + 1
+
+    def crear(directorio, funcion_lenta=lenta, version=None):
+        flujo = FlujoEtapas("reanudable", hilos=2, directorio_checkpoints=directorio)
+        flujo.agregar("lenta", funcion_lenta, ("x",), version=version)
+        flujo.agregar("fragil", fragil, ("x",))
+        flujo.agregar("final", lambda lenta, fragil: lenta + fragil, ("lenta", "fragil"))
+        return flujo
+
+    with tempfile.TemporaryDirectory() as carpeta:
+        try:
+            crear(carpeta).ejecutar({"x": 1})
+            assert False
+        except ErrorEtapa as e:
+            assert e.etapa == "fragil" and "sensor desconectado" in str(e)
+            assert e.informe["etapas"]["lenta"]["estado"] == "ejecutada"
+            assert e.informe["pendientes"] == ["final"]
+        assert [a.split("__")[0] for a in os.listdir(carpeta)] == ["lenta"]
+
+        estado["fallar"] = False
+        llamadas.clear()
+        resultado = crear(carpeta).ejecutar({"x": 1})
+        assert resultado["valores"]["final"] == 2 + 10
+        assert llamadas == ["fragil"]
+        assert resultado["etapas"]["lenta"]["estado"] == "checkpoint"
+        assert [t["etapa"] for t in resultado["linea_tiempo"]] == ["fragil", "final"]
+
+        llamadas.clear()
+        assert crear(carpeta).ejecutar({"x": 2})["valores"]["final"] == 3 + 20
+        assert sorted(llamadas) == ["fragil", "lenta"]
+        assert len(os.listdir(carpeta)) == 3
+        # Otro código u otra versión de la etapa no reusa su checkpoint
+        llamadas.clear()
+        assert crear(carpeta, lenta_corregida).ejecutar({"x": 2})["etapas"]["lenta"]["estado"] == "ejecutada"
+        assert crear(carpeta, lenta, version="2").ejecutar({"x": 2})["etapas"]["lenta"]["estado"] == "ejecutada"
+        assert llamadas == ["lenta_corregida", "lenta"]
+        flujo = crear(carpeta)
+        flujo.limpiar_cache(checkpoints=True)
+        assert os.listdir(carpeta) == []
+    print("✅ Checkpoints y reanudación correctos")
+
+def test_ejecutor_procesos():
+    """Etapas independientes en procesos con línea de tiempo solapada"""
+    print("🔍 Probando ejecución en procesos...")
+    flujo = FlujoEtapas("procesos", hilos=2, ejecutor="procesos")
+    flujo.agregar("cuadrado", cuadrado, ("x",))
+    flujo.agregar("cubo", cubo, ("x",))
+    flujo.agregar("suma", suma, ("cuadrado", "cubo"))
+    resultado = flujo.ejecutar({"x": 3})
+    assert resultado["valores"]["suma"] == 36
+    tramos = {t["etapa"]: t for t in resultado["linea_tiempo"]}
+    assert tramos["cuadrado"]["inicio_s"] < tramos["cubo"]["fin_s"]
+    assert tramos["cubo"]["inicio_s"] < tramos["cuadrado"]["fin_s"]
+    assert tramos["suma"]["inicio_s"] >= max(tramos["cuadrado"]["fin_s"], tramos["cubo"]["fin_s"])
+    try:
+        FlujoEtapas("x", ejecutor="gpu")
+        assert False
+    except ValueError:
+        pass
+    print("✅ Ejecución en procesos correcta")
+
+def test_caso_completo_orquestado():
+    """LiDAR, satélite, suelo y tránsito antes del diseño; línea de tiempo y reporte"""
+    print("🔍 Probando caso práctico orquestado...")
+    actual = os.getcwd()
+    with tempfile.TemporaryDirectory() as carpeta:
+        try:
+            os.chdir(carpeta)
+            caso = CasoPracticoSanMiguel()
+            resultado = caso.ejecutar_caso_completo()
+            assert "error" not in resultado
+            ejecucion = resultado["ejecucion"]
+            assert sorted(ejecucion["etapas_ejecutadas"]) == sorted(
+                ["lidar", "satelital", "suelo", "transito", "diseno", "interoperabilidad", "reporte"])
+            tramos = {t["etapa"]: t for t in ejecucion["linea_tiempo"]}
+            entradas = ("lidar", "suelo", "transito")
+            assert tramos["diseno"]["inicio_s"] >= max(tramos[e]["fin_s"] for e in entradas)
+            assert tramos["satelital"]["inicio_s"] < tramos["lidar"]["fin_s"]
+            assert resultado["datos_satelitales"]["datos_satelitales"]["datos_suelo"]["NDVI_promedio"] > 0
+            # El modelo BIM toma la geometría del movimiento de tierras del diseño
+            tierras = resultado["diseno_pavimento"]["movimiento_tierras"]
+            modelo = resultado["interoperabilidad"]["revit"]["modelo_3d"]
+            assert tierras["espesor_estructura_m"] > 0.2 and "MDT" not in resultado["datos_lidar"]["resultado_procesamiento"]
+            assert modelo["area_total_m2"] == round(tierras["area_plataforma_m2"], 2)
+            assert modelo["movimiento_tierras"]["corte_m3"] == tierras["corte_total_m3"]
+            assert os.path.isfile(os.path.join("resultados_san_miguel", "reporte_completo.json"))
+            # Un caso completo borra sus checkpoints: la siguiente ejecución recalcula
+            assert os.listdir(os.path.join("resultados_san_miguel", "checkpoints")) == []
+            repetido = CasoPracticoSanMiguel().ejecutar_caso_completo()
+            assert len(repetido["ejecucion"]["etapas_ejecutadas"]) == 7
+        finally:
+            os.chdir(actual)
+    print("✅ Caso práctico orquestado correcto")
+
+def test_caso_reanuda_tras_falla():
+    """
+    Una falla en la exportación no repite LiDAR ni diseño al reanudar,
+    salvo que cambie el archivo LAS
+    """
+    print("🔍 Probando reanudación del caso práctico...")
+    actual = os.getcwd()
+    with tempfile.TemporaryDirectory() as carpeta:
+        try:
+            os.chdir(carpeta)
+            caso = CasoPracticoSanMiguel()
+            caso.directorio_resultados = os.path.join(carpeta, "caso")
+            caso.archivo_las = os.path.join(carpeta, "levantamiento.las")
+            with open(caso.archivo_las, "wb") as f:
+                f.write(b"vuelo 1")
+            checkpoints = os.path.join(carpeta, "caso", "checkpoints")
+
+            def checkpoint_lidar():
+                return [a for a in os.listdir(checkpoints) if a.startswith("lidar__")]
+
+            def exportacion_caida(datos_lidar, diseno_pavimento):
+                raise ConnectionError("servidor de licencias no disponible")
+
+            caso._etapa_interoperabilidad = exportacion_caida
+            fallido = caso.ejecutar_caso_completo(reanudar=False)
+            assert fallido["etapa_fallida"] == "interoperabilidad"
+            assert "servidor de licencias" in fallido["error"]
+            assert {"lidar", "diseno"} <= set(fallido["etapas_completadas"])
+            assert fallido["etapas_pendientes"] == ["reporte"]
+
+            # Otro vuelo en la misma ruta: el LiDAR se recalcula
+            vuelo_1 = checkpoint_lidar()
+            with open(caso.archivo_las, "wb") as f:
+                f.write(b"vuelo 2")
+            assert caso.ejecutar_caso_completo()["etapa_fallida"] == "interoperabilidad"
+            assert len(checkpoint_lidar()) == 1 and checkpoint_lidar() != vuelo_1
+
+            del caso._etapa_interoperabilidad
+            caso.datos_proyecto["fecha_estudio"] = "2099-01-01"
+            reanudado = caso.ejecutar_caso_completo()
+            assert "error" not in reanudado
+            assert reanudado["ejecucion"]["etapas_ejecutadas"] == ["interoperabilidad", "reporte"]
+            assert "lidar" in reanudado["ejecucion"]["etapas_desde_checkpoint"]
+            assert reanudado["informacion_proyecto"]["fecha_estudio"] == "2099-01-01"
+            assert os.path.isfile(os.path.join(carpeta, "caso", "resumen_ejecutivo.txt"))
+            assert os.listdir(checkpoints) == []
+        finally:
+            os.chdir(actual)
+    print("✅ Reanudación del caso práctico correcta")
+
+def main():
+    """Función principal de pruebas"""
+    print("🧪 TEST CASO SAN MIGUEL POR ETAPAS")
+    print("=" * 50)
+    test_checkpoints_y_reanudacion()
+    test_ejecutor_procesos()
+    test_caso_completo_orquestado()
+    test_caso_reanuda_tras_falla()
+    print("\n🎉 ¡Todas las pruebas del caso por etapas pasaron!")
+
+if __name__ == "__main__":
+    main()
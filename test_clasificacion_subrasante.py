@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+TEST CLASIFICACIÓN SUBRASANTE
+=============================
+
+Verifica las tablas de cortes vectorizadas NDVI/humedad → CBR y k, la
+clasificación determinista de suelos por NDVI y el mapa de subrasante
+del área de proyecto
+"""
+
+import math
+import os
+import tempfile
+import numpy as np
+
+from MODULO_CACHE_SATELITAL import CacheConsultasSatelitales
+from MODULO_CLASIFICACION_SUBRASANTE import (aplicar_tabla, categoria_subrasante, cbr_desde_ndvi, k_desde_cbr,
+                                             mapa_subrasante, mapa_subrasante_proyecto)
+from MODULO_EE_LOCAL import EELocal
+from MODULO_GOOGLE_EARTH_ENGINE import clasificar_suelo_por_ndvi, generar_reporte_satelital
+from MODULO_SERIES_SATELITALES import POLIGONO_SAN_MIGUEL
+
+def cbr_referencia(ndvi):
+    """Cadena de condiciones original de calcular_cbr_ndvi (APP.py)"""
+    if ndvi < 0.2:
+        return 2.0
+    elif ndvi < 0.3:
+        return 3.5
+    elif ndvi < 0.4:
+        return 5.0
+    elif ndvi < 0.5:
+        return 7.0
+    elif ndvi < 0.6:
+        return 9.0
+    return 12.0
+
+def test_tabla_igual_a_cadena_original():
+    """La tabla vectorizada reproduce la correlación escalar, bordes incluidos"""
+    print("🔍 Probando tabla NDVI → CBR...")
+    ndvi = np.concatenate([np.linspace(-0.2, 1.0, 1201), [0.2, 0.3, 0.4, 0.5, 0.6]])
+    assert cbr_desde_ndvi(ndvi).tolist() == [cbr_referencia(v) for v in ndvi]
+    raster = np.array([[0.1, 0.45], [np.nan, 0.7]])
+    cbr = cbr_desde_ndvi(raster)
+    assert cbr.shape == (2, 2) and np.isnan(cbr[1, 0]) and cbr[0, 1] == 7.0
+    assert k_desde_cbr(cbr)[1, 1] == 120.0
+    assert float(cbr_desde_ndvi(0.35)) == 5.0
+    print("✅ Tabla NDVI → CBR correcta")
+
+def test_clasificacion_determinista():
+    """El tipo de suelo y su CBR no cambian entre llamadas ni en el reporte"""
+    print("🔍 Probando clasificación determinista...")
+    primera = [clasificar_suelo_por_ndvi(v) for v in (0.1, 0.3, 0.5, 0.8)]
+    assert primera == [clasificar_suelo_por_ndvi(v) for v in (0.1, 0.3, 0.5, 0.8)]
+    rangos = [(8.0, 15.0), (3.0, 8.0), (8.0, 20.0), (2.0, 6.0)]
+    assert all(a <= c["CBR_estimado"] <= b for c, (a, b) in zip(primera, rangos))
+    assert primera[1]["tipo_suelo"] == "Suelo volcánico/pobre"
+    datos = {"datos_suelo": {"NDVI_promedio": 0.35, "Precipitacion_anual": 700.0}}
+    actual = os.getcwd()
+    with tempfile.TemporaryDirectory() as carpeta:
+        try:
+            os.chdir(carpeta)
+            resumen = generar_reporte_satelital(datos)["resumen_ejecutivo"]
+        finally:
+            os.chdir(actual)
+    assert resumen["CBR_estimado"] == 5.5 and resumen["recomendacion_principal"] == primera[1]["recomendacion"]
+    print("✅ Clasificación determinista correcta")
+
+def test_humedad_tablas_y_categorias():
+    """La humedad reduce el CBR; tablas lineales; categorías S0 a S5"""
+    print("🔍 Probando humedad, tablas y categorías...")
+    ndvi = np.full((2, 3), 0.45)
+    humedad = np.array([[0.10, 0.20, 0.30], [0.40, np.nan, 0.10]])
+    cbr = cbr_desde_ndvi(ndvi, humedad)
+    assert np.allclose(cbr[0], [7.0, 6.3, 5.25]) and cbr[1, 0] == 7.0 * 0.6 and np.isnan(cbr[1, 1])
+    assert np.allclose(cbr_desde_ndvi([0.45, 0.45], 0.2), [6.3, 6.3])
+    lineal = {"cortes": [0.2, 0.6], "valores": [2.0, 10.0], "modo": "lineal"}
+    assert np.allclose(aplicar_tabla([0.0, 0.4, 0.9, np.nan], lineal)[:3], [2.0, 6.0, 10.0])
+    assert np.isnan(aplicar_tabla([np.nan], lineal)[0])
+    try:
+        aplicar_tabla([0.3], {"cortes": [0.2, 0.4], "valores": [1.0, 2.0]})
+        assert False
+    except ValueError:
+        pass
+    assert categoria_subrasante([2.9, 3.0, 6.0, 9.9, 15.0, 25.0, 40.0, np.nan]).tolist() == [0, 1, 2, 2, 3, 4, 5, -1]
+    mapa = mapa_subrasante(np.array([[0.1, 0.45], [0.7, np.nan]]), area_pixel_m2=100.0)
+    assert mapa["pixeles"] == 3 and mapa["resumen_categorias"]["S0 Inadecuada"]["area_m2"] == 100.0
+    assert mapa["resumen_categorias"]["S3 Buena"]["pixeles"] == 1
+    assert mapa["estadisticas"]["k_minimo_MPa_m"] == 20.0
+    print("✅ Humedad, tablas y categorías correctas")
+
+def test_mapa_proyecto():
+    """Mapa de CBR y k de toda el área en una pasada, reproducible y con caché"""
+    print("🔍 Probando mapa de subrasante del proyecto...")
+    mapa = mapa_subrasante_proyecto(EELocal(), POLIGONO_SAN_MIGUEL, "2023-04-01", "2023-10-01")
+    assert mapa["estado"].startswith("✅")
+    assert mapa["cbr"].shape == mapa["k"].shape == mapa["categoria"].shape == mapa["ndvi"].shape
+    assert np.array_equal(np.isnan(mapa["cbr"]), np.isnan(mapa["ndvi"]))
+    assert np.nanmax(mapa["humedad"]) < 0.5
+    lados = np.ptp(np.array(POLIGONO_SAN_MIGUEL), axis=0) * 111320.0
+    area = lados[0] * lados[1] * math.cos(math.radians(-15.235))
+    assert abs(mapa["area_m2"] - area) / area < 0.03
+    assert abs(sum(c["porcentaje"] for c in mapa["resumen_categorias"].values()) - 100) < 0.1
+    with tempfile.TemporaryDirectory() as carpeta:
+        mapa_cache = mapa_subrasante_proyecto(EELocal(), POLIGONO_SAN_MIGUEL, "2023-04-01", "2023-10-01",
+                                              cache=CacheConsultasSatelitales(carpeta))
+        sin_conexion = mapa_subrasante_proyecto(None, POLIGONO_SAN_MIGUEL, "2023-04-01", "2023-10-01",
+                                                cache=CacheConsultasSatelitales(carpeta, sin_conexion=True))
+    assert np.array_equal(mapa_cache["cbr"], mapa["cbr"], equal_nan=True)
+    assert np.array_equal(sin_conexion["k"], mapa["k"], equal_nan=True)
+    nublado = mapa_subrasante_proyecto(EELocal(), POLIGONO_SAN_MIGUEL, "2023-02-01", "2023-03-01")
+    assert "error" in nublado
+    print("✅ Mapa de subrasante del proyecto correcto")
+
+def main():
+    """Función principal de pruebas"""
+    print("🧪 TEST CLASIFICACIÓN SUBRASANTE")
+    print("=" * 50)
+    test_tabla_igual_a_cadena_original()
+    test_clasificacion_determinista()
+    test_humedad_tablas_y_categorias()
+    test_mapa_proyecto()
+    print("\n🎉 ¡Todas las pruebas de clasificación de subrasante pasaron!")
+
+if __name__ == "__main__":
+    main()
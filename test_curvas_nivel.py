@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+TEST CURVAS DE NIVEL (MARCHING SQUARES)
+=======================================
+
+Verifica la extracción de polilíneas de curvas de nivel sobre el MDT
+"""
+
+import json
+import os
+import tempfile
+import numpy as np
+
+from MODULO_CURVAS_NIVEL import (
+    exportar_curvas_dxf, exportar_curvas_geojson, extraer_curvas_nivel,
+    segmentos_curvas_nivel
+)
+
+def mdt_cono(radio: int = 50):
+    """Cono z = r: la curva de nivel L es una circunferencia de radio L"""
+    x = np.arange(-radio, radio + 1, 1.0)
+    X, Y = np.meshgrid(x, x)
+    return {'X_grid': X, 'Y_grid': Y, 'Z_grid': np.hypot(X, Y), 'resolution': 1.0}
+
+def test_curvas_circulares():
+    """Las curvas del cono son circunferencias cerradas de longitud 2πL"""
+    print("🔍 Probando curvas de nivel sobre un cono...")
+    resultado = extraer_curvas_nivel(mdt_cono(), intervalo=10.0)
+    cerradas = [c for c in resultado["curvas"] if c["cerrada"]]
+    assert sorted(c["nivel"] for c in cerradas) == [10.0, 20.0, 30.0, 40.0, 50.0]
+    for curva in cerradas:
+        radios = np.hypot(curva["coordenadas"][:, 0], curva["coordenadas"][:, 1])
+        assert np.allclose(radios, curva["nivel"], atol=0.05)
+        assert np.allclose(curva["coordenadas"][0], curva["coordenadas"][-1])
+        longitud = resultado["longitud_por_nivel_m"][curva["nivel"]]
+        assert abs(longitud - 2 * np.pi * curva["nivel"]) / (2 * np.pi * curva["nivel"]) < 0.01
+    print("✅ Curvas circulares correctas")
+
+def test_resolucion_y_origen():
+    """Las coordenadas respetan el origen y la resolución del MDT"""
+    print("🔍 Probando origen y resolución...")
+    x = 230500 + np.arange(0, 40) * 0.5
+    y = 8325000 + np.arange(0, 30) * 0.5
+    X, Y = np.meshgrid(x, y)
+    Z = 3800 + 0.1 * (X - 230500)
+    resultado = extraer_curvas_nivel({'X_grid': X, 'Y_grid': Y, 'Z_grid': Z, 'resolution': 0.5},
+                                     intervalo=0.5)
+    for curva in resultado["curvas"]:
+        esperado_x = 230500 + (curva["nivel"] - 3800) / 0.1
+        assert np.allclose(curva["coordenadas"][:, 0], esperado_x)
+        assert abs(resultado["longitud_por_nivel_m"][curva["nivel"]] - 14.5) < 1e-6
+    print("✅ Origen y resolución correctos")
+
+def test_costo_independiente_de_niveles():
+    """Cada segmento corresponde a un cruce real: no hay pares vacíos"""
+    print("🔍 Probando segmentos solo en celdas cruzadas...")
+    Z = np.add.outer(np.zeros(20), np.linspace(0, 1, 20))
+    segmentos = segmentos_curvas_nivel(Z, intervalo=0.001)
+    # Cada franja vertical de celdas cruza ~ (Δz/intervalo) niveles por fila
+    assert segmentos["k"].size == 19 * 1000
+    assert segmentos_curvas_nivel(np.full((10, 10), 5.0), 0.5)["k"].size == 0
+    print("✅ Segmentos generados solo donde cruzan niveles")
+
+def test_valores_nan():
+    """Las celdas con NaN no generan segmentos"""
+    print("🔍 Probando celdas sin datos...")
+    mdt = mdt_cono(10)
+    mdt['Z_grid'][:, :10] = np.nan
+    resultado = extraer_curvas_nivel(mdt, intervalo=2.0)
+    for curva in resultado["curvas"]:
+        assert np.all(curva["coordenadas"][:, 0] >= -1.0 - 1e-9)
+    print("✅ Celdas sin datos ignoradas")
+
+def test_exportacion_dxf_geojson():
+    """Los archivos DXF y GeoJSON contienen todas las polilíneas"""
+    print("🔍 Probando exportación DXF y GeoJSON...")
+    resultado = extraer_curvas_nivel(mdt_cono(20), intervalo=2.5)
+    with tempfile.TemporaryDirectory() as directorio:
+        ruta_dxf = exportar_curvas_dxf(resultado, os.path.join(directorio, "curvas.dxf"), cada_maestra=4)
+        ruta_geojson = exportar_curvas_geojson(resultado, os.path.join(directorio, "curvas.geojson"))
+        with open(ruta_dxf, encoding="utf-8") as f:
+            contenido = f.read()
+        with open(ruta_geojson, encoding="utf-8") as f:
+            geojson = json.load(f)
+
+    assert contenido.count("\nPOLYLINE\n") == len(resultado["curvas"])
+    assert "CURVAS_MAESTRAS" in contenido
+    assert contenido.rstrip().endswith("EOF")
+    assert len(geojson["features"]) == len(resultado["curvas"])
+    assert geojson["features"][0]["geometry"]["type"] == "LineString"
+    print("✅ Exportación correcta")
+
+def main():
+    """Función principal de pruebas"""
+    print("🧪 TEST CURVAS DE NIVEL")
+    print("=" * 50)
+    test_curvas_circulares()
+    test_resolucion_y_origen()
+    test_costo_independiente_de_niveles()
+    test_valores_nan()
+    test_exportacion_dxf_geojson()
+    print("\n🎉 ¡Todas las pruebas de curvas de nivel pasaron!")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+"""
+TEST DECIMACIÓN DE NUBES DE PUNTOS
+==================================
+
+Verifica la decimación por vóxel, mínimo y aleatoria por celda
+"""
+
+import numpy as np
+
+from MODULO_DECIMACION import (
+    decimar_aleatorio_celda, decimar_minimo_celda, decimar_nube,
+    decimar_voxel, tamano_celda_objetivo
+)
+
+def nube_cuadra(n: int = 200000, semilla: int = 3):
+    """Nube de suelo en una cuadra de 100 m × 80 m"""
+    rng = np.random.default_rng(semilla)
+    return np.column_stack([rng.uniform(0, 100, n), rng.uniform(0, 80, n),
+                            3850 + rng.normal(0, 0.05, n)])
+
+def test_voxel_centroides():
+    """Cada vóxel se reemplaza por el centroide de sus puntos"""
+    print("🔍 Probando decimación por vóxel...")
+    puntos = np.array([[0.1, 0.1, 0.1], [0.3, 0.3, 0.3], [1.5, 0.2, 0.2], [1.7, 0.4, 0.4]])
+    decimados = decimar_voxel(puntos, 1.0)
+    assert decimados.shape == (2, 3)
+    assert np.allclose(decimados, [[0.2, 0.2, 0.2], [1.6, 0.3, 0.3]])
+    print("✅ Centroides por vóxel correctos")
+
+def test_minimo_por_celda():
+    """Se conserva el punto real más bajo de cada celda"""
+    print("🔍 Probando mínimo por celda...")
+    nube = nube_cuadra()
+    decimados = decimar_minimo_celda(nube, 2.0)
+    assert len(decimados) == 50 * 40
+    origen = nube[:, :2].min(axis=0)
+    celda = np.floor((nube[:, 1] - origen[1]) / 2) * 50 + np.floor((nube[:, 0] - origen[0]) / 2)
+    minimos = np.full(2000, np.inf)
+    np.minimum.at(minimos, celda.astype(int), nube[:, 2])
+    assert np.allclose(np.sort(decimados[:, 2]), np.sort(minimos))
+    assert np.all(np.isin(decimados[:, 0], nube[:, 0]))
+    print("✅ Mínimos por celda correctos")
+
+def test_aleatorio_reproducible():
+    """El muestreo aleatorio respeta el cupo por celda y la semilla"""
+    print("🔍 Probando muestreo aleatorio por celda...")
+    nube = nube_cuadra()
+    a = decimar_aleatorio_celda(nube, 2.0, puntos_por_celda=3, semilla=1)
+    b = decimar_aleatorio_celda(nube, 2.0, puntos_por_celda=3, semilla=1)
+    c = decimar_aleatorio_celda(nube, 2.0, puntos_por_celda=3, semilla=2)
+    assert len(a) == 3 * 2000
+    assert np.array_equal(a, b) and not np.array_equal(a, c)
+    origen = nube[:, :2].min(axis=0)
+    celda = (np.floor((a[:, 1] - origen[1]) / 2) * 50 + np.floor((a[:, 0] - origen[0]) / 2)).astype(int)
+    assert np.bincount(celda).max() == 3
+    print("✅ Muestreo aleatorio correcto")
+
+def test_densidad_por_consumidor():
+    """El tamaño de celda se ajusta a la grilla o al octree de Poisson"""
+    print("🔍 Probando tamaño de celda por consumidor...")
+    nube = nube_cuadra()
+    assert np.isclose(tamano_celda_objetivo(nube, celdas_grilla=100), 0.5, atol=1e-3)
+    assert np.isclose(tamano_celda_objetivo(nube, profundidad_poisson=8), 100 / 256, atol=1e-3)
+    resultado = decimar_nube(nube, "minimo", 1.0)
+    assert resultado["puntos_entrada"] == len(nube)
+    assert resultado["puntos_salida"] == len(resultado["puntos"]) <= 101 * 81
+    assert resultado["tiempo_s"] >= 0 and resultado["reduccion_pct"] > 90
+    print("✅ Densidad por consumidor correcta")
+
+def main():
+    """Función principal de pruebas"""
+    print("🧪 TEST DECIMACIÓN")
+    print("=" * 50)
+    test_voxel_centroides()
+    test_minimo_por_celda()
+    test_aleatorio_reproducible()
+    test_densidad_por_consumidor()
+    print("\n🎉 ¡Todas las pruebas de decimación pasaron!")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+TEST DISEÑO ESPACIAL
+====================
+
+Verifica los solucionadores AASHTO 93 vectorizados, el mapa de espesores
+desde rásters de CBR, la segmentación en tramos homogéneos por
+diferencias acumuladas y el diseño por tramos a lo largo de un eje
+"""
+
+import numpy as np
+
+from MODULO_CLASIFICACION_SUBRASANTE import mapa_subrasante_proyecto
+from MODULO_DISENO_ESPACIAL import (capas_flexible_aashto93, diseno_por_tramos, espesor_rigido_aashto93,
+                                    lonlat_a_local, log_w18_rigido, mapa_espesores, numero_estructural_aashto93,
+                                    raster_desde_mapa_subrasante, segmentos_homogeneos)
+from MODULO_EE_LOCAL import EELocal
+from MODULO_SERIES_SATELITALES import POLIGONO_SAN_MIGUEL
+
+def raster_calle():
+    """Calle de 600 m: CBR 4% hasta 250 m, 9% hasta 420 m y 6% al final"""
+    x = np.arange(0, 600, 2.0)
+    y = np.arange(-20, 20, 2.0)
+    X, Y = np.meshgrid(x, y)
+    cbr = np.where(X < 250, 4.0, np.where(X < 420, 9.0, 6.0)) + 0.5 * np.sin(X / 15)
+    return {"X_grid": X, "Y_grid": Y, "Z_grid": cbr, "resolution": 2.0}
+
+def test_solucionadores_aashto93():
+    """Ejemplos de la guía AASHTO 93 y residuo nulo en toda una grilla"""
+    print("🔍 Probando solucionadores AASHTO 93...")
+    # Ejemplo de la guía: W18 = 5.1e6, k = 72 pci, Ec = 5e6 psi, Sc = 650 psi, J = 3.2, ΔPSI = 1.7 → D ≈ 10"
+    D = espesor_rigido_aashto93(5.1e6, 72 / 3.6839, Ec_MPa=5e6 / 145.038, Sc_MPa=650 / 145.038,
+                                pt=2.8, S0=0.29) / 25.4
+    assert abs(D - 10.0) < 0.4
+    # Ejemplo de la guía: W18 = 5e6, R = 95%, S0 = 0.35, MR = 5000 psi, ΔPSI = 1.9 → SN ≈ 5.0
+    assert abs(numero_estructural_aashto93(5e6, 5000, ZR=-1.645, S0=0.35, pt=2.3) - 5.0) < 0.1
+
+    W18, k = np.meshgrid(np.logspace(5, 7.5, 40), np.linspace(20, 150, 30))
+    losa = espesor_rigido_aashto93(W18, k)
+    residuo = log_w18_rigido(losa / 25.4, k * 3.6839, 4.5 * 145.038, 28000 * 145.038, 3.2, 1.0,
+                             -1.645, 0.35, 4.5, 2.5) - np.log10(W18)
+    assert losa.shape == (30, 40) and losa.min() == 150.0
+    assert np.abs(residuo[losa > 150]).max() < 1e-6
+    assert (np.diff(losa, axis=1) >= 0).all() and (np.diff(losa, axis=0) <= 0).all()
+    delgada = espesor_rigido_aashto93(1e4, 150, espesor_minimo_mm=0.0)
+    assert 80 < delgada < 150
+    print("✅ Solucionadores AASHTO 93 correctos")
+
+def test_mapa_espesores():
+    """Un ráster de CBR da losa y capas por celda, igual que celda por celda"""
+    print("🔍 Probando mapa de espesores...")
+    cbr = np.array([[3.0, 5.0, np.nan], [8.0, 12.0, 20.0]])
+    mapa = mapa_espesores(cbr, 2e6)
+    assert mapa["losa_mm"].shape == mapa["SN"].shape == cbr.shape
+    assert np.isnan(mapa["losa_mm"][0, 2]) and np.isnan(mapa["subbase_cm"][0, 2])
+    for i, j in [(0, 0), (1, 1), (1, 2)]:
+        assert np.isclose(mapa["losa_mm"][i, j], espesor_rigido_aashto93(2e6, cbr[i, j] * 10))
+        assert np.isclose(mapa["SN"][i, j], capas_flexible_aashto93(2e6, cbr[i, j])["SN"])
+    validos = ~np.isnan(cbr)
+    assert (np.diff(mapa["losa_mm"][validos][[0, 1, 3, 4]]) <= 0).all()
+    capas = capas_flexible_aashto93(2e6, 5.0)
+    aporte = (0.44 * capas["carpeta_cm"] + 0.14 * capas["base_cm"] + 0.11 * capas["subbase_cm"]) / 2.54
+    assert aporte >= capas["SN"] and capas["carpeta_cm"] >= 5.08
+    por_celda = mapa_espesores(cbr, np.array([[1e6, 1e6, 1e6], [1e7, 1e7, 1e7]]), tipo="rigido")
+    assert "SN" not in por_celda and por_celda["losa_mm"][1, 0] > mapa["losa_mm"][1, 0]
+    try:
+        mapa_espesores(cbr, 1e6, tipo="adoquin")
+        assert False
+    except ValueError:
+        pass
+    print("✅ Mapa de espesores correcto")
+
+def test_tramos_homogeneos():
+    """Los límites caen en los cambios de subrasante y se respetan los cortes"""
+    print("🔍 Probando tramos homogéneos por diferencias acumuladas...")
+    rng = np.random.default_rng(3)
+    x = np.arange(0, 1000, 10.0)
+    cbr = np.where(x < 300, 4.0, np.where(x < 650, 10.0, 6.0)) + rng.normal(0, 0.4, x.size)
+    segmentacion = segmentos_homogeneos(x, cbr, longitud_minima_m=80)
+    assert np.allclose([x[i] for i in segmentacion["limites"]], [300.0, 650.0], atol=10)
+    assert abs(segmentacion["zx"][0]) < 1e-9 and abs(segmentacion["zx"][-1]) < 1e-9
+    forzado = segmentos_homogeneos(x, cbr, longitud_minima_m=80, cortes=(500.0,))
+    assert np.allclose([x[i] for i in forzado["limites"]], [300.0, 500.0, 650.0], atol=10)
+    assert 500.0 in [x[i] for i in forzado["limites"]]
+    largos = segmentos_homogeneos(x, cbr, longitud_minima_m=400)
+    assert all(x[i1] - x[i0] >= 400 for i0, i1 in largos["tramos"]) or len(largos["tramos"]) == 1
+    print("✅ Tramos homogéneos correctos")
+
+def test_diseno_por_tramos():
+    """Tabla de tramos con tránsito por segmento, ensayos de campo y mapa satelital"""
+    print("🔍 Probando diseño por tramos...")
+    raster = raster_calle()
+    eje = np.array([[0.0, 0.0], [598.0, 0.0]])
+    resultado = diseno_por_tramos(raster, eje, [(0, 300, 1.5e6), (300, 600, 4.0e6)])
+    assert resultado["estado"].startswith("✅")
+    tramos = resultado["tramos"]
+    assert [t["progresiva_inicio"] for t in tramos] == [0.0, 240.0, 300.0, 420.0]
+    assert [t["W18"] for t in tramos] == [1.5e6, 1.5e6, 4.0e6, 4.0e6]
+    assert tramos[0]["losa_mm"] > tramos[1]["losa_mm"] and tramos[3]["losa_mm"] > tramos[2]["losa_mm"]
+    assert all(t["k_diseno_MPa_m"] == round(t["CBR_diseno"] * 10, 1) for t in tramos)
+    mapa = resultado["mapa"]
+    assert mapa["losa_mm"].shape == raster["Z_grid"].shape
+    # Cada celda con el tránsito de su tramo: el mapa coincide con la tabla
+    for tramo in tramos:
+        celdas = (raster["X_grid"] > tramo["progresiva_inicio"] + 1) & (raster["X_grid"] < tramo["progresiva_fin"] - 1)
+        assert (mapa["W18"][celdas] == tramo["W18"]).all() and (mapa["tramo"][celdas] == tramo["tramo"]).all()
+    celda = (3, 10)
+    assert np.isclose(mapa["losa_mm"][celda], espesor_rigido_aashto93(1.5e6, raster["Z_grid"][celda] * 10))
+
+    ensayos = [(100.0, 2 * 4.0), (350.0, 2 * 9.0), (500.0, 2 * 6.0)]
+    calibrado = diseno_por_tramos(raster, eje, [(0, 600, 1.5e6)], ensayos=ensayos)
+    assert abs(calibrado["correccion_ensayos"] - 2.0) < 0.15
+    assert calibrado["tramos"][0]["CBR_diseno"] > 1.8 * tramos[0]["CBR_diseno"]
+    fuera = diseno_por_tramos(raster, eje + 5000, [(0, 600, 1.5e6)])
+    assert "error" in fuera and fuera["estado"].startswith("❌")
+
+    mapa = mapa_subrasante_proyecto(EELocal(), POLIGONO_SAN_MIGUEL, "2023-04-01", "2023-10-01")
+    satelital = raster_desde_mapa_subrasante(mapa)
+    eje_local = lonlat_a_local(satelital, [(-70.1290, -15.2350), (-70.1180, -15.2340)])
+    assert abs(np.hypot(*np.diff(eje_local, axis=0)[0]) - 1186.7) < 5
+    sobre_mapa = diseno_por_tramos(satelital, eje_local, [(0, 600, 1e6), (600, 2000, 3e6)])
+    assert sobre_mapa["estado"].startswith("✅") and len(sobre_mapa["tramos"]) >= 2
+    assert sobre_mapa["tramos"][-1]["progresiva_fin"] > 1180
+    print("✅ Diseño por tramos correcto")
+
+def main():
+    """Función principal de pruebas"""
+    print("🧪 TEST DISEÑO ESPACIAL")
+    print("=" * 50)
+    test_solucionadores_aashto93()
+    test_mapa_espesores()
+    test_tramos_homogeneos()
+    test_diseno_por_tramos()
+    print("\n🎉 ¡Todas las pruebas de diseño espacial pasaron!")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+"""
+TEST EXTRACCIÓN POR LOTES
+=========================
+
+Verifica la agrupación de sitios por tesela y ventana de fechas, que el
+lote dé lo mismo que consultar sitio por sitio, la concurrencia limitada
+hacia el proveedor, las ventanas sin imágenes y los errores del proveedor
+"""
+
+import threading
+import time
+
+from MODULO_EE_LOCAL import EELocal, _DatosLocales
+from MODULO_EXTRACCION_LOTES import (centroides_manzanas, extraer_lote, normalizar_sitios,
+                                     ventanas_fechas)
+from MODULO_SERIES_SATELITALES import VARIABLES_SATELITALES
+
+class ProveedorLento(EELocal):
+    """Proveedor con latencia de red que registra las solicitudes simultáneas"""
+
+    def __init__(self, latencia: float = 0.1):
+        super().__init__()
+        proveedor = self
+        self.activas = 0
+        self.maximo_activas = 0
+        self.llamadas = 0
+        candado = threading.Lock()
+
+        class Datos:
+            @staticmethod
+            def computePixels(solicitud):
+                with candado:
+                    proveedor.activas += 1
+                    proveedor.llamadas += 1
+                    proveedor.maximo_activas = max(proveedor.maximo_activas, proveedor.activas)
+                time.sleep(latencia)
+                with candado:
+                    proveedor.activas -= 1
+                return _DatosLocales.computePixels(solicitud)
+
+        self.data = Datos
+
+class ProveedorConFallas(EELocal):
+    """Proveedor que rechaza las solicitudes de una variable (por su resolución) como Earth Engine"""
+
+    class EEException(Exception):
+        pass
+
+    def __init__(self, variable_caida: str):
+        super().__init__()
+        proveedor = self
+
+        class Datos:
+            @staticmethod
+            def computePixels(solicitud):
+                resolucion = VARIABLES_SATELITALES[variable_caida]["resolucion"]
+                if solicitud["grid"]["affineTransform"]["scaleX"] == resolucion:
+                    raise proveedor.EEException("Computation timed out.")
+                return _DatosLocales.computePixels(solicitud)
+
+        self.data = Datos
+
+def test_agrupacion_y_solicitudes():
+    """Cientos de manzanas se resuelven con una solicitud por tesela y ventana"""
+    print("🔍 Probando agrupación de solicitudes...")
+    manzanas = centroides_manzanas((-70.1234, -15.2345), 15, 20)
+    assert len(ventanas_fechas("2023-01-01", "2024-01-01", 91)) == 5
+    assert ventanas_fechas("2023-01-01", "2023-02-01") == [("2023-01-01", "2023-02-01")]
+    resultado = extraer_lote(EELocal(), manzanas, "2023-04-01", "2023-10-01",
+                             variables=["humedad_suelo", "temperatura"], ventana_dias=61)
+    assert resultado["estado"].startswith("✅")
+    assert resultado["sitios"] == 300 and resultado["solicitudes_por_sitio"] == 300 * 2 * 3
+    assert resultado["solicitudes"] == 2 * 3
+    tabla = resultado["tabla"]
+    assert len(tabla) == 300 * 2 * 3 and tabla["media"].notna().all()
+    assert set(tabla["variable"]) == {"humedad_suelo", "temperatura"}
+    assert tabla[tabla["variable"] == "temperatura"]["unidad"].iloc[0] == "°C"
+    print("✅ Agrupación de solicitudes correcta")
+
+def test_lote_igual_a_sitio_por_sitio():
+    """El lote y las consultas individuales dan los mismos valores"""
+    print("🔍 Probando equivalencia con consultas individuales...")
+    ee = EELocal()
+    sitios = [
+        {"id": "plaza", "lon": -70.1234, "lat": -15.2345},
+        {"id": "mercado", "poligono": [(-70.1250, -15.2360), (-70.1235, -15.2360), (-70.1235, -15.2348),
+                                       (-70.1250, -15.2348)]},
+        {"id": "lejos", "lon": -70.0500, "lat": -15.3000},
+        (-70.1300, -15.2300)
+    ]
+    assert [s["id"] for s in normalizar_sitios(sitios)] == ["plaza", "mercado", "lejos", 3]
+    lote = extraer_lote(ee, sitios, "2023-06-01", "2023-09-01", variables=["ndvi", "precipitacion"])
+    tabla = lote["tabla"]
+    assert lote["solicitudes"] < lote["solicitudes_por_sitio"]
+    for sitio in sitios:
+        identificador = sitio["id"] if isinstance(sitio, dict) else 3
+        individual = extraer_lote(ee, [sitio], "2023-06-01", "2023-09-01",
+                                  variables=["ndvi", "precipitacion"])["tabla"]
+        del individual["sitio"]
+        propio = tabla[tabla["sitio"] == identificador].drop(columns="sitio").reset_index(drop=True)
+        assert propio.equals(individual)
+    mercado = tabla[(tabla["sitio"] == "mercado") & (tabla["variable"] == "ndvi")].iloc[0]
+    assert mercado["pixeles"] > 100 and mercado["minimo"] <= mercado["media"] <= mercado["maximo"]
+    assert (tabla[tabla["sitio"] == "plaza"]["pixeles"] == 1).all()
+    print("✅ Equivalencia con consultas individuales correcta")
+
+def test_concurrencia_limitada():
+    """Las solicitudes se solapan sin superar el límite de conexiones"""
+    print("🔍 Probando concurrencia hacia el proveedor...")
+    proveedor = ProveedorLento(latencia=0.1)
+    manzanas = centroides_manzanas((-70.1234, -15.2345), 5, 5)
+    inicio = time.perf_counter()
+    resultado = extraer_lote(proveedor, manzanas, "2023-01-01", "2023-05-01",
+                             variables=["temperatura"], ventana_dias=15, max_concurrentes=3)
+    transcurrido = time.perf_counter() - inicio
+    assert resultado["solicitudes"] == proveedor.llamadas == 8
+    assert proveedor.maximo_activas == 3
+    assert transcurrido < 8 * 0.1
+    print("✅ Concurrencia limitada correcta")
+
+def test_ventanas_sin_imagenes_y_errores():
+    """Ventanas nubladas quedan vacías sin romper el lote; errores se informan"""
+    print("🔍 Probando ventanas sin imágenes y errores...")
+    resultado = extraer_lote(EELocal(), [(-70.1234, -15.2345)], "2023-01-01", "2023-05-01",
+                             variables=["ndvi"], ventana_dias=31)
+    tabla = resultado["tabla"]
+    assert resultado["grupos_sin_datos"] == 2 and resultado["estado"].startswith("✅")
+    vacias = tabla[tabla["pixeles"] == 0]
+    assert list(vacias["inicio"]) == ["2023-02-01", "2023-03-04"] and vacias["media"].isna().all()
+    nublado = extraer_lote(EELocal(), [(-70.1234, -15.2345)], "2023-02-01", "2023-03-01", variables=["ndvi"])
+    assert nublado["estado"].startswith("⚠️")
+    error = extraer_lote(EELocal(), [(-70.1234, -15.2345)], "2023-01-01", "2023-02-01", variables=["viento"])
+    assert "error" in error and error["estado"].startswith("❌")
+
+    caido = extraer_lote(ProveedorConFallas("temperatura"), [(-70.1234, -15.2345), (-70.0500, -15.3000)],
+                         "2023-06-01", "2023-09-01", variables=["ndvi", "temperatura"])
+    tabla = caido["tabla"]
+    fallidas = tabla[tabla["variable"] == "temperatura"]
+    assert caido["grupos_con_error"] == caido["grupos_sin_datos"] > 0 and caido["estado"].startswith("⚠️")
+    assert len(fallidas) == 2 and (fallidas["error"] == "Computation timed out.").all()
+    assert fallidas["media"].isna().all() and tabla[tabla["variable"] == "ndvi"]["error"].isna().all()
+    print("✅ Ventanas sin imágenes y errores correctos")
+
+def main():
+    """Función principal de pruebas"""
+    print("🧪 TEST EXTRACCIÓN POR LOTES")
+    print("=" * 50)
+    test_agrupacion_y_solicitudes()
+    test_lote_igual_a_sitio_por_sitio()
+    test_concurrencia_limitada()
+    test_ventanas_sin_imagenes_y_errores()
+    print("\n🎉 ¡Todas las pruebas de extracción por lotes pasaron!")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+TEST FILTRO DE SUELO (PMF)
+==========================
+
+Verifica la clasificación automática de suelo para nubes LAS sin clasificar
+"""
+
+import os
+import tempfile
+import numpy as np
+
+from MODULO_FILTRO_SUELO import (
+    LASPY_AVAILABLE, apertura_morfologica, apertura_por_teselas,
+    clasificar_archivo_las, clasificar_suelo_nube, necesita_clasificacion,
+    rasterizar_minimos
+)
+
+def generar_cuadra_sintetica(n: int = 150000, semilla: int = 7):
+    """Calle inclinada con una edificación y árboles (verdad de terreno conocida)"""
+    rng = np.random.default_rng(semilla)
+    x = rng.uniform(0, 80, n)
+    y = rng.uniform(0, 80, n)
+    z = 3850 + 0.06 * x + 0.02 * y + rng.normal(0, 0.02, n)
+    es_suelo = np.ones(n, dtype=bool)
+
+    # Edificación de 12 x 18 m y 7 m de altura (techo completo)
+    edificacion = (x > 30) & (x < 42) & (y > 20) & (y < 38)
+    z[edificacion] += 7.0
+    es_suelo[edificacion] = False
+
+    # Vegetación: 30% de los puntos dentro de copas quedan sobre el terreno
+    for cx, cy in [(10, 60), (60, 65), (70, 15)]:
+        copa = ((x - cx) ** 2 + (y - cy) ** 2 < 9) & (rng.random(n) < 0.3)
+        z[copa] += rng.uniform(1.5, 6.0, np.sum(copa))
+        es_suelo[copa] = False
+
+    return np.column_stack([x, y, z]), es_suelo
+
+def test_necesita_clasificacion():
+    """Nubes sin clase 2 requieren filtro"""
+    print("🔍 Probando detección de nubes sin clasificar...")
+    assert necesita_clasificacion(None)
+    assert necesita_clasificacion(np.zeros(10, dtype=np.uint8))
+    assert necesita_clasificacion(np.ones(10, dtype=np.uint8))
+    assert not necesita_clasificacion(np.array([1, 2, 5], dtype=np.uint8))
+    print("✅ Detección correcta")
+
+def test_rasterizar_minimos():
+    """El mínimo por celda coincide con el cálculo directo"""
+    print("🔍 Probando rasterización de mínimos...")
+    points = np.array([[0.2, 0.2, 5.0], [0.7, 0.4, 3.0], [1.5, 0.5, 4.0], [1.9, 1.9, 9.0]])
+    z_min, grilla = rasterizar_minimos(points, resolucion=1.0)
+    assert z_min.shape == (2, 2)
+    assert z_min[0, 0] == 3.0
+    assert z_min[0, 1] == 4.0
+    assert z_min[1, 1] == 9.0
+    assert np.isnan(z_min[1, 0])
+    print("✅ Mínimos por celda correctos")
+
+def test_apertura_por_teselas_exacta():
+    """El procesamiento por teselas reproduce la apertura global"""
+    print("🔍 Probando apertura morfológica por teselas...")
+    a = np.random.default_rng(3).normal(size=(300, 410))
+    for ventana in (3, 9, 17):
+        assert np.allclose(apertura_por_teselas(a, ventana, tesela=64),
+                           apertura_morfologica(a, ventana))
+    print("✅ Teselas idénticas al cálculo global")
+
+def test_clasificacion_cuadra_sintetica():
+    """El filtro separa terreno de edificación y vegetación"""
+    print("🔍 Probando clasificación de cuadra sintética...")
+    points, es_suelo = generar_cuadra_sintetica()
+    resultado = clasificar_suelo_nube(points, resolucion=1.0, tesela=32)
+    clases = resultado["clasificacion"]
+
+    exactitud = np.mean((clases == 2) == es_suelo)
+    techo_como_suelo = np.mean(clases[~es_suelo] == 2)
+    print(f"   Exactitud global: {exactitud:.3f}")
+    print(f"   No-suelo clasificado como suelo: {techo_como_suelo:.3f}")
+    assert exactitud > 0.95
+    assert techo_como_suelo < 0.05
+    print("✅ Clasificación de suelo correcta")
+
+def test_clasificar_archivo_las():
+    """El LAS de salida contiene la clasificación escrita por bloques"""
+    print("🔍 Probando clasificación de archivo LAS por bloques...")
+    if not LASPY_AVAILABLE:
+        print("⚠️ LasPy no está instalado, prueba omitida")
+        return
+    import laspy
+
+    points, es_suelo = generar_cuadra_sintetica(n=60000)
+    with tempfile.TemporaryDirectory() as directorio:
+        entrada = os.path.join(directorio, "sin_clasificar.las")
+        salida = os.path.join(directorio, "clasificado.las")
+        header = laspy.LasHeader(point_format=1, version="1.2")
+        header.scales = np.array([0.001, 0.001, 0.001])
+        header.offsets = points.min(axis=0)
+        las = laspy.LasData(header)
+        las.x, las.y, las.z = points[:, 0], points[:, 1], points[:, 2]
+        las.write(entrada)
+
+        resultado = clasificar_archivo_las(entrada, salida, resolucion=1.0,
+                                           puntos_por_bloque=7000)
+        assert "error" not in resultado, resultado.get("error")
+        clases = np.asarray(laspy.read(salida).classification)
+        assert len(clases) == len(points)
+        assert resultado["puntos_suelo"] == int(np.sum(clases == 2))
+        assert np.mean((clases == 2) == es_suelo) > 0.95
+    print("✅ Archivo LAS clasificado correctamente")
+
+def main():
+    """Función principal de pruebas"""
+    print("🧪 TEST FILTRO DE SUELO (PMF)")
+    print("=" * 50)
+    test_necesita_clasificacion()
+    test_rasterizar_minimos()
+    test_apertura_por_teselas_exacta()
+    test_clasificacion_cuadra_sintetica()
+    test_clasificar_archivo_las()
+    print("\n🎉 ¡Todas las pruebas del filtro de suelo pasaron!")
+
+if __name__ == "__main__":
+    main()
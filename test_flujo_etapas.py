@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+TEST FLUJO POR ETAPAS
+=====================
+
+Verifica la memorización por hash de entradas, la ejecución en paralelo
+de etapas independientes y el flujo LiDAR completo sobre el grafo
+"""
+
+import os
+import tempfile
+import time
+import numpy as np
+
+from MODULO_FLUJO_ETAPAS import FlujoEtapas, huella
+from MODULO_LIDAR_DRONES import crear_flujo_lidar, procesamiento_completo_lidar
+
+def test_memorizacion_por_entradas():
+    """Solo se re-ejecutan las etapas cuyas entradas cambiaron"""
+    print("🔍 Probando memorización por hash de entradas...")
+    llamadas = []
+
+    def registrar(nombre, funcion):
+        def etapa(**entradas):
+            llamadas.append(nombre)
+            return funcion(**entradas)
+        return etapa
+
+    flujo = FlujoEtapas("prueba")
+    flujo.agregar("datos", registrar("datos", lambda n: np.arange(n, dtype=float)), ("n",))
+    flujo.agregar("signo", registrar("signo", lambda datos, umbral: datos > umbral), ("datos", "umbral"))
+    flujo.agregar("cuenta", registrar("cuenta", lambda signo: int(signo.sum())), ("signo",))
+    flujo.agregar("media", registrar("media", lambda datos: float(datos.mean())), ("datos",))
+
+    primera = flujo.ejecutar({"n": 10, "umbral": 4.5})
+    assert primera["valores"]["cuenta"] == 5 and primera["valores"]["media"] == 4.5
+    assert sorted(llamadas) == ["cuenta", "datos", "media", "signo"]
+    llamadas.clear()
+    segunda = flujo.ejecutar({"n": 10, "umbral": 4.5})
+    assert llamadas == [] and len(segunda["en_cache"]) == 4
+    # Otro umbral con la misma máscara: 'cuenta' sale de la caché
+    tercera = flujo.ejecutar({"n": 10, "umbral": 4.7})
+    assert llamadas == ["signo"] and tercera["ejecutadas"] == ["signo"]
+    llamadas.clear()
+    solo_media = flujo.ejecutar({"n": 12}, objetivos=["media"])
+    assert llamadas == ["datos", "media"] and list(solo_media["valores"]) == ["media"]
+    # Quien llama recibe copias: modificarlas no altera la caché
+    flujo.ejecutar({"n": 12}, objetivos=["datos"])["valores"]["datos"][:] = -1
+    assert flujo.ejecutar({"n": 12}, objetivos=["datos"])["valores"]["datos"][0] == 0.0
+    assert huella({"a": np.zeros(3), "b": [1, 2.0]}) == huella({"b": [1, 2.0], "a": np.zeros(3)})
+    assert huella(np.zeros(3)) != huella(np.zeros(3, dtype=np.float32))
+    print("✅ Memorización correcta")
+
+def test_etapas_en_paralelo():
+    """Dos etapas independientes corren a la vez"""
+    print("🔍 Probando ejecución en paralelo...")
+    flujo = FlujoEtapas("paralelo", hilos=2)
+    flujo.agregar("base", lambda x: x + 1, ("x",))
+    flujo.agregar("lenta_a", lambda base: time.sleep(0.3) or base * 2, ("base",))
+    flujo.agregar("lenta_b", lambda base: time.sleep(0.3) or base * 3, ("base",))
+    flujo.agregar("suma", lambda lenta_a, lenta_b: lenta_a + lenta_b, ("lenta_a", "lenta_b"))
+    resultado = flujo.ejecutar({"x": 1})
+    assert resultado["valores"]["suma"] == 10
+    assert resultado["tiempo_s"] < 0.5
+    assert resultado["tiempos"]["total_s"] >= 0.6
+    assert flujo.orden(["suma"])[0] == "base" and flujo.orden(["suma"])[-1] == "suma"
+    print("✅ Ejecución en paralelo correcta")
+
+def test_errores_y_archivos():
+    """Ciclos, entradas faltantes, errores de etapa y archivos por contenido"""
+    print("🔍 Probando errores y entradas de archivo...")
+    ciclo = FlujoEtapas("ciclo")
+    ciclo.agregar("a", lambda b: b, ("b",), ("a",))
+    ciclo.agregar("b", lambda a: a, ("a",), ("b",))
+    try:
+        ciclo.ejecutar({})
+        assert False
+    except ValueError as e:
+        assert "Ciclo" in str(e)
+    flujo = FlujoEtapas("errores")
+    flujo.agregar("division", lambda a, b: a / b, ("a", "b"))
+    try:
+        flujo.ejecutar({"a": 1})
+        assert False
+    except ValueError as e:
+        assert "['b']" in str(e)
+    try:
+        flujo.ejecutar({"a": 1, "b": 0})
+        assert False
+    except RuntimeError as e:
+        assert "'division'" in str(e)
+
+    lecturas = []
+    lector = FlujoEtapas("archivo")
+    lector.agregar("texto", lambda ruta: lecturas.append(ruta) or open(ruta).read(), ("ruta",))
+    with tempfile.TemporaryDirectory() as carpeta:
+        ruta = os.path.join(carpeta, "datos.txt")
+        with open(ruta, "w") as f:
+            f.write("uno")
+        assert lector.ejecutar({"ruta": ruta}, archivos=("ruta",))["valores"]["texto"] == "uno"
+        assert lector.ejecutar({"ruta": ruta}, archivos=("ruta",))["en_cache"] == ["texto"]
+        with open(ruta, "w") as f:
+            f.write("dos!")
+        assert lector.ejecutar({"ruta": ruta}, archivos=("ruta",))["valores"]["texto"] == "dos!"
+    assert len(lecturas) == 2
+    print("✅ Errores y archivos correctos")
+
+def test_flujo_lidar():
+    """La nube se carga, filtra y grilla una sola vez; la repetición sale de la caché"""
+    print("🔍 Probando flujo LiDAR memorizado...")
+    flujo = crear_flujo_lidar()
+    actual = os.getcwd()
+    with tempfile.TemporaryDirectory() as carpeta:
+        try:
+            os.chdir(carpeta)
+            primera = procesamiento_completo_lidar("san_miguel.las", flujo=flujo)
+            segunda = procesamiento_completo_lidar("san_miguel.las", flujo=flujo)
+            assert os.path.exists("mdt_terreno.tif")
+        finally:
+            os.chdir(actual)
+    assert primera["Estado"].startswith("✅") and primera["Etapas_en_cache"] == []
+    etapas = set(primera["Tiempos_etapas"]) - {"total_s"}
+    assert etapas == {"lectura", "filtro_elevacion", "suelo", "mdt", "geotiff",
+                      "zonas_inestables", "curvas", "drenaje", "datos_lidar"}
+    assert set(segunda["Etapas_en_cache"]) == etapas - {"geotiff"}
+    assert segunda["Datos_LiDAR"] == primera["Datos_LiDAR"]
+    assert segunda["Curvas_Nivel"]["total_curvas"] == primera["Curvas_Nivel"]["total_curvas"] > 0
+    assert primera["Datos_LiDAR"]["Archivo_GeoTIFF"] == "mdt_terreno.tif"
+    assert abs(primera["Datos_LiDAR"]["Pendiente_%"] - primera["Analisis_Drenaje"]["Pendiente_promedio_%"]) < 0.02
+    with tempfile.TemporaryDirectory() as carpeta:
+        ruta = os.path.join(carpeta, "mdt.tif")
+        destino = procesamiento_completo_lidar("san_miguel.las", flujo=flujo, ruta_geotiff=ruta)
+        assert os.path.exists(ruta) and os.getcwd() == actual
+        assert destino["Datos_LiDAR"]["Archivo_GeoTIFF"] == ruta and ruta in destino["Archivos_Generados"]
+    cambio = flujo.ejecutar({"archivo_las": "san_miguel.las", "cota_minima": 2000, "resolucion": 1.0,
+                             "intervalo": 1.0},
+                            objetivos=["curvas"], archivos=("archivo_las",))
+    assert cambio["ejecutadas"] == ["curvas"]
+    print("✅ Flujo LiDAR memorizado correcto")
+
+def main():
+    """Función principal de pruebas"""
+    print("🧪 TEST FLUJO POR ETAPAS")
+    print("=" * 50)
+    test_memorizacion_por_entradas()
+    test_etapas_en_paralelo()
+    test_errores_y_archivos()
+    test_flujo_lidar()
+    print("\n🎉 ¡Todas las pruebas de flujo por etapas pasaron!")
+
+if __name__ == "__main__":
+    main()
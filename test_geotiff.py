@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+TEST GEOTIFF
+============
+
+Verifica la escritura teselada, comprimida y con resúmenes del MDT
+"""
+
+import os
+import tempfile
+import numpy as np
+
+from MODULO_GEOTIFF import escribir_geotiff, exportar_mdt_geotiff, leer_geotiff
+
+def mdt_sintetico(nx: int = 600, ny: int = 430, resolucion: float = 0.5):
+    """MDT con fila 0 al sur y centros de celda como coordenadas"""
+    x = 230500 + np.arange(nx) * resolucion
+    y = 8325000 + np.arange(ny) * resolucion
+    X, Y = np.meshgrid(x, y)
+    Z = 3850 + 0.03 * (X - x[0]) + np.cos((Y - y[0]) / 15)
+    return {'X_grid': X, 'Y_grid': Y, 'Z_grid': Z, 'resolution': resolucion}
+
+def test_ida_y_vuelta_mdt():
+    """El MDT leído coincide en valores, orientación y georreferencia"""
+    print("🔍 Probando escritura y lectura del MDT...")
+    mdt = mdt_sintetico()
+    mdt['Z_grid'][5:9, 10:20] = np.nan
+    with tempfile.TemporaryDirectory() as directorio:
+        ruta = os.path.join(directorio, "mdt.tif")
+        resultado = exportar_mdt_geotiff(mdt, ruta)
+        leido = leer_geotiff(ruta)
+    assert resultado["resumenes"] == [(300, 215), (150, 108)]
+    assert resultado["tamano_bytes"] < mdt['Z_grid'].size * 4 / 4
+    Z = mdt['Z_grid'].astype(np.float32)
+    validos = ~np.isnan(Z)
+    assert np.array_equal(leido['Z_grid'][validos], Z[validos])
+    assert np.all(leido['Z_grid'][~validos] == -9999)
+    assert np.allclose(leido['X_grid'][0, :3], mdt['X_grid'][0, :3])
+    assert np.allclose(leido['Y_grid'][:3, 0], mdt['Y_grid'][:3, 0])
+    assert leido['epsg'] == 32718 and leido['nodata'] == -9999 and leido['niveles'] == 3
+    print("✅ MDT íntegro tras la ida y vuelta")
+
+def test_resumenes_promedio():
+    """Los resúmenes promedian bloques 2×2 ignorando sin-datos"""
+    print("🔍 Probando resúmenes internos...")
+    datos = np.arange(64 * 48, dtype=np.float32).reshape(48, 64)
+    datos[0, 0] = np.nan
+    with tempfile.TemporaryDirectory() as directorio:
+        ruta = os.path.join(directorio, "resumen.tif")
+        escribir_geotiff(ruta, datos, 0.0, 48.0, 1.0, tesela=16)
+        resumen = leer_geotiff(ruta, nivel=1)['Z_grid'][::-1]
+    esperado = datos.reshape(24, 2, 32, 2)
+    esperado = np.nanmean(esperado, axis=(1, 3))
+    assert resumen.shape == (24, 32)
+    assert np.allclose(resumen, esperado)
+    print("✅ Resúmenes correctos")
+
+def test_enteros_y_bigtiff():
+    """Máscaras enteras con predictor 2 y formato BigTIFF"""
+    print("🔍 Probando enteros y BigTIFF...")
+    mascara = (np.arange(300 * 270).reshape(270, 300) % 7 == 0)
+    with tempfile.TemporaryDirectory() as directorio:
+        ruta = os.path.join(directorio, "mascara.tif")
+        resultado = escribir_geotiff(ruta, mascara, 0.0, 270.0, 1.0, bigtiff=True, nodata=255)
+        leido = leer_geotiff(ruta)
+    assert resultado["tipo"] == "uint8" and leido['bigtiff']
+    assert np.array_equal(leido['Z_grid'][::-1], mascara.astype(np.uint8))
+    print("✅ Enteros y BigTIFF correctos")
+
+def test_fuente_memmap():
+    """La fuente puede ser un np.memmap leído por franjas"""
+    print("🔍 Probando escritura desde memoria mapeada...")
+    with tempfile.TemporaryDirectory() as directorio:
+        ruta_npy = os.path.join(directorio, "mdt.npy")
+        np.save(ruta_npy, mdt_sintetico(700, 520)['Z_grid'])
+        fuente = np.load(ruta_npy, mmap_mode="r")
+        ruta = os.path.join(directorio, "mdt.tif")
+        escribir_geotiff(ruta, fuente, 0.0, 0.0, 0.5, sur_arriba=True, compresion=False)
+        leido = leer_geotiff(ruta)
+        assert np.array_equal(leido['Z_grid'], np.asarray(fuente, dtype=np.float32))
+        del fuente
+    print("✅ Escritura desde memoria mapeada correcta")
+
+def main():
+    """Función principal de pruebas"""
+    print("🧪 TEST GEOTIFF")
+    print("=" * 50)
+    test_ida_y_vuelta_mdt()
+    test_resumenes_promedio()
+    test_enteros_y_bigtiff()
+    test_fuente_memmap()
+    print("\n🎉 ¡Todas las pruebas de GeoTIFF pasaron!")
+
+if __name__ == "__main__":
+    main()
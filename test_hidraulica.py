@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+TEST HIDRÁULICA
+===============
+
+Verifica la geometría y las capacidades de Manning, el tirante normal
+por Newton vectorizado en secciones mixtas, la verificación de una red
+de cunetas contra los caudales por sumidero y el dimensionamiento de
+alcantarillas comerciales
+"""
+
+import math
+import numpy as np
+import pandas as pd
+
+from MODULO_HIDRAULICA import (DIAMETROS_COMERCIALES, K_MANNING_INGLES, alcantarilla_circular, capacidad_seccion,
+                               cuneta_trapezoidal, cuneta_triangular, dimensionar_alcantarillas,
+                               geometria, normalizar_secciones, tirante_normal, verificar_red_cunetas)
+
+def test_capacidades_conocidas():
+    """Soluciones cerradas: triángulo, tubo lleno y medio lleno"""
+    print("🔍 Probando capacidades de Manning...")
+    D, n, S = 0.6, 0.013, 0.01
+    lleno = (1 / n) * (math.pi * D ** 2 / 4) * (D / 4) ** (2 / 3) * math.sqrt(S)
+    capacidades = capacidad_seccion(alcantarilla_circular([D, D], llenado_maximo=[1.0, 0.5], n=n, pendiente=S))
+    assert np.allclose(capacidades, [lleno, lleno / 2], rtol=1e-9)
+
+    cuneta = cuneta_triangular(0.02, 0.15, n=0.016, pendiente=0.02)
+    Z, lados = 25.0, 1 + math.sqrt(1 + 50 ** 2)
+    y = (0.05 * 0.016 / math.sqrt(0.02) * lados ** (2 / 3) / Z ** (5 / 3)) ** (3 / 8)
+    flujo = tirante_normal(0.05, cuneta)
+    assert abs(flujo["tirante_m"][0] - y) < 1e-9
+    assert abs(flujo["area_m2"][0] - Z * y ** 2) < 1e-9 and abs(flujo["ancho_superficial_m"][0] - 50 * y) < 1e-9
+    assert abs(flujo["froude"][0] - 0.05 / (Z * y ** 2) / math.sqrt(9.81 * y / 2)) < 1e-9
+    assert capacidad_seccion(cuneta)[0] == capacidad_seccion({**cuneta, "profundidad_m": [0.15]})[0]
+    try:
+        normalizar_secciones({"tipo": "ovoide"})
+        assert False
+    except ValueError:
+        pass
+    print("✅ Capacidades de Manning correctas")
+
+def test_tirante_normal_en_lote():
+    """Miles de secciones mixtas resueltas juntas con residuo nulo"""
+    print("🔍 Probando tirante normal en lote...")
+    rng = np.random.default_rng(8)
+    N = 6000
+    tipo = rng.choice(["triangular", "trapezoidal", "circular"], N)
+    secciones = {"tipo": tipo, "base_m": np.where(tipo == "trapezoidal", rng.uniform(0.2, 1.0, N), 0.0),
+                 "talud_izq": rng.uniform(0, 2, N), "talud_der": rng.uniform(0.5, 40, N),
+                 "diametro_m": np.where(tipo == "circular", rng.uniform(0.3, 1.5, N), np.nan),
+                 "profundidad_m": 0.3, "n": rng.uniform(0.011, 0.025, N), "pendiente": rng.uniform(0.001, 0.08, N)}
+    s = normalizar_secciones(secciones)
+    Q = 0.6 * capacidad_seccion(s) * rng.uniform(0.05, 1.2, N)
+    flujo = tirante_normal(Q, s)
+
+    area, perimetro, ancho, _ = geometria(flujo["tirante_m"], s)
+    Q_calculado = area * (area / perimetro) ** (2 / 3) * np.sqrt(s["pendiente"]) / s["n"]
+    assert np.abs(Q_calculado / Q - 1).max() < 1e-8
+    assert np.allclose(flujo["velocidad_m_s"], Q / area)
+    assert np.allclose(flujo["froude"], Q / area / np.sqrt(9.81 * area / ancho))
+    assert not flujo["en_carga"].any()
+    assert (flujo["desborde"] == ((tipo != "circular") & (flujo["tirante_m"] > 0.3 + 1e-12))).all()
+
+    mas = tirante_normal(Q * 1.1, s)
+    assert (mas["tirante_m"] > flujo["tirante_m"]).all()
+    tubo = alcantarilla_circular(0.6, n=0.013, pendiente=0.01)
+    maximo = capacidad_seccion({**tubo, "llenado_maximo": 0.938})[0]
+    extremos = tirante_normal([0.0, 0.99 * maximo, 1.2 * maximo], tubo)
+    assert extremos["tirante_m"][0] == 0.0 and extremos["froude"][0] == 0.0
+    assert 0.8 < extremos["tirante_m"][1] / 0.6 < 0.938 and extremos["en_carga"].tolist() == [False, False, True]
+    print("✅ Tirante normal en lote correcto")
+
+def test_red_contra_sumideros():
+    """Cada tramo se verifica con el caudal de su sumidero"""
+    print("🔍 Probando verificación de red de cunetas...")
+    cuencas = [{"id": 1, "caudal_l_s": 12.0}, {"id": 2, "caudal_l_s": 45.0}, {"id": 3, "caudal_l_s": 400.0}]
+    tramos = pd.DataFrame([
+        {**cuneta_triangular(0.02, 0.12, n=0.016, pendiente=0.03), "sumidero": 1},
+        {**cuneta_triangular(0.02, 0.12, n=0.016, pendiente=0.01), "sumidero": 2},
+        {**cuneta_trapezoidal(0.3, 1.0, 0.25, n=0.015, pendiente=0.005), "sumidero": 3},
+        {**alcantarilla_circular(0.3, n=0.013, pendiente=0.005), "sumidero": 3}
+    ])
+    red = verificar_red_cunetas(tramos, cuencas)
+    tabla = red["tramos"]
+    assert tabla["caudal_m3_s"].tolist() == [0.012, 0.045, 0.4, 0.4]
+    assert tabla["cumple"].tolist() == [True, True, False, False]
+    assert red["resumen"]["desbordes"] == 1 and red["resumen"]["en_carga"] == 1
+    assert tabla.loc[2, "utilizacion"] > 1 and red["estado"].startswith("⚠️")
+    assert set(tabla["regimen"]) <= {"Subcrítico", "Supercrítico"}
+
+    ingles = verificar_red_cunetas(tramos, cuencas, k_manning=K_MANNING_INGLES)
+    assert np.allclose(ingles["tramos"]["capacidad_m3_s"] / tabla["capacidad_m3_s"], K_MANNING_INGLES, rtol=1e-3)
+    assert "error" in verificar_red_cunetas(tramos, cuencas[:2])
+    assert "error" in verificar_red_cunetas(tramos.drop(columns="sumidero"))
+    directa = verificar_red_cunetas(tramos.assign(caudal_m3_s=0.001))
+    assert directa["estado"].startswith("✅") and directa["resumen"]["cumplen"] == 4
+    print("✅ Verificación de red correcta")
+
+def test_dimensionamiento_alcantarillas():
+    """Menor diámetro comercial que conduce cada caudal"""
+    print("🔍 Probando dimensionamiento de alcantarillas...")
+    caudales = np.array([0.05, 0.3, 0.9, 2.5, 60.0])
+    resultado = dimensionar_alcantarillas(caudales, 0.01)
+    assert resultado["capacidades_m3_s"].shape == (5, len(DIAMETROS_COMERCIALES))
+    for i, Q in enumerate(caudales[:4]):
+        capacidades = [capacidad_seccion(alcantarilla_circular(d, n=0.013, pendiente=0.01))[0]
+                       for d in DIAMETROS_COMERCIALES]
+        esperado = next(d for d, c in zip(DIAMETROS_COMERCIALES, capacidades) if c >= Q)
+        assert resultado["diametro_m"][i] == esperado and resultado["capacidad_m3_s"][i] >= Q
+    assert np.isnan(resultado["diametro_m"][4])
+    assert (np.diff(resultado["diametro_m"][:4]) >= 0).all()
+    plano = dimensionar_alcantarillas(0.3, [0.002, 0.05])
+    assert plano["diametro_m"][0] > plano["diametro_m"][1]
+    print("✅ Dimensionamiento de alcantarillas correcto")
+
+def main():
+    """Función principal de pruebas"""
+    print("🧪 TEST HIDRÁULICA")
+    print("=" * 50)
+    test_capacidades_conocidas()
+    test_tirante_normal_en_lote()
+    test_red_contra_sumideros()
+    test_dimensionamiento_alcantarillas()
+    print("\n🎉 ¡Todas las pruebas de hidráulica pasaron!")
+
+if __name__ == "__main__":
+    main()
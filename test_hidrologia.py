@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+TEST HIDROLOGÍA (PRIORITY-FLOOD, D8, D-INFINITO)
+================================================
+
+Verifica el relleno de depresiones, la dirección y la acumulación de flujo
+"""
+
+import numpy as np
+
+import MODULO_HIDROLOGIA as hidro
+from MODULO_HIDROLOGIA import (
+    acumulacion_flujo, analisis_hidrologico_mdt, cuencas_por_sumidero,
+    detectar_puntos_bajos, direccion_flujo_d8, direccion_flujo_dinf,
+    longitud_flujo, rellenar_depresiones
+)
+
+def plano_inclinado(ny: int = 30, nx: int = 40, pendiente: float = 0.05):
+    """Plano que desciende hacia el oeste (columna 0)"""
+    return np.tile(pendiente * np.arange(nx, dtype=float), (ny, 1))
+
+def test_relleno_depresion():
+    """Un bache cerrado se rellena hasta el nivel de desborde"""
+    print("🔍 Probando relleno de depresiones...")
+    Z = np.full((7, 7), 10.0)
+    Z[1:6, 1:6] = 12.0
+    Z[3, 3] = 9.0
+    relleno = rellenar_depresiones(Z)
+    assert relleno[3, 3] > 12.0 and relleno[3, 3] - 12.0 < 1e-9
+    assert np.all(relleno >= Z)
+    assert np.array_equal(relleno[0, :], Z[0, :])
+    print("✅ Depresión rellenada")
+
+def test_codigos_d8():
+    """Cada celda apunta al vecino de máxima pendiente"""
+    print("🔍 Probando códigos D8...")
+    flujo = direccion_flujo_d8(plano_inclinado(), resolucion=1.0)
+    codigos = flujo["codigo"]
+    assert np.all(codigos[:, 1:] == 16)  # Oeste
+    assert np.all(codigos[:, 0] == 0)    # Salidas
+    assert np.allclose(flujo["pendiente"][:, 1:], 0.05)
+    print("✅ Códigos D8 correctos")
+
+def test_acumulacion_plano():
+    """En un plano la acumulación crece linealmente y suma todas las celdas"""
+    print("🔍 Probando acumulación de flujo...")
+    Z = plano_inclinado()
+    flujo = direccion_flujo_d8(Z)
+    acumulacion = acumulacion_flujo(flujo)
+    assert np.allclose(acumulacion, np.arange(40, 0, -1)[np.newaxis, :])
+    assert np.isclose(acumulacion[:, 0].sum(), Z.size)
+    assert np.allclose(longitud_flujo(flujo)[:, 0], 39.0)
+    print("✅ Acumulación correcta")
+
+def test_proporciones_dinf():
+    """Las proporciones D-infinito suman 1 y conservan el volumen"""
+    print("🔍 Probando D-infinito...")
+    y, x = np.mgrid[0:25, 0:25].astype(float)
+    Z = 0.03 * x + 0.01 * y
+    flujo = direccion_flujo_dinf(Z)
+    con_receptor = flujo["receptores"][:, 0] >= 0
+    assert np.allclose(flujo["proporciones"][con_receptor].sum(axis=1), 1.0)
+    acumulacion = acumulacion_flujo(flujo)
+    salidas = ~con_receptor.reshape(Z.shape)
+    assert np.isclose(acumulacion[salidas].sum(), Z.size)
+    print("✅ Proporciones D-infinito correctas")
+
+def test_nucleo_python_puro():
+    """Sin Numba el Priority-Flood da el mismo resultado"""
+    print("🔍 Probando núcleo sin Numba...")
+    rng = np.random.default_rng(7)
+    Z = rng.uniform(0, 5, (20, 20))
+    nucleo = getattr(hidro._priority_flood, "py_func", hidro._priority_flood)
+    puro = nucleo(Z.ravel().copy(), 20, 20, hidro._DF, hidro._DC,
+                  np.zeros(400, dtype=bool)).reshape(20, 20)
+    assert np.array_equal(puro, rellenar_depresiones(Z))
+    resumen = analisis_hidrologico_mdt({'Z_grid': Z, 'resolution': 1.0})["resumen"]
+    assert resumen["volumen_depresiones_m3"] >= 0
+    print("✅ Núcleo Python puro consistente")
+
+def test_cuencas_anidadas():
+    """Dos sumideros sobre la misma línea de flujo no comparten área"""
+    print("🔍 Probando cuencas por sumidero...")
+    Z = plano_inclinado()
+    X, Y = np.meshgrid(np.arange(40, dtype=float), np.arange(30, dtype=float))
+    mdt = {'X_grid': X, 'Y_grid': Y, 'Z_grid': Z, 'resolution': 1.0}
+    resultado = cuencas_por_sumidero(mdt, sumideros=[(20, 15), (0, 15)], radio_ajuste_m=0.0)
+    aguas_arriba, aguas_abajo = resultado["sumideros"]
+    assert aguas_arriba["area_ha"] == aguas_abajo["area_ha"] == 0.002
+    assert aguas_arriba["longitud_flujo_max_m"] == 19.0
+    assert abs(aguas_abajo["caudal_l_s"] - 0.7 * 60 * 0.002 / 360 * 1000) < 0.01
+    assert np.all(resultado["etiquetas"][15, 20:] == 0)
+    assert np.all(resultado["etiquetas"][15, :20] == 1)
+    assert np.sum(resultado["etiquetas"] >= 0) == 40
+    print("✅ Cuencas anidadas correctas")
+
+def test_punto_bajo_automatico():
+    """Sin sumideros se usa el punto bajo de la calzada"""
+    print("🔍 Probando detección de puntos bajos...")
+    x = np.arange(-10, 11, 1.0)
+    X, Y = np.meshgrid(x, x)
+    Z = 3850 + 0.1 * np.hypot(X, Y)
+    assert list(detectar_puntos_bajos(Z)) == [10 * 21 + 10]
+    resultado = cuencas_por_sumidero({'X_grid': X, 'Y_grid': Y, 'Z_grid': Z, 'resolution': 1.0})
+    assert resultado["total_sumideros"] == 1
+    assert resultado["sumideros"][0]["x"] == 0.0 and resultado["sumideros"][0]["y"] == 0.0
+    assert resultado["area_total_ha"] == round(Z.size / 10000, 4)
+    print("✅ Punto bajo detectado")
+
+def main():
+    """Función principal de pruebas"""
+    print("🧪 TEST HIDROLOGÍA")
+    print("=" * 50)
+    test_relleno_depresion()
+    test_codigos_d8()
+    test_acumulacion_plano()
+    test_proporciones_dinf()
+    test_nucleo_python_puro()
+    test_cuencas_anidadas()
+    test_punto_bajo_automatico()
+    print("\n🎉 ¡Todas las pruebas de hidrología pasaron!")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+TEST IDF
+========
+
+Verifica Gumbel y Dyck-Peschke, el ajuste conjunto de la curva
+i = K·T^m / (D + c)^n, la lectura de registros de estación y CHIRPS, y
+el método racional por cuenca con la intensidad de su tiempo de
+concentración
+"""
+
+import os
+import tempfile
+import numpy as np
+import pandas as pd
+
+from MODULO_EE_LOCAL import EELocal
+from MODULO_HIDROLOGIA import cuencas_por_sumidero
+from MODULO_IDF import (CURVA_IDF_POR_DEFECTO, ajustar_curva_idf, caudales_racionales, cuantiles_gumbel,
+                        curva_idf_desde_chirps, curva_idf_desde_registros, factor_frecuencia_gumbel, intensidad_idf,
+                        maximos_anuales_diarios, precipitacion_duraciones, tabla_idf)
+from MODULO_LIDAR_AVANZADO import analizar_drenaje_avanzado
+from MODULO_NUBE_SINTETICA import nube_sintetica
+from MODULO_SERIES_SATELITALES import POLIGONO_SAN_MIGUEL, AlmacenSeriesSatelitales
+
+def test_gumbel_y_desagregacion():
+    """Factores de frecuencia, cuantiles por columna y láminas por duración"""
+    print("🔍 Probando Gumbel y Dyck-Peschke...")
+    assert np.allclose(factor_frecuencia_gumbel([2, 10, 100]), [-0.1643, 1.3046, 3.1367], atol=1e-3)
+    maximos = np.array([[20.0, 8.0], [30.0, 12.0], [40.0, np.nan], [30.0, 10.0]])
+    cuantiles = cuantiles_gumbel(maximos, [10, 100])
+    assert cuantiles.shape == (2, 2)
+    assert np.isclose(cuantiles[0, 0], 30 + 1.3046 * np.std([20, 30, 40, 30], ddof=1), atol=1e-2)
+    assert np.isclose(cuantiles[1, 1], 10 + 3.1367 * 2.0, atol=1e-2)
+    laminas = precipitacion_duraciones([40.0, 80.0], [60, 1440])
+    assert np.allclose(laminas, [[40 * 24 ** -0.25, 40], [80 * 24 ** -0.25, 80]])
+
+    fechas = pd.date_range("2019-01-01", "2021-03-31", freq="D")
+    lluvia = np.where(fechas.dayofyear == 40, 25.0 + fechas.year - 2019, 1.0)
+    maximos_anuales = maximos_anuales_diarios(fechas, lluvia)
+    assert maximos_anuales.to_dict() == {2019: 25.0, 2020: 26.0}
+    print("✅ Gumbel y Dyck-Peschke correctos")
+
+def test_ajuste_y_evaluacion():
+    """El ajuste recupera K, m, n y c; intensidades como arreglos D × T"""
+    print("🔍 Probando ajuste de la curva IDF...")
+    curva = {"K": 420.0, "m": 0.18, "n": 0.82, "c": 12.5}
+    duraciones = np.array([5, 10, 15, 30, 60, 120, 360, 1440])
+    periodos = np.array([2, 5, 10, 25, 50, 100])
+    tabla = intensidad_idf(curva, duraciones[:, None], periodos[None, :])
+    assert tabla.shape == (8, 6)
+    ajuste = ajustar_curva_idf(tabla, duraciones, periodos)
+    assert ajuste["c"] == 12.5 and abs(ajuste["K"] - 420.0) < 0.01
+    assert abs(ajuste["m"] - 0.18) < 1e-4 and abs(ajuste["n"] - 0.82) < 1e-4 and ajuste["r2"] == 1.0
+
+    assert intensidad_idf(CURVA_IDF_POR_DEFECTO, 1.0, 10) == intensidad_idf(CURVA_IDF_POR_DEFECTO, 5.0, 10)
+    assert intensidad_idf(CURVA_IDF_POR_DEFECTO, 10, 25) > intensidad_idf(CURVA_IDF_POR_DEFECTO, 10, 10)
+    assert intensidad_idf(CURVA_IDF_POR_DEFECTO, 30, 10) < intensidad_idf(CURVA_IDF_POR_DEFECTO, 10, 10)
+    mostrada = tabla_idf(CURVA_IDF_POR_DEFECTO)
+    assert mostrada.shape == (11, 7) and mostrada.loc[60, "T=10"] == round(
+        float(intensidad_idf(CURVA_IDF_POR_DEFECTO, 60, 10)), 2)
+    try:
+        ajustar_curva_idf([[50.0, np.nan], [np.nan, np.nan]], [10, 60], [2, 10])
+        assert False
+    except ValueError:
+        pass
+    print("✅ Ajuste de la curva IDF correcto")
+
+def test_registros_y_chirps():
+    """Curvas desde registros diarios, pluviógrafo y CHIRPS del almacén"""
+    print("🔍 Probando curvas desde registros...")
+    rng = np.random.default_rng(4)
+    fechas = pd.date_range("1995-01-01", "2019-12-31", freq="D")
+    with tempfile.TemporaryDirectory() as carpeta:
+        ruta = os.path.join(carpeta, "estacion.csv")
+        pd.DataFrame({"fecha": fechas, "pp": rng.gamma(0.3, 5.0, len(fechas))}).to_csv(ruta, index=False)
+        diario = curva_idf_desde_registros(ruta)
+        assert diario["estado"].startswith("✅") and diario["curva"]["anios"] == 25
+        assert diario["curva"]["n"] == 0.75 and diario["tabla"].shape == (11, 7)
+
+        anios = 20
+        laminas_24h = rng.gumbel(35.0, 8.0, anios)
+        duraciones = [10, 30, 60, 120, 360, 1440]
+        pluviografo = pd.DataFrame({str(d): laminas_24h * d / 60 * ((d + 15) / 1455) ** -0.8 for d in duraciones})
+        pluviografo.insert(0, "anio", range(2000, 2000 + anios))
+        curva = curva_idf_desde_registros(pluviografo)["curva"]
+        assert curva["c"] == 15.0 and abs(curva["n"] - 0.8) < 1e-3 and curva["r2"] > 0.98
+        assert curva["duracion_minima_min"] == 10.0
+        assert "error" in curva_idf_desde_registros(pd.DataFrame({"fecha": ["2020-01-01"], "caudal": [1.0]}))
+
+        almacen = AlmacenSeriesSatelitales(os.path.join(carpeta, "series"))
+        almacen.ingerir(EELocal(), "precipitacion", (-70.135, -15.245, -70.112, -15.224), "2020-01-01", "2023-01-01")
+        chirps = curva_idf_desde_chirps(almacen, POLIGONO_SAN_MIGUEL, "2020-01-01", "2022-12-31")
+        assert chirps["estado"].startswith("✅") and chirps["curva"]["anios"] == 3
+        assert "error" in curva_idf_desde_chirps(almacen, POLIGONO_SAN_MIGUEL, "2010-01-01", "2010-12-31")
+    print("✅ Curvas desde registros correctas")
+
+def test_racional_por_cuenca():
+    """Cada cuenca usa la intensidad de su tiempo de concentración"""
+    print("🔍 Probando método racional por cuenca...")
+    racional = caudales_racionales([0.5, 2.0], [6.0, 30.0], 0.7, periodo_retorno=25)
+    intensidad = intensidad_idf(CURVA_IDF_POR_DEFECTO, [6.0, 30.0], 25)
+    assert np.allclose(racional["intensidad_mm_h"], intensidad)
+    assert np.allclose(racional["caudal_m3_s"], 0.7 * intensidad * [0.5, 2.0] / 360)
+
+    X, Y = np.meshgrid(np.arange(320, dtype=float), np.arange(30, dtype=float))
+    Z = 3850 + 0.005 * X + 0.002 * np.abs(Y - 15)
+    mdt = {'X_grid': X, 'Y_grid': Y, 'Z_grid': Z, 'resolution': 1.0}
+    resultado = cuencas_por_sumidero(mdt, sumideros=[(280, 15), (0, 15)], radio_ajuste_m=0.0,
+                                     curva_idf=CURVA_IDF_POR_DEFECTO, periodo_retorno=10)
+    corto, largo = resultado["sumideros"]
+    assert corto["tiempo_concentracion_min"] < largo["tiempo_concentracion_min"]
+    assert corto["intensidad_mm_h"] > largo["intensidad_mm_h"]
+    for sumidero in resultado["sumideros"]:
+        esperado = intensidad_idf(CURVA_IDF_POR_DEFECTO, sumidero["tiempo_concentracion_min"], 10)
+        assert abs(sumidero["intensidad_mm_h"] - esperado) < 0.05
+        assert abs(sumidero["caudal_l_s"] - 0.7 * esperado * sumidero["area_ha"] / 360 * 1000) < 0.05
+    fijo = cuencas_por_sumidero(mdt, sumideros=[(280, 15), (0, 15)], radio_ajuste_m=0.0)
+    assert [s["intensidad_mm_h"] for s in fijo["sumideros"]] == [60.0, 60.0]
+
+    nube = nube_sintetica(20000, semilla=3)
+    drenaje = analizar_drenaje_avanzado(nube["points"], {})
+    parametros = drenaje["parametros_hidrologicos"]
+    assert parametros["intensidad_lluvia_mm_h"] == round(float(intensidad_idf(
+        CURVA_IDF_POR_DEFECTO, parametros["tiempo_concentracion_min"], 10)), 2)
+    print("✅ Método racional por cuenca correcto")
+
+def main():
+    """Función principal de pruebas"""
+    print("🧪 TEST IDF")
+    print("=" * 50)
+    test_gumbel_y_desagregacion()
+    test_ajuste_y_evaluacion()
+    test_registros_y_chirps()
+    test_racional_por_cuenca()
+    print("\n🎉 ¡Todas las pruebas de curvas IDF pasaron!")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+TEST INTERPOLACIÓN DEL MDT (KD-TREE)
+====================================
+
+Verifica IDW, vecino más cercano y vecino natural discreto por teselas
+"""
+
+import numpy as np
+
+from MODULO_INTERPOLACION import interpolar_en_puntos, interpolar_mdt
+
+def nube_con_hueco(n: int = 40000, semilla: int = 5):
+    """Plano inclinado muestreado con un hueco circular de 12 m"""
+    rng = np.random.default_rng(semilla)
+    x = rng.uniform(0, 80, n)
+    y = rng.uniform(0, 60, n)
+    fuera = np.hypot(x - 40, y - 30) > 12
+    x, y = x[fuera], y[fuera]
+    return np.column_stack([x, y, 3850 + 0.04 * x - 0.02 * y])
+
+def test_distancia_muestra():
+    """La capa de calidad es la distancia exacta a la muestra más cercana"""
+    print("🔍 Probando capa de distancia a la muestra...")
+    nube = nube_con_hueco(3000)
+    mdt = interpolar_mdt(nube, resolucion=2.0, metodo="vecino")
+    centros = np.column_stack([mdt['X_grid'].ravel(), mdt['Y_grid'].ravel()])
+    distancias = np.hypot(centros[:, :1] - nube[:, 0], centros[:, 1:] - nube[:, 1])
+    assert np.allclose(mdt['distancia_muestra'].ravel(), distancias.min(axis=1))
+    assert np.allclose(mdt['Z_grid'].ravel(), nube[distancias.argmin(axis=1), 2])
+    print("✅ Distancias y vecino más cercano correctos")
+
+def test_teselas_equivalentes():
+    """El resultado no depende del tamaño de tesela ni del número de hilos"""
+    print("🔍 Probando empalme entre teselas...")
+    nube = nube_con_hueco()
+    for metodo in ("idw", "natural"):
+        completo = interpolar_mdt(nube, resolucion=0.5, metodo=metodo, tesela=4096, hilos=1)
+        teselado = interpolar_mdt(nube, resolucion=0.5, metodo=metodo, tesela=37, hilos=3)
+        assert teselado['teselas'] > 1
+        assert np.allclose(completo['Z_grid'], teselado['Z_grid'], atol=1e-9, equal_nan=True)
+    print("✅ Teselas empalman sin costuras")
+
+def test_vecino_natural_en_huecos():
+    """En huecos el vecino natural reproduce mejor el plano que el IDW"""
+    print("🔍 Probando vecino natural en huecos...")
+    nube = nube_con_hueco()
+    errores = {}
+    for metodo in ("idw", "natural"):
+        mdt = interpolar_mdt(nube, resolucion=0.5, metodo=metodo)
+        verdad = 3850 + 0.04 * mdt['X_grid'] - 0.02 * mdt['Y_grid']
+        hueco = mdt['distancia_muestra'] > 4
+        errores[metodo] = np.abs(mdt['Z_grid'] - verdad)[hueco].mean()
+    assert errores["natural"] < 0.5 * errores["idw"]
+    assert errores["natural"] < 0.1
+    print("✅ Vecino natural más fiel en huecos")
+
+def test_radio_maximo():
+    """Fuera del radio máximo no se extrapola"""
+    print("🔍 Probando radio máximo...")
+    nube = nube_con_hueco()
+    valores, distancias = interpolar_en_puntos(nube, [[40.0, 30.0], [10.0, 10.0]], radio_max=5.0)
+    assert np.isnan(valores[0]) and np.isinf(distancias[0])
+    assert abs(valores[1] - (3850 + 0.4 - 0.2)) < 0.05
+    print("✅ Radio máximo respetado")
+
+def test_plano_local():
+    """El plano local de mínimos cuadrados es exacto en superficies planas"""
+    print("🔍 Probando plano local...")
+    rng = np.random.default_rng(8)
+    x, y = rng.uniform(0, 50, 20000), rng.uniform(0, 20, 20000)
+    nube = np.column_stack([x, y, 3850 + 0.01 * x - 0.02 * y])
+    consultas = np.column_stack([rng.uniform(1, 49, 500), rng.uniform(1, 19, 500)])
+    verdad = 3850 + 0.01 * consultas[:, 0] - 0.02 * consultas[:, 1]
+    plano, _ = interpolar_en_puntos(nube, consultas, metodo="plano", k=12, bloque=97)
+    idw, _ = interpolar_en_puntos(nube, consultas, metodo="idw")
+    assert np.abs(plano - verdad).max() < 1e-9
+    assert np.abs(idw - verdad).max() > 1e-4
+    print("✅ Plano local exacto")
+
+def main():
+    """Función principal de pruebas"""
+    print("🧪 TEST INTERPOLACIÓN")
+    print("=" * 50)
+    test_distancia_muestra()
+    test_teselas_equivalentes()
+    test_vecino_natural_en_huecos()
+    test_radio_maximo()
+    test_plano_local()
+    print("\n🎉 ¡Todas las pruebas de interpolación pasaron!")
+
+if __name__ == "__main__":
+    main()
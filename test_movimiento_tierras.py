@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+TEST MOVIMIENTO DE TIERRAS
+==========================
+
+Verifica la cubicación de corte y relleno entre el MDT y la superficie de diseño
+"""
+
+import numpy as np
+
+from MODULO_MOVIMIENTO_TIERRAS import calcular_movimiento_tierras, estructura_pavimento
+from MODULO_INTEROPERABILIDAD import RevitBIM
+
+def mdt_plano(largo: float = 200.0, ancho: float = 60.0, resolucion: float = 0.1, cota: float = 3850.0):
+    """MDT horizontal con coordenadas en los centros de celda"""
+    x = np.arange(0, largo, resolucion) + resolucion / 2
+    y = np.arange(0, ancho, resolucion) + resolucion / 2
+    X, Y = np.meshgrid(x, y)
+    return {'X_grid': X, 'Y_grid': Y, 'Z_grid': np.full(X.shape, cota), 'resolution': resolucion}
+
+def test_corte_en_terreno_plano():
+    """Rasante al nivel del terreno: se excava la estructura, el bombeo y los taludes"""
+    print("🔍 Probando corte de la caja del pavimento...")
+    mdt = mdt_plano()
+    diseno = {"pavimento_rigido": {"espesor_cm": 25.0}}
+    eje = np.array([[0.0, 30.0], [200.0, 30.0]])
+    resultado = calcular_movimiento_tierras(mdt, diseno, eje, cotas_rasante=[3850.0, 3850.0],
+                                            intervalo_m=50.0)
+    espesor = 0.25 + 0.15
+    borde = espesor + 0.02 * 3
+    por_metro = 2 * (3 * espesor + 0.02 * 9 / 2) + borde ** 2 * 1.0
+    assert resultado["relleno_total_m3"] == 0
+    assert abs(resultado["corte_total_m3"] - 200 * por_metro) / (200 * por_metro) < 0.01
+    assert len(resultado["tramos"]) == 4
+    for tramo in resultado["tramos"]:
+        assert abs(tramo["corte_m3"] - 50 * por_metro) / (50 * por_metro) < 0.02
+    assert abs(resultado["area_plataforma_m2"] - 1200) < 15
+    assert [capa["capa"] for capa in resultado["capas"]] == ["losa", "subbase"]
+    print("✅ Corte en terreno plano correcto")
+
+def test_relleno_con_taludes():
+    """Rasante elevada: terraplén con taludes de relleno 1.5H:1V"""
+    print("🔍 Probando relleno de terraplén...")
+    mdt = mdt_plano()
+    diseno = {"espesor_base_cm": 20.0, "espesor_subbase_cm": 30.0, "espesor_carpeta_cm": 10.0}
+    eje = np.array([[0.0, 30.0], [200.0, 30.0]])
+    resultado = calcular_movimiento_tierras(mdt, diseno, eje, cotas_rasante=[3852.6, 3852.6],
+                                            bombeo_pct=0.0)
+    altura = 2.6 - 0.6
+    por_metro = 6 * altura + altura ** 2 * 1.5
+    assert resultado["corte_total_m3"] == 0
+    assert abs(resultado["relleno_total_m3"] - 200 * por_metro) / (200 * por_metro) < 0.01
+    assert resultado["balance_m3"] < 0
+    print("✅ Relleno con taludes correcto")
+
+def test_teselas_y_corredor():
+    """El resultado no depende de la tesela y se omiten teselas fuera del corredor"""
+    print("🔍 Probando teselas del corredor...")
+    rng = np.random.default_rng(2)
+    mdt = mdt_plano(400.0, 300.0, 0.5)
+    mdt['Z_grid'] = mdt['Z_grid'] + 0.01 * mdt['X_grid'] + rng.normal(0, 0.3, mdt['Z_grid'].shape)
+    eje = np.array([[10.0, 20.0], [200.0, 40.0], [390.0, 30.0]])
+    diseno = {"pavimento_rigido": {"espesor_cm": 20.0}}
+    grande = calcular_movimiento_tierras(mdt, diseno, eje, tesela=4096, devolver_grilla=True)
+    pequena = calcular_movimiento_tierras(mdt, diseno, eje, tesela=64, devolver_grilla=True)
+    assert pequena["teselas"] < (800 // 64 + 1) * (600 // 64 + 1) / 2
+    assert np.isclose(grande["corte_total_m3"], pequena["corte_total_m3"])
+    assert np.isclose(grande["relleno_total_m3"], pequena["relleno_total_m3"])
+    assert np.allclose(grande["diferencia"], pequena["diferencia"], equal_nan=True)
+    assert np.isnan(pequena["diferencia"][-1, :]).all()
+    assert abs(pequena["longitud_m"] - (np.hypot(190, 20) + np.hypot(190, 10))) < 0.01
+    print("✅ Teselas del corredor correctas")
+
+def test_modelo_bim_con_corredor():
+    """El modelo BIM usa la geometría del corredor en lugar de la cuadra 100×6 m"""
+    print("🔍 Probando modelo BIM con movimiento de tierras...")
+    assert estructura_pavimento({"espesor_cm": 22.0})[0] == ("losa", 0.22)
+    mdt = mdt_plano(300.0, 40.0, 0.25)
+    diseno = {"pavimento_rigido": {"espesor_cm": 20.0}}
+    diseno["movimiento_tierras"] = calcular_movimiento_tierras(
+        mdt, diseno, np.array([[0.0, 20.0], [300.0, 20.0]]), ancho_m=7.2)
+    modelo = RevitBIM().crear_modelo_3d(diseno)
+    losa = modelo["elementos"][0]
+    assert losa["dimensiones"]["largo"] == 300 and losa["dimensiones"]["ancho"] == 7.2
+    assert abs(modelo["area_total_m2"] - 300 * 7.2) < 20
+    assert modelo["movimiento_tierras"]["corte_m3"] > 0
+    print("✅ Modelo BIM con geometría del corredor")
+
+def main():
+    """Función principal de pruebas"""
+    print("🧪 TEST MOVIMIENTO DE TIERRAS")
+    print("=" * 50)
+    test_corte_en_terreno_plano()
+    test_relleno_con_taludes()
+    test_teselas_y_corredor()
+    test_modelo_bim_con_corredor()
+    print("\n🎉 ¡Todas las pruebas de movimiento de tierras pasaron!")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+TEST NUBE SINTÉTICA
+===================
+
+Verifica la reproducibilidad, el modelo de terreno y la escritura LAS del
+generador de levantamientos sintéticos
+"""
+
+import os
+import tempfile
+import numpy as np
+import laspy
+
+from MODULO_NUBE_SINTETICA import (
+    PUNTOS_POR_LOTE, escribir_las_sintetico, generar_nube_sintetica, nube_sintetica,
+    superficie_terreno
+)
+from MODULO_LIDAR_AVANZADO import LaspySimulator
+
+def test_reproducible_por_bloques():
+    """Misma semilla = misma nube, sin importar el tamaño de bloque"""
+    print("🔍 Probando reproducibilidad por bloques...")
+    n = 3 * PUNTOS_POR_LOTE + 1234
+    grande = nube_sintetica(n, semilla=5)
+    bloques = list(generar_nube_sintetica(n, semilla=5, puntos_por_bloque=50000))
+    assert [len(b["x"]) for b in bloques] == [50000] * 3 + [n - 150000]
+    for clave in ("x", "y", "z", "clasificacion", "intensidad"):
+        assert np.array_equal(np.concatenate([b[clave] for b in bloques]),
+                              grande["points"][:, "xyz".index(clave)] if clave in "xyz" else grande[clave])
+    otra = nube_sintetica(n, semilla=6)
+    assert not np.allclose(otra["points"], grande["points"])
+    prefijo = nube_sintetica(PUNTOS_POR_LOTE + 10, semilla=5)
+    assert np.array_equal(prefijo["points"], grande["points"][:PUNTOS_POR_LOTE + 10])
+    print("✅ Nube reproducible")
+
+def test_modelo_de_calle():
+    """Bombeo, sardinel y pendiente longitudinal en los puntos de suelo"""
+    print("🔍 Probando modelo de calle...")
+    nube = nube_sintetica(400000, semilla=1)
+    suelo = nube["points"][nube["clasificacion"] == 2]
+    terreno = superficie_terreno(suelo[:, 0], suelo[:, 1])
+    residuo = suelo[:, 2] - terreno["z"]
+    assert abs(residuo.std() - 0.02) < 0.002 and abs(residuo.mean()) < 0.001
+    assert set(np.unique(terreno["superficie"]).tolist()) == {0, 1, 2}
+    d = terreno["desplazamiento"]
+    x = suelo[:, 0]
+    relativa = suelo[:, 2] - 0.03 * (x - 100)
+    eje = relativa[np.abs(d) < 0.3].mean()
+    borde = relativa[(np.abs(d) > 3.3) & (np.abs(d) < 3.6)].mean()
+    vereda = relativa[(np.abs(d) > 3.65) & (np.abs(d) < 3.9)].mean()
+    assert abs(eje - borde - 0.02 * 3.3) < 0.01
+    assert abs(vereda - borde - 0.15) < 0.02
+    calzada = np.abs(d) < 3.6
+    pendiente = np.polyfit(x[calzada], suelo[calzada, 2], 1)[0]
+    assert abs(pendiente - 0.03) < 0.001
+    print("✅ Modelo de calle correcto")
+
+def test_vegetacion_y_atipicos():
+    """Árboles solo en lotes, clases por altura y atípicos bajo el suelo"""
+    print("🔍 Probando vegetación y atípicos...")
+    nube = nube_sintetica(500000, semilla=2, parametros={"arboles_por_ha": 60.0})
+    puntos, clase = nube["points"], nube["clasificacion"]
+    terreno = superficie_terreno(puntos[:, 0], puntos[:, 1])
+    altura = puntos[:, 2] - terreno["z"]
+    for codigo, (minimo, maximo) in {3: (0.3, 2.0), 4: (2.0, 5.0), 5: (5.0, 10.0)}.items():
+        seleccion = altura[clase == codigo]
+        assert seleccion.size > 0 and seleccion.min() >= minimo - 1e-9 and seleccion.max() <= maximo
+    vegetacion = (clase >= 3) & (clase <= 5)
+    assert np.all(terreno["superficie"][vegetacion] == 2)
+    assert np.all(altura[clase == 7] <= -1.9)
+    assert 0.0002 < (clase == 7).mean() < 0.001
+    print("✅ Vegetación y atípicos correctos")
+
+def test_escritura_las():
+    """El LAS escrito por bloques se lee con laspy y coincide con la nube"""
+    print("🔍 Probando escritura LAS...")
+    n = 150000
+    with tempfile.TemporaryDirectory() as carpeta:
+        ruta = os.path.join(carpeta, "lidar", "sintetico.las")
+        resultado = escribir_las_sintetico(ruta, n, semilla=3, puntos_por_bloque=40000, densidad_pts_m2=15)
+        assert resultado["puntos"] == n and sum(resultado["puntos_por_clase"].values()) == n
+        las = laspy.read(ruta)
+        referencia = nube_sintetica(n, semilla=3, densidad_pts_m2=15)
+        assert las.header.point_count == n
+        assert np.allclose(np.column_stack([las.x, las.y, las.z]), referencia["points"], atol=0.0006)
+        assert np.array_equal(np.asarray(las.classification), referencia["clasificacion"])
+        assert las.header.maxs[0] - las.header.mins[0] > 99.0
+    simulador = LaspySimulator().read("san_miguel.laz", num_points=20000)
+    otra = LaspySimulator().read("san_miguel.laz", num_points=20000)
+    assert np.array_equal(simulador.points, otra.points)
+    assert simulador.header["point_count"] == 20000 and np.any(simulador.classification == 2)
+    print("✅ Escritura LAS correcta")
+
+def main():
+    """Función principal de pruebas"""
+    print("🧪 TEST NUBE SINTÉTICA")
+    print("=" * 50)
+    test_reproducible_por_bloques()
+    test_modelo_de_calle()
+    test_vegetacion_y_atipicos()
+    test_escritura_las()
+    print("\n🎉 ¡Todas las pruebas de nube sintética pasaron!")
+
+if __name__ == "__main__":
+    main()
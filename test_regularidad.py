@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+TEST REGULARIDAD SUPERFICIAL
+============================
+
+Verifica el IRI por cuarto de carro y el ahuellamiento por el método de la regla
+"""
+
+import numpy as np
+from scipy.signal import cont2discrete
+
+from MODULO_REGULARIDAD import (
+    GOLDEN_CAR, RODADAS_M, ahuellamiento_regla, evaluar_superficie_pavimento,
+    iri_por_segmentos, matrices_cuarto_carro
+)
+
+def perfil_rugoso(n: int = 8001, semilla: int = 1):
+    """Perfil longitudinal con rugosidad de ruido blanco integrado"""
+    rng = np.random.default_rng(semilla)
+    perfil = np.cumsum(rng.normal(0, 0.0015, n))
+    return perfil - np.linspace(perfil[0], perfil[-1], n)
+
+def test_matrices_cuarto_carro():
+    """La transición exacta coincide con la discretización ZOH de SciPy"""
+    print("🔍 Probando matrices del cuarto de carro...")
+    k1, k2, mu, c = GOLDEN_CAR["k1"], GOLDEN_CAR["k2"], GOLDEN_CAR["mu"], GOLDEN_CAR["c"]
+    A = np.array([[0, 1, 0, 0], [-k2, -c, k2, c], [0, 0, 0, 1], [k2 / mu, c / mu, -(k1 + k2) / mu, -c / mu]])
+    B = np.array([[0], [0], [0], [k1 / mu]])
+    ST, PR = matrices_cuarto_carro(0.25)
+    Ad, Bd, _, _, _ = cont2discrete((A, B, np.eye(4), np.zeros((4, 1))), 0.25 / (80 / 3.6), "zoh")
+    assert np.allclose(ST, Ad) and np.allclose(PR, Bd[:, 0])
+    print("✅ Matrices correctas")
+
+def test_segmentos_igual_simulacion_continua():
+    """Los segmentos vectorizados reproducen la simulación continua del perfil"""
+    print("🔍 Probando IRI por segmentos...")
+    paso = 0.25
+    perfil = perfil_rugoso()
+    ST, PR = matrices_cuarto_carro(paso)
+    pendiente_inicial = (perfil[44] - perfil[0]) / 11.0
+    estado = np.array([pendiente_inicial, 0, pendiente_inicial, 0])
+    respuesta = []
+    for pendiente in np.diff(perfil) / paso:
+        estado = ST @ estado + PR * pendiente
+        respuesta.append(abs(estado[0] - estado[2]))
+    continuo = np.array(respuesta).reshape(-1, 40).mean(axis=1) * 1000
+    segmentos = iri_por_segmentos([perfil, perfil[:4001], np.zeros(401)], paso, 10.0)
+    assert len(segmentos[0]) == 200 and len(segmentos[1]) == 100
+    assert np.allclose(segmentos[0], continuo, rtol=0.02)
+    assert np.allclose(segmentos[1], continuo[:100], rtol=0.02)
+    assert np.allclose(segmentos[2], 0.0)
+    print("✅ IRI por segmentos correcto")
+
+def test_ahuellamiento_regla():
+    """Huella de 15 mm bajo la regla, sin efecto del bombeo"""
+    print("🔍 Probando método de la regla...")
+    d = np.arange(-3.0, 0.001, 0.05)
+    bombeo = 3850 + 0.02 * d
+    huella = bombeo - 0.015 * np.exp(-((d + 1.5) / 0.2) ** 2)
+    dos_huellas = huella - 0.008 * np.exp(-((d + 0.3) / 0.15) ** 2)
+    resultado = ahuellamiento_regla(np.stack([bombeo, huella, dos_huellas]), 0.05)
+    assert resultado[0] < 1e-9
+    assert abs(resultado[1] - 0.015) < 0.0005
+    assert abs(resultado[2] - 0.015) < 0.0005
+    pequena = ahuellamiento_regla(np.stack([huella[::2]] * 3).reshape(3, 1, -1), 0.1, longitud_regla_m=0.6)
+    assert pequena.shape == (3, 1) and np.all(pequena < resultado[1])
+    print("✅ Método de la regla correcto")
+
+def test_evaluacion_por_lotes():
+    """Varias calles en un lote, con huellas solo en la segunda mitad"""
+    print("🔍 Probando evaluación de calles en lote...")
+    rng = np.random.default_rng(0)
+    n = 400000
+    x = rng.uniform(0, 300, n)
+    y = rng.uniform(-3.5, 3.5, n)
+    huellas = sum(-0.02 * np.exp(-((y - c) / 0.25) ** 2) for c in RODADAS_M) * (x > 150)
+    calle_1 = np.column_stack([x, y, 3850 + 0.01 * x - 0.02 * np.abs(y) + huellas])
+    calle_2 = np.column_stack([x[:100000] / 3 + 1000, y[:100000], np.full(100000, 3860.0)])
+    nube = np.vstack([calle_1, calle_2])
+    ejes = [np.array([[0.0, 0.0], [300.0, 0.0]]), np.array([[1000.0, 0.0], [1100.0, 0.0]])]
+    resultado = evaluar_superficie_pavimento(nube, ejes, longitud_segmento_m=50.0)
+    segmentos = resultado["segmentos"]
+    assert resultado["longitud_total_km"] == 0.4
+    assert [s["calle"] for s in segmentos] == [0] * 6 + [1] * 2
+    assert all(s["ahuellamiento_max_mm"] < 1 for s in segmentos[:3] + segmentos[6:])
+    assert all(abs(s["ahuellamiento_max_mm"] - 20) < 1.5 for s in segmentos[3:6])
+    assert all(s["intervencion"] == "Mantenimiento rutinario" for s in segmentos[:3] + segmentos[6:])
+    assert all(s["intervencion"] == "Rehabilitación" for s in segmentos[4:6])
+    assert all(s["iri_m_km"] < 0.05 for s in segmentos[6:])
+    print("✅ Evaluación en lote correcta")
+
+def main():
+    """Función principal de pruebas"""
+    print("🧪 TEST REGULARIDAD SUPERFICIAL")
+    print("=" * 50)
+    test_matrices_cuarto_carro()
+    test_segmentos_igual_simulacion_continua()
+    test_ahuellamiento_regla()
+    test_evaluacion_por_lotes()
+    print("\n🎉 ¡Todas las pruebas de regularidad pasaron!")
+
+if __name__ == "__main__":
+    main()
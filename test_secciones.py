@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+TEST SECCIONES Y PERFILES
+=========================
+
+Verifica el muestreo bilineal, el perfil longitudinal, las secciones
+transversales y la geometría HEC-RAS
+"""
+
+import numpy as np
+
+from MODULO_SECCIONES import (
+    extraer_perfil_longitudinal, extraer_secciones, geometria_hec_ras,
+    muestrear_bilineal, pendientes_transversales
+)
+
+def mdt_funcion(funcion, largo: float = 120.0, ancho: float = 80.0, resolucion: float = 0.5):
+    """MDT con cotas dadas por una función de (x, y) en los centros de celda"""
+    x = np.arange(0, largo, resolucion) + resolucion / 2
+    y = np.arange(0, ancho, resolucion) + resolucion / 2
+    X, Y = np.meshgrid(x, y)
+    return {'X_grid': X, 'Y_grid': Y, 'Z_grid': funcion(X, Y), 'resolution': resolucion}
+
+def plano(X, Y):
+    """Plano inclinado de prueba"""
+    return 3850 - 0.03 * X + 0.01 * Y
+
+def test_bilineal_en_plano():
+    """La interpolación bilineal reproduce un plano y respeta la huella"""
+    print("🔍 Probando muestreo bilineal...")
+    mdt = mdt_funcion(plano)
+    rng = np.random.default_rng(4)
+    xy = np.column_stack([rng.uniform(0, 120, 5000), rng.uniform(0, 80, 5000)]).reshape(50, 100, 2)
+    z = muestrear_bilineal(mdt, xy)
+    assert z.shape == (50, 100)
+    interior = (xy[..., 0] >= 0.25) & (xy[..., 0] <= 119.75) & (xy[..., 1] >= 0.25) & (xy[..., 1] <= 79.75)
+    assert np.allclose(z[interior], plano(xy[..., 0], xy[..., 1])[interior])
+    assert np.isfinite(z).all()
+    assert np.isnan(muestrear_bilineal(mdt, [[-1.0, 10.0], [10.0, 80.5]])).all()
+    mdt['Z_grid'][40, 40] = np.nan
+    cercanos = muestrear_bilineal(mdt, [[20.3, 20.1], [30.0, 30.0]])
+    assert np.isnan(cercanos[0]) and np.isfinite(cercanos[1])
+    print("✅ Muestreo bilineal correcto")
+
+def test_perfil_longitudinal():
+    """Perfil a lo largo de un eje quebrado con la pendiente del plano"""
+    print("🔍 Probando perfil longitudinal...")
+    mdt = mdt_funcion(plano)
+    eje = np.array([[10.0, 40.0], [60.0, 40.0], [60.0, 70.0]])
+    perfil = extraer_perfil_longitudinal(mdt, eje, intervalo_m=2.0)
+    assert perfil["longitud_m"] == 80.0 and perfil["progresiva"][-1] == 80.0
+    assert np.allclose(perfil["z"], plano(perfil["x"], perfil["y"]))
+    assert np.allclose(perfil["pendiente_pct"][:20], -3.0)
+    assert np.allclose(perfil["pendiente_pct"][-10:], 1.0)
+    print("✅ Perfil longitudinal correcto")
+
+def test_secciones_transversales():
+    """Secciones perpendiculares a un eje oblicuo sobre una calle en V"""
+    print("🔍 Probando secciones transversales...")
+    direccion = np.array([0.8, 0.6])
+    normal = np.array([-0.6, 0.8])
+    origen = np.array([10.0, 10.0])
+
+    def calle(X, Y):
+        lateral = (X - origen[0]) * normal[0] + (Y - origen[1]) * normal[1]
+        return 3850 + 0.02 * np.abs(lateral) + 0.1 * lateral
+    mdt = mdt_funcion(calle)
+    eje = np.array([origen, origen + 80 * direccion])
+    secciones = extraer_secciones(mdt, eje, intervalo_m=5.0, semiancho_m=6.0, paso_m=0.5)
+    chico = extraer_secciones(mdt, eje, intervalo_m=5.0, semiancho_m=6.0, paso_m=0.5, bloque=3)
+    assert secciones["z"].shape == (17, 25)
+    assert np.allclose(secciones["z"], chico["z"])
+    d = secciones["desplazamiento"]
+    esperado = 3850 + 0.02 * np.abs(d) + 0.1 * d
+    interior = np.isfinite(secciones["z"]).all(axis=1)
+    assert interior.sum() >= 14
+    assert np.allclose(secciones["z"][interior], esperado, atol=0.01)
+    pendientes = pendientes_transversales(secciones)[interior]
+    assert np.allclose(pendientes[:, :11], 8.0, atol=0.1) and np.allclose(pendientes[:, 13:], 12.0, atol=0.1)
+    print("✅ Secciones transversales correctas")
+
+def test_geometria_hec_ras():
+    """Secciones listadas aguas abajo con estaciones de río decrecientes"""
+    print("🔍 Probando geometría HEC-RAS...")
+    mdt = mdt_funcion(lambda X, Y: 3850 - 0.02 * X + 0.03 * np.abs(Y - 40))
+    for eje in (np.array([[5.0, 40.0], [105.0, 40.0]]), np.array([[105.0, 40.0], [5.0, 40.0]])):
+        secciones = extraer_secciones(mdt, eje, intervalo_m=25.0, semiancho_m=5.0, paso_m=1.0)
+        texto = geometria_hec_ras(secciones, orillas_m=(-3.0, 3.0))
+        lineas = texto.splitlines()
+        cabeceras = [linea for linea in lineas if linea.startswith("Type RM")]
+        estaciones_rio = [float(linea.split(",")[1]) for linea in cabeceras]
+        assert len(cabeceras) == 5
+        assert estaciones_rio == sorted(estaciones_rio, reverse=True)
+        primera = lineas.index(cabeceras[0])
+        assert lineas[primera + 1].strip() == "#Sta/Elev= 11"
+        cotas = np.array(" ".join(lineas[primera + 2:primera + 5]).split(), dtype=float)[1::2]
+        assert abs(cotas[0] - cotas[-1]) < 1e-6 and cotas.argmin() == 5
+        assert abs(cotas[0] - 3850.05) < 1e-6
+        assert "Bank Sta=2.00,8.00" in lineas
+    print("✅ Geometría HEC-RAS correcta")
+
+def main():
+    """Función principal de pruebas"""
+    print("🧪 TEST SECCIONES Y PERFILES")
+    print("=" * 50)
+    test_bilineal_en_plano()
+    test_perfil_longitudinal()
+    test_secciones_transversales()
+    test_geometria_hec_ras()
+    print("\n🎉 ¡Todas las pruebas de secciones pasaron!")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+TEST SERIES SATELITALES
+=======================
+
+Verifica el sustituto local de la API 'ee', la ingesta por teselas y
+meses, y las consultas zonales servidas desde el almacén en disco
+"""
+
+import os
+import tempfile
+import numpy as np
+
+from MODULO_EE_LOCAL import EELocal, punto_en_poligono
+from MODULO_SERIES_SATELITALES import (AlmacenSeriesSatelitales, POLIGONO_SAN_MIGUEL,
+                                       datos_suelo_desde_series)
+
+CAJA = (-70.135, -15.245, -70.112, -15.224)
+
+def test_sustituto_ee():
+    """La cadena de llamadas de la API real funciona y es reproducible"""
+    print("🔍 Probando sustituto local de Earth Engine...")
+    ee = EELocal()
+    assert ee.Initialize()
+    punto = ee.Geometry.Point([-70.1234, -15.2345])
+    todas = ee.ImageCollection('COPERNICUS/S2_SR').filterDate('2023-01-01', '2024-01-01').filterBounds(punto)
+    despejadas = todas.filter(ee.Filter.lt('CLOUDY_PIXEL_PERCENTAGE', 20))
+    assert todas.size().getInfo() == 73 and 0 < despejadas.size().getInfo() < 73
+    ndvi = despejadas.median().normalizedDifference(['B8', 'B4']).rename('NDVI')
+    valor = ndvi.reduceRegion(ee.Reducer.mean(), punto, 30).get('NDVI').getInfo()
+    assert 0 < valor < 1
+    assert valor == EELocal().ImageCollection('COPERNICUS/S2_SR').filterDate('2023-01-01', '2024-01-01') \
+        .filter(ee.Filter.lt('CLOUDY_PIXEL_PERCENTAGE', 20)).median() \
+        .normalizedDifference(['B8', 'B4']).reduceRegion(ee.Reducer.mean(), punto, 30).get('nd').getInfo()
+
+    imagen = ee.ImageCollection('UCSB-CHG/CHIRPS/DAILY').filterDate('2023-02-01', '2023-02-02').first()
+    pixeles = ee.data.computePixels({"expression": imagen, "fileFormat": "NUMPY_NDARRAY", "grid": {
+        "dimensions": {"width": 4, "height": 3},
+        "affineTransform": {"scaleX": 0.05, "shearX": 0, "translateX": -70.2,
+                            "shearY": 0, "scaleY": -0.05, "translateY": -15.2}}})
+    assert pixeles.shape == (3, 4) and pixeles.dtype.names == ("precipitation",)
+    assert (pixeles["precipitation"] >= 0).all()
+    cuadrado = np.array([(0, 0), (2, 0), (2, 2), (0, 2)])
+    assert punto_en_poligono(np.array([1, 3, 1.5]), np.array([1, 1, 1.9]), cuadrado).tolist() == [True, False, True]
+    print("✅ Sustituto local correcto")
+
+def test_ingesta_y_consulta_zonal():
+    """La media zonal del almacén coincide con el cálculo directo sobre la API"""
+    print("🔍 Probando ingesta y consulta zonal...")
+    ee = EELocal()
+    with tempfile.TemporaryDirectory() as carpeta:
+        almacen = AlmacenSeriesSatelitales(carpeta)
+        ingesta = almacen.ingerir(ee, "temperatura", CAJA, "2023-01-01", "2023-03-01")
+        assert ingesta["imagenes"] == 59 and ingesta["bloques"] == 2
+        assert os.path.isfile(os.path.join(carpeta, "temperatura", "indice.json"))
+        ingesta = almacen.ingerir(ee, "ndvi", CAJA, "2023-06-01", "2023-09-01")
+        assert ingesta["estado"].startswith("✅") and ingesta["teselas"] == 4
+
+        triangulo = [(-70.130, -15.240), (-70.117, -15.238), (-70.122, -15.226)]
+        consulta = AlmacenSeriesSatelitales(carpeta).consulta_zonal("ndvi", triangulo, "2023-07-01", "2023-07-31")
+        assert consulta["fechas"] and all(f.startswith("2023-07") for f in consulta["fechas"])
+
+        dia = consulta["fechas"][0]
+        resolucion = almacen.resolucion("ndvi")
+        columnas = np.arange(np.floor((-70.130 + 180) / resolucion), np.floor((-70.117 + 180) / resolucion) + 1)
+        filas = np.arange(np.floor((90 + 15.226) / resolucion), np.floor((90 + 15.240) / resolucion) + 1)
+        lon, lat = np.meshgrid(-180 + (columnas + 0.5) * resolucion, 90 - (filas + 0.5) * resolucion)
+        dentro = punto_en_poligono(lon, lat, np.array(triangulo))
+        imagen = ee.ImageCollection('COPERNICUS/S2_SR').filterDate(dia, "2023-08-01").first() \
+            .normalizedDifference(['B8', 'B4'])
+        esperado = imagen.evaluar(lon[dentro], lat[dentro])["nd"].astype(np.float32)
+        assert consulta["pixeles"][0] == esperado.size
+        assert abs(consulta["media"][0] - float(esperado.mean())) < 1e-4
+        assert consulta["minimo"][0] <= consulta["media"][0] <= consulta["maximo"][0]
+    print("✅ Ingesta y consulta zonal correctas")
+
+def test_reingesta_puntos_y_vacios():
+    """Reingestar no duplica fechas; puntos usan su píxel; rangos vacíos avisan"""
+    print("🔍 Probando reingesta, puntos y rangos vacíos...")
+    ee = EELocal()
+    with tempfile.TemporaryDirectory() as carpeta:
+        almacen = AlmacenSeriesSatelitales(carpeta)
+        almacen.ingerir(ee, "precipitacion", CAJA, "2023-01-10", "2023-01-20")
+        almacen.ingerir(ee, "precipitacion", CAJA, "2023-01-01", "2023-01-15")
+        fechas = almacen.fechas_disponibles("precipitacion")
+        assert len(fechas) == len(set(fechas)) == 19
+        assert fechas[0] == "2023-01-01" and fechas[-1] == "2023-01-19"
+        bloques = os.listdir(os.path.join(carpeta, "precipitacion", next(iter(
+            almacen.indice("precipitacion")["bloques"]))))
+        assert len(bloques) == 1
+
+        punto = almacen.serie_punto("precipitacion", -70.1234, -15.2345)
+        poligono = almacen.consulta_zonal("precipitacion", POLIGONO_SAN_MIGUEL)
+        assert punto["pixeles"] == [1] * 19 and punto["media"] == poligono["media"]
+        assert punto["resumen"]["acumulado_periodo"] >= 0
+        vacio = almacen.consulta_zonal("precipitacion", POLIGONO_SAN_MIGUEL, "2024-01-01", "2024-02-01")
+        assert vacio["fechas"] == [] and vacio["estado"].startswith("⚠️")
+    print("✅ Reingesta, puntos y rangos vacíos correctos")
+
+def test_resumen_suelo_y_rapidez():
+    """Resumen anual en el formato del módulo GEE, consultas en milisegundos"""
+    print("🔍 Probando resumen de suelo y tiempos de consulta...")
+    with tempfile.TemporaryDirectory() as carpeta:
+        almacen = AlmacenSeriesSatelitales(carpeta)
+        almacen.ingerir_variables(EELocal(), CAJA, "2023-01-01", "2024-01-01")
+        datos = datos_suelo_desde_series(almacen, POLIGONO_SAN_MIGUEL, "2023-01-01", "2023-12-31")
+        assert datos["estado"].startswith("✅")
+        assert 0 < datos["NDVI_minimo"] <= datos["NDVI_promedio"] <= datos["NDVI_maximo"] < 1
+        assert 300 < datos["Precipitacion_anual"] < 1500 and 0 < datos["Temperatura_promedio"] < 20
+        assert datos == datos_suelo_desde_series(AlmacenSeriesSatelitales(carpeta), POLIGONO_SAN_MIGUEL,
+                                                 "2023-01-01", "2023-12-31")
+        almacen.consulta_zonal("ndvi", POLIGONO_SAN_MIGUEL)
+        consulta = almacen.consulta_zonal("temperatura", POLIGONO_SAN_MIGUEL, "2023-01-01", "2023-12-31")
+        assert len(consulta["fechas"]) == 365 and consulta["tiempo_ms"] < 100
+        assert almacen.consulta_zonal("ndvi", POLIGONO_SAN_MIGUEL)["tiempo_ms"] < 100
+        incompleto = datos_suelo_desde_series(AlmacenSeriesSatelitales(os.path.join(carpeta, "otro")),
+                                              POLIGONO_SAN_MIGUEL, "2023-01-01", "2023-12-31")
+        assert "error" in incompleto
+    print("✅ Resumen de suelo y tiempos correctos")
+
+def main():
+    """Función principal de pruebas"""
+    print("🧪 TEST SERIES SATELITALES")
+    print("=" * 50)
+    test_sustituto_ee()
+    test_ingesta_y_consulta_zonal()
+    test_reingesta_puntos_y_vacios()
+    test_resumen_suelo_y_rapidez()
+    print("\n🎉 ¡Todas las pruebas de series satelitales pasaron!")
+
+if __name__ == "__main__":
+    main()
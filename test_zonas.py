@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""
+TEST ZONAS CRÍTICAS (COMPONENTES CONEXAS)
+=========================================
+
+Verifica la delimitación de zonas contiguas, sus polígonos de contorno y
+la exportación a GeoJSON/DXF
+"""
+
+import json
+import os
+import tempfile
+import numpy as np
+from scipy import ndimage
+
+from MODULO_ZONAS import delimitar_zonas, exportar_zonas_dxf, exportar_zonas_geojson
+from MODULO_LIDAR_DRONES import detectar_zonas_inestables
+
+def mdt_grilla(ny: int, nx: int, resolucion: float = 0.5, x0: float = 1000.0, y0: float = 8000.0,
+               Z: np.ndarray = None):
+    """MDT con centros de celda desde (x0, y0)"""
+    X, Y = np.meshgrid(x0 + np.arange(nx) * resolucion, y0 + np.arange(ny) * resolucion)
+    return {'X_grid': X, 'Y_grid': Y, 'Z_grid': np.zeros((ny, nx)) if Z is None else Z,
+            'resolution': resolucion}
+
+def area_poligono(anillo) -> float:
+    """Área con signo de un anillo cerrado"""
+    x, y = np.array(anillo).T
+    return 0.5 * float(np.dot(x, np.roll(y, -1)) - np.dot(y, np.roll(x, -1)))
+
+def test_zona_con_hueco():
+    """Un cuadrado y un marco con hueco: área, centroide, caja y anillos"""
+    print("🔍 Probando zonas con contorno y hueco...")
+    mdt = mdt_grilla(100, 120)
+    mascara = np.zeros((100, 120), dtype=bool)
+    mascara[10:20, 10:20] = True
+    mascara[40:80, 50:100] = True
+    mascara[50:70, 60:90] = False
+    valor = np.where(mascara, np.arange(120)[np.newaxis, :] * 1.0, 0.0)
+    zonas = delimitar_zonas(mdt, {"Pendiente_excesiva": mascara}, {"Pendiente_excesiva": valor})
+    assert [zona["id"] for zona in zonas] == [1, 2]
+    marco, cuadrado = zonas
+    assert marco["celdas"] == 2000 - 600 and marco["area_m2"] == 350.0
+    assert cuadrado["area_m2"] == 25.0
+    assert cuadrado["centroide"] == (1000 + 14.5 * 0.5, 8000 + 14.5 * 0.5)
+    assert cuadrado["bbox"] == (1004.75, 8004.75, 1009.75, 8009.75)
+    assert (marco["valor_min"], marco["valor_max"]) == (50, 99)
+    exterior, hueco = marco["poligono"]
+    assert len(exterior) == 9 and len(hueco) == 9
+    assert area_poligono(exterior) > 0 > area_poligono(hueco)
+    assert abs(area_poligono(exterior) + area_poligono(hueco) - 350.0) < 0.5
+    x, y = np.array(exterior).T
+    assert (x.min(), y.min(), x.max(), y.max()) == marco["bbox"]
+    assert len(delimitar_zonas(mdt, {"x": mascara}, area_minima_m2=30.0)) == 1
+    print("✅ Zonas con contorno correctas")
+
+def test_escala_y_teselas():
+    """Manchas aleatorias: el etiquetado por teselas coincide con el global"""
+    print("🔍 Probando etiquetado por teselas frente a SciPy...")
+    rng = np.random.default_rng(3)
+    mascara = ndimage.uniform_filter(rng.normal(0, 1, (1500, 1500)), 9) > 0.12
+    etiquetas, cuenta = ndimage.label(mascara, structure=np.ones((3, 3)))
+    referencia = np.sort(np.bincount(etiquetas.ravel())[1:])
+    mdt = mdt_grilla(1500, 1500)
+    for tesela in (100, 333):
+        zonas = delimitar_zonas(mdt, {"Curvatura_alta": mascara}, tesela=tesela, poligonos=False)
+        assert len(zonas) == cuenta
+        assert np.array_equal(np.sort([zona["celdas"] for zona in zonas]), referencia)
+        assert "poligono" not in zonas[0]
+    print("✅ Etiquetado por teselas correcto")
+
+def test_zonas_inestables_mdt():
+    """Una depresión (borde convexo anular) y un talud se listan como zonas individuales"""
+    print("🔍 Probando detección de zonas inestables...")
+    X, Y = np.meshgrid(np.arange(200.0), np.arange(150.0))
+    Z = 3850 - 6.0 * np.exp(-((X - 60) ** 2 + (Y - 70) ** 2) / 6 ** 2) + 0.4 * np.clip(X - 170, 0, None)
+    mdt = mdt_grilla(150, 200, 1.0, 0.0, 0.0, Z)
+    resultado = detectar_zonas_inestables(mdt)
+    assert resultado["Total_zonas"] == len(resultado["Zonas"]) > 0
+    por_tipo = {tipo: [z for z in resultado["Zonas"] if z["tipo"] == tipo]
+                for tipo in ("Pendiente_excesiva", "Curvatura_alta", "Zonas_hundimiento")}
+    assert sum(z["area_m2"] for z in por_tipo["Pendiente_excesiva"]) <= resultado["Pendiente_excesiva"]
+    hundimiento = por_tipo["Zonas_hundimiento"][0]
+    assert np.allclose(hundimiento["centroide"], (60, 70), atol=0.5)
+    assert hundimiento["valor_min"] < -0.05 and len(hundimiento["poligono"]) == 2
+    talud = max(por_tipo["Pendiente_excesiva"], key=lambda z: z["centroide"][0])
+    assert talud["bbox"][0] >= 168 and talud["valor_max"] >= 40
+    assert "Recomendación" in resultado
+    json.dumps(resultado["Zonas"])
+    print("✅ Zonas inestables delimitadas")
+
+def test_exportar_geojson_dxf():
+    """Polígonos cerrados en GeoJSON y polilíneas con etiqueta en DXF"""
+    print("🔍 Probando exportación de zonas...")
+    mascara = np.zeros((60, 60), dtype=bool)
+    mascara[5:25, 5:25] = True
+    mascara[10:15, 10:15] = False
+    mascara[40:50, 30:55] = True
+    zonas = delimitar_zonas(mdt_grilla(60, 60), {"Zonas hundimiento": mascara})
+    with tempfile.TemporaryDirectory() as carpeta:
+        ruta = exportar_zonas_geojson(zonas, os.path.join(carpeta, "zonas", "zonas.geojson"))
+        with open(ruta, encoding="utf-8") as f:
+            datos = json.load(f)
+        assert len(datos["features"]) == 2
+        geometria = datos["features"][0]["geometry"]
+        assert geometria["type"] == "Polygon" and len(geometria["coordinates"]) == 2
+        assert all(anillo[0] == anillo[-1] for anillo in geometria["coordinates"])
+        assert datos["features"][0]["properties"]["area_m2"] == 93.75
+        ruta = exportar_zonas_dxf(zonas, os.path.join(carpeta, "zonas.dxf"))
+        with open(ruta, encoding="utf-8") as f:
+            lineas = f.read().splitlines()
+        assert lineas.count("POLYLINE") == 3 and lineas.count("TEXT") == 2
+        assert "ZONA_ZONAS_HUNDIMIENTO" in lineas and "Z1 93.8 m2" in lineas
+        assert lineas[-1] == "EOF"
+    print("✅ Exportación de zonas correcta")
+
+def main():
+    """Función principal de pruebas"""
+    print("🧪 TEST ZONAS CRÍTICAS")
+    print("=" * 50)
+    test_zona_con_hueco()
+    test_escala_y_teselas()
+    test_zonas_inestables_mdt()
+    test_exportar_geojson_dxf()
+    print("\n🎉 ¡Todas las pruebas de zonas pasaron!")
+
+if __name__ == "__main__":
+    main()